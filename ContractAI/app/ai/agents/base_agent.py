@@ -11,9 +11,12 @@ from typing import Dict, Any, List, Optional, Union, Tuple
 import asyncio
 
 from app.services.cache_service import LLMResponseCache
-from app.monitoring.llm_metrics import LLMMetricsTracker
+from app.monitoring.llm_metrics import LLMMetricsTracker, record_usage
+from app.monitoring import prometheus
+from app.monitoring.tracing import start_span, traced, current_span
 from app.ai.llm_factory import LLMFactory, LLMNotAvailableError
 from app.ai.token_counter import count_tokens, count_messages_tokens
+from app.ai.cassette import get_cassette
 from app.config import get_llm_provider_settings
 
 logger = logging.getLogger(__name__)
@@ -53,6 +56,7 @@ class BaseAgent:
         self.metrics_tracker = metrics_tracker
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.cassette = get_cassette()
         self.provider = None
         self.model = None
         self.llm = None
@@ -78,6 +82,7 @@ class BaseAgent:
             logger.error(f"Failed to initialize {self.agent_name} agent: {str(e)}")
             raise
     
+    @traced("llm.call")
     async def _call_llm(
         self,
         prompt: str,
@@ -105,6 +110,14 @@ class BaseAgent:
         """
         if not self.initialized:
             await self.initialize()
+        
+        span = current_span()
+        span.set_attributes({
+            "llm.provider": self.provider,
+            "llm.model": self.model,
+            "llm.agent": self.agent_name,
+            "llm.operation": operation or "call_llm",
+        })
             
         # Prepare messages
         messages = []
@@ -138,8 +151,12 @@ class BaseAgent:
                 cache_data
             )
             
-            # Check cache
-            cached_response = await self.cache_service.get_with_key(cache_key)
+            # Check cache; a cassette sees every call, so it is bypassed
+            # while recording or replaying
+            cached_response = None
+            if not self.cassette.enabled:
+                cached_response = await self.cache_service.get_with_key(cache_key)
+                span.set_attribute("llm.cache_hit", bool(cached_response))
             if cached_response:
                 logger.info(f"Using cached response for {self.agent_name} agent")
                 
@@ -163,23 +180,38 @@ class BaseAgent:
         # Count tokens
         prompt_tokens = count_messages_tokens(messages, self.model)
         
-        # Call LLM with retries
         start_time = time.time()
         response = None
         error = None
+        replayed = False
+        
+        # Serve recorded responses when replaying a cassette
+        fingerprint = None
+        if self.cassette.enabled:
+            fingerprint = self.cassette.fingerprint(self.agent_name, operation, messages, params)
+            if self.cassette.mode == "replay":
+                response = await self.cassette.replay(fingerprint)
+                replayed = response is not None
+                span.set_attribute("llm.cassette_hit", replayed)
         
-        for attempt in range(self.max_retries):
+        # Call LLM with retries
+        for attempt in range(0 if replayed else self.max_retries):
+            span.set_attribute("llm.attempts", attempt + 1)
             try:
-                if self.provider == "openai":
-                    response = await self._call_openai(messages, params)
-                elif self.provider == "anthropic":
-                    response = await self._call_anthropic(messages, params)
-                elif self.provider == "cohere":
-                    response = await self._call_cohere(messages, params)
-                elif self.provider == "mistral":
-                    response = await self._call_mistral(messages, params)
-                else:
-                    raise ValueError(f"Unsupported provider: {self.provider}")
+                with start_span("llm.provider_call", {"llm.provider": self.provider, "llm.attempt": attempt + 1}):
+                    if self.provider == "openai":
+                        response = await self._call_openai(messages, params)
+                    elif self.provider == "anthropic":
+                        response = await self._call_anthropic(messages, params)
+                    elif self.provider == "cohere":
+                        response = await self._call_cohere(messages, params)
+                    elif self.provider == "mistral":
+                        response = await self._call_mistral(messages, params)
+                    elif self.provider == "simulated":
+                        # The simulated client mirrors the OpenAI interface
+                        response = await self._call_openai(messages, params)
+                    else:
+                        raise ValueError(f"Unsupported provider: {self.provider}")
                     
                 # Break if successful
                 break
@@ -199,6 +231,37 @@ class BaseAgent:
         if response:
             # Extract completion tokens
             completion_tokens = count_tokens(response["content"], self.model)
+            span.set_attributes({
+                "llm.prompt_tokens": prompt_tokens,
+                "llm.completion_tokens": completion_tokens,
+            })
+            
+            # Replayed responses were paid for and accounted when recorded
+            if replayed:
+                return response
+            
+            if self.cassette.mode == "record":
+                await self.cassette.record(
+                    fingerprint=fingerprint,
+                    agent_name=self.agent_name,
+                    operation=operation,
+                    provider=self.provider,
+                    model=self.model,
+                    response=response,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    latency_ms=latency_ms
+                )
+            
+            prometheus.record_llm_call(
+                provider=self.provider,
+                agent=self.agent_name,
+                operation=operation,
+                seconds=latency_ms / 1000,
+                success=True,
+                input_tokens=prompt_tokens,
+                output_tokens=completion_tokens
+            )
             
             # Calculate cost
             cost = 0.0
@@ -231,6 +294,7 @@ class BaseAgent:
                 output_tokens=completion_tokens,
                 cost=cost
             )
+            record_usage(prompt_tokens, completion_tokens, cost)
             
             # Cache response if enabled
             if use_cache and cache_key:
@@ -242,6 +306,15 @@ class BaseAgent:
                 
             return response
         else:
+            prometheus.record_llm_call(
+                provider=self.provider,
+                agent=self.agent_name,
+                operation=operation,
+                seconds=latency_ms / 1000,
+                success=False,
+                input_tokens=prompt_tokens
+            )
+            
             # Record failed call
             if operation:
                 await self.metrics_tracker.record_llm_call(
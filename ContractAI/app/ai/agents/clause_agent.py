@@ -85,7 +85,7 @@ class ClauseDetectionAgent(BaseAgent):
         """
         # Use default clause types if none specified
         if not clause_types:
-            clause_types = self.STANDARD_CLAUSE_TYPES
+            clause_types = STANDARD_CLAUSE_TYPES
         
         # Create prompt for clause detection
         base_prompt = self._create_clause_detection_prompt(contract_text, clause_types)
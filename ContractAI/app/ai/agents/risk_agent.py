@@ -88,7 +88,7 @@ class RiskAnalysisAgent(BaseAgent):
         """
         # Use default risk categories if none specified
         if not risk_categories:
-            risk_categories = self.RISK_CATEGORIES
+            risk_categories = RISK_CATEGORIES
         
         # Create prompt for risk analysis
         base_prompt = self._create_risk_analysis_prompt(
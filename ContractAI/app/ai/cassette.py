@@ -0,0 +1,300 @@
+"""
+LLM call cassettes for ContractAI.
+
+This module records provider responses from BaseAgent._call_llm and replays
+them later. In record mode every live response is stored with a fingerprint of
+the request, its token counts and the observed latency. In replay mode a
+request with a recorded fingerprint is answered from the cassette without
+calling the provider, optionally after waiting the recorded latency. Pipeline
+changes can then be benchmarked offline against recorded production traffic.
+
+Cassettes are gzip-compressed JSON lines files in LLM_CASSETTE_DIR, one file
+per recording process. Prompts themselves are not stored, only their SHA-256
+fingerprint.
+"""
+
+import os
+import json
+import gzip
+import time
+import atexit
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+# Records buffered before a gzip member is appended to the cassette file
+RECORD_BUFFER_SIZE = 50
+
+
+class CassetteMissError(Exception):
+    """Exception raised in strict replay mode when a request was never recorded."""
+    pass
+
+
+class LLMCassette:
+    """
+    Records and replays LLM responses keyed by request fingerprint.
+
+    Replay is deterministic: when a fingerprint was recorded several times,
+    its responses are served in recorded order and then repeat.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        directory: str = "cassettes",
+        replay_latency_scale: float = 0.0,
+        strict: bool = False
+    ):
+        """
+        Initialize the cassette.
+
+        Args:
+            mode: 'off', 'record' or 'replay'
+            directory: Directory holding cassette files
+            replay_latency_scale: Multiplier for recorded latency in replay mode (0 = no delay)
+            strict: Whether a replay miss raises instead of calling the provider
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+
+        self.mode = mode
+        self.directory = directory
+        self.replay_latency_scale = replay_latency_scale
+        self.strict = strict
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer: List[str] = []
+        self._path: Optional[str] = None
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+        if mode == "record":
+            os.makedirs(directory, exist_ok=True)
+            self._path = os.path.join(directory, f"{int(time.time())}-{os.getpid()}.jsonl.gz")
+            atexit.register(self.close)
+            logger.info(f"Recording LLM calls to {self._path}")
+        elif mode == "replay":
+            self._load()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether the cassette records or replays."""
+        return self.mode != "off"
+
+    @staticmethod
+    def fingerprint(
+        agent_name: str,
+        operation: Optional[str],
+        messages: List[Dict[str, str]],
+        params: Dict[str, Any]
+    ) -> str:
+        """
+        Compute the fingerprint of an LLM request.
+
+        The provider and model are left out so traffic recorded on one
+        provider can be replayed under a different configuration.
+
+        Args:
+            agent_name: Name of the calling agent
+            operation: Operation name
+            messages: Chat messages
+            params: Sampling parameters
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        payload = json.dumps(
+            {"agent": agent_name, "operation": operation, "messages": messages, "params": params},
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    async def record(
+        self,
+        fingerprint: str,
+        agent_name: str,
+        operation: Optional[str],
+        provider: str,
+        model: str,
+        response: Dict[str, Any],
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float
+    ) -> None:
+        """
+        Record a live provider response.
+
+        Full buffers are compressed and appended in the default executor so
+        the event loop is not blocked.
+
+        Args:
+            fingerprint: Request fingerprint
+            agent_name: Name of the calling agent
+            operation: Operation name
+            provider: Provider that served the request
+            model: Model that served the request
+            response: Response dictionary returned by the provider call
+            prompt_tokens: Number of prompt tokens
+            completion_tokens: Number of completion tokens
+            latency_ms: Observed latency including retries
+        """
+        if self.mode != "record":
+            return
+
+        line = json.dumps({
+            "fingerprint": fingerprint,
+            "agent": agent_name,
+            "operation": operation,
+            "provider": provider,
+            "model": model,
+            "response": response,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "latency_ms": latency_ms,
+            "recorded_at": time.time()
+        }, separators=(",", ":"))
+
+        with self._lock:
+            self._buffer.append(line)
+            self.recorded += 1
+            if len(self._buffer) < RECORD_BUFFER_SIZE:
+                return
+            lines, self._buffer = self._buffer, []
+
+        await asyncio.get_running_loop().run_in_executor(None, self._write_lines, lines)
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the next recorded entry for a fingerprint.
+
+        Args:
+            fingerprint: Request fingerprint
+
+        Returns:
+            Recorded entry, or None on a miss
+
+        Raises:
+            CassetteMissError: On a miss in strict mode
+        """
+        entries = self._entries.get(fingerprint)
+        if not entries:
+            self.misses += 1
+            if self.strict:
+                raise CassetteMissError(f"No recorded response for request {fingerprint[:12]}")
+            return None
+
+        position = self._positions.get(fingerprint, 0)
+        self._positions[fingerprint] = position + 1
+        self.hits += 1
+        return entries[position % len(entries)]
+
+    async def replay(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Serve a recorded response, waiting the scaled recorded latency.
+
+        Args:
+            fingerprint: Request fingerprint
+
+        Returns:
+            Recorded response dictionary, or None on a miss
+        """
+        entry = self.lookup(fingerprint)
+        if entry is None:
+            return None
+
+        if self.replay_latency_scale > 0:
+            await asyncio.sleep(entry["latency_ms"] * self.replay_latency_scale / 1000)
+        return entry["response"]
+
+    def close(self) -> None:
+        """Write buffered records to disk."""
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+        self._write_lines(lines)
+
+    def _write_lines(self, lines: List[str]) -> None:
+        """Append records to the cassette file as one gzip member."""
+        if not lines or self._path is None:
+            return
+        with self._write_lock:
+            try:
+                with gzip.open(self._path, "ab") as f:
+                    f.write(("\n".join(lines) + "\n").encode("utf-8"))
+            except Exception as e:
+                logger.warning(f"Error writing LLM cassette: {str(e)}")
+
+    def _load(self) -> None:
+        """Load every cassette file in the directory, oldest first."""
+        if not os.path.isdir(self.directory):
+            logger.warning(f"LLM cassette directory {self.directory} does not exist; nothing to replay")
+            return
+
+        count = 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".jsonl.gz"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        entry = json.loads(line)
+                        self._entries.setdefault(entry["fingerprint"], []).append(entry)
+                        count += 1
+            except (OSError, EOFError, ValueError) as e:
+                # A file cut short by a crash still yields its complete members
+                logger.warning(f"Error reading LLM cassette {path}: {str(e)}")
+
+        logger.info(f"Loaded {count} recorded LLM calls ({len(self._entries)} distinct requests)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get cassette statistics.
+
+        Returns:
+            Dictionary with mode and hit, miss and record counts
+        """
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "distinct_requests": len(self._entries)
+        }
+
+
+_cassette: Optional[LLMCassette] = None
+
+
+def get_cassette() -> LLMCassette:
+    """
+    Get the process-wide cassette configured from settings.
+
+    Returns:
+        LLM cassette
+    """
+    global _cassette
+
+    if _cassette is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _cassette = LLMCassette(
+            mode=settings.LLM_CASSETTE_MODE,
+            directory=settings.LLM_CASSETTE_DIR,
+            replay_latency_scale=settings.LLM_CASSETTE_REPLAY_LATENCY_SCALE,
+            strict=settings.LLM_CASSETTE_STRICT
+        )
+    return _cassette
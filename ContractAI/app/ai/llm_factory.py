@@ -10,7 +10,7 @@ import asyncio
 from typing import Dict, Any, Optional, List, Tuple, Union
 from enum import Enum
 
-from app.config import get_llm_provider_settings, agent_llm_settings, get_enabled_llm_providers
+from app.config import get_settings, get_llm_provider_settings, agent_llm_settings, get_enabled_llm_providers
 from app.ai.token_counter import count_tokens, count_messages_tokens
 
 logger = logging.getLogger(__name__)
@@ -21,6 +21,7 @@ class LLMProvider(str, Enum):
     ANTHROPIC = "anthropic"
     COHERE = "cohere"
     MISTRAL = "mistral"
+    SIMULATED = "simulated"
 
 class LLMNotAvailableError(Exception):
     """Exception raised when an LLM is not available."""
@@ -86,6 +87,20 @@ class LLMFactory:
             logger.error(f"Failed to initialize {provider_name} client: {str(e)}")
             raise LLMNotAvailableError(f"Failed to initialize {provider_name} client: {str(e)}")
     
+    @classmethod
+    def set_client(cls, provider_name: str, client: Any) -> None:
+        """
+        Use a preconfigured client for a provider.
+        
+        Benchmarks use this to install a SimulatedLLMClient with a
+        specific configuration.
+        
+        Args:
+            provider_name: Name of the LLM provider
+            client: Client instance to return from get_llm
+        """
+        cls._instances[provider_name] = client
+    
     @classmethod
     async def get_agent_llm(cls, agent_name: str) -> Tuple[str, str, Any]:
         """
@@ -107,6 +122,12 @@ class LLMFactory:
         if agent_name not in agent_llm_settings:
             raise ValueError(f"No configuration found for agent '{agent_name}'")
             
+        # Route every agent to the simulated provider when enabled
+        if get_settings().LLM_SIMULATED:
+            provider_settings = get_llm_provider_settings()[LLMProvider.SIMULATED.value]
+            llm = await cls.get_llm(LLMProvider.SIMULATED.value)
+            return LLMProvider.SIMULATED.value, provider_settings.model_name, llm
+            
         agent_config = agent_llm_settings[agent_name]
         
         # Try primary provider first
@@ -193,6 +214,10 @@ class LLMFactory:
             await client.list_models()
             return client
             
+        elif provider_name == LLMProvider.SIMULATED.value:
+            from app.ai.simulated_provider import SimulatedLLMClient, SimulatedLLMConfig
+            return SimulatedLLMClient(SimulatedLLMConfig.from_settings())
+            
         else:
             raise ValueError(f"Unsupported LLM provider: {provider_name}")
     
@@ -1,19 +1,55 @@
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, List, Any, Awaitable, Callable, Iterator, Optional
 from dataclasses import dataclass
 import numpy as np
 
 from app.ai.agents.clause_agent import ClauseDetectionAgent
 from app.ai.agents.risk_agent import RiskAnalysisAgent
-from app.ai.agents.comparison_agent import ComparisonAgent
 from app.ai.agents.recommendation_agent import RecommendationAgent
 from app.services.service_factory import ServiceFactory
+from app.monitoring.prometheus import stage_timer
+from app.monitoring.tracing import start_span, traced, current_span
 from app.config import get_settings
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Map risk severities reported by the risk agent to summary risk levels
+SEVERITY_RISK_LEVELS = {
+    "critical": "high",
+    "high": "high",
+    "medium": "medium",
+    "low": "low",
+    "negligible": "low"
+}
+
+# Perspective used for clause recommendations
+DEFAULT_PERSPECTIVE = "client"
+
+# Upper bounds on per-document LLM fan-out for comparisons and recommendations
+MAX_CLAUSE_COMPARISONS = 10
+MAX_RECOMMENDATIONS = 10
+
+# Receives a stage name and stage details as processing advances
+ProgressCallback = Callable[..., Awaitable[None]]
+
+
+@contextmanager
+def pipeline_stage(stage: str) -> Iterator[Any]:
+    """
+    Time a processing stage in Prometheus and trace it as a span.
+    
+    Args:
+        stage: Stage name
+        
+    Yields:
+        The stage span
+    """
+    with stage_timer(stage), start_span(f"orchestrator.{stage}") as span:
+        yield span
+
 
 @dataclass
 class DocumentSection:
@@ -65,7 +101,7 @@ class DocumentChunker:
                 if break_pos == -1:
                     # Fall back to word break
                     break_pos = text.rfind(' ', current_pos, end_pos)
-                if break_pos != -1:
+                if break_pos > current_pos:
                     end_pos = break_pos
             
             # Create section
@@ -76,8 +112,12 @@ class DocumentChunker:
             )
             sections.append(section)
             
-            # Move position for next section, including overlap
-            current_pos = max(current_pos, end_pos - self.overlap)
+            if end_pos >= len(text):
+                break
+            
+            # Move position for next section, including overlap, but always forward
+            next_pos = end_pos - self.overlap
+            current_pos = next_pos if next_pos > current_pos else end_pos
         
         return sections
 
@@ -156,8 +196,8 @@ class ClauseMerger:
         length1 = pos1["end_char"] - pos1["start_char"]
         length2 = pos2["end_char"] - pos2["start_char"]
         
-        overlap_ratio1 = overlap_length / length1
-        overlap_ratio2 = overlap_length / length2
+        overlap_ratio1 = overlap_length / max(length1, 1)
+        overlap_ratio2 = overlap_length / max(length2, 1)
         
         return max(overlap_ratio1, overlap_ratio2) > overlap_threshold
 
@@ -199,17 +239,25 @@ class AgentOrchestrator:
             logger.error(f"Error initializing AgentOrchestrator: {e}")
             raise
     
-    async def process_document(self, document_text: str) -> Dict[str, Any]:
+    @traced("orchestrator.process_document")
+    async def process_document(
+        self,
+        document_text: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> Dict[str, Any]:
         """
         Process a document using parallel agent coordination.
         
         Args:
             document_text: Text content of the document
+            progress: Optional coroutine function called as progress(stage, **details)
+                after each stage; errors it raises are logged and ignored
             
         Returns:
             Analysis results including clauses, risks, comparisons, and recommendations
         """
         logger.info("Starting parallel document processing")
+        current_span().set_attribute("document.length", len(document_text))
         
         # Ensure agents are initialized
         if not self.initialized:
@@ -217,40 +265,59 @@ class AgentOrchestrator:
         
         try:
             # Split document into sections
-            sections = self.chunker.split_by_semantic_sections(document_text)
+            with pipeline_stage("chunking") as span:
+                sections = self.chunker.split_by_semantic_sections(document_text)
+                span.set_attribute("document.sections", len(sections))
             logger.info(f"Split document into {len(sections)} sections")
+            await self._report(progress, "sections", total=len(sections))
             
             # Process sections in parallel with clause detection
-            clause_tasks = [
-                self.clause_agent.detect_clauses(section.text)
-                for section in sections
-            ]
-            section_results = await asyncio.gather(*clause_tasks)
+            completed = 0
+            
+            async def detect_clauses(section: DocumentSection) -> Dict[str, Any]:
+                nonlocal completed
+                result = await self.clause_agent.detect_clauses(section.text)
+                completed += 1
+                await self._report(progress, "clauses", completed=completed, total=len(sections))
+                return result
+            
+            with pipeline_stage("clause_detection"):
+                section_results = await asyncio.gather(*(detect_clauses(section) for section in sections))
             
             # Merge clause results
-            clauses = self.merger.merge_with_context(section_results, sections)
+            with pipeline_stage("clause_merge"):
+                section_clauses = [
+                    self._locate_clauses(result, section)
+                    for result, section in zip(section_results, sections)
+                ]
+                clauses = self.merger.merge_with_context(section_clauses, sections)
             logger.info(f"Detected and merged {len(clauses)} clauses")
             
             # Process risks and comparisons in parallel
-            risk_task = self.risk_agent.analyze_risks(clauses)
-            comparison_task = self.comparison_agent.compare_clauses(clauses)
+            risk_task = self._analyze_risks(clauses)
+            comparison_task = self._compare_clauses(clauses)
             
-            risks, comparisons = await asyncio.gather(risk_task, comparison_task)
+            with pipeline_stage("risk_and_comparison"):
+                risks, comparisons = await asyncio.gather(risk_task, comparison_task)
             logger.info(f"Analyzed {len(risks)} risks and {len(comparisons)} comparisons")
+            await self._report(progress, "risks", clauses=len(clauses), risks=len(risks))
             
             # Generate recommendations
-            recommendations = await self.recommendation_agent.generate_recommendations(
-                risks, comparisons
-            )
+            with pipeline_stage("recommendations"):
+                recommendations = await self._generate_recommendations(risks)
             logger.info(f"Generated {len(recommendations)} recommendations")
+            await self._report(progress, "recommendations", recommendations=len(recommendations))
             
             # Prepare analysis results
+            with pipeline_stage("summary"):
+                summary = self._generate_summary(clauses, risks, recommendations)
+            
             results = {
                 "clauses": clauses,
                 "risks": risks,
                 "comparisons": comparisons,
                 "recommendations": recommendations,
-                "summary": self._generate_summary(clauses, risks, recommendations)
+                "summary": summary
             }
             
             return results
@@ -259,6 +326,151 @@ class AgentOrchestrator:
             logger.error(f"Error in parallel document processing: {e}")
             raise
     
+    async def _report(self, progress: Optional[ProgressCallback], stage: str, **details: Any) -> None:
+        """Report a finished stage to the progress callback, if any."""
+        if progress is None:
+            return
+        try:
+            await progress(stage, **details)
+        except Exception as e:
+            logger.warning(f"Error reporting {stage} progress: {str(e)}")
+    
+    def _locate_clauses(self, result: Dict[str, Any], section: DocumentSection) -> List[Dict[str, Any]]:
+        """
+        Attach section-relative positions to clauses detected in a section.
+        
+        Args:
+            result: Clause detection result for the section
+            section: The section the clauses were detected in
+            
+        Returns:
+            Clauses with position and confidence fields
+        """
+        located = []
+        for clause in result.get("clauses", []):
+            text = clause.get("text") or ""
+            start = section.text.find(text) if text else -1
+            
+            if start >= 0:
+                position = {"start_char": start, "end_char": start + len(text)}
+                confidence = 1.0
+            else:
+                # Paraphrased text; attribute the clause to the whole section
+                position = {"start_char": 0, "end_char": len(section.text)}
+                confidence = 0.5
+            
+            located.append({
+                **clause,
+                "position": position,
+                "confidence": float(clause.get("confidence", confidence))
+            })
+        return located
+    
+    async def _analyze_risks(self, clauses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Analyze risks across the detected clauses.
+        
+        Clauses are grouped into batches no longer than a chunker section so
+        each risk analysis prompt stays within the same size bounds as
+        clause detection.
+        
+        Args:
+            clauses: Merged clauses
+            
+        Returns:
+            Risks with a normalized risk_level
+        """
+        batches = []
+        current: List[str] = []
+        current_length = 0
+        for clause in clauses:
+            text = clause.get("text") or ""
+            if current and current_length + len(text) > self.chunker.max_section_length:
+                batches.append("\n\n".join(current))
+                current, current_length = [], 0
+            current.append(text)
+            current_length += len(text) + 2
+        if current:
+            batches.append("\n\n".join(current))
+        
+        results = await asyncio.gather(*(
+            self.risk_agent.analyze_contract_risks(batch) for batch in batches
+        ))
+        
+        risks = []
+        for result in results:
+            for risk in result.get("risk_analysis", []):
+                severity = str(risk.get("severity", "")).lower()
+                risks.append({**risk, "risk_level": SEVERITY_RISK_LEVELS.get(severity, "medium")})
+        return risks
+    
+    async def _compare_clauses(self, clauses: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Compare clauses of the same type that appear more than once.
+        
+        Repeated clauses (e.g., a second termination clause in a schedule)
+        are a common source of conflicting terms in long contracts.
+        
+        Args:
+            clauses: Merged clauses
+            
+        Returns:
+            Comparison results, one per compared pair
+        """
+        by_type: Dict[str, List[Dict[str, Any]]] = {}
+        for clause in clauses:
+            by_type.setdefault(clause.get("type", ""), []).append(clause)
+        
+        pairs = []
+        for clause_type, typed_clauses in by_type.items():
+            for first, second in zip(typed_clauses, typed_clauses[1:]):
+                pairs.append((clause_type, first, second))
+        pairs = pairs[:MAX_CLAUSE_COMPARISONS]
+        
+        results = await asyncio.gather(*(
+            self.clause_agent.compare_clauses(first["text"], second["text"], clause_type)
+            for clause_type, first, second in pairs
+        ))
+        
+        return [
+            {**result, "clause_type": clause_type}
+            for (clause_type, _, _), result in zip(pairs, results)
+        ]
+    
+    async def _generate_recommendations(self, risks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate recommendations for the clauses behind high risks.
+        
+        Args:
+            risks: Risks from _analyze_risks
+            
+        Returns:
+            Recommendations with priority and suggested_action fields
+        """
+        high_risks = [risk for risk in risks if risk["risk_level"] == "high"][:MAX_RECOMMENDATIONS]
+        
+        results = await asyncio.gather(*(
+            self.recommendation_agent.generate_clause_recommendations(
+                clause_text=risk.get("clause", ""),
+                clause_type=risk.get("category", "General"),
+                company_perspective=DEFAULT_PERSPECTIVE,
+                risk_analysis=risk
+            )
+            for risk in high_risks
+        ))
+        
+        recommendations = []
+        for risk, result in zip(high_risks, results):
+            for item in result.get("improvement_recommendations", []):
+                recommendations.append({
+                    "risk_id": risk.get("risk_id"),
+                    "clause_type": result.get("clause_type") or risk.get("category"),
+                    "suggested_action": item.get("recommendation", ""),
+                    "rationale": item.get("rationale", ""),
+                    "priority": str(item.get("priority", "medium")).lower()
+                })
+        return recommendations
+    
     def _generate_summary(
         self,
         clauses: List[Dict[str, Any]],
@@ -1,10 +1,14 @@
 import logging
-from typing import Any, List
+from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db, User, Document, Analysis
 from app.models.user import UserResponse
 from app.core.security import get_current_active_superuser
+from app.core.principal_cache import PrincipalCache
+from app.services.search_service import remove_document as remove_from_search_index
+from app.services import stats_service
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -15,12 +19,12 @@ async def get_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get all users. Only accessible to superusers.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
+    users = (await db.scalars(select(User).offset(skip).limit(limit))).all()
     return users
 
 
@@ -28,12 +32,12 @@ async def get_users(
 async def get_user(
     user_id: int,
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get a specific user by ID. Only accessible to superusers.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -46,12 +50,12 @@ async def get_user(
 async def activate_user(
     user_id: int,
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Activate a user. Only accessible to superusers.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -60,8 +64,11 @@ async def activate_user(
     
     user.is_active = True
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    
+    # Cached principals would otherwise keep the old status until they expire
+    await PrincipalCache.invalidate(user.id)
     
     return user
 
@@ -70,7 +77,7 @@ async def activate_user(
 async def deactivate_user(
     user_id: int,
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Deactivate a user. Only accessible to superusers.
@@ -82,7 +89,7 @@ async def deactivate_user(
             detail="Cannot deactivate your own account",
         )
     
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -91,8 +98,11 @@ async def deactivate_user(
     
     user.is_active = False
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+    
+    # Cached principals would otherwise keep the old status until they expire
+    await PrincipalCache.invalidate(user.id)
     
     return user
 
@@ -100,98 +110,67 @@ async def deactivate_user(
 @router.get("/stats/documents", response_model=dict)
 async def get_document_stats(
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get statistics about documents. Only accessible to superusers.
-    """
-    total = db.query(Document).count()
-    
-    # Count by status
-    by_status = {}
-    statuses = ["uploaded", "processing", "processed", "error"]
-    for status in statuses:
-        count = db.query(Document).filter(Document.status == status).count()
-        by_status[status] = count
     
-    # Recent documents (last 7 days)
-    import datetime
-    seven_days_ago = datetime.datetime.now() - datetime.timedelta(days=7)
-    recent = db.query(Document).filter(Document.created_at >= seven_days_ago).count()
-    
-    return {
-        "total": total,
-        "by_status": by_status,
-        "recent": recent,
-    }
+    Read from counters maintained with every document change, so the cost
+    does not grow with the number of documents.
+    """
+    return await stats_service.get_document_stats(db)
 
 
 @router.get("/stats/users", response_model=dict)
 async def get_user_stats(
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get statistics about users. Only accessible to superusers.
-    """
-    total = db.query(User).count()
-    active = db.query(User).filter(User.is_active == True).count()
-    inactive = db.query(User).filter(User.is_active == False).count()
-    superusers = db.query(User).filter(User.is_superuser == True).count()
     
-    # Recent users (last 30 days)
-    import datetime
-    thirty_days_ago = datetime.datetime.now() - datetime.timedelta(days=30)
-    recent = db.query(User).filter(User.created_at >= thirty_days_ago).count()
-    
-    # Users by document count
-    from sqlalchemy import func
-    
-    user_doc_counts = db.query(
-        Document.owner_id, 
-        func.count(Document.id).label("doc_count")
-    ).group_by(Document.owner_id).all()
-    
-    # Categorize users by document count
-    users_by_doc_count = {
-        "0": db.query(User).filter(~User.id.in_([u[0] for u in user_doc_counts])).count(),
-        "1-5": 0,
-        "6-20": 0,
-        "21-100": 0,
-        "100+": 0,
-    }
-    
-    for owner_id, count in user_doc_counts:
-        if count <= 5:
-            users_by_doc_count["1-5"] += 1
-        elif count <= 20:
-            users_by_doc_count["6-20"] += 1
-        elif count <= 100:
-            users_by_doc_count["21-100"] += 1
-        else:
-            users_by_doc_count["100+"] += 1
-    
-    return {
-        "total": total,
-        "active": active,
-        "inactive": inactive,
-        "superusers": superusers,
-        "recent": recent,
-        "by_document_count": users_by_doc_count,
-    }
+    Read from counters; users by document count is as of the last
+    reconciliation.
+    """
+    return await stats_service.get_user_stats(db)
+
+
+@router.get("/stats/dedup", response_model=dict)
+async def get_dedup_stats(
+    days: Optional[int] = Query(None, ge=1, description="Only the last days days"),
+    current_user: User = Depends(get_current_active_superuser),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get how many analyses were reused from identical uploads and the LLM
+    spend that avoided. Only accessible to superusers.
+    """
+    return await stats_service.get_dedup_stats(db, days=days)
+
+
+@router.post("/stats/reconcile", response_model=dict)
+async def reconcile_stats(
+    current_user: User = Depends(get_current_active_superuser),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Recompute all statistics counters from the source tables. Only accessible to superusers.
+    """
+    counters = await stats_service.reconcile_counters(db)
+    return {"message": f"Reconciled {len(counters)} counters"}
 
 
 @router.post("/documents/{document_id}/reset", response_model=dict)
 async def reset_document_processing(
     document_id: int,
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Reset a document's processing status and remove analysis. Only accessible to superusers.
     """
     # Get document
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id)
     if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -204,10 +183,13 @@ async def reset_document_processing(
     db.add(document)
     
     # Remove analysis if exists
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+    analysis = await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
     if analysis:
-        db.delete(analysis)
+        await db.delete(analysis)
+    
+    # Remove search passages built from the analysis
+    await remove_from_search_index(db, document_id)
     
-    db.commit()
+    await db.commit()
     
     return {"message": f"Document {document_id} has been reset"}
\ No newline at end of file
@@ -1,39 +1,165 @@
 import logging
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from app.database import get_db, Document, User, Analysis
-from app.models.document import AnalysisResponse
-from app.models.analysis import BatchAnalysisRequest, BatchAnalysisResponse
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db, Document, User, Analysis, BatchJob, BatchItem
+from app.models.document import AnalysisResponse, DocumentListResponse
+from app.models.analysis import (
+    BatchAnalysisRequest,
+    BatchAnalysisResponse,
+    BatchStatusResponse,
+    BatchResultsResponse,
+    SearchResponse,
+)
 from app.core.security import get_current_user
-from app.services.document_service import process_document
-from app.core.utils import verify_document_access
-from app.core.errors import DocumentNotFoundError, AnalysisNotFoundError, AccessDeniedError
+from app.services.document_service import (
+    ANALYSIS_LIST_FIELDS,
+    AnalysisProjection,
+    get_analysis_projection,
+    analysis_filter_conditions,
+)
+from app.services.search_service import search_passages
+from app.services.batch_service import (
+    ITEM_STATUSES,
+    create_batch,
+    get_item_counts,
+    cancel_batch,
+    dispatch_items,
+)
+from app.core.utils import (
+    verify_document_access,
+    encode_cursor,
+    decode_cursor,
+    make_etag,
+    is_not_modified,
+    cache_headers,
+)
+from app.core.responses import FastJSONResponse, json_stream_response, ndjson_response, wants_ndjson
+from app.core.errors import DocumentNotFoundError, AnalysisNotFoundError, AccessDeniedError, BatchNotFoundError
+from app.config import get_settings
 
-router = APIRouter()
+settings = get_settings()
+router = APIRouter(default_response_class=FastJSONResponse)
 logger = logging.getLogger(__name__)
 
 
+@router.get("/portfolio", response_model=DocumentListResponse)
+async def query_portfolio(
+    clause_type: Optional[str] = Query(None, description="Documents with a clause of this type"),
+    risk_level: Optional[str] = Query(None, description="Documents with a risk of this level (high, medium, low)"),
+    risk_category: Optional[str] = Query(None, description="Documents with a risk in this category"),
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Find the current user's analyzed documents by clause type and risk.
+    
+    Filters are evaluated in the database; on Postgres they are JSONB
+    containment checks served by GIN indexes. Results are newest first and
+    paged by cursor.
+    """
+    if not (clause_type or risk_level or risk_category):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one of clause_type, risk_level or risk_category is required",
+        )
+    
+    conditions = analysis_filter_conditions(
+        db.get_bind().dialect.name, clause_type, risk_level, risk_category
+    )
+    query = (
+        select(Document)
+        .join(Analysis, Analysis.document_id == Document.id)
+        .where(Document.owner_id == current_user.id, *conditions)
+    )
+    
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor",
+            )
+        query = query.where(tuple_(Document.created_at, Document.id) < tuple_(cursor_created_at, cursor_id))
+    
+    # One extra row tells whether there is a next page
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit + 1)
+    documents = (await db.scalars(query)).all()
+    
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1].created_at, documents[-1].id)
+    
+    return {
+        "total": None,
+        "documents": documents,
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/search", response_model=SearchResponse)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200, description="Words or phrases to search for"),
+    kind: Optional[str] = Query(None, pattern="^(clause|content)$", description="Only clauses or only content"),
+    clause_type: Optional[str] = Query(None, description="Only clauses of this type"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Search clause texts and content across the current user's documents.
+    
+    Supports quoted phrases, OR and -exclusions, and tolerates partial or
+    misspelled words. Results are ranked, with highlighted snippets.
+    """
+    results = await search_passages(db, current_user.id, q, kind, clause_type, limit, offset)
+    
+    return {
+        "query": q,
+        "results": results,
+    }
+
+
 @router.get("/{document_id}", response_model=AnalysisResponse)
 async def get_analysis(
     document_id: int,
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get the analysis results for a document.
+    
+    Responses carry an ETag and Last-Modified; a matching If-None-Match or
+    If-Modified-Since gets 304 Not Modified without loading the analysis.
+    Stored clauses, risks and recommendations are streamed as they are,
+    without revalidating each item against the response model.
     """
+    # Answer revalidation from the version columns alone
+    if _is_conditional(request):
+        version = await _load_projection(document_id, [], current_user, db)
+        if version.status == "processed":
+            not_modified = _not_modified(request, version.analysis_etag(), version.analysis_modified_at)
+            if not_modified is not None:
+                return not_modified
+    
     # Check if document exists
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id)
     if not document:
         raise DocumentNotFoundError(document_id)
     
     # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if not await verify_document_access(current_user.id, document_id, db):
         raise AccessDeniedError()
     
     # Get analysis
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+    analysis = await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
     if not analysis:
         raise AnalysisNotFoundError(document_id)
     
@@ -51,166 +177,396 @@ async def get_analysis(
             detail=document.error_message or "Document processing failed",
         )
     
-    return analysis
+    modified_at = analysis.updated_at or analysis.created_at
+    headers = cache_headers(make_etag("analysis", analysis.id, modified_at), modified_at)
+    
+    return json_stream_response(
+        {
+            "document_id": analysis.document_id,
+            "clauses": analysis.clauses or [],
+            "risks": analysis.risks or [],
+            "comparisons": analysis.comparisons or [],
+            "recommendations": analysis.recommendations or [],
+            "summary": analysis.summary,
+            "created_at": analysis.created_at,
+            "updated_at": analysis.updated_at,
+        },
+        headers=headers,
+    )
 
 
-@router.post("/batch", response_model=BatchAnalysisResponse)
+@router.post("/batch", response_model=BatchAnalysisResponse, status_code=status.HTTP_202_ACCEPTED)
 async def batch_analysis(
     batch_request: BatchAnalysisRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Start batch analysis for multiple documents.
+    
+    The batch is queued and analyzed by the workers; follow its progress
+    with GET /batch/{batch_id}. Documents that are already processed are
+    skipped, and documents that are missing or not yours fail at once.
     """
-    processed = 0
-    failed = 0
+    if not batch_request.document_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one document ID is required",
+        )
+    if len(batch_request.document_ids) > settings.BATCH_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch can have at most {settings.BATCH_MAX_DOCUMENTS} documents",
+        )
     
-    for document_id in batch_request.document_ids:
-        # Check if document exists and user has access
-        document = db.query(Document).filter(Document.id == document_id).first()
-        if not document or not verify_document_access(current_user.id, document_id, db):
-            failed += 1
-            continue
-        
-        # Skip already processed documents
-        if document.status == "processed":
-            processed += 1
-            continue
-        
-        # Update document status
-        document.status = "processing"
-        document.error_message = None
-        db.add(document)
-        
-        # Delete existing analysis if any
-        analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
-        if analysis:
-            db.delete(analysis)
-        
-        try:
-            # Start processing asynchronously (will be queued)
-            await process_document(document_id)
-            processed += 1
-        except Exception as e:
-            logger.error(f"Failed to start processing for document {document_id}: {e}")
-            document.status = "error"
-            document.error_message = str(e)
-            failed += 1
-    
-    # Commit all changes
-    db.commit()
+    batch = await create_batch(db, current_user.id, batch_request.document_ids)
+    counts = await get_item_counts(db, batch.id)
+    
+    # Hand the first documents to the workers; later ones follow as slots free up
+    try:
+        await dispatch_items()
+    except Exception as e:
+        logger.warning(f"Error dispatching batch {batch.id}: {str(e)}")
     
     return {
-        "total": len(batch_request.document_ids),
-        "processed": processed,
-        "failed": failed,
-        "task_id": None  # In a real implementation, this would be a batch task ID
+        "total": batch.total,
+        "processed": counts["skipped"],
+        "failed": counts["failed"],
+        "queued": counts["queued"],
+        "batch_id": batch.id,
+        "task_id": str(batch.id),
     }
 
 
-@router.get("/documents/{document_id}/clauses", response_model=List[Any])
-async def get_document_clauses(
-    document_id: int,
+async def _get_own_batch(batch_id: int, user: User, db: AsyncSession) -> BatchJob:
+    """Load a batch job the user owns."""
+    batch = await db.get(BatchJob, batch_id)
+    if not batch:
+        raise BatchNotFoundError(batch_id)
+    if batch.owner_id != user.id:
+        raise AccessDeniedError()
+    return batch
+
+
+async def _batch_status(batch: BatchJob, db: AsyncSession) -> Dict[str, Any]:
+    """Get the progress of a batch job."""
+    counts = await get_item_counts(db, batch.id)
+    finished = sum(counts[name] for name in ("succeeded", "failed", "skipped", "cancelled"))
+    return {
+        "id": batch.id,
+        "status": batch.status,
+        "total": batch.total,
+        "counts": counts,
+        "progress": finished / batch.total if batch.total else 1.0,
+        "created_at": batch.created_at,
+        "updated_at": batch.updated_at,
+        "finished_at": batch.finished_at,
+    }
+
+
+@router.get("/batch/{batch_id}", response_model=BatchStatusResponse)
+async def get_batch(
+    batch_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
-    Get just the clauses from a document analysis.
+    Get the progress of a batch analysis, with item counts per status.
     """
-    # Check if document exists
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
+    batch = await _get_own_batch(batch_id, current_user, db)
+    return await _batch_status(batch, db)
+
+
+@router.get("/batch/{batch_id}/results", response_model=BatchResultsResponse)
+async def get_batch_results(
+    batch_id: int,
+    item_status: Optional[str] = Query(
+        None, alias="status", pattern=f"^({'|'.join(ITEM_STATUSES)})$", description="Only items with this status"
+    ),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get the status of each document in a batch analysis, in request order.
+    """
+    batch = await _get_own_batch(batch_id, current_user, db)
+    
+    filters = [BatchItem.batch_id == batch.id]
+    if item_status:
+        filters.append(BatchItem.status == item_status)
+    
+    total = await db.scalar(select(func.count()).select_from(BatchItem).where(*filters))
+    items = (await db.scalars(
+        select(BatchItem).where(*filters).order_by(BatchItem.id).offset(offset).limit(limit)
+    )).all()
+    
+    return {
+        "batch_id": batch.id,
+        "total": total,
+        "items": items,
+    }
+
+
+@router.post("/batch/{batch_id}/cancel", response_model=BatchStatusResponse)
+async def cancel_batch_analysis(
+    batch_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Cancel a batch analysis.
+    
+    Documents that have not started are cancelled; documents being analyzed
+    finish normally.
+    """
+    batch = await _get_own_batch(batch_id, current_user, db)
+    await cancel_batch(db, batch)
+    
+    # Cancelled items free slots for other batches
+    try:
+        await dispatch_items()
+    except Exception as e:
+        logger.warning(f"Error dispatching after cancelling batch {batch.id}: {str(e)}")
+    
+    return await _batch_status(batch, db)
+
+
+def _representation_etag(etag: str, ndjson: bool) -> str:
+    """Get the ETag of the NDJSON representation when it was requested."""
+    return f'{etag[:-1]}-ndjson"' if ndjson else etag
+
+
+def _array_response(items: Any, response: Response, ndjson: bool) -> Response:
+    """Stream a list field as JSON or NDJSON with the headers set on response."""
+    if isinstance(items, Response):
+        return items
+    
+    headers = dict(response.headers)
+    headers["Vary"] = "Accept"
+    if ndjson:
+        return ndjson_response(items, headers=headers)
+    return json_stream_response(items, headers=headers)
+
+
+def _is_conditional(request: Request) -> bool:
+    """Check whether a request carries conditional GET headers."""
+    return "if-none-match" in request.headers or "if-modified-since" in request.headers
+
+
+def _not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Any,
+    vary: Optional[str] = None,
+    check_modified_since: bool = True
+) -> Optional[Response]:
+    """
+    Get a 304 response if the client's copy is current, otherwise None.
+    
+    Args:
+        request: Request with the conditional GET headers
+        etag: Current ETag of the requested representation
+        last_modified: Current modification time
+        vary: Vary header of the 200 response, repeated on the 304
+        check_modified_since: Whether If-Modified-Since is evaluated; it is
+            not when representations share Last-Modified but not content
+        
+    Returns:
+        304 response, or None
+    """
+    if is_not_modified(request.headers, etag, last_modified if check_modified_since else None):
+        headers = cache_headers(etag, last_modified)
+        if vary:
+            headers["Vary"] = vary
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return None
+
+
+async def _load_projection(
+    document_id: int,
+    fields: List[str],
+    user: User,
+    db: AsyncSession,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> AnalysisProjection:
+    """
+    Load analysis fields with the ownership and existence checks applied.
+    
+    Args:
+        document_id: ID of the document
+        fields: Analysis fields to load; none loads only version columns
+        user: Requesting user
+        db: Database session
+        offset: First list item to return
+        limit: Maximum number of list items to return (None = all)
+        
+    Returns:
+        Projection of a document the user owns that has an analysis
+    """
+    projection = await get_analysis_projection(db, document_id, fields, offset=offset, limit=limit)
+    if projection is None:
         raise DocumentNotFoundError(document_id)
     
-    # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if projection.owner_id != user.id:
         raise AccessDeniedError()
     
-    # Get analysis
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
-    if not analysis:
+    if not projection.has_analysis:
         raise AnalysisNotFoundError(document_id)
     
-    return analysis.clauses
+    return projection
+
+
+async def _get_analysis_field(
+    document_id: int,
+    field_name: str,
+    user: User,
+    db: AsyncSession,
+    request: Request,
+    response: Response,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    ndjson: bool = False
+) -> Any:
+    """
+    Load one analysis field with an ownership check in a single query.
+    
+    Conditional requests are checked against the analysis version first, so
+    a current client gets 304 without the field being read. List fields have
+    JSON and NDJSON representations with their own ETags but one
+    Last-Modified, so for them only If-None-Match can give a 304.
+    
+    Args:
+        document_id: ID of the document
+        field_name: Analysis field to load
+        user: Requesting user
+        db: Database session
+        request: Request, for conditional GET headers
+        response: Response to set cache headers and X-Total-Count on
+        offset: First list item to return
+        limit: Maximum number of list items to return (None = all)
+        ndjson: Whether the field is sent as NDJSON, which has its own ETag
+        
+    Returns:
+        Value of the field, or a 304 response
+    """
+    if _is_conditional(request):
+        version = await _load_projection(document_id, [], user, db)
+        etag = _representation_etag(version.analysis_etag(), ndjson)
+        negotiated = field_name in ANALYSIS_LIST_FIELDS
+        not_modified = _not_modified(
+            request,
+            etag,
+            version.analysis_modified_at,
+            vary="Accept" if negotiated else None,
+            check_modified_since=not negotiated
+        )
+        if not_modified is not None:
+            return not_modified
+    
+    projection = await _load_projection(document_id, [field_name], user, db, offset, limit)
+    
+    etag = _representation_etag(projection.analysis_etag(), ndjson)
+    response.headers.update(cache_headers(etag, projection.analysis_modified_at))
+    if field_name in projection.totals:
+        response.headers["X-Total-Count"] = str(projection.totals[field_name])
+    
+    return projection.fields[field_name]
+
+
+@router.get("/documents/{document_id}/clauses", response_model=List[Any])
+async def get_document_clauses(
+    document_id: int,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="Response format"),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Get just the clauses from a document analysis.
+    
+    Supports paging with offset and limit; the full count is returned in
+    the X-Total-Count header. Send format=ndjson or Accept:
+    application/x-ndjson to get one item per line.
+    """
+    ndjson = wants_ndjson(request, format)
+    items = await _get_analysis_field(
+        document_id, "clauses", current_user, db, request, response, offset, limit, ndjson
+    )
+    return _array_response(items, response, ndjson)
 
 
 @router.get("/documents/{document_id}/risks", response_model=List[Any])
 async def get_document_risks(
     document_id: int,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="Response format"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get just the risks from a document analysis.
-    """
-    # Check if document exists
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
-        raise DocumentNotFoundError(document_id)
     
-    # Check access
-    if not verify_document_access(current_user.id, document_id, db):
-        raise AccessDeniedError()
-    
-    # Get analysis
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
-    if not analysis:
-        raise AnalysisNotFoundError(document_id)
-    
-    return analysis.risks
+    Supports paging with offset and limit; the full count is returned in
+    the X-Total-Count header. Send format=ndjson or Accept:
+    application/x-ndjson to get one item per line.
+    """
+    ndjson = wants_ndjson(request, format)
+    items = await _get_analysis_field(
+        document_id, "risks", current_user, db, request, response, offset, limit, ndjson
+    )
+    return _array_response(items, response, ndjson)
 
 
 @router.get("/documents/{document_id}/recommendations", response_model=List[Any])
 async def get_document_recommendations(
     document_id: int,
+    request: Request,
+    response: Response,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson)$", description="Response format"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get just the recommendations from a document analysis.
-    """
-    # Check if document exists
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
-        raise DocumentNotFoundError(document_id)
-    
-    # Check access
-    if not verify_document_access(current_user.id, document_id, db):
-        raise AccessDeniedError()
-    
-    # Get analysis
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
-    if not analysis:
-        raise AnalysisNotFoundError(document_id)
     
-    return analysis.recommendations
+    Supports paging with offset and limit; the full count is returned in
+    the X-Total-Count header. Send format=ndjson or Accept:
+    application/x-ndjson to get one item per line.
+    """
+    ndjson = wants_ndjson(request, format)
+    items = await _get_analysis_field(
+        document_id, "recommendations", current_user, db, request, response, offset, limit, ndjson
+    )
+    return _array_response(items, response, ndjson)
 
 
 @router.get("/documents/{document_id}/summary", response_model=str)
 async def get_document_summary(
     document_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get just the summary from a document analysis.
     """
-    # Check if document exists
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
-        raise DocumentNotFoundError(document_id)
-    
-    # Check access
-    if not verify_document_access(current_user.id, document_id, db):
-        raise AccessDeniedError()
-    
-    # Get analysis
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
-    if not analysis:
-        raise AnalysisNotFoundError(document_id)
+    summary = await _get_analysis_field(document_id, "summary", current_user, db, request, response)
+    if isinstance(summary, Response):
+        return summary
     
-    if not analysis.summary:
+    if not summary:
         return "No summary available for this document."
     
-    return analysis.summary
\ No newline at end of file
+    return summary
@@ -2,15 +2,17 @@ from typing import Any
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db, User
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_password_async,
+    get_password_hash_async,
     create_access_token,
     get_current_user,
     get_current_active_superuser,
 )
+from app.core.principal_cache import PrincipalCache
 from app.models.user import (
     UserCreate,
     UserUpdate,
@@ -27,13 +29,13 @@ router = APIRouter()
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     OAuth2 compatible token login, get an access token for future requests.
     """
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -59,13 +61,13 @@ async def login_for_access_token(
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_create: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Register a new user.
     """
     # Check if user with this email already exists
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_create.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -73,7 +75,7 @@ async def register_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     db_user = User(
         email=user_create.email,
         hashed_password=hashed_password,
@@ -83,8 +85,8 @@ async def register_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
@@ -103,44 +105,50 @@ async def read_users_me(
 async def update_user_me(
     user_update: UserUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Update current user information.
     """
+    # current_user may come from the principal cache; update the stored row
+    user = await db.get(User, current_user.id)
+    
     # Update user fields
     if user_update.full_name is not None:
-        current_user.full_name = user_update.full_name
+        user.full_name = user_update.full_name
     if user_update.email is not None:
         # Check if email is already taken
-        existing_user = db.query(User).filter(User.email == user_update.email).first()
-        if existing_user and existing_user.id != current_user.id:
+        existing_user = await db.scalar(select(User).where(User.email == user_update.email))
+        if existing_user and existing_user.id != user.id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered",
             )
-        current_user.email = user_update.email
+        user.email = user_update.email
     if user_update.password is not None:
-        current_user.hashed_password = get_password_hash(user_update.password)
+        user.hashed_password = await get_password_hash_async(user_update.password)
     
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
     
-    return current_user
+    # Drop cached copies of the old details
+    await PrincipalCache.invalidate(user.id)
+    
+    return user
 
 
 @router.post("/users", response_model=UserResponse)
 async def create_user(
     user_create: UserCreate,
     current_user: User = Depends(get_current_active_superuser),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Create new user (superuser only).
     """
     # Check if user with this email already exists
-    existing_user = db.query(User).filter(User.email == user_create.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_create.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -148,7 +156,7 @@ async def create_user(
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_create.password)
+    hashed_password = await get_password_hash_async(user_create.password)
     db_user = User(
         email=user_create.email,
         hashed_password=hashed_password,
@@ -158,7 +166,7 @@ async def create_user(
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
\ No newline at end of file
@@ -1,7 +1,9 @@
 import logging
 from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db, Document, User, Analysis
 from app.models.document import (
     DocumentCreate,
@@ -11,33 +13,57 @@ from app.models.document import (
     DocumentListResponse,
 )
 from app.core.security import get_current_user
-from app.services.document_service import process_document
+from app.services.document_service import (
+    ANALYSIS_FIELDS,
+    enqueue_document,
+    count_documents,
+    get_analysis_projection,
+)
 from app.services.storage_service import store_document_file, get_document_content
-from app.core.utils import generate_storage_path, verify_document_access
-from app.core.errors import DocumentNotFoundError, AccessDeniedError
+from app.services.search_service import remove_document as remove_from_search_index
+from app.services.progress_service import publish_progress, progress_event_stream
+from app.core.utils import (
+    generate_storage_path,
+    verify_document_access,
+    encode_cursor,
+    decode_cursor,
+    is_not_modified,
+    cache_headers,
+)
+from app.core.responses import FastJSONResponse, json_stream_response
+from app.core.errors import DocumentNotFoundError, DocumentTooLargeError, AccessDeniedError
+from app.monitoring.tracing import traced, current_span
 from app.config import get_settings
 
 settings = get_settings()
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 logger = logging.getLogger(__name__)
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+@traced("documents.create_document")
 async def create_document(
     name: str = Form(...),
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Upload a new document for analysis.
+    
+    Returns once the file is stored; analysis is queued. Follow its progress
+    with GET /{document_id}/events.
     """
-    # Validate file size
-    if file.size > settings.MAX_DOCUMENT_SIZE:
-        raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-            detail=f"File too large. Maximum size is {settings.MAX_DOCUMENT_SIZE // (1024 * 1024)}MB",
-        )
+    span = current_span()
+    span.set_attributes({
+        "document.content_type": file.content_type or "",
+        "document.size": file.size or 0,
+        "user.id": current_user.id,
+    })
+    
+    # Validate file size when known up front; storing enforces it either way
+    if file.size is not None and file.size > settings.MAX_DOCUMENT_SIZE:
+        raise DocumentTooLargeError(settings.MAX_DOCUMENT_SIZE)
     
     # Validate file type
     if file.content_type not in settings.ALLOWED_DOCUMENT_TYPES:
@@ -65,34 +91,39 @@ async def create_document(
         owner_id=current_user.id,
     )
     db.add(db_document)
-    db.commit()
-    db.refresh(db_document)
+    await db.commit()
+    await db.refresh(db_document)
+    span.set_attribute("document.id", db_document.id)
     
     # Store file
     try:
-        await store_document_file(file, storage_path)
+        content_hash, size = await store_document_file(file, storage_path)
     except Exception as e:
         # Update document status to error
         db_document.status = "error"
         db_document.error_message = str(e)
         db.add(db_document)
-        db.commit()
+        await db.commit()
         
+        if isinstance(e, DocumentTooLargeError):
+            raise
         logger.error(f"Failed to store document: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to store document",
         )
     
-    # Start processing asynchronously
+    await publish_progress(db_document.id, "stored", size=size)
+    
+    # Queue processing; the response does not wait for the analysis
     try:
-        # Update document status to processing
+        db_document.content_hash = content_hash
         db_document.status = "processing"
         db.add(db_document)
-        db.commit()
+        await db.commit()
+        await db.refresh(db_document)
         
-        # Process document asynchronously
-        await process_document(db_document.id)
+        await enqueue_document(db_document.id)
     except Exception as e:
         logger.error(f"Failed to start document processing: {e}")
         # Don't fail the request, processing will be retried
@@ -104,12 +135,20 @@ async def create_document(
 async def list_documents(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    status: Optional[str] = Query(None),
+    document_status: Optional[str] = Query(None, alias="status"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Return an approximate total in cursor mode"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
-    List documents belonging to the current user.
+    List documents belonging to the current user, newest first.
+    
+    Pages can be requested by offset (skip) or by cursor. Every page returns
+    next_cursor; passing it back reads the next page from the
+    (owner_id, status, created_at, id) index without counting or skipping
+    rows, so latency does not grow with depth. In cursor mode the total is
+    omitted unless include_total is set, in which case it may be cached.
     """
     # Validate pagination parameters
     if skip < 0 or limit < 1 or limit > 100:
@@ -119,32 +158,60 @@ async def list_documents(
         )
     
     # Base query
-    query = db.query(Document).filter(Document.owner_id == current_user.id)
+    query = select(Document).where(Document.owner_id == current_user.id)
     
     # Apply status filter if provided
-    if status:
-        query = query.filter(Document.status == status)
+    if document_status:
+        query = query.where(Document.status == document_status)
     
-    # Get total count
-    total = query.count()
-    
-    # Apply pagination
-    documents = query.order_by(Document.created_at.desc()).offset(skip).limit(limit).all()
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid pagination cursor",
+            )
+        query = query.where(tuple_(Document.created_at, Document.id) < tuple_(cursor_created_at, cursor_id))
+        total = None
+        if include_total:
+            total = await count_documents(db, current_user.id, document_status, use_cache=True)
+    else:
+        # Get total count
+        total = await count_documents(db, current_user.id, document_status)
+        query = query.offset(skip)
+    
+    # Apply pagination; one extra row tells whether there is a next page
+    query = query.order_by(Document.created_at.desc(), Document.id.desc()).limit(limit + 1)
+    documents = (await db.scalars(query)).all()
+    
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1].created_at, documents[-1].id)
     
     return {
         "total": total,
         "documents": documents,
+        "next_cursor": next_cursor,
     }
 
 
 @router.get("/{document_id}", response_model=DocumentDetailResponse)
 async def get_document(
     document_id: int,
+    request: Request,
+    include: Optional[str] = Query(
+        None, description="Comma-separated analysis fields to include (default: all)"
+    ),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get a specific document by ID.
+    
+    Responses carry an ETag and Last-Modified; a matching If-None-Match or
+    If-Modified-Since gets 304 Not Modified without loading the analysis.
     """
     # Validate document ID
     if document_id <= 0:
@@ -153,30 +220,46 @@ async def get_document(
             detail="Invalid document ID",
         )
     
-    # Get document
-    document = db.query(Document).filter(Document.id == document_id).first()
-    if not document:
+    # Validate requested analysis fields
+    if include is None:
+        fields = list(ANALYSIS_FIELDS)
+    else:
+        fields = [name.strip() for name in include.split(",") if name.strip()]
+        unknown = [name for name in fields if name not in ANALYSIS_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown analysis fields: {', '.join(unknown)}",
+            )
+    
+    # Answer revalidation from the version columns alone
+    if "if-none-match" in request.headers or "if-modified-since" in request.headers:
+        version = await get_analysis_projection(db, document_id, [])
+        if version is None:
+            raise DocumentNotFoundError(document_id)
+        if version.owner_id != current_user.id:
+            raise AccessDeniedError()
+        etag, last_modified = version.document_etag(), version.document_last_modified()
+        if is_not_modified(request.headers, etag, last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, last_modified))
+    
+    # Document, ownership and requested analysis columns in one query
+    projection = await get_analysis_projection(db, document_id, fields, with_document=True)
+    if projection is None:
         raise DocumentNotFoundError(document_id)
     
     # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if projection.owner_id != current_user.id:
         raise AccessDeniedError()
     
-    # Get analysis if available
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+    headers = cache_headers(projection.document_etag(), projection.document_last_modified())
     
-    # Create response with analysis included
-    response = DocumentDetailResponse.model_validate(document)
-    if analysis:
-        response.analysis = {
-            "clauses": analysis.clauses,
-            "risks": analysis.risks,
-            "comparisons": analysis.comparisons,
-            "recommendations": analysis.recommendations,
-            "summary": analysis.summary,
-        }
+    # Validate the document's columns only, since reading document.analysis
+    # would lazy-load outside an await; the analysis is streamed as stored
+    content = DocumentResponse.model_validate(projection.document).model_dump(mode="json")
+    content["analysis"] = projection.fields if projection.has_analysis else None
     
-    return response
+    return json_stream_response(content, headers=headers)
 
 
 @router.put("/{document_id}", response_model=DocumentResponse)
@@ -184,7 +267,7 @@ async def update_document(
     document_id: int,
     document_update: DocumentUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Update a specific document.
@@ -197,12 +280,12 @@ async def update_document(
         )
     
     # Get document
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id)
     if not document:
         raise DocumentNotFoundError(document_id)
     
     # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if not await verify_document_access(current_user.id, document_id, db):
         raise AccessDeniedError()
     
     # Update document
@@ -218,17 +301,17 @@ async def update_document(
         document.status = document_update.status
     
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    await db.commit()
+    await db.refresh(document)
     
     return document
 
 
-@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT, response_model=None)
 async def delete_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Delete a document.
@@ -241,22 +324,25 @@ async def delete_document(
         )
     
     # Get document
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id)
     if not document:
         raise DocumentNotFoundError(document_id)
     
     # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if not await verify_document_access(current_user.id, document_id, db):
         raise AccessDeniedError()
     
     # Delete analysis if exists
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+    analysis = await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
     if analysis:
-        db.delete(analysis)
+        await db.delete(analysis)
+    
+    # Delete search passages
+    await remove_from_search_index(db, document_id)
     
     # Delete document
-    db.delete(document)
-    db.commit()
+    await db.delete(document)
+    await db.commit()
     
     # Note: In a production system, we would also remove the file from storage
     # This is omitted here for simplicity
@@ -268,7 +354,7 @@ async def delete_document(
 async def get_document_content_endpoint(
     document_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Get the raw text content of a document.
@@ -281,12 +367,12 @@ async def get_document_content_endpoint(
         )
     
     # Get document
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id)
     if not document:
         raise DocumentNotFoundError(document_id)
     
     # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if not await verify_document_access(current_user.id, document_id, db):
         raise AccessDeniedError()
     
     # Get document content
@@ -305,7 +391,7 @@ async def get_document_content_endpoint(
 async def reprocess_document(
     document_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
     """
     Reprocess a document to regenerate analysis.
@@ -318,32 +404,76 @@ async def reprocess_document(
         )
     
     # Get document
-    document = db.query(Document).filter(Document.id == document_id).first()
+    document = await db.get(Document, document_id)
     if not document:
         raise DocumentNotFoundError(document_id)
     
     # Check access
-    if not verify_document_access(current_user.id, document_id, db):
+    if not await verify_document_access(current_user.id, document_id, db):
         raise AccessDeniedError()
     
     # Update document status
     document.status = "processing"
     document.error_message = None
     db.add(document)
-    db.commit()
-    db.refresh(document)
+    await db.commit()
+    await db.refresh(document)
     
     # Delete existing analysis if any
-    analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+    analysis = await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
     if analysis:
-        db.delete(analysis)
-        db.commit()
+        await db.delete(analysis)
+        await db.commit()
     
-    # Start processing asynchronously
+    # Queue processing; the response does not wait for the analysis. The
+    # analysis is recomputed even if an identical document has one
     try:
-        await process_document(document.id)
+        await enqueue_document(document.id, reuse=False)
     except Exception as e:
         logger.error(f"Failed to start document processing: {e}")
         # Don't fail the request, processing will be retried
     
-    return document
\ No newline at end of file
+    return document
+
+
+@router.get("/{document_id}/events")
+async def document_events(
+    document_id: int,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """
+    Stream processing progress of a document as Server-Sent Events.
+    
+    Each event is named after its stage (stored, queued, text_extracted,
+    sections, clauses, risks, recommendations, done, error) and carries the
+    stage details as JSON. The stream ends after done or error; for a
+    document that has already finished, that is the only event.
+    """
+    document = await db.get(Document, document_id)
+    if not document:
+        raise DocumentNotFoundError(document_id)
+    
+    if document.owner_id != current_user.id:
+        raise AccessDeniedError()
+    
+    initial = None
+    if document.status in ("processed", "error"):
+        initial = {
+            "document_id": document.id,
+            "stage": "done" if document.status == "processed" else "error",
+            "at": (document.updated_at or document.created_at).timestamp(),
+            "status": document.status,
+        }
+        if document.error_message:
+            initial["message"] = document.error_message
+    
+    # Release the database connection; the stream may stay open for minutes
+    await db.close()
+    
+    return StreamingResponse(
+        progress_event_stream(document_id, request.is_disconnected, initial),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
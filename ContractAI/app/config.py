@@ -46,23 +46,82 @@ class Settings(BaseSettings):
     
     # Database settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Connection pool of the async engine used by API handlers (per worker)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Prepared statements cached per asyncpg connection
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "500"))
     
     # JWT settings
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "43200"))  # 30 days
+    # Authenticated users cached per token, in process and in Redis
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+    # Threads for bcrypt hashing and verification (per worker)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
     
     # Minio settings
     MINIO_ENDPOINT: str = os.getenv("MINIO_ENDPOINT", "")
     MINIO_ACCESS_KEY: str = os.getenv("MINIO_ACCESS_KEY", "")
     MINIO_SECRET_KEY: str = os.getenv("MINIO_SECRET_KEY", "")
     MINIO_SECURE: bool = os.getenv("MINIO_SECURE", "False").lower() == "true"
+    # 'minio', or 'memory' for an in-process stand-in (load tests, local development)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "minio").lower()
+    STORAGE_MEMORY_LATENCY_MS: float = float(os.getenv("STORAGE_MEMORY_LATENCY_MS", "0"))
+    # Bytes per part of multipart uploads, and so the memory an upload holds
+    # (at least 5 MiB, the S3 minimum)
+    STORAGE_UPLOAD_PART_SIZE: int = int(os.getenv("STORAGE_UPLOAD_PART_SIZE", str(5 * 1024 * 1024)))
     DOCUMENT_BUCKET: str = "documents"
     PROCESSED_BUCKET: str = "processed-documents"
     
     # Redis settings
     REDIS_URL: str = os.getenv("REDIS_URL", "")
     
+    # Celery settings; the broker and result backend default to REDIS_URL
+    CELERY_BROKER_URL: str = os.getenv("CELERY_BROKER_URL", "")
+    CELERY_RESULT_BACKEND: str = os.getenv("CELERY_RESULT_BACKEND", "")
+    
+    # Where uploaded documents are processed: 'celery' workers, or 'local' for
+    # background tasks in the API process (development, load tests)
+    DOCUMENT_PROCESSING_BACKEND: str = os.getenv("DOCUMENT_PROCESSING_BACKEND", "celery").lower()
+    # Seconds the latest processing progress event of a document is kept
+    PROGRESS_EVENT_TTL: int = int(os.getenv("PROGRESS_EVENT_TTL", "86400"))
+    # Documents a Celery worker process analyzes at once on its shared event
+    # loop, and seconds they get to finish when the worker shuts down
+    WORKER_DOCUMENT_CONCURRENCY: int = int(os.getenv("WORKER_DOCUMENT_CONCURRENCY", "4"))
+    WORKER_SHUTDOWN_TIMEOUT: float = float(os.getenv("WORKER_SHUTDOWN_TIMEOUT", "60"))
+    # Version of the analysis pipeline; bump it when prompts, models or agents
+    # change so analyses of older versions are no longer reused
+    ANALYSIS_PIPELINE_VERSION: str = os.getenv("ANALYSIS_PIPELINE_VERSION", "1")
+    # Which completed analyses of an identical upload are reused: 'owner' for the
+    # uploader's own documents, 'global' for any user's, 'off' to always analyze.
+    # With 'global', a fast result tells a user someone else uploaded the same file.
+    ANALYSIS_REUSE_SCOPE: str = os.getenv("ANALYSIS_REUSE_SCOPE", "owner").lower()
+    
+    # Batch analysis: documents per batch, documents handed to workers at once
+    # across all batches and per batch, and seconds before an in-flight
+    # document is given up on
+    BATCH_MAX_DOCUMENTS: int = int(os.getenv("BATCH_MAX_DOCUMENTS", "1000"))
+    BATCH_MAX_IN_FLIGHT: int = int(os.getenv("BATCH_MAX_IN_FLIGHT", "32"))
+    BATCH_MAX_IN_FLIGHT_PER_BATCH: int = int(os.getenv("BATCH_MAX_IN_FLIGHT_PER_BATCH", "8"))
+    BATCH_ITEM_TIMEOUT: int = int(os.getenv("BATCH_ITEM_TIMEOUT", "3600"))
+    
+    # Metrics settings
+    METRICS_QUEUE_SIZE: int = int(os.getenv("METRICS_QUEUE_SIZE", "10000"))
+    METRICS_BATCH_SIZE: int = int(os.getenv("METRICS_BATCH_SIZE", "500"))
+    METRICS_FLUSH_INTERVAL: float = float(os.getenv("METRICS_FLUSH_INTERVAL", "0.5"))
+    
+    # Tracing settings
+    TRACING_ENABLED: bool = os.getenv("TRACING_ENABLED", "False").lower() == "true"
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "console")  # console, file, otlp
+    TRACING_FILE_PATH: str = os.getenv("TRACING_FILE_PATH", "traces.jsonl")
+    TRACING_SAMPLE_RATIO: float = float(os.getenv("TRACING_SAMPLE_RATIO", "0.05"))
+    TRACING_OTLP_ENDPOINT: str = os.getenv("TRACING_OTLP_ENDPOINT", "")
+    
     # AI settings
     SPACY_MODEL: str = "en_core_web_lg"
     TRANSFORMER_MODEL: str = "distilbert-base-uncased"
@@ -74,8 +133,40 @@ class Settings(BaseSettings):
     COHERE_API_KEY: Optional[str] = os.getenv("COHERE_API_KEY")
     MISTRAL_API_KEY: Optional[str] = os.getenv("MISTRAL_API_KEY")
     
+    # Simulated LLM provider (benchmarks and offline development)
+    LLM_SIMULATED: bool = os.getenv("LLM_SIMULATED", "False").lower() == "true"
+    SIMULATED_LLM_LATENCY_DISTRIBUTION: str = os.getenv("SIMULATED_LLM_LATENCY_DISTRIBUTION", "lognormal")
+    SIMULATED_LLM_LATENCY_MS: float = float(os.getenv("SIMULATED_LLM_LATENCY_MS", "800"))
+    SIMULATED_LLM_TOKENS_PER_SECOND: float = float(os.getenv("SIMULATED_LLM_TOKENS_PER_SECOND", "50"))
+    SIMULATED_LLM_ERROR_RATE: float = float(os.getenv("SIMULATED_LLM_ERROR_RATE", "0.0"))
+    SIMULATED_LLM_RATE_LIMIT_ERROR_RATE: float = float(os.getenv("SIMULATED_LLM_RATE_LIMIT_ERROR_RATE", "0.0"))
+    SIMULATED_LLM_REQUESTS_PER_MINUTE: int = int(os.getenv("SIMULATED_LLM_REQUESTS_PER_MINUTE", "0"))
+    SIMULATED_LLM_TIME_SCALE: float = float(os.getenv("SIMULATED_LLM_TIME_SCALE", "1.0"))
+
+    # LLM call cassettes (off, record or replay)
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "off").lower()
+    LLM_CASSETTE_DIR: str = os.getenv("LLM_CASSETTE_DIR", "cassettes")
+    LLM_CASSETTE_REPLAY_LATENCY_SCALE: float = float(os.getenv("LLM_CASSETTE_REPLAY_LATENCY_SCALE", "0.0"))
+    LLM_CASSETTE_STRICT: bool = os.getenv("LLM_CASSETTE_STRICT", "False").lower() == "true"
+
+    # Cache-Control for analysis and document detail responses; clients revalidate
+    # with If-None-Match by default (empty to omit the header)
+    ANALYSIS_CACHE_CONTROL: str = os.getenv("ANALYSIS_CACHE_CONTROL", "private, no-cache")
+    
+    # Seconds an approximate document count is cached for cursor pagination
+    DOCUMENT_COUNT_CACHE_TTL: int = int(os.getenv("DOCUMENT_COUNT_CACHE_TTL", "60"))
+    
+    # Admin dashboard counters: rows per counter, and seconds between recomputes (0 disables)
+    STATS_COUNTER_SHARDS: int = int(os.getenv("STATS_COUNTER_SHARDS", "8"))
+    STATS_RECONCILE_INTERVAL: float = float(os.getenv("STATS_RECONCILE_INTERVAL", "900"))
+    
+    # Expired document cleanup: documents per batch, and documents deleted per
+    # second at most (0 for no limit)
+    CLEANUP_BATCH_SIZE: int = int(os.getenv("CLEANUP_BATCH_SIZE", "500"))
+    CLEANUP_MAX_RATE: float = float(os.getenv("CLEANUP_MAX_RATE", "200"))
+    
     # Processing settings
-    MAX_DOCUMENT_SIZE: int = 10 * 1024 * 1024  # 10 MB
+    MAX_DOCUMENT_SIZE: int = int(os.getenv("MAX_DOCUMENT_SIZE", str(10 * 1024 * 1024)))  # 10 MB
     ALLOWED_DOCUMENT_TYPES: List[str] = ["application/pdf", "application/msword", 
                                         "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]
     
@@ -169,6 +260,13 @@ def get_llm_provider_settings() -> Dict[str, LLMProviderSettings]:
             timeout=30,
             cost_per_1k_tokens=0.008,  # Approximate cost
             max_tokens=8192
+        ),
+        "simulated": LLMProviderSettings(
+            api_key="simulated" if settings.LLM_SIMULATED else None,
+            model_name="simulated-contract-model",
+            timeout=60,
+            cost_per_1k_tokens=0.0,
+            max_tokens=8192
         )
     }
 
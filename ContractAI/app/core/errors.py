@@ -54,6 +54,16 @@ class BucketNotFoundError(StorageError):
         self.status_code = status.HTTP_404_NOT_FOUND
 
 
+class DocumentTooLargeError(ContractAIException):
+    """Exception raised when an uploaded document exceeds the size limit."""
+    
+    def __init__(self, max_size: int):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File too large. Maximum size is {max_size // (1024 * 1024)}MB",
+        )
+
+
 class DocumentNotFoundError(ContractAIException):
     """Exception raised when a document is not found."""
     
@@ -80,6 +90,16 @@ class AnalysisNotFoundError(ContractAIException):
         )
 
 
+class BatchNotFoundError(ContractAIException):
+    """Exception raised when a batch job is not found."""
+    
+    def __init__(self, batch_id: int):
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Batch with ID {batch_id} not found",
+        )
+
+
 class AccessDeniedError(ContractAIException):
     """Exception raised when user does not have access to a resource."""
     
@@ -0,0 +1,306 @@
+"""
+Authenticated principal cache for ContractAI.
+
+Caches the user behind an access token so authenticated requests skip the
+users table lookup. Entries live in two tiers: an in-process LRU and a Redis
+hash per user (principal:{user_id}, one field per token id), both expiring
+after PRINCIPAL_CACHE_TTL seconds (0 disables the cache).
+
+Invalidating a user deletes the Redis hash and publishes the user id on a
+channel every worker listens to, so in-process entries are dropped
+everywhere at once. Workers only use their in-process tier while subscribed;
+otherwise they read through to Redis or the database.
+
+Each user also has a generation counter (principal:{user_id}:generation)
+that invalidation increments. A request reads it before loading the user
+from the database and caches the user under that generation; entries and
+writes from an older generation are rejected, so a request that loaded the
+user just before an invalidation cannot cache the stale row after it.
+"""
+
+import json
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from aioredis.exceptions import WatchError
+from sqlalchemy.orm import make_transient_to_detached
+from app.database import User
+from app.services.redis_service import RedisService
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# User columns cached for a principal; the password hash is never cached
+PRINCIPAL_FIELDS = ("id", "email", "full_name", "is_active", "is_superuser", "created_at", "updated_at")
+
+INVALIDATION_CHANNEL = "principal:invalidate"
+
+# Seconds to wait before resubscribing after the invalidation listener fails
+LISTENER_RETRY_INTERVAL = 5.0
+
+
+def snapshot_user(user: User) -> Dict[str, Any]:
+    """
+    Get the cacheable fields of a user.
+    
+    Args:
+        user: User loaded from the database
+    
+    Returns:
+        JSON-serializable user fields
+    """
+    snapshot = {}
+    for name in PRINCIPAL_FIELDS:
+        value = getattr(user, name)
+        snapshot[name] = value.isoformat() if isinstance(value, datetime) else value
+    return snapshot
+
+
+def user_from_snapshot(snapshot: Dict[str, Any]) -> User:
+    """
+    Rebuild a detached User from cached fields.
+    
+    The user is detached rather than transient, so adding it to a session
+    updates the existing row instead of inserting a new one. Fields that are
+    not cached, such as the password hash, are not loaded.
+    
+    Args:
+        snapshot: Fields from snapshot_user
+    
+    Returns:
+        Detached user
+    """
+    values = dict(snapshot)
+    for name in ("created_at", "updated_at"):
+        if values.get(name):
+            values[name] = datetime.fromisoformat(values[name])
+    user = User(**values)
+    make_transient_to_detached(user)
+    return user
+
+
+def _decode(value: Any) -> str:
+    """Decode a Redis reply value to str."""
+    return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+
+def _hash_key(user_id: int) -> str:
+    """Get the Redis hash holding a user's cached principals."""
+    return f"principal:{user_id}"
+
+
+def _generation_key(user_id: int) -> str:
+    """Get the Redis key holding a user's cache generation."""
+    return f"principal:{user_id}:generation"
+
+
+class PrincipalCache:
+    """Two-tier cache of authenticated users keyed by user id and token id."""
+    
+    _local: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+    # Latest generation of each user seen on the invalidation channel
+    _generations: Dict[int, int] = {}
+    _listener: Optional[asyncio.Task] = None
+    _subscribed: bool = False
+    _retry_at: float = 0.0
+    
+    @classmethod
+    async def get(cls, user_id: int, token_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached principal.
+        
+        Args:
+            user_id: ID of the user
+            token_id: ID of the access token
+        
+        Returns:
+            Cached user fields, or None on a miss
+        """
+        if settings.PRINCIPAL_CACHE_TTL <= 0:
+            return None
+        
+        cls._ensure_listener()
+        key = f"{user_id}:{token_id}"
+        
+        if cls._subscribed:
+            entry = cls._local.get(key)
+            if entry is not None:
+                expires_at, generation, snapshot = entry
+                if expires_at > time.monotonic() and generation >= cls._generations.get(user_id, 0):
+                    cls._local.move_to_end(key)
+                    return snapshot
+                cls._local.pop(key, None)
+        
+        try:
+            redis = await RedisService.get_redis()
+            pipe = redis.pipeline(transaction=False)
+            pipe.hget(_hash_key(user_id), token_id)
+            pipe.get(_generation_key(user_id))
+            raw, current = await pipe.execute()
+            if raw is not None:
+                cached = json.loads(raw)
+                generation = int(current or 0)
+                if cached["expires_at"] > time.time() and cached.get("generation") == generation:
+                    cls._store_local(user_id, token_id, generation, cached["user"])
+                    return cached["user"]
+        except Exception as e:
+            logger.warning(f"Error reading cached principal: {str(e)}")
+        
+        return None
+    
+    @classmethod
+    async def generation(cls, user_id: int) -> Optional[int]:
+        """
+        Get a user's current cache generation; read it before loading the user.
+        
+        Args:
+            user_id: ID of the user
+        
+        Returns:
+            Generation, or None if the cache is disabled or Redis is unavailable
+        """
+        if settings.PRINCIPAL_CACHE_TTL <= 0:
+            return None
+        
+        try:
+            redis = await RedisService.get_redis()
+            return int(await redis.get(_generation_key(user_id)) or 0)
+        except Exception as e:
+            logger.warning(f"Error reading principal cache generation: {str(e)}")
+            return None
+    
+    @classmethod
+    async def set(cls, user_id: int, token_id: str, snapshot: Dict[str, Any], generation: Optional[int]) -> bool:
+        """
+        Cache a principal in both tiers, unless the user was invalidated since.
+        
+        Args:
+            user_id: ID of the user
+            token_id: ID of the access token
+            snapshot: Fields from snapshot_user
+            generation: Generation read before the user was loaded
+        
+        Returns:
+            Whether the principal was cached
+        """
+        if settings.PRINCIPAL_CACHE_TTL <= 0 or generation is None:
+            return False
+        
+        try:
+            redis = await RedisService.get_redis()
+            ttl = settings.PRINCIPAL_CACHE_TTL
+            value = json.dumps({"expires_at": time.time() + ttl, "generation": generation, "user": snapshot})
+            async with redis.pipeline(transaction=True) as pipe:
+                # The write fails if invalidate() increments the generation meanwhile
+                await pipe.watch(_generation_key(user_id))
+                if int(await pipe.get(_generation_key(user_id)) or 0) != generation:
+                    return False
+                pipe.multi()
+                pipe.hset(_hash_key(user_id), token_id, value)
+                pipe.expire(_hash_key(user_id), ttl)
+                await pipe.execute()
+        except WatchError:
+            return False
+        except Exception as e:
+            logger.warning(f"Error caching principal: {str(e)}")
+            return False
+        
+        cls._store_local(user_id, token_id, generation, snapshot)
+        return True
+    
+    @classmethod
+    async def invalidate(cls, user_id: int) -> None:
+        """
+        Drop every cached principal of a user, in this and all other workers.
+        
+        Args:
+            user_id: ID of the user
+        """
+        cls._evict_local(user_id)
+        
+        try:
+            redis = await RedisService.get_redis()
+            pipe = redis.pipeline(transaction=True)
+            pipe.incr(_generation_key(user_id))
+            pipe.delete(_hash_key(user_id))
+            generation, _ = await pipe.execute()
+            cls._evict_local(user_id, generation)
+            await redis.publish(INVALIDATION_CHANNEL, f"{user_id}:{generation}")
+        except Exception as e:
+            logger.warning(f"Error invalidating cached principal: {str(e)}")
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Stop the invalidation listener and clear the in-process tier."""
+        if cls._listener is not None:
+            cls._listener.cancel()
+            try:
+                await cls._listener
+            except asyncio.CancelledError:
+                pass
+            cls._listener = None
+        cls._subscribed = False
+        cls._local.clear()
+        cls._generations.clear()
+    
+    @classmethod
+    def _store_local(cls, user_id: int, token_id: str, generation: int, snapshot: Dict[str, Any]) -> None:
+        """Add an entry to the in-process tier, evicting the least recently used."""
+        if not cls._subscribed or generation < cls._generations.get(user_id, 0):
+            return
+        key = f"{user_id}:{token_id}"
+        cls._local[key] = (time.monotonic() + settings.PRINCIPAL_CACHE_TTL, generation, snapshot)
+        cls._local.move_to_end(key)
+        while len(cls._local) > settings.PRINCIPAL_CACHE_MAX_ENTRIES:
+            cls._local.popitem(last=False)
+    
+    @classmethod
+    def _evict_local(cls, user_id: int, generation: Optional[int] = None) -> None:
+        """Drop a user's entries from the in-process tier, and remember its newest generation."""
+        if generation is not None and generation > cls._generations.get(user_id, 0):
+            cls._generations[user_id] = generation
+        prefix = f"{user_id}:"
+        for key in [key for key in cls._local if key.startswith(prefix)]:
+            cls._local.pop(key, None)
+    
+    @classmethod
+    def _ensure_listener(cls) -> None:
+        """Start the invalidation listener on the running event loop if needed."""
+        if cls._listener is not None and not cls._listener.done():
+            return
+        if time.monotonic() < cls._retry_at:
+            return
+        cls._listener = asyncio.get_running_loop().create_task(cls._listen())
+    
+    @classmethod
+    async def _listen(cls) -> None:
+        """Evict in-process entries for user ids published on the invalidation channel."""
+        pubsub = None
+        try:
+            redis = await RedisService.get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            cls._subscribed = True
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    user_id, _, generation = _decode(message["data"]).partition(":")
+                    cls._evict_local(int(user_id), int(generation) if generation else None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Principal invalidation listener stopped: {str(e)}")
+        finally:
+            # Entries can no longer be invalidated by other workers
+            cls._subscribed = False
+            cls._local.clear()
+            cls._generations.clear()
+            cls._retry_at = time.monotonic() + LISTENER_RETRY_INTERVAL
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
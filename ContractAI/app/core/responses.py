@@ -0,0 +1,177 @@
+"""
+JSON responses for ContractAI.
+
+Payloads are encoded with orjson when it is installed, which is several times
+faster than the standard library encoder and serializes datetimes natively;
+the standard library encoder is used otherwise.
+
+Large analysis payloads are streamed: objects are walked key by key and
+arrays item by item, each item is encoded on its own, and the output is sent
+in chunks of about STREAM_CHUNK_SIZE bytes, so the encoded body is never held
+in memory as a whole. Bodies that fit in a single chunk are sent with a
+Content-Length instead. Array endpoints can also be read as NDJSON, one item
+per line, with ?format=ndjson or an Accept: application/x-ndjson header.
+"""
+
+import json
+import itertools
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, Optional
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Target size of each streamed chunk in bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _default(value: Any) -> Any:
+    """Encode values neither encoder handles natively."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON.
+    
+    Args:
+        value: Value to encode
+    
+    Returns:
+        Encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with dumps."""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _iter_parts(value: Any) -> Iterator[bytes]:
+    """Encode a value in pieces, walking into objects and arrays but not into array items."""
+    if isinstance(value, dict):
+        yield b"{"
+        for index, (key, item) in enumerate(value.items()):
+            yield (b"," if index else b"") + dumps(str(key)) + b":"
+            yield from _iter_parts(item)
+        yield b"}"
+    elif isinstance(value, list):
+        yield b"["
+        for index, item in enumerate(value):
+            yield (b"," if index else b"") + dumps(item)
+        yield b"]"
+    else:
+        yield dumps(value)
+
+
+def _buffered(parts: Iterable[bytes], chunk_size: int) -> Iterator[bytes]:
+    """Join encoded pieces into chunks of at least chunk_size bytes, except the last."""
+    buffer = bytearray()
+    for part in parts:
+        buffer += part
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+def iter_json(value: Any, chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encode a value as JSON in chunks.
+    
+    Args:
+        value: Value to encode
+        chunk_size: Target chunk size in bytes
+    
+    Returns:
+        Iterator over the encoded chunks
+    """
+    return _buffered(_iter_parts(value), chunk_size)
+
+
+def iter_ndjson(items: Iterable[Any], chunk_size: int = STREAM_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encode items as newline-delimited JSON in chunks.
+    
+    Args:
+        items: Items to encode, one per line
+        chunk_size: Target chunk size in bytes
+    
+    Returns:
+        Iterator over the encoded chunks
+    """
+    return _buffered((dumps(item) + b"\n" for item in items), chunk_size)
+
+
+def wants_ndjson(request: Request, format: Optional[str] = None) -> bool:
+    """
+    Check whether a client asked for NDJSON.
+    
+    Args:
+        request: Request, for the Accept header
+        format: Explicit format from the query string, which takes precedence
+    
+    Returns:
+        Whether to respond with NDJSON
+    """
+    if format:
+        return format == "ndjson"
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _chunked_response(chunks: Iterator[bytes], media_type: str, headers: Optional[Dict[str, str]]) -> Response:
+    """Send a single chunk as a plain response and anything longer as a stream."""
+    first = next(chunks, b"")
+    second = next(chunks, None)
+    if second is None:
+        return Response(content=first, media_type=media_type, headers=headers)
+    return StreamingResponse(itertools.chain((first, second), chunks), media_type=media_type, headers=headers)
+
+
+def json_stream_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build a streamed JSON response.
+    
+    Args:
+        content: JSON-serializable content
+        headers: Extra response headers
+    
+    Returns:
+        Response with the encoded content
+    """
+    return _chunked_response(iter_json(content), JSON_MEDIA_TYPE, headers)
+
+
+def ndjson_response(items: Iterable[Any], headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Build a streamed NDJSON response.
+    
+    Args:
+        items: JSON-serializable items, one per line
+        headers: Extra response headers
+    
+    Returns:
+        Response with the encoded items
+    """
+    return _chunked_response(iter_ndjson(items), NDJSON_MEDIA_TYPE, headers)
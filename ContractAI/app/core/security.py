@@ -1,11 +1,16 @@
+import uuid
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional, Union, Any
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db, User
+from app.core.principal_cache import PrincipalCache, snapshot_user, user_from_snapshot
 from app.config import get_settings
 
 settings = get_settings()
@@ -27,6 +32,24 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# bcrypt is deliberately slow; run it off the event loop on a bounded pool
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
 def create_access_token(
     subject: Union[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -47,19 +70,23 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
+    # jti identifies the token in the principal cache
+    to_encode = {"exp": expire, "sub": str(subject), "jti": uuid.uuid4().hex}
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Validate access token and return current user.
     
+    The user may come from the principal cache, detached from the session
+    and without the password hash; load it from db before modifying it.
+    
     Args:
         token: JWT token
         db: Database session
@@ -86,9 +113,20 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == int(user_id)).first()
-    if user is None:
-        raise credentials_exception
+    # Tokens issued before jti was added are identified by their hash
+    token_id = payload.get("jti") or hashlib.sha256(token.encode()).hexdigest()
+    
+    # Served from the principal cache when possible, skipping the users table
+    cached = await PrincipalCache.get(int(user_id), token_id)
+    if cached is not None:
+        user = user_from_snapshot(cached)
+    else:
+        # Read first, so an invalidation while the user is loaded is detected
+        generation = await PrincipalCache.generation(int(user_id))
+        user = await db.get(User, int(user_id))
+        if user is None:
+            raise credentials_exception
+        await PrincipalCache.set(user.id, token_id, snapshot_user(user), generation)
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -98,7 +136,7 @@ def get_current_user(
     return user
 
 
-def get_current_active_superuser(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_superuser(current_user: User = Depends(get_current_user)) -> User:
     """
     Get current user and verify if it's a superuser.
     
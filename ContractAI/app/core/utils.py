@@ -1,10 +1,12 @@
 import os
 import random
 import string
+import base64
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import json
-from datetime import datetime
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
 logger = logging.getLogger(__name__)
 
@@ -44,21 +46,22 @@ def generate_storage_path(user_id: int, filename: str) -> str:
     return f"{user_id}/{timestamp}_{random_string}_{safe_filename}"
 
 
-def verify_document_access(user_id: int, document_id: int, db) -> bool:
+async def verify_document_access(user_id: int, document_id: int, db) -> bool:
     """
     Verify if a user has access to a document.
     
     Args:
         user_id: ID of the user
         document_id: ID of the document
-        db: Database session
+        db: Async database session
         
     Returns:
         True if user has access to the document, False otherwise
     """
     from app.database import Document
     
-    document = db.query(Document).filter(Document.id == document_id).first()
+    # Served from the session's identity map when the handler already loaded it
+    document = await db.get(Document, document_id)
     if not document:
         return False
     
@@ -71,6 +74,42 @@ def verify_document_access(user_id: int, document_id: int, db) -> bool:
     return False
 
 
+def encode_cursor(created_at: datetime, document_id: int) -> str:
+    """
+    Encode an opaque pagination cursor for a document position.
+    
+    Args:
+        created_at: Creation time of the last document on the page
+        document_id: ID of the last document on the page
+        
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), document_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a pagination cursor created by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+        
+    Returns:
+        Tuple of (created_at, document_id)
+        
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, document_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(document_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
 def chunks(lst: List[Any], n: int) -> List[List[Any]]:
     """
     Split a list into chunks of size n.
@@ -118,4 +157,103 @@ def safe_json_loads(json_str: str, default: Optional[Any] = None) -> Any:
         return json.loads(json_str)
     except (json.JSONDecodeError, TypeError) as e:
         logger.warning(f"Error parsing JSON: {e}")
-        return default if default is not None else {}
\ No newline at end of file
+        return default if default is not None else {}
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from version components.
+    
+    Args:
+        parts: Values identifying the representation's version; datetimes
+            are reduced to their digits
+        
+    Returns:
+        ETag header value
+    """
+    values = [
+        part.strftime("%Y%m%d%H%M%S%f") if isinstance(part, datetime) else str(part)
+        for part in parts
+    ]
+    return f'W/"{"-".join(values)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag using weak comparison.
+    
+    Args:
+        if_none_match: Header value, possibly a comma-separated list or *
+        etag: Current ETag
+        
+    Returns:
+        True if the client's copy is current
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    current = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+def is_not_modified(headers: Any, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluate conditional GET headers.
+    
+    If-None-Match takes precedence; If-Modified-Since is only consulted when
+    it is absent, at the one-second precision of HTTP dates.
+    
+    Args:
+        headers: Request headers
+        etag: Current ETag
+        last_modified: Current modification time
+        
+    Returns:
+        True if a 304 Not Modified response should be sent
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        return int(last_modified.timestamp()) <= int(since.timestamp())
+    
+    return False
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """
+    Get validator and Cache-Control headers for a cacheable response.
+    
+    Args:
+        etag: Current ETag
+        last_modified: Current modification time
+        
+    Returns:
+        Headers to set on 200 and 304 responses
+    """
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+    
+    from app.config import get_settings
+    cache_control = get_settings().ANALYSIS_CACHE_CONTROL
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    
+    return headers
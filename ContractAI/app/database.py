@@ -1,21 +1,86 @@
 import json
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, create_engine, JSON
+from sqlalchemy import (
+    Column, Integer, BigInteger, Float, String, ForeignKey, DateTime, Text, Boolean, Index, create_engine, JSON,
+    literal_column, text as sql_text
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from sqlalchemy.sql import func
 from app.config import get_settings
+from app.monitoring.tracing import instrument_db_commits
 
 settings = get_settings()
 
-# Create SQLAlchemy engine
+# SQLite connections are shared between the event loop and threadpool dependencies
+connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
+
+# Create SQLAlchemy engine for Celery tasks, scripts and schema creation
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,  # Check connection before using from pool
+    connect_args=connect_args,
 )
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def get_async_database_url(url: str) -> str:
+    """
+    Get the async driver URL for a database URL.
+    
+    Args:
+        url: Database URL using a sync driver
+        
+    Returns:
+        URL using asyncpg for Postgres or aiosqlite for SQLite
+    """
+    scheme, _, rest = url.partition("://")
+    base = scheme.split("+")[0]
+    if base in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if base == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def _async_engine_options(url: str) -> dict:
+    """Get pool and driver options for the async engine."""
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool class; sizing options do not apply
+        return {}
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+    if url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+# Create async engine for API handlers, so queries do not block the event loop
+async_database_url = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(
+    async_database_url,
+    pool_pre_ping=True,
+    **_async_engine_options(async_database_url),
+)
+
+# Objects stay usable after commit; reloading them would need another await
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Record a span for each commit from sync and async sessions when tracing is enabled
+instrument_db_commits(Session)
+
 # Create base class for declarative models
 Base = declarative_base()
 
@@ -44,6 +109,8 @@ class Document(Base):
     name = Column(String, index=True)
     storage_path = Column(String, nullable=False)
     content_type = Column(String)
+    # SHA-256 of the uploaded file, to find identical uploads
+    content_hash = Column(String(64), index=True, nullable=True)
     status = Column(String, index=True, default="uploaded")  # uploaded, processing, processed, error
     error_message = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
@@ -53,18 +120,46 @@ class Document(Base):
     # Relationships
     owner = relationship("User", back_populates="documents")
     analysis = relationship("Analysis", back_populates="document", uselist=False)
+    
+    __table_args__ = (
+        # Keyset pagination of a user's documents, newest first, with and
+        # without a status filter
+        Index("ix_documents_owner_status_created_id", "owner_id", "status", "created_at", "id"),
+        Index("ix_documents_owner_created_id", "owner_id", "created_at", "id"),
+        # Keyset scan of expired documents by the retention cleanup
+        Index("ix_documents_status_created_id", "status", "created_at", "id"),
+    )
+
+
+# JSONB on Postgres so clause and risk containment queries can use GIN indexes
+AnalysisJSON = JSON().with_variant(JSONB(), "postgresql")
 
 
 class Analysis(Base):
     __tablename__ = "analyses"
+    __table_args__ = (
+        # Serve @> containment filters across analyses (see migrations/002)
+        Index("ix_analyses_clauses_gin", "clauses", postgresql_using="gin",
+              postgresql_ops={"clauses": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+        Index("ix_analyses_risks_gin", "risks", postgresql_using="gin",
+              postgresql_ops={"risks": "jsonb_path_ops"}).ddl_if(dialect="postgresql"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("documents.id"), unique=True)
-    clauses = Column(JSON, default=dict)
-    risks = Column(JSON, default=dict)
-    comparisons = Column(JSON, default=dict)
-    recommendations = Column(JSON, default=dict)
+    clauses = Column(AnalysisJSON, default=list)
+    risks = Column(AnalysisJSON, default=list)
+    comparisons = Column(AnalysisJSON, default=list)
+    recommendations = Column(AnalysisJSON, default=list)
     summary = Column(Text, nullable=True)
+    # ANALYSIS_PIPELINE_VERSION the analysis was produced with
+    pipeline_version = Column(String, nullable=True)
+    # LLM usage of computing the analysis; copies keep the original's
+    llm_tokens = Column(Integer, nullable=True)
+    llm_cost = Column(Float, nullable=True)
+    # Document whose analysis was copied, if it was reused; not a foreign key,
+    # so the copy outlives the original
+    reused_from_document_id = Column(Integer, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -72,10 +167,101 @@ class Analysis(Base):
     document = relationship("Document", back_populates="analysis")
 
 
+def search_vector(column):
+    """
+    Get the full-text search vector expression for a text column.
+    
+    The text search configuration is rendered inline so queries match the
+    expression index on Postgres.
+    """
+    return func.to_tsvector(literal_column("'english'"), column)
+
+
+class SearchPassage(Base):
+    """A clause or content passage of a processed document, indexed for search."""
+    __tablename__ = "search_passages"
+    
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    # Copied from the document so searches are scoped without a join
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    kind = Column(String, nullable=False)  # clause, content
+    clause_type = Column(String, nullable=True)
+    section = Column(String, nullable=True)
+    ordinal = Column(Integer, nullable=False, default=0)
+    text = Column(Text, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_search_passages_owner_id", "owner_id"),
+        Index("ix_search_passages_document_id", "document_id"),
+        # Trigram matching for partial words and misspellings (see migrations/003)
+        Index("ix_search_passages_text_trgm", "text", postgresql_using="gin",
+              postgresql_ops={"text": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        # Ranked full-text matching on the same expression as search_vector(),
+        # so no tsvector column is stored
+        Index("ix_search_passages_text_fts", sql_text("to_tsvector('english', text)"),
+              postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+
+
+class StatCounter(Base):
+    """
+    A shard of a dashboard counter, maintained by app.services.stats_service.
+    
+    A counter's value is the sum of its shards; spreading increments over
+    shards avoids every upload contending for one row lock.
+    """
+    __tablename__ = "stat_counters"
+    
+    name = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class BatchJob(Base):
+    """A batch analysis request; its documents are run by app.services.batch_service."""
+    __tablename__ = "batch_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # queued, running, completed, cancelled
+    total = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class BatchItem(Base):
+    """One document of a batch job."""
+    __tablename__ = "batch_items"
+    
+    id = Column(Integer, primary_key=True)
+    batch_id = Column(Integer, ForeignKey("batch_jobs.id"), nullable=False)
+    # Not a foreign key: requested IDs are recorded even if the document is missing or deleted
+    document_id = Column(Integer, nullable=False)
+    # Copied from the batch so the dispatcher can share slots between owners without a join
+    owner_id = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="queued")  # queued, dispatched, running, succeeded, failed, skipped, cancelled
+    error_message = Column(Text, nullable=True)
+    dispatched_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    
+    __table_args__ = (
+        # Progress counts and per-item results of a batch
+        Index("ix_batch_items_batch_status", "batch_id", "status"),
+        # Queued and in-flight items across batches, for the dispatcher
+        Index("ix_batch_items_status_batch_id", "status", "batch_id", "id"),
+    )
+
+
 # Database session dependency
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
\ No newline at end of file
+
+
+# Keep dashboard counters in step with document and user changes in every session
+from app.services.stats_service import instrument_stat_counters  # noqa: E402
+
+instrument_stat_counters(Session)
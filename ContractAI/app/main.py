@@ -1,10 +1,15 @@
 import logging
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, status, Response
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth, documents, analysis, admin
 from app.core.errors import configure_exception_handlers
-from app.database import Base, engine
+from app.database import Base, engine, async_engine
 from app.config import get_settings
+from app.services.service_factory import ServiceFactory
+from app.services.stats_service import start_reconciliation, stop_reconciliation
+from app.services.document_service import wait_for_local_processing
+from app.monitoring.prometheus import PrometheusMiddleware, generate_metrics
+from app.monitoring.tracing import configure_tracing
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -23,8 +28,15 @@ app = FastAPI(
     version="1.0.0",
 )
 
-# Configure CORS
 settings = get_settings()
+
+# Seconds to let documents processed in the API process finish on shutdown
+LOCAL_PROCESSING_SHUTDOWN_TIMEOUT = 30.0
+
+# Export request, pipeline and provider call spans when TRACING_ENABLED is set
+configure_tracing("contractai-api")
+
+# Configure CORS
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -33,6 +45,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request latency per route for the /metrics endpoint
+app.add_middleware(PrometheusMiddleware, engine=async_engine)
+
 # Configure exception handlers
 configure_exception_handlers(app)
 
@@ -43,6 +58,24 @@ app.include_router(analysis.router, prefix="/api/analysis", tags=["Analysis"])
 app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 
+@app.on_event("startup")
+async def start_background_jobs():
+    """
+    Start periodic reconciliation of the admin dashboard counters.
+    """
+    start_reconciliation()
+
+
+@app.on_event("shutdown")
+async def shutdown_services():
+    """
+    Flush buffered metrics and close shared connections on shutdown.
+    """
+    await stop_reconciliation()
+    await wait_for_local_processing(LOCAL_PROCESSING_SHUTDOWN_TIMEOUT)
+    await ServiceFactory.shutdown()
+
+
 @app.get("/", tags=["Health"])
 async def health_check():
     """
@@ -51,6 +84,15 @@ async def health_check():
     return {"status": "healthy", "version": "1.0.0"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape target with in-process metrics from all workers.
+    """
+    payload, content_type = generate_metrics()
+    return Response(content=payload, media_type=content_type)
+
+
 def run_app():
     """
     Entry point for the application when installed as a package.
@@ -22,11 +22,12 @@ class RiskCreate(BaseModel):
 
 
 class ComparisonCreate(BaseModel):
-    """Model for creating a comparison."""
-    match_score: float = Field(..., description="Similarity score to standard clause")
-    differences: List[Dict[str, Any]] = Field(..., description="Differences from standard")
-    standard_text: str = Field(..., description="Text of the standard clause")
-    document_text: str = Field(..., description="Text from the document")
+    """Model for creating a comparison of two clauses of the same type."""
+    clause_type: str = Field(..., description="Type of the compared clauses")
+    similarities: List[str] = Field(default_factory=list, description="Similarities between the clauses")
+    differences: List[str] = Field(default_factory=list, description="Differences between the clauses")
+    comparison: Dict[str, Any] = Field(default_factory=dict, description="Which clause is more favorable and why")
+    recommendation: Optional[str] = Field(None, description="Which clause to prefer or how to combine them")
 
 
 class RecommendationCreate(BaseModel):
@@ -43,7 +44,7 @@ class AnalysisCreate(BaseModel):
     document_id: int = Field(..., description="Document ID")
     clauses: List[ClauseCreate] = Field(default_factory=list)
     risks: List[RiskCreate] = Field(default_factory=list)
-    comparisons: Dict[str, ComparisonCreate] = Field(default_factory=dict)
+    comparisons: List[ComparisonCreate] = Field(default_factory=list)
     recommendations: List[RecommendationCreate] = Field(default_factory=list)
     summary: Optional[str] = Field(None, description="Executive summary of the document")
 
@@ -52,7 +53,7 @@ class AnalysisUpdate(BaseModel):
     """Model for updating an analysis."""
     clauses: Optional[List[ClauseCreate]] = None
     risks: Optional[List[RiskCreate]] = None
-    comparisons: Optional[Dict[str, ComparisonCreate]] = None
+    comparisons: Optional[List[ComparisonCreate]] = None
     recommendations: Optional[List[RecommendationCreate]] = None
     summary: Optional[str] = None
 
@@ -76,6 +77,57 @@ class BatchAnalysisRequest(BaseModel):
 class BatchAnalysisResponse(BaseModel):
     """Response model for batch analysis."""
     total: int = Field(..., description="Total number of documents in batch")
-    processed: int = Field(..., description="Number of documents processed")
-    failed: int = Field(..., description="Number of documents that failed processing")
-    task_id: Optional[str] = Field(None, description="Task ID for tracking progress")
\ No newline at end of file
+    processed: int = Field(..., description="Number of documents already processed, which are skipped")
+    failed: int = Field(..., description="Number of documents that were not found")
+    queued: int = Field(0, description="Number of documents queued for analysis")
+    batch_id: Optional[int] = Field(None, description="Batch ID for tracking progress")
+    task_id: Optional[str] = Field(None, description="Batch ID as a string, for older clients")
+
+
+class BatchStatusResponse(BaseModel):
+    """Progress of a batch analysis."""
+    id: int
+    status: str = Field(..., description="Batch status (queued, running, completed, cancelled)")
+    total: int = Field(..., description="Total number of documents in batch")
+    counts: Dict[str, int] = Field(..., description="Number of documents per item status")
+    progress: float = Field(..., description="Fraction of documents finished, from 0 to 1")
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class BatchItemResult(BaseModel):
+    """Status of one document in a batch."""
+    document_id: int
+    status: str = Field(
+        ..., description="Item status (queued, dispatched, running, succeeded, failed, skipped, cancelled)"
+    )
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class BatchResultsResponse(BaseModel):
+    """Per-document results of a batch analysis."""
+    batch_id: int
+    total: int = Field(..., description="Number of items matching the filter")
+    items: List[BatchItemResult]
+
+class SearchResult(BaseModel):
+    """A matching clause or content passage."""
+    document_id: int
+    document_name: Optional[str] = None
+    kind: str = Field(..., description="Passage kind (clause, content)")
+    clause_type: Optional[str] = Field(None, description="Clause type for clause passages")
+    section: Optional[str] = Field(None, description="Section of the clause if known")
+    snippet: str = Field(..., description="Matching text with surrounding context")
+    rank: float = Field(..., description="Relevance score; higher is better")
+
+
+class SearchResponse(BaseModel):
+    """Response model for clause and content search."""
+    query: str
+    results: List[SearchResult]
@@ -43,8 +43,9 @@ class DocumentDetailResponse(DocumentResponse):
 
 class DocumentListResponse(BaseModel):
     """Response model for list of documents."""
-    total: int
+    total: Optional[int] = None
     documents: List[DocumentResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, if there is one")
 
 
 class ClauseBase(BaseModel):
@@ -64,9 +65,12 @@ class RiskBase(BaseModel):
 
 
 class ComparisonBase(BaseModel):
-    """Base model for clause comparison results."""
-    match_score: float = Field(..., description="Similarity score to standard clause")
-    differences: List[Dict[str, Any]] = Field(..., description="Differences from standard")
+    """Base model for the comparison of two clauses of the same type."""
+    clause_type: str = Field(..., description="Type of the compared clauses")
+    similarities: List[str] = Field(default_factory=list, description="Similarities between the clauses")
+    differences: List[str] = Field(default_factory=list, description="Differences between the clauses")
+    comparison: Dict[str, Any] = Field(default_factory=dict, description="Which clause is more favorable and why")
+    recommendation: Optional[str] = Field(None, description="Which clause to prefer or how to combine them")
 
 
 class RecommendationBase(BaseModel):
@@ -82,7 +86,7 @@ class AnalysisResponse(BaseModel):
     document_id: int
     clauses: List[ClauseBase] = Field(default_factory=list)
     risks: List[RiskBase] = Field(default_factory=list)
-    comparisons: Dict[str, ComparisonBase] = Field(default_factory=dict)
+    comparisons: List[ComparisonBase] = Field(default_factory=list)
     recommendations: List[RecommendationBase] = Field(default_factory=list)
     summary: Optional[str] = None
     created_at: datetime
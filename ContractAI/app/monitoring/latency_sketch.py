@@ -0,0 +1,210 @@
+"""
+Mergeable latency quantile sketches for ContractAI.
+
+This module implements a DDSketch-style quantile sketch. Values are mapped to
+logarithmically sized buckets, so every quantile estimate is within a fixed
+relative error of the true value. Sketches merge by adding bucket counts,
+which lets each worker write its counts to a Redis hash with HINCRBY and
+readers merge any set of hashes without coordination.
+"""
+
+import math
+from typing import Dict, Any, Iterable, Optional, Union
+
+# Default relative accuracy of quantile estimates (1%)
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Values at or below this are counted in the zero bucket
+MIN_TRACKED_VALUE = 1e-3
+
+# Hash field used for the zero bucket
+ZERO_BUCKET_FIELD = "z"
+
+# Quantiles reported in summaries
+SUMMARY_QUANTILES = {
+    "p50": 0.5,
+    "p90": 0.9,
+    "p99": 0.99,
+    "p99.9": 0.999
+}
+
+
+class LatencySketch:
+    """
+    Quantile sketch with bounded relative error.
+
+    Bucket i holds values in (gamma^(i-1), gamma^i], where
+    gamma = (1 + alpha) / (1 - alpha) for relative accuracy alpha.
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            relative_accuracy: Maximum relative error of quantile estimates
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def key(self, value: float) -> int:
+        """
+        Get the bucket index for a value.
+
+        Args:
+            value: Value to map (must be above MIN_TRACKED_VALUE)
+
+        Returns:
+            Bucket index
+        """
+        return int(math.ceil(math.log(value) / self._log_gamma))
+
+    def bucket_field(self, value: float) -> str:
+        """
+        Get the Redis hash field that a value is counted under.
+
+        Args:
+            value: Value to map
+
+        Returns:
+            Hash field name
+        """
+        if value <= MIN_TRACKED_VALUE:
+            return ZERO_BUCKET_FIELD
+        return str(self.key(value))
+
+    def add(self, value: float, count: int = 1) -> None:
+        """
+        Add a value to the sketch.
+
+        Args:
+            value: Value to add
+            count: Number of times to add it
+        """
+        if value <= MIN_TRACKED_VALUE:
+            self.zero_count += count
+        else:
+            index = self.key(value)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+
+    def merge(self, other: "LatencySketch") -> None:
+        """
+        Merge another sketch into this one.
+
+        Args:
+            other: Sketch with the same relative accuracy
+        """
+        if not math.isclose(other.gamma, self.gamma):
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile.
+
+        Args:
+            q: Quantile between 0 and 1
+
+        Returns:
+            Estimated value, or None if the sketch is empty
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1")
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0.0
+
+        seen = self.zero_count
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Midpoint of the bucket in relative terms
+                return 2 * self.gamma ** index / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.bins) / (self.gamma + 1)
+
+    def percentiles(self) -> Dict[str, Optional[float]]:
+        """
+        Get the standard summary percentiles.
+
+        Returns:
+            Dictionary with p50, p90, p99 and p99.9 estimates
+        """
+        return {name: self.quantile(q) for name, q in SUMMARY_QUANTILES.items()}
+
+    def to_mapping(self) -> Dict[str, int]:
+        """
+        Serialize the sketch to a flat mapping for a Redis hash.
+
+        Returns:
+            Mapping of bucket field to count
+        """
+        mapping = {str(index): count for index, count in self.bins.items()}
+        if self.zero_count:
+            mapping[ZERO_BUCKET_FIELD] = self.zero_count
+        return mapping
+
+    @classmethod
+    def from_mapping(
+        cls,
+        mapping: Dict[Union[str, bytes], Any],
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> "LatencySketch":
+        """
+        Build a sketch from a Redis hash.
+
+        Args:
+            mapping: Mapping of bucket field to count, as returned by HGETALL
+            relative_accuracy: Relative accuracy the hash was written with
+
+        Returns:
+            Sketch with the given counts
+        """
+        sketch = cls(relative_accuracy)
+        for field, count in mapping.items():
+            field = field.decode("utf-8") if isinstance(field, bytes) else field
+            count = int(count)
+            if field == ZERO_BUCKET_FIELD:
+                sketch.zero_count += count
+            else:
+                index = int(field)
+                sketch.bins[index] = sketch.bins.get(index, 0) + count
+            sketch.count += count
+        return sketch
+
+    @classmethod
+    def merged(
+        cls,
+        mappings: Iterable[Dict[Union[str, bytes], Any]],
+        relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY
+    ) -> "LatencySketch":
+        """
+        Build a single sketch from several Redis hashes.
+
+        Args:
+            mappings: Hashes to merge
+            relative_accuracy: Relative accuracy the hashes were written with
+
+        Returns:
+            Merged sketch
+        """
+        sketch = cls(relative_accuracy)
+        for mapping in mappings:
+            if mapping:
+                sketch.merge(cls.from_mapping(mapping, relative_accuracy))
+        return sketch
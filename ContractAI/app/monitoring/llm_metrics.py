@@ -7,14 +7,151 @@ including latency, token counts, costs, and success rates.
 
 import json
 import time
+import hashlib
 import logging
 import uuid
-from typing import Dict, Any, List, Optional, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional, Union
 from datetime import datetime, timedelta
 import aioredis
 
+from app.monitoring.metrics_writer import MetricsWriter
+from app.monitoring.latency_sketch import LatencySketch
+
 logger = logging.getLogger(__name__)
 
+# Rollup resolutions: name -> (bucket size in seconds, bucket key format)
+ROLLUP_RESOLUTIONS = {
+    "1m": (60, "%Y%m%d%H%M"),
+    "1h": (3600, "%Y%m%d%H"),
+}
+
+# How long 1-minute rollups are kept; 1-hour rollups follow retention_days
+MINUTE_ROLLUP_RETENTION_SECONDS = 2 * 86400
+
+# Latency sketch resolutions: name -> bucket key format
+LATENCY_RESOLUTIONS = {
+    "1h": "%Y%m%d%H",
+    "1d": "%Y-%m-%d",
+}
+
+# Dimensions that latency sketches are kept for, besides the overall sketch
+LATENCY_DIMENSIONS = ["provider", "model", "agent", "operation"]
+
+# Counter fields kept in each rollup bucket
+ROLLUP_INT_FIELDS = ["calls", "successful_calls", "failed_calls", "cached_calls", "total_tokens"]
+ROLLUP_FLOAT_FIELDS = ["cost", "latency_ms"]
+
+# Fields of the daily record_call aggregate hashes
+DAILY_INT_FIELDS = [
+    "total_calls", "successful_calls", "failed_calls", "cached_calls",
+    "total_tokens", "prompt_tokens", "completion_tokens"
+]
+DAILY_FLOAT_FIELDS = ["total_cost", "total_latency_ms"]
+DAILY_MODEL_FIELDS = {"calls": 0, "successful_calls": 0, "total_tokens": 0, "total_cost": 0.0}
+DAILY_OPERATION_FIELDS = {"calls": 0, "successful_calls": 0, "total_tokens": 0}
+
+# Updates the daily totals, model and operation hashes for one call in a
+# single atomic step, so concurrent workers never lose increments.
+# KEYS: totals, model hash, operation hash, model index, operation index
+# ARGV: model, operation, success, cached, prompt tokens, completion tokens,
+#       cost, latency_ms, expiry seconds
+DAILY_METRICS_SCRIPT = """
+local success = tonumber(ARGV[3])
+local cached = tonumber(ARGV[4])
+local prompt_tokens = tonumber(ARGV[5])
+local completion_tokens = tonumber(ARGV[6])
+local total_tokens = prompt_tokens + completion_tokens
+
+redis.call('HINCRBY', KEYS[1], 'total_calls', 1)
+redis.call('HINCRBY', KEYS[1], 'successful_calls', success)
+redis.call('HINCRBY', KEYS[1], 'failed_calls', 1 - success)
+redis.call('HINCRBY', KEYS[1], 'cached_calls', cached)
+redis.call('HINCRBY', KEYS[1], 'total_tokens', total_tokens)
+redis.call('HINCRBY', KEYS[1], 'prompt_tokens', prompt_tokens)
+redis.call('HINCRBY', KEYS[1], 'completion_tokens', completion_tokens)
+redis.call('HINCRBYFLOAT', KEYS[1], 'total_cost', ARGV[7])
+redis.call('HINCRBYFLOAT', KEYS[1], 'total_latency_ms', ARGV[8])
+
+redis.call('HINCRBY', KEYS[2], 'calls', 1)
+redis.call('HINCRBY', KEYS[2], 'successful_calls', success)
+redis.call('HINCRBY', KEYS[2], 'total_tokens', total_tokens)
+redis.call('HINCRBYFLOAT', KEYS[2], 'total_cost', ARGV[7])
+
+redis.call('HINCRBY', KEYS[3], 'calls', 1)
+redis.call('HINCRBY', KEYS[3], 'successful_calls', success)
+redis.call('HINCRBY', KEYS[3], 'total_tokens', total_tokens)
+
+redis.call('SADD', KEYS[4], ARGV[1])
+redis.call('SADD', KEYS[5], ARGV[2])
+
+for i = 1, 5 do
+    redis.call('EXPIRE', KEYS[i], ARGV[9])
+end
+return 1
+"""
+DAILY_METRICS_SCRIPT_SHA = hashlib.sha1(DAILY_METRICS_SCRIPT.encode("utf-8")).hexdigest()
+
+
+def _decode(value: Union[bytes, str]) -> str:
+    """Decode a Redis reply value to str."""
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+@dataclass
+class LLMUsage:
+    """LLM calls made for one unit of work, e.g. one document."""
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+
+_current_usage: ContextVar[Optional[LLMUsage]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_llm_usage() -> Iterator[LLMUsage]:
+    """
+    Add up the LLM calls made inside a block.
+    
+    Tasks started inside the block, e.g. by asyncio.gather, add to the same
+    usage. Cached responses are not counted.
+    
+    Yields:
+        Usage, updated as calls complete
+    """
+    usage = LLMUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def record_usage(input_tokens: int, output_tokens: int, cost: float) -> None:
+    """
+    Add an LLM call to the usage being tracked, if any.
+    
+    Args:
+        input_tokens: Number of prompt tokens
+        output_tokens: Number of completion tokens
+        cost: Cost of the call
+    """
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.calls += 1
+        usage.input_tokens += input_tokens
+        usage.output_tokens += output_tokens
+        usage.cost += cost
+
+
 class LLMMetricsTracker:
     """
     Tracks and analyzes LLM usage metrics.
@@ -23,18 +160,48 @@ class LLMMetricsTracker:
     LLM API calls, including latency, token counts, costs, and success rates.
     """
     
-    def __init__(self, redis_client: aioredis.Redis, retention_days: int = 30):
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        retention_days: int = 30,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5
+    ):
         """
         Initialize the LLM metrics tracker.
         
         Args:
             redis_client: Redis client for storing metrics
             retention_days: Number of days to retain metrics data
+            max_queue_size: Maximum number of entries each writer buffers before dropping
+            batch_size: Number of buffered entries that triggers a flush
+            flush_interval: Maximum time in seconds between flushes
         """
         self.redis = redis_client
         self.retention_days = retention_days
         self.metrics_key_prefix = "llm:metrics:"
-        self.daily_metrics_key = "llm:daily_metrics:"
+        self.daily_metrics_key = "llm:daily:"
+        self.events_key_prefix = "llm:events:"
+        self.rollup_key_prefix = "llm:rollup:"
+        self.latency_key_prefix = "llm:latency:"
+        self.latency_sketch = LatencySketch()
+        self.writer = MetricsWriter(
+            redis_client,
+            self._write_llm_call_batch,
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            name="llm_metrics"
+        )
+        self.call_writer = MetricsWriter(
+            redis_client,
+            self._write_call_batch,
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            name="llm_call_metrics"
+        )
         logger.info(f"Initialized LLM metrics tracker with {retention_days} days retention")
     
     async def record_call(
@@ -52,6 +219,9 @@ class LLMMetricsTracker:
         """
         Record metrics for an LLM API call.
         
+        The entry is queued and written in the next pipelined batch; daily
+        aggregates are updated on the Redis server by DAILY_METRICS_SCRIPT.
+        
         Args:
             model_name: Name of the LLM model
             operation: Type of operation (e.g., 'completion', 'embedding')
@@ -100,108 +270,81 @@ class LLMMetricsTracker:
         if metadata:
             metrics_entry["metadata"] = metadata
         
-        # Store the metrics entry
-        metrics_key = f"{self.metrics_key_prefix}{metrics_id}"
-        daily_key = f"{self.daily_metrics_key}{date_str}"
-        
-        try:
-            # Store detailed metrics with expiration
-            expiry_seconds = self.retention_days * 86400  # days to seconds
-            await self.redis.setex(
-                metrics_key,
-                expiry_seconds,
-                json.dumps(metrics_entry)
-            )
-            
-            # Update daily aggregated metrics
-            await self._update_daily_metrics(daily_key, metrics_entry)
-            
-            logger.debug(f"Recorded metrics for {model_name} call with ID {metrics_id}")
-            return metrics_id
-            
-        except Exception as e:
-            logger.warning(f"Error recording metrics: {str(e)}")
-            return metrics_id
+        if self.call_writer.enqueue(metrics_entry):
+            logger.debug(f"Queued metrics for {model_name} call with ID {metrics_id}")
+        return metrics_id
     
-    async def _update_daily_metrics(self, daily_key: str, metrics_entry: Dict[str, Any]) -> None:
+    def _write_call_batch(self, pipe: Any, entries: List[Dict[str, Any]]) -> None:
         """
-        Update daily aggregated metrics.
+        Add the Redis commands for a batch of record_call entries to a pipeline.
         
         Args:
-            daily_key: Redis key for daily metrics
-            metrics_entry: The metrics entry to add
+            pipe: Redis pipeline to add commands to
+            entries: Metrics entries built by record_call
         """
-        try:
-            # Get existing daily metrics or create new
-            daily_metrics_json = await self.redis.get(daily_key)
-            
-            if daily_metrics_json:
-                daily_metrics = json.loads(daily_metrics_json)
-            else:
-                daily_metrics = {
-                    "date": metrics_entry["date"],
-                    "total_calls": 0,
-                    "successful_calls": 0,
-                    "failed_calls": 0,
-                    "cached_calls": 0,
-                    "total_tokens": 0,
-                    "prompt_tokens": 0,
-                    "completion_tokens": 0,
-                    "total_cost": 0.0,
-                    "total_latency_ms": 0,
-                    "models": {},
-                    "operations": {}
-                }
-            
-            # Update overall metrics
-            daily_metrics["total_calls"] += 1
-            daily_metrics["successful_calls"] += 1 if metrics_entry["success"] else 0
-            daily_metrics["failed_calls"] += 0 if metrics_entry["success"] else 1
-            daily_metrics["cached_calls"] += 1 if metrics_entry.get("cached", False) else 0
-            daily_metrics["total_tokens"] += metrics_entry["total_tokens"]
-            daily_metrics["prompt_tokens"] += metrics_entry["prompt_tokens"]
-            daily_metrics["completion_tokens"] += metrics_entry["completion_tokens"]
-            daily_metrics["total_cost"] += metrics_entry["cost"]
-            daily_metrics["total_latency_ms"] += metrics_entry["latency_ms"]
-            
-            # Update model-specific metrics
-            model_name = metrics_entry["model_name"]
-            if model_name not in daily_metrics["models"]:
-                daily_metrics["models"][model_name] = {
-                    "calls": 0,
-                    "successful_calls": 0,
-                    "total_tokens": 0,
-                    "total_cost": 0.0
-                }
-            
-            daily_metrics["models"][model_name]["calls"] += 1
-            daily_metrics["models"][model_name]["successful_calls"] += 1 if metrics_entry["success"] else 0
-            daily_metrics["models"][model_name]["total_tokens"] += metrics_entry["total_tokens"]
-            daily_metrics["models"][model_name]["total_cost"] += metrics_entry["cost"]
-            
-            # Update operation-specific metrics
-            operation = metrics_entry["operation"]
-            if operation not in daily_metrics["operations"]:
-                daily_metrics["operations"][operation] = {
-                    "calls": 0,
-                    "successful_calls": 0,
-                    "total_tokens": 0
-                }
+        expiry_seconds = self.retention_days * 86400  # days to seconds
+        increments: Dict[tuple, int] = {}
+        index_members: Dict[str, set] = {}
+        events_keys = set()
+        
+        def incr(key: str, field: str, amount: int) -> None:
+            increments[(key, field)] = increments.get((key, field), 0) + amount
+        
+        # Load the script in the same pipeline so EVALSHA never sees an empty
+        # script cache, e.g. after a Redis restart
+        pipe.script_load(DAILY_METRICS_SCRIPT)
+        
+        for entry in entries:
+            timestamp = entry["timestamp"]
+            date_str = entry["date"]
+            entry_json = json.dumps(entry)
             
-            daily_metrics["operations"][operation]["calls"] += 1
-            daily_metrics["operations"][operation]["successful_calls"] += 1 if metrics_entry["success"] else 0
-            daily_metrics["operations"][operation]["total_tokens"] += metrics_entry["total_tokens"]
+            # The raw event is stored once, in the day's time index, with its
+            # score kept by ID for get_metrics_by_id
+            events_key = f"{self.events_key_prefix}{date_str}"
+            pipe.zadd(events_key, {entry_json: timestamp})
+            pipe.hset(f"{events_key}:ids", entry["id"], repr(timestamp))
+            events_keys.update((events_key, f"{events_key}:ids"))
             
-            # Store updated daily metrics with expiration
-            expiry_seconds = self.retention_days * 86400  # days to seconds
-            await self.redis.setex(
+            # Update daily aggregates atomically on the server
+            daily_key = f"{self.daily_metrics_key}{date_str}"
+            pipe.evalsha(
+                DAILY_METRICS_SCRIPT_SHA,
+                5,
                 daily_key,
-                expiry_seconds,
-                json.dumps(daily_metrics)
+                f"{daily_key}:models:{entry['model_name']}",
+                f"{daily_key}:operations:{entry['operation']}",
+                f"{daily_key}:model_index",
+                f"{daily_key}:operation_index",
+                entry["model_name"],
+                entry["operation"],
+                1 if entry["success"] else 0,
+                1 if entry["cached"] else 0,
+                entry["prompt_tokens"],
+                entry["completion_tokens"],
+                repr(float(entry["cost"])),
+                repr(float(entry["latency_ms"])),
+                expiry_seconds
             )
             
-        except Exception as e:
-            logger.warning(f"Error updating daily metrics: {str(e)}")
+            # Add the latency to the model and operation sketches; the overall
+            # sketch is fed by record_llm_call only, so no call is counted twice
+            if not entry["cached"]:
+                self._add_latency_sample(
+                    timestamp,
+                    entry["latency_ms"],
+                    {"model": entry["model_name"], "operation": entry["operation"]},
+                    incr,
+                    index_members,
+                    overall=False
+                )
+        
+        for (key, field), amount in increments.items():
+            pipe.hincrby(key, field, amount)
+        for key, members in index_members.items():
+            pipe.sadd(key, *members)
+        for key in events_keys | {key for key, _ in increments} | set(index_members):
+            pipe.expire(key, expiry_seconds)
     
     def _calculate_cost(self, model_name: str, prompt_tokens: int, completion_tokens: int) -> float:
         """
@@ -236,22 +379,44 @@ class LLMMetricsTracker:
         
         return prompt_cost + completion_cost
     
-    async def get_metrics_by_id(self, metrics_id: str) -> Optional[Dict[str, Any]]:
+    async def get_metrics_by_id(self, metrics_id: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Get metrics entry by ID.
         
+        The entry's score is read from the per-day ID hashes, the given day's
+        or every retained day's in one round trip, and the entry is then read
+        from the day's event index by that score.
+        
         Args:
             metrics_id: ID of the metrics entry
+            date: Date the entry was recorded in format 'YYYY-MM-DD'
             
         Returns:
             Metrics entry or None if not found
         """
         try:
-            metrics_key = f"{self.metrics_key_prefix}{metrics_id}"
-            metrics_json = await self.redis.get(metrics_key)
+            if date:
+                dates = [date]
+            else:
+                today = datetime.now()
+                dates = [
+                    (today - timedelta(days=i)).strftime("%Y-%m-%d")
+                    for i in range(self.retention_days + 1)
+                ]
             
-            if metrics_json:
-                return json.loads(metrics_json)
+            pipe = self.redis.pipeline(transaction=False)
+            for day in dates:
+                pipe.hget(f"{self.events_key_prefix}{day}:ids", metrics_id)
+            
+            for day, score in zip(dates, await pipe.execute()):
+                if score is None:
+                    continue
+                score = float(score)
+                members = await self.redis.zrangebyscore(f"{self.events_key_prefix}{day}", score, score)
+                for member in members:
+                    entry = json.loads(member)
+                    if entry["id"] == metrics_id:
+                        return entry
             return None
             
         except Exception as e:
@@ -273,16 +438,132 @@ class LLMMetricsTracker:
             
         try:
             daily_key = f"{self.daily_metrics_key}{date}"
-            daily_metrics_json = await self.redis.get(daily_key)
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hgetall(daily_key)
+            pipe.smembers(f"{daily_key}:model_index")
+            pipe.smembers(f"{daily_key}:operation_index")
+            totals, models, operations = await pipe.execute()
             
-            if daily_metrics_json:
-                return json.loads(daily_metrics_json)
-            return None
+            if not totals:
+                return None
+            
+            models = sorted(_decode(m) for m in models)
+            operations = sorted(_decode(op) for op in operations)
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for model in models:
+                pipe.hgetall(f"{daily_key}:models:{model}")
+            for operation in operations:
+                pipe.hgetall(f"{daily_key}:operations:{operation}")
+            breakdowns = await pipe.execute() if models or operations else []
+            
+            daily_metrics = {"date": date}
+            daily_metrics.update(self._parse_daily_hash(totals, self._daily_total_defaults()))
+            daily_metrics["models"] = {
+                model: self._parse_daily_hash(data, DAILY_MODEL_FIELDS)
+                for model, data in zip(models, breakdowns[:len(models)])
+            }
+            daily_metrics["operations"] = {
+                operation: self._parse_daily_hash(data, DAILY_OPERATION_FIELDS)
+                for operation, data in zip(operations, breakdowns[len(models):])
+            }
+            return daily_metrics
             
         except Exception as e:
             logger.warning(f"Error retrieving daily metrics: {str(e)}")
             return None
     
+    async def get_daily_model_metrics(self, model_name: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get daily aggregated metrics for a single model.
+        
+        Args:
+            model_name: Name of the LLM model
+            date: Date string in format 'YYYY-MM-DD' (defaults to today)
+            
+        Returns:
+            Model metrics or None if the model has no calls that day
+        """
+        return await self._get_daily_breakdown("models", model_name, DAILY_MODEL_FIELDS, date)
+    
+    async def get_daily_operation_metrics(self, operation: str, date: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get daily aggregated metrics for a single operation.
+        
+        Args:
+            operation: Type of operation
+            date: Date string in format 'YYYY-MM-DD' (defaults to today)
+            
+        Returns:
+            Operation metrics or None if the operation has no calls that day
+        """
+        return await self._get_daily_breakdown("operations", operation, DAILY_OPERATION_FIELDS, date)
+    
+    async def _get_daily_breakdown(
+        self,
+        dimension: str,
+        name: str,
+        defaults: Dict[str, Union[int, float]],
+        date: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Read one per-model or per-operation daily hash.
+        
+        Args:
+            dimension: 'models' or 'operations'
+            name: Model or operation name
+            defaults: Field defaults for the hash
+            date: Date string in format 'YYYY-MM-DD' (defaults to today)
+            
+        Returns:
+            Breakdown metrics or None if not found
+        """
+        if not date:
+            date = datetime.now().strftime("%Y-%m-%d")
+            
+        try:
+            data = await self.redis.hgetall(f"{self.daily_metrics_key}{date}:{dimension}:{name}")
+            if not data:
+                return None
+            
+            metrics = self._parse_daily_hash(data, defaults)
+            if metrics["calls"] > 0:
+                metrics["success_rate"] = metrics["successful_calls"] / metrics["calls"]
+            return metrics
+            
+        except Exception as e:
+            logger.warning(f"Error retrieving daily {dimension} metrics: {str(e)}")
+            return None
+    
+    @staticmethod
+    def _daily_total_defaults() -> Dict[str, Union[int, float]]:
+        """Get the zero values of the daily totals hash."""
+        defaults: Dict[str, Union[int, float]] = {field: 0 for field in DAILY_INT_FIELDS}
+        defaults.update({field: 0.0 for field in DAILY_FLOAT_FIELDS})
+        return defaults
+    
+    @staticmethod
+    def _parse_daily_hash(
+        data: Dict[Any, Any],
+        defaults: Dict[str, Union[int, float]]
+    ) -> Dict[str, Union[int, float]]:
+        """
+        Convert a daily aggregate hash to typed values.
+        
+        Args:
+            data: Hash as returned by HGETALL
+            defaults: Field names and zero values; float defaults mark float fields
+            
+        Returns:
+            Dictionary with every default field present
+        """
+        values = {_decode(field): _decode(value) for field, value in data.items()}
+        parsed = dict(defaults)
+        for field, default in defaults.items():
+            if field in values:
+                parsed[field] = float(values[field]) if isinstance(default, float) else int(values[field])
+        return parsed
+    
     async def get_metrics_summary(self, days: int = 7) -> Dict[str, Any]:
         """
         Get a summary of metrics over a period of days.
@@ -321,9 +602,11 @@ class LLMMetricsTracker:
             # Collect daily metrics
             current_date = start_date
             total_latency = 0
+            dates = []
             
             while current_date <= end_date:
                 date_str = current_date.strftime("%Y-%m-%d")
+                dates.append(date_str)
                 daily_metrics = await self.get_daily_metrics(date_str)
                 
                 if daily_metrics:
@@ -389,6 +672,9 @@ class LLMMetricsTracker:
                 if stats["calls"] > 0:
                     stats["success_rate"] = stats["successful_calls"] / stats["calls"]
             
+            # Add tail latency from the merged daily sketches
+            summary["latency_percentiles"] = await self._get_daily_latency_percentiles(dates)
+            
             return summary
             
         except Exception as e:
@@ -414,40 +700,125 @@ class LLMMetricsTracker:
             List of metrics entries
         """
         try:
-            # Parse dates
             start = datetime.strptime(start_date, "%Y-%m-%d")
-            end = datetime.strptime(end_date, "%Y-%m-%d")
+            end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+            events = await self.get_events(start.timestamp(), end.timestamp())
+            return events[::-1]
             
-            # Initialize results
-            results = []
+        except Exception as e:
+            logger.warning(f"Error exporting metrics: {str(e)}")
+            return []
+    
+    async def get_events(
+        self,
+        start_ts: float,
+        end_ts: float,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        Get raw metrics events recorded in a time range, newest first.
+        
+        Only the per-day event indexes that overlap the range are read, from
+        the newest day back, and each page is cut by Redis with
+        ZREVRANGEBYSCORE ... LIMIT, so the cost scales with the page rather
+        than the number of events in the range.
+        
+        Args:
+            start_ts: Start of the range as a Unix timestamp (inclusive)
+            end_ts: End of the range as a Unix timestamp (exclusive)
+            limit: Optional maximum number of events to return
+            offset: Number of newer events to skip
             
-            # Scan through all metrics keys
-            cursor = b'0'
-            pattern = f"{self.metrics_key_prefix}*"
+        Returns:
+            List of metrics entries sorted by timestamp, newest first
+        """
+        try:
+            first_day = datetime.fromtimestamp(start_ts).replace(hour=0, minute=0, second=0, microsecond=0)
+            day = datetime.fromtimestamp(end_ts).replace(hour=0, minute=0, second=0, microsecond=0)
             
-            while cursor:
-                cursor, keys = await self.redis.scan(cursor=cursor, match=pattern, count=100)
+            results = []
+            while day >= first_day and (limit is None or len(results) < limit):
+                events_key = f"{self.events_key_prefix}{day.strftime('%Y-%m-%d')}"
+                day -= timedelta(days=1)
                 
-                # Process each key
-                for key in keys:
-                    metrics_json = await self.redis.get(key)
-                    if metrics_json:
-                        metrics = json.loads(metrics_json)
-                        
-                        # Check if within date range
-                        metrics_date = datetime.strptime(metrics["date"], "%Y-%m-%d")
-                        if start <= metrics_date <= end:
-                            results.append(metrics)
+                # Skip whole days that fall inside the offset without reading them
+                if offset:
+                    count = await self.redis.zcount(events_key, start_ts, f"({end_ts}")
+                    if count <= offset:
+                        offset -= count
+                        continue
                 
-                if cursor == b'0':
-                    break
+                if limit is None and not offset:
+                    members = await self.redis.zrevrangebyscore(events_key, f"({end_ts}", start_ts)
+                else:
+                    members = await self.redis.zrevrangebyscore(
+                        events_key,
+                        f"({end_ts}",
+                        start_ts,
+                        start=offset,
+                        num=-1 if limit is None else limit - len(results)
+                    )
+                offset = 0
+                results.extend(json.loads(member) for member in members)
             
-            # Sort by timestamp
-            results.sort(key=lambda x: x["timestamp"])
             return results
             
         except Exception as e:
-            logger.warning(f"Error exporting metrics: {str(e)}")
+            logger.warning(f"Error retrieving metrics events: {str(e)}")
+            return []
+    
+    async def get_rollups(
+        self,
+        resolution: str,
+        start_ts: float,
+        end_ts: float
+    ) -> List[Dict[str, Any]]:
+        """
+        Get pre-aggregated LLM call rollups for a time range.
+        
+        Args:
+            resolution: Rollup resolution ('1m' or '1h')
+            start_ts: Start of the range as a Unix timestamp (inclusive)
+            end_ts: End of the range as a Unix timestamp (exclusive)
+            
+        Returns:
+            List of rollup buckets with counters, ordered by time
+        """
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unsupported rollup resolution: {resolution}")
+            
+        bucket_seconds, bucket_format = ROLLUP_RESOLUTIONS[resolution]
+        
+        try:
+            bucket_starts = []
+            bucket_ts = start_ts - (start_ts % bucket_seconds)
+            while bucket_ts < end_ts:
+                bucket_starts.append(bucket_ts)
+                bucket_ts += bucket_seconds
+            
+            pipe = self.redis.pipeline(transaction=False)
+            for bucket_ts in bucket_starts:
+                bucket = datetime.fromtimestamp(bucket_ts).strftime(bucket_format)
+                pipe.hgetall(f"{self.rollup_key_prefix}{resolution}:{bucket}")
+            
+            rollups = []
+            for bucket_ts, data in zip(bucket_starts, await pipe.execute()):
+                if not data:
+                    continue
+                data = {_decode(k): v for k, v in data.items()}
+                rollup = {"timestamp": bucket_ts}
+                for field in ROLLUP_INT_FIELDS:
+                    rollup[field] = int(data.get(field, 0))
+                for field in ROLLUP_FLOAT_FIELDS:
+                    rollup[field] = float(data.get(field, 0.0))
+                rollup["avg_latency_ms"] = rollup["latency_ms"] / rollup["calls"] if rollup["calls"] else 0.0
+                rollups.append(rollup)
+            
+            return rollups
+            
+        except Exception as e:
+            logger.warning(f"Error retrieving metrics rollups: {str(e)}")
             return []
 
     async def record_llm_call(
@@ -515,54 +886,259 @@ class LLMMetricsTracker:
         if metadata:
             metrics_entry["metadata"] = metadata
         
-        # Store the metrics entry
-        metrics_key = f"{self.metrics_key_prefix}{metrics_id}"
-        day_key = f"llm:metrics:{date_str}"
+        # Queue the entry; the writer flushes it to Redis in the background
+        self.writer.enqueue(metrics_entry)
+        logger.debug(f"Queued LLM call metrics for {provider}/{model} with ID {metrics_id}")
+        return metrics_id
+
+    def _write_llm_call_batch(self, pipe: Any, entries: List[Dict[str, Any]]) -> None:
+        """
+        Add the Redis commands for a batch of LLM call entries to a pipeline.
         
-        try:
-            # Store detailed metrics with expiration
-            expiry_seconds = self.retention_days * 86400  # days to seconds
-            await self.redis.setex(
-                metrics_key,
-                expiry_seconds,
-                json.dumps(metrics_entry)
-            )
+        Counter increments are summed per key and field before being sent, so a
+        batch costs one command per distinct counter rather than one per call.
+        
+        Args:
+            pipe: Redis pipeline to add commands to
+            entries: LLM call metrics entries
+        """
+        expiry_seconds = self.retention_days * 86400  # days to seconds
+        int_increments: Dict[tuple, int] = {}
+        float_increments: Dict[tuple, float] = {}
+        
+        def incr(key: str, field: str, amount: int) -> None:
+            int_increments[(key, field)] = int_increments.get((key, field), 0) + amount
+        
+        def incr_float(key: str, field: str, amount: float) -> None:
+            float_increments[(key, field)] = float_increments.get((key, field), 0.0) + amount
+        
+        index_members: Dict[str, set] = {}
+        events: Dict[str, Dict[str, float]] = {}
+        event_ids: Dict[str, Dict[str, str]] = {}
+        
+        for entry in entries:
+            entry_json = json.dumps(entry)
+            
+            # The raw event is stored once, in the day's time index, with its
+            # score kept by ID for get_metrics_by_id
+            events_key = f"{self.events_key_prefix}{entry['date']}"
+            events.setdefault(events_key, {})[entry_json] = entry["timestamp"]
+            event_ids.setdefault(f"{events_key}:ids", {})[entry["id"]] = repr(entry["timestamp"])
+            
+            day_key = f"{self.metrics_key_prefix}{entry['date']}"
+            provider_key = f"{day_key}:providers:{entry['provider']}"
+            agent_key = f"{day_key}:agents:{entry['agent']}"
+            
+            # Per-day index sets so readers never have to scan the keyspace
+            index_members.setdefault(f"{day_key}:provider_index", set()).add(entry["provider"])
+            index_members.setdefault(f"{day_key}:agent_index", set()).add(entry["agent"])
+            
+            # Update pre-aggregated rollups
+            for resolution, (_, bucket_format) in ROLLUP_RESOLUTIONS.items():
+                bucket = datetime.fromtimestamp(entry["timestamp"]).strftime(bucket_format)
+                rollup_key = f"{self.rollup_key_prefix}{resolution}:{bucket}"
+                incr(rollup_key, "calls", 1)
+                incr(rollup_key, "successful_calls" if entry["success"] else "failed_calls", 1)
+                incr(rollup_key, "total_tokens", entry["total_tokens"])
+                incr_float(rollup_key, "cost", entry["cost"])
+                incr_float(rollup_key, "latency_ms", entry["latency_ms"])
+                if entry["cached"]:
+                    incr(rollup_key, "cached_calls", 1)
+            
+            # Cache hits carry no latency and would skew the percentiles
+            if not entry["cached"]:
+                self._add_latency_sample(
+                    entry["timestamp"],
+                    entry["latency_ms"],
+                    {
+                        "provider": entry["provider"],
+                        "model": entry["model"],
+                        "agent": entry["agent"],
+                        "operation": (entry.get("metadata") or {}).get("operation")
+                    },
+                    incr,
+                    index_members
+                )
             
             # Update daily counters
-            await self.redis.hincrby(f"{day_key}:counters", "total_calls", 1)
-            await self.redis.hincrby(f"{day_key}:counters", "total_tokens", input_tokens + output_tokens)
-            await self.redis.hincrbyfloat(f"{day_key}:counters", "total_cost", cost)
-            
-            # Update provider-specific counters
-            await self.redis.hincrby(f"{day_key}:providers:{provider}", "calls", 1)
-            await self.redis.hincrby(f"{day_key}:providers:{provider}", "input_tokens", input_tokens)
-            await self.redis.hincrby(f"{day_key}:providers:{provider}", "output_tokens", output_tokens)
-            await self.redis.hincrbyfloat(f"{day_key}:providers:{provider}", "cost", cost)
-            
-            # Update agent-specific counters
-            await self.redis.hincrby(f"{day_key}:agents:{agent}", "calls", 1)
-            await self.redis.hincrby(f"{day_key}:agents:{agent}", "input_tokens", input_tokens)
-            await self.redis.hincrby(f"{day_key}:agents:{agent}", "output_tokens", output_tokens)
-            await self.redis.hincrbyfloat(f"{day_key}:agents:{agent}", "cost", cost)
+            incr(f"{day_key}:counters", "total_calls", 1)
+            incr(f"{day_key}:counters", "total_tokens", entry["total_tokens"])
+            incr_float(f"{day_key}:counters", "total_cost", entry["cost"])
+            
+            # Update provider- and agent-specific counters
+            for key in (provider_key, agent_key):
+                incr(key, "calls", 1)
+                incr(key, "input_tokens", entry["input_tokens"])
+                incr(key, "output_tokens", entry["output_tokens"])
+                incr_float(key, "cost", entry["cost"])
             
             # Update success/failure counters
-            if success:
-                await self.redis.hincrby(f"{day_key}:counters", "successful_calls", 1)
+            if entry["success"]:
+                incr(f"{day_key}:counters", "successful_calls", 1)
             else:
-                await self.redis.hincrby(f"{day_key}:counters", "failed_calls", 1)
-                if error_type:
-                    await self.redis.hincrby(f"{day_key}:errors", error_type, 1)
+                incr(f"{day_key}:counters", "failed_calls", 1)
+                if entry.get("error_type"):
+                    incr(f"{day_key}:errors", entry["error_type"], 1)
             
             # Update cache counters
-            if cached:
-                await self.redis.hincrby(f"{day_key}:counters", "cached_calls", 1)
+            if entry["cached"]:
+                incr(f"{day_key}:counters", "cached_calls", 1)
+        
+        for (key, field), amount in int_increments.items():
+            pipe.hincrby(key, field, amount)
+        for (key, field), amount in float_increments.items():
+            pipe.hincrbyfloat(key, field, amount)
+        
+        for key, members in index_members.items():
+            pipe.sadd(key, *members)
+        for key, mapping in events.items():
+            pipe.zadd(key, mapping)
+        for key, mapping in event_ids.items():
+            pipe.hset(key, mapping=mapping)
+        
+        # Aggregates expire with the detailed entries; minute rollups are trimmed sooner
+        touched = {key for key, _ in int_increments} | {key for key, _ in float_increments}
+        for key in touched | set(index_members) | set(events) | set(event_ids):
+            if key.startswith(f"{self.rollup_key_prefix}1m:"):
+                pipe.expire(key, MINUTE_ROLLUP_RETENTION_SECONDS)
+            else:
+                pipe.expire(key, expiry_seconds)
+
+    def _add_latency_sample(
+        self,
+        timestamp: float,
+        latency_ms: float,
+        dimensions: Dict[str, Optional[str]],
+        incr: Any,
+        index_members: Dict[str, set],
+        overall: bool = True
+    ) -> None:
+        """
+        Count a latency sample in the overall and per-dimension sketches.
+        
+        Each sketch is a Redis hash of bucket counts, so concurrent workers
+        merge their samples with plain HINCRBY.
+        
+        Args:
+            timestamp: Time of the call as a Unix timestamp
+            latency_ms: Latency in milliseconds
+            dimensions: Mapping of dimension name to value (None values are skipped)
+            incr: Callback that adds an integer increment for a hash field
+            index_members: Index set members to add, keyed by index key
+            overall: Whether to count the sample in the overall sketch as well
+        """
+        field = self.latency_sketch.bucket_field(latency_ms)
+        
+        for resolution, bucket_format in LATENCY_RESOLUTIONS.items():
+            bucket = datetime.fromtimestamp(timestamp).strftime(bucket_format)
+            prefix = f"{self.latency_key_prefix}{resolution}:{bucket}"
+            if overall:
+                incr(f"{prefix}:all:all", field, 1)
             
-            logger.debug(f"Recorded LLM call metrics for {provider}/{model} with ID {metrics_id}")
-            return metrics_id
+            for dimension, name in dimensions.items():
+                if name:
+                    incr(f"{prefix}:{dimension}:{name}", field, 1)
+                    index_members.setdefault(f"{prefix}:index:{dimension}", set()).add(name)
+    
+    async def get_latency_percentiles(
+        self,
+        dimension: str = "all",
+        name: str = "all",
+        hours: int = 1
+    ) -> Dict[str, Any]:
+        """
+        Get latency percentiles over the most recent hours.
+        
+        Intended for routing and hedging decisions that need current tail
+        latency for a provider, model, agent or operation.
+        
+        Args:
+            dimension: One of 'all', 'provider', 'model', 'agent' or 'operation'
+            name: Value of the dimension (ignored for 'all')
+            hours: Number of hourly sketches to merge, including the current hour
+            
+        Returns:
+            Dictionary with the sample count and p50, p90, p99 and p99.9 in milliseconds
+        """
+        if dimension == "all":
+            name = "all"
+        
+        try:
+            now = datetime.now()
+            pipe = self.redis.pipeline(transaction=False)
+            for offset in range(hours):
+                bucket = (now - timedelta(hours=offset)).strftime(LATENCY_RESOLUTIONS["1h"])
+                pipe.hgetall(f"{self.latency_key_prefix}1h:{bucket}:{dimension}:{name}")
+            
+            sketch = LatencySketch.merged(await pipe.execute())
+            return {"count": sketch.count, **sketch.percentiles()}
             
         except Exception as e:
-            logger.warning(f"Error recording LLM call metrics: {str(e)}")
-            return metrics_id
+            logger.warning(f"Error retrieving latency percentiles: {str(e)}")
+            return {"count": 0, "error": str(e)}
+    
+    async def _get_daily_latency_percentiles(self, dates: List[str]) -> Dict[str, Any]:
+        """
+        Merge daily latency sketches into overall and per-dimension percentiles.
+        
+        Args:
+            dates: Dates in format 'YYYY-MM-DD'
+            
+        Returns:
+            Dictionary with 'overall' percentiles and a mapping per dimension
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for date_str in dates:
+            prefix = f"{self.latency_key_prefix}1d:{date_str}"
+            pipe.hgetall(f"{prefix}:all:all")
+            for dimension in LATENCY_DIMENSIONS:
+                pipe.smembers(f"{prefix}:index:{dimension}")
+        replies = await pipe.execute()
+        
+        # Collect the overall hashes and the sketch names for each day
+        stride = 1 + len(LATENCY_DIMENSIONS)
+        overall = []
+        names: List[tuple] = []
+        for day_index, date_str in enumerate(dates):
+            day_replies = replies[day_index * stride:(day_index + 1) * stride]
+            overall.append(day_replies[0])
+            for dimension, members in zip(LATENCY_DIMENSIONS, day_replies[1:]):
+                names.extend((date_str, dimension, _decode(member)) for member in members)
+        
+        pipe = self.redis.pipeline(transaction=False)
+        for date_str, dimension, name in names:
+            pipe.hgetall(f"{self.latency_key_prefix}1d:{date_str}:{dimension}:{name}")
+        hashes = await pipe.execute() if names else []
+        
+        grouped: Dict[tuple, List[Dict[Any, Any]]] = {}
+        for (_, dimension, name), data in zip(names, hashes):
+            grouped.setdefault((dimension, name), []).append(data)
+        
+        result: Dict[str, Any] = {
+            "overall": LatencySketch.merged(overall).percentiles()
+        }
+        for dimension in LATENCY_DIMENSIONS:
+            result[f"{dimension}s"] = {}
+        for (dimension, name), mappings in grouped.items():
+            result[f"{dimension}s"][name] = LatencySketch.merged(mappings).percentiles()
+        
+        return result
+
+    async def flush(self) -> int:
+        """
+        Write all buffered LLM call metrics to Redis.
+        
+        Returns:
+            Number of entries written
+        """
+        written = await self.writer.flush()
+        written += await self.call_writer.flush()
+        return written
+
+    async def close(self) -> None:
+        """Flush buffered metrics and stop the background writers."""
+        await self.writer.close()
+        await self.call_writer.close()
 
     async def get_daily_llm_metrics(self, date: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -577,59 +1153,47 @@ class LLMMetricsTracker:
         if not date:
             date = datetime.now().strftime("%Y-%m-%d")
             
-        day_key = f"llm:metrics:{date}"
+        day_key = f"{self.metrics_key_prefix}{date}"
         
         try:
-            # Get counters
-            counters = await self.redis.hgetall(f"{day_key}:counters")
+            # Read the counters and the per-day index sets in one round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.hgetall(f"{day_key}:counters")
+            pipe.hgetall(f"{day_key}:errors")
+            pipe.smembers(f"{day_key}:provider_index")
+            pipe.smembers(f"{day_key}:agent_index")
+            raw_counters, raw_errors, provider_names, agent_names = await pipe.execute()
             
             # Convert string values to appropriate types
-            for key in counters:
+            counters = {}
+            for key, value in raw_counters.items():
+                key = _decode(key)
                 if key in ["total_calls", "successful_calls", "failed_calls", "cached_calls", "total_tokens"]:
-                    counters[key] = int(counters[key])
+                    counters[key] = int(value)
                 elif key in ["total_cost"]:
-                    counters[key] = float(counters[key])
+                    counters[key] = float(value)
             
-            # Get provider metrics
-            providers = {}
-            provider_keys = await self.redis.keys(f"{day_key}:providers:*")
+            errors = {_decode(key): int(value) for key, value in raw_errors.items()}
             
-            for provider_key in provider_keys:
-                provider_name = provider_key.split(":")[-1]
-                provider_data = await self.redis.hgetall(provider_key)
-                
-                # Convert string values to appropriate types
-                for key in provider_data:
-                    if key in ["calls", "input_tokens", "output_tokens"]:
-                        provider_data[key] = int(provider_data[key])
-                    elif key in ["cost"]:
-                        provider_data[key] = float(provider_data[key])
-                
-                providers[provider_name] = provider_data
+            # Fetch the provider and agent hashes named by the indexes
+            provider_names = sorted(_decode(name) for name in provider_names)
+            agent_names = sorted(_decode(name) for name in agent_names)
             
-            # Get agent metrics
-            agents = {}
-            agent_keys = await self.redis.keys(f"{day_key}:agents:*")
+            pipe = self.redis.pipeline(transaction=False)
+            for name in provider_names:
+                pipe.hgetall(f"{day_key}:providers:{name}")
+            for name in agent_names:
+                pipe.hgetall(f"{day_key}:agents:{name}")
+            hashes = await pipe.execute() if provider_names or agent_names else []
             
-            for agent_key in agent_keys:
-                agent_name = agent_key.split(":")[-1]
-                agent_data = await self.redis.hgetall(agent_key)
-                
-                # Convert string values to appropriate types
-                for key in agent_data:
-                    if key in ["calls", "input_tokens", "output_tokens"]:
-                        agent_data[key] = int(agent_data[key])
-                    elif key in ["cost"]:
-                        agent_data[key] = float(agent_data[key])
-                
-                agents[agent_name] = agent_data
-            
-            # Get error metrics
-            errors = await self.redis.hgetall(f"{day_key}:errors")
-            
-            # Convert string values to integers
-            for key in errors:
-                errors[key] = int(errors[key])
+            providers = {
+                name: self._parse_breakdown(data)
+                for name, data in zip(provider_names, hashes[:len(provider_names)])
+            }
+            agents = {
+                name: self._parse_breakdown(data)
+                for name, data in zip(agent_names, hashes[len(provider_names):])
+            }
             
             return {
                 "date": date,
@@ -644,4 +1208,23 @@ class LLMMetricsTracker:
             return {
                 "date": date,
                 "error": str(e)
-            } 
\ No newline at end of file
+            }
+    
+    def _parse_breakdown(self, data: Dict[Any, Any]) -> Dict[str, Union[int, float]]:
+        """
+        Convert a provider or agent counter hash to typed values.
+        
+        Args:
+            data: Raw hash returned by Redis
+            
+        Returns:
+            Dictionary with integer token and call counts and a float cost
+        """
+        parsed = {}
+        for key, value in data.items():
+            key = _decode(key)
+            if key in ["calls", "input_tokens", "output_tokens"]:
+                parsed[key] = int(value)
+            elif key in ["cost"]:
+                parsed[key] = float(value)
+        return parsed
@@ -0,0 +1,192 @@
+"""
+Buffered metrics writer for ContractAI.
+
+This module provides an asynchronous writer that takes metrics entries off the
+request path. Entries are queued in memory and flushed to Redis in pipelined
+batches, either on a short interval or when the batch size is reached.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Any, List, Callable, Optional
+import aioredis
+
+from app.monitoring.prometheus import set_queue_depth, QUEUE_DROPPED
+
+logger = logging.getLogger(__name__)
+
+# Signature of the callback that turns a batch of entries into pipeline commands
+FlushHandler = Callable[[Any, List[Dict[str, Any]]], None]
+
+
+class MetricsWriter:
+    """
+    Queues metrics entries and writes them to Redis in batches.
+
+    Enqueueing never waits on Redis. When the queue is full, new entries are
+    dropped and counted instead of applying backpressure to LLM calls.
+    """
+
+    def __init__(
+        self,
+        redis_client: aioredis.Redis,
+        flush_handler: FlushHandler,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        name: str = "metrics"
+    ):
+        """
+        Initialize the metrics writer.
+
+        Args:
+            redis_client: Redis client for storing metrics
+            flush_handler: Callback that adds the commands for a batch of entries to a pipeline
+            max_queue_size: Maximum number of entries buffered in memory
+            batch_size: Number of entries that triggers an immediate flush
+            flush_interval: Maximum time in seconds an entry waits before being flushed
+            name: Queue name used in Prometheus metrics
+        """
+        self.redis = redis_client
+        self.flush_handler = flush_handler
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+
+        self._queue: List[Dict[str, Any]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+        # Counters exposed through get_stats()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flush_errors = 0
+
+        logger.info(
+            f"Initialized metrics writer (queue size {max_queue_size}, "
+            f"batch size {batch_size}, flush interval {flush_interval}s)"
+        )
+
+    def enqueue(self, entry: Dict[str, Any]) -> bool:
+        """
+        Queue a metrics entry for the next flush.
+
+        Args:
+            entry: The metrics entry to write
+
+        Returns:
+            True if the entry was queued, False if it was dropped
+        """
+        if self._closed or len(self._queue) >= self.max_queue_size:
+            self.dropped += 1
+            QUEUE_DROPPED.labels(queue=self.name).inc()
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Metrics queue full or closed, dropped {self.dropped} entries so far")
+            return False
+
+        self._queue.append(entry)
+        self.enqueued += 1
+        self._ensure_started()
+
+        if len(self._queue) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+        return True
+
+    def _ensure_started(self) -> None:
+        """Start the background flush task on the running event loop if needed."""
+        if self._task is not None and not self._task.done():
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No running loop; entries stay queued until the next flush()
+            return
+
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Flush queued entries on an interval or when the batch size is reached."""
+        while not self._closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Error in metrics flush loop: {str(e)}")
+
+    async def flush(self) -> int:
+        """
+        Write all queued entries to Redis.
+
+        Returns:
+            Number of entries written
+        """
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        written = 0
+        async with self._flush_lock:
+            while self._queue:
+                batch = self._queue[:self.batch_size]
+                del self._queue[:self.batch_size]
+
+                try:
+                    pipe = self.redis.pipeline(transaction=False)
+                    self.flush_handler(pipe, batch)
+                    await pipe.execute()
+                    self.written += len(batch)
+                    written += len(batch)
+                except Exception as e:
+                    # Metrics are best effort; count the batch as dropped
+                    self.flush_errors += 1
+                    self.dropped += len(batch)
+                    QUEUE_DROPPED.labels(queue=self.name).inc(len(batch))
+                    logger.warning(f"Error flushing {len(batch)} metrics entries: {str(e)}")
+
+        set_queue_depth(self.name, len(self._queue))
+        return written
+
+    async def close(self) -> None:
+        """Stop the background task and flush any remaining entries."""
+        self._closed = True
+
+        if self._task is not None:
+            # Wake the loop so it finishes its current flush and exits
+            self._wakeup.set()
+            try:
+                await self._task
+            except Exception as e:
+                logger.warning(f"Error stopping metrics writer: {str(e)}")
+            self._task = None
+
+        await self.flush()
+        logger.info(f"Metrics writer closed ({self.written} written, {self.dropped} dropped)")
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Get writer statistics.
+
+        Returns:
+            Dictionary with queue depth and enqueue, write and drop counts
+        """
+        return {
+            "queue_depth": len(self._queue),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flush_errors": self.flush_errors
+        }
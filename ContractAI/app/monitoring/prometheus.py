@@ -0,0 +1,351 @@
+"""
+Prometheus metrics for ContractAI.
+
+This module defines the in-process counters, gauges and histograms exposed on
+the /metrics endpoint. Recording a value only touches process-local memory, so
+scrapes never cost a Redis round trip.
+
+When the PROMETHEUS_MULTIPROC_DIR environment variable is set, prometheus_client
+writes values to memory-mapped files in that directory and the /metrics
+endpoint aggregates every worker process. The directory must be empty when the
+server starts. Under gunicorn, gunicorn.conf.py marks exited workers as dead so
+their live gauges are dropped.
+"""
+
+import os
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from prometheus_client import (
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# Buckets for HTTP requests and pipeline stages (seconds)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Buckets for provider calls (seconds)
+LLM_BUCKETS = (0.25, 0.5, 1, 2, 4, 8, 15, 30, 60, 120)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "contractai_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=REQUEST_BUCKETS,
+)
+
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "contractai_http_requests_in_progress",
+    "HTTP requests currently being handled",
+    multiprocess_mode="livesum",
+)
+
+ORCHESTRATOR_STAGE_DURATION = Histogram(
+    "contractai_orchestrator_stage_duration_seconds",
+    "Duration of AgentOrchestrator.process_document stages",
+    ["stage"],
+    buckets=REQUEST_BUCKETS,
+)
+
+LLM_CALL_DURATION = Histogram(
+    "contractai_llm_call_duration_seconds",
+    "LLM provider call latency including retries",
+    ["provider", "agent", "operation", "outcome"],
+    buckets=LLM_BUCKETS,
+)
+
+LLM_TOKENS = Counter(
+    "contractai_llm_tokens",
+    "Tokens sent to and received from LLM providers",
+    ["provider", "agent", "direction"],
+)
+
+CACHE_REQUESTS = Counter(
+    "contractai_cache_requests",
+    "Cache lookups by cache, tier and result",
+    ["cache", "tier", "result"],
+)
+
+QUEUE_DEPTH = Gauge(
+    "contractai_queue_depth",
+    "Number of items waiting in an in-process queue",
+    ["queue"],
+    multiprocess_mode="livesum",
+)
+
+QUEUE_DROPPED = Counter(
+    "contractai_queue_dropped",
+    "Items dropped because an in-process queue was full",
+    ["queue"],
+)
+
+DOCUMENT_ANALYSES = Counter(
+    "contractai_document_analyses",
+    "Saved document analyses by source: computed, or reused from an identical document",
+    ["source"],
+)
+
+LLM_COST_AVOIDED = Counter(
+    "contractai_llm_cost_avoided_dollars",
+    "Estimated LLM spend avoided by reusing the analyses of identical documents",
+)
+
+DB_POOL_CONNECTIONS = Gauge(
+    "contractai_db_pool_connections",
+    "Database connection pool usage by state",
+    ["state"],
+    multiprocess_mode="livesum",
+)
+
+# Label children resolved once; labels() takes a lock on every lookup
+_stage_children: Dict[str, Any] = {}
+_cache_children: Dict[Tuple[str, str, str], Any] = {}
+_llm_call_children: Dict[Tuple[str, str, str, str], Any] = {}
+_llm_token_children: Dict[Tuple[str, str, str], Any] = {}
+_http_children: Dict[Tuple[str, str, str], Any] = {}
+
+# Engines whose pool gauges are refreshed when metrics are scraped
+_db_pool_engines: List[Any] = []
+
+# With several worker processes, each refreshes its own pool gauges at most
+# this often while serving requests, as only one of them serves a scrape
+DB_POOL_REFRESH_SECONDS = 5.0
+
+
+def observe_stage_duration(stage: str, seconds: float) -> None:
+    """
+    Record the duration of an orchestrator stage.
+
+    Args:
+        stage: Stage name
+        seconds: Duration in seconds
+    """
+    child = _stage_children.get(stage)
+    if child is None:
+        child = _stage_children.setdefault(stage, ORCHESTRATOR_STAGE_DURATION.labels(stage=stage))
+    child.observe(seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Time a block of code as an orchestrator stage.
+
+    Args:
+        stage: Stage name
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage_duration(stage, time.perf_counter() - start)
+
+
+def record_llm_call(
+    provider: str,
+    agent: str,
+    operation: Optional[str],
+    seconds: float,
+    success: bool,
+    input_tokens: int = 0,
+    output_tokens: int = 0
+) -> None:
+    """
+    Record latency and token counts for a provider call.
+
+    Args:
+        provider: LLM provider name
+        agent: Agent name
+        operation: Operation name, if known
+        seconds: Call latency in seconds
+        success: Whether the call succeeded
+        input_tokens: Number of prompt tokens
+        output_tokens: Number of completion tokens
+    """
+    key = (provider, agent, operation or "call_llm", "success" if success else "error")
+    child = _llm_call_children.get(key)
+    if child is None:
+        child = _llm_call_children.setdefault(
+            key, LLM_CALL_DURATION.labels(provider=provider, agent=agent, operation=key[2], outcome=key[3])
+        )
+    child.observe(seconds)
+
+    for direction, tokens in (("input", input_tokens), ("output", output_tokens)):
+        if not tokens:
+            continue
+        token_key = (provider, agent, direction)
+        child = _llm_token_children.get(token_key)
+        if child is None:
+            child = _llm_token_children.setdefault(
+                token_key, LLM_TOKENS.labels(provider=provider, agent=agent, direction=direction)
+            )
+        child.inc(tokens)
+
+
+def record_cache_lookup(cache: str, tier: str, hit: bool) -> None:
+    """
+    Record a cache hit or miss.
+
+    Args:
+        cache: Cache name (e.g., 'llm_response')
+        tier: Cache tier (e.g., 'redis', 'local')
+        hit: Whether the lookup was a hit
+    """
+    key = (cache, tier, "hit" if hit else "miss")
+    child = _cache_children.get(key)
+    if child is None:
+        child = _cache_children.setdefault(key, CACHE_REQUESTS.labels(cache=cache, tier=tier, result=key[2]))
+    child.inc()
+
+
+def record_document_analysis(reused: bool, llm_cost: float = 0.0) -> None:
+    """
+    Record a saved document analysis.
+
+    Args:
+        reused: Whether the analysis was copied from an identical document
+        llm_cost: LLM cost of the analysis; for a reused one, the spend avoided
+    """
+    DOCUMENT_ANALYSES.labels(source="reused" if reused else "computed").inc()
+    if reused and llm_cost:
+        LLM_COST_AVOIDED.inc(llm_cost)
+
+
+def set_queue_depth(queue: str, depth: int) -> None:
+    """
+    Set the current depth of an in-process queue.
+
+    Args:
+        queue: Queue name
+        depth: Number of items waiting
+    """
+    QUEUE_DEPTH.labels(queue=queue).set(depth)
+
+
+def register_db_pool(engine: Any) -> None:
+    """
+    Report an engine's connection pool usage when metrics are scraped.
+
+    Args:
+        engine: SQLAlchemy engine whose pool should be reported
+    """
+    if engine not in _db_pool_engines:
+        _db_pool_engines.append(engine)
+
+
+def update_db_pool_metrics(engine: Any) -> None:
+    """
+    Update connection pool gauges from a SQLAlchemy engine.
+
+    Args:
+        engine: SQLAlchemy engine whose pool should be reported
+    """
+    pool = engine.pool
+    try:
+        DB_POOL_CONNECTIONS.labels(state="checked_out").set(pool.checkedout())
+        DB_POOL_CONNECTIONS.labels(state="checked_in").set(pool.checkedin())
+        DB_POOL_CONNECTIONS.labels(state="overflow").set(max(pool.overflow(), 0))
+        DB_POOL_CONNECTIONS.labels(state="size").set(pool.size())
+    except AttributeError:
+        # Pools such as NullPool or StaticPool do not track usage
+        pass
+
+
+def generate_metrics() -> Tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (payload, content type)
+    """
+    for engine in _db_pool_engines:
+        update_db_pool_metrics(engine)
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """
+    Drop the live gauges of an exited worker process.
+
+    Args:
+        pid: Process ID of the worker
+    """
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware that records HTTP request latency per route template.
+
+    Using the route template (e.g., /api/documents/{document_id}) rather than
+    the raw path keeps label cardinality bounded. Pool usage is read when
+    metrics are scraped, not per request, except that with several worker
+    processes each refreshes its own gauges every DB_POOL_REFRESH_SECONDS.
+    """
+
+    def __init__(self, app: Any, engine: Optional[Any] = None):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: ASGI application to wrap
+            engine: Optional SQLAlchemy engine whose pool usage is reported
+        """
+        self.app = app
+        self.engine = engine
+        self.multiprocess = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+        self._pool_refreshed_at = 0.0
+        if engine is not None:
+            register_db_pool(engine)
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or scope.get("path") == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        HTTP_REQUESTS_IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            HTTP_REQUESTS_IN_PROGRESS.dec()
+
+            route = scope.get("route")
+            key = (scope.get("method", ""), getattr(route, "path", None) or "unmatched", str(status_code))
+            child = _http_children.get(key)
+            if child is None:
+                child = _http_children.setdefault(
+                    key, HTTP_REQUEST_DURATION.labels(method=key[0], route=key[1], status=key[2])
+                )
+            child.observe(duration)
+
+            if self.multiprocess and self.engine is not None:
+                now = time.monotonic()
+                if now - self._pool_refreshed_at >= DB_POOL_REFRESH_SECONDS:
+                    self._pool_refreshed_at = now
+                    update_db_pool_metrics(self.engine)
@@ -0,0 +1,336 @@
+"""
+Distributed tracing for ContractAI.
+
+This module wraps the OpenTelemetry API so the rest of the code can open spans
+without caring whether tracing is installed or enabled. When the
+opentelemetry packages are missing, or TRACING_ENABLED is false, spans are
+no-ops and cost a context manager call.
+
+Spans are sampled at the trace root with TRACING_SAMPLE_RATIO and child spans
+follow their parent's decision, so a sampled request is traced end to end
+through the API, Celery tasks, the orchestrator and every provider call.
+Exporters:
+    console: Human readable spans on stdout
+    file: One JSON span per line appended to TRACING_FILE_PATH
+    otlp: OTLP over HTTP to TRACING_OTLP_ENDPOINT (needs
+          opentelemetry-exporter-otlp-proto-http)
+"""
+
+import os
+import logging
+import functools
+from contextlib import contextmanager
+from typing import Dict, Any, Callable, Iterator, Optional
+
+from app.config import get_settings
+
+try:
+    from opentelemetry import trace, context as otel_context, propagate
+    from opentelemetry.propagators.textmap import Getter
+    OTEL_AVAILABLE = True
+except ImportError:
+    OTEL_AVAILABLE = False
+    Getter = object
+
+logger = logging.getLogger(__name__)
+
+TRACER_NAME = "contractai"
+
+_configured = False
+
+# Open Celery task spans and context tokens, keyed by task ID
+_task_spans: Dict[str, tuple] = {}
+
+
+class _NoOpSpan:
+    """Stand-in span used when OpenTelemetry is not installed."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, attributes: Dict[str, Any]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoOpSpan()
+
+
+def configure_tracing(service_name: str = "contractai-api") -> bool:
+    """
+    Install the tracer provider, sampler and exporter from settings.
+
+    Safe to call more than once; only the first call in a process has effect.
+
+    Args:
+        service_name: Service name reported on every span
+
+    Returns:
+        True if spans will be recorded and exported
+    """
+    global _configured
+
+    if _configured:
+        return True
+
+    settings = get_settings()
+    if not settings.TRACING_ENABLED:
+        return False
+
+    if not OTEL_AVAILABLE:
+        logger.warning("TRACING_ENABLED is set but opentelemetry is not installed; tracing disabled")
+        return False
+
+    try:
+        # Import here to avoid SDK dependencies if tracing is not used
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": service_name}),
+            sampler=ParentBased(TraceIdRatioBased(settings.TRACING_SAMPLE_RATIO)),
+        )
+        provider.add_span_processor(BatchSpanProcessor(_create_exporter(settings)))
+        trace.set_tracer_provider(provider)
+
+    except Exception as e:
+        logger.warning(f"Error configuring tracing: {str(e)}")
+        return False
+
+    _configured = True
+    logger.info(
+        f"Tracing enabled for {service_name} ({settings.TRACING_EXPORTER} exporter, "
+        f"sample ratio {settings.TRACING_SAMPLE_RATIO})"
+    )
+    return True
+
+
+def _create_exporter(settings: Any) -> Any:
+    """
+    Create the span exporter selected by TRACING_EXPORTER.
+
+    Args:
+        settings: Application settings
+
+    Returns:
+        Span exporter instance
+    """
+    from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+
+    exporter = settings.TRACING_EXPORTER.lower()
+
+    if exporter == "console":
+        return ConsoleSpanExporter()
+
+    elif exporter == "file":
+        # Line-buffered so spans survive a crashed worker
+        out = open(settings.TRACING_FILE_PATH, "a", buffering=1)
+        return ConsoleSpanExporter(
+            out=out,
+            formatter=lambda span: span.to_json(indent=None) + os.linesep,
+        )
+
+    elif exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        if settings.TRACING_OTLP_ENDPOINT:
+            return OTLPSpanExporter(endpoint=settings.TRACING_OTLP_ENDPOINT)
+        return OTLPSpanExporter()
+
+    else:
+        raise ValueError(f"Unsupported tracing exporter: {settings.TRACING_EXPORTER}")
+
+
+def tracing_enabled() -> bool:
+    """
+    Check whether spans are being recorded in this process.
+
+    Returns:
+        True if configure_tracing has installed a provider
+    """
+    return _configured
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """
+    Open a span as the current span for the enclosed block.
+
+    Exceptions raised in the block are recorded on the span and re-raised.
+
+    Args:
+        name: Span name (e.g., 'orchestrator.chunking')
+        attributes: Initial span attributes
+
+    Yields:
+        The span, or a no-op span when tracing is unavailable
+    """
+    if not OTEL_AVAILABLE:
+        yield _NOOP_SPAN
+        return
+
+    tracer = trace.get_tracer(TRACER_NAME)
+    with tracer.start_as_current_span(name, attributes=attributes) as span:
+        yield span
+
+
+def current_span() -> Any:
+    """
+    Get the active span.
+
+    Returns:
+        The current span, or a no-op span when tracing is unavailable
+    """
+    if not OTEL_AVAILABLE:
+        return _NOOP_SPAN
+    return trace.get_current_span()
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator that runs an async function inside a span.
+
+    The wrapped function keeps its signature, so it can be used on FastAPI
+    route handlers.
+
+    Args:
+        name: Span name
+
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with start_span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def inject_context(carrier: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Write the current trace context into a carrier, e.g. message headers.
+
+    Args:
+        carrier: Mutable mapping to add propagation headers to
+
+    Returns:
+        The carrier
+    """
+    if OTEL_AVAILABLE:
+        propagate.inject(carrier)
+    return carrier
+
+
+class _TaskRequestGetter(Getter):
+    """Reads propagation headers from a Celery task request."""
+
+    def get(self, carrier: Any, key: str) -> Optional[list]:
+        value = getattr(carrier, key, None)
+        if value is None and isinstance(getattr(carrier, "headers", None), dict):
+            value = carrier.headers.get(key)
+        if value is None:
+            return None
+        return value if isinstance(value, list) else [value]
+
+    def keys(self, carrier: Any) -> list:
+        return []
+
+
+def instrument_db_commits(session_factory: Any) -> None:
+    """
+    Record a span for every commit made by sessions from a factory.
+
+    Args:
+        session_factory: SQLAlchemy sessionmaker or Session class to instrument;
+            async sessions are covered through their sync Session class
+    """
+    from sqlalchemy import event
+
+    def before_commit(session: Any) -> None:
+        if not _configured:
+            return
+        tracer = trace.get_tracer(TRACER_NAME)
+        session.info["trace_commit_span"] = tracer.start_span("db.commit")
+
+    def after_commit(session: Any) -> None:
+        span = session.info.pop("trace_commit_span", None)
+        if span is not None:
+            span.end()
+
+    def after_rollback(session: Any) -> None:
+        span = session.info.pop("trace_commit_span", None)
+        if span is not None:
+            span.set_attribute("db.rolled_back", True)
+            span.set_status(trace.Status(trace.StatusCode.ERROR, "commit rolled back"))
+            span.end()
+
+    event.listen(session_factory, "before_commit", before_commit)
+    event.listen(session_factory, "after_commit", after_commit)
+    event.listen(session_factory, "after_rollback", after_rollback)
+
+
+def instrument_celery() -> None:
+    """
+    Propagate trace context from task publishers to Celery workers.
+
+    The publisher adds the current context to the message headers; the
+    worker opens a task span as a child of it. Worker processes configure
+    tracing after fork so exporter threads are not shared.
+    """
+    if not OTEL_AVAILABLE:
+        return
+
+    from celery import signals
+
+    @signals.worker_process_init.connect(weak=False)
+    def configure_worker_tracing(**kwargs):
+        configure_tracing("contractai-worker")
+
+    @signals.before_task_publish.connect(weak=False)
+    def inject_task_context(headers=None, **kwargs):
+        if headers is not None:
+            inject_context(headers)
+
+    @signals.task_prerun.connect(weak=False)
+    def start_task_span(task_id=None, task=None, **kwargs):
+        if not _configured or task is None:
+            return
+        parent = propagate.extract(task.request, getter=_TaskRequestGetter())
+        parent_token = otel_context.attach(parent)
+        span = trace.get_tracer(TRACER_NAME).start_span(
+            f"celery.task {task.name}",
+            kind=trace.SpanKind.CONSUMER,
+            attributes={"celery.task_id": task_id, "celery.task_name": task.name},
+        )
+        span_token = otel_context.attach(trace.set_span_in_context(span))
+        _task_spans[task_id] = (span, span_token, parent_token)
+
+    @signals.task_failure.connect(weak=False)
+    def record_task_failure(task_id=None, exception=None, **kwargs):
+        entry = _task_spans.get(task_id)
+        if entry is not None and exception is not None:
+            entry[0].record_exception(exception)
+            entry[0].set_status(trace.Status(trace.StatusCode.ERROR, str(exception)))
+
+    @signals.task_postrun.connect(weak=False)
+    def end_task_span(task_id=None, state=None, **kwargs):
+        entry = _task_spans.pop(task_id, None)
+        if entry is None:
+            return
+        span, span_token, parent_token = entry
+        if state:
+            span.set_attribute("celery.state", state)
+        span.end()
+        otel_context.detach(span_token)
+        otel_context.detach(parent_token)
@@ -0,0 +1,405 @@
+"""
+Batch analysis jobs for ContractAI.
+
+A batch is stored as a BatchJob with one BatchItem per requested document and
+returned to the client at once; the documents are analyzed by Celery workers.
+Items are not all enqueued up front. The dispatcher hands queued items to the
+workers as slots free up, at most BATCH_MAX_IN_FLIGHT across all batches and
+BATCH_MAX_IN_FLIGHT_PER_BATCH per batch, and gives each free slot to the owner
+with the fewest documents in flight, so one large batch cannot starve other
+users' batches. It runs when a batch is created or cancelled and whenever an
+item finishes.
+
+Item statuses:
+    queued: Waiting for a slot
+    dispatched: Enqueued to a worker
+    running: Being analyzed
+    succeeded, failed: Analysis finished
+    skipped: The document was already processed
+    cancelled: The batch was cancelled before the item started
+"""
+
+import heapq
+import asyncio
+import logging
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import select, update, insert, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import AsyncSessionLocal, BatchJob, BatchItem, Document
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ITEM_STATUSES = ("queued", "dispatched", "running", "succeeded", "failed", "skipped", "cancelled")
+IN_FLIGHT_STATUSES = ("dispatched", "running")
+UNFINISHED_STATUSES = ("queued", "dispatched", "running")
+
+# Postgres advisory lock serializing dispatchers, so slot counts are not raced
+DISPATCH_LOCK_ID = 704519
+
+
+def _now() -> datetime:
+    """Get the current UTC time."""
+    return datetime.now(timezone.utc)
+
+
+async def create_batch(db: AsyncSession, owner_id: int, document_ids: Sequence[int]) -> BatchJob:
+    """
+    Store a batch job with one item per requested document.
+    
+    Documents that are missing or owned by someone else fail at once, and
+    documents that are already processed are skipped; the rest are queued.
+    Repeated IDs are counted once.
+    
+    Args:
+        db: Database session
+        owner_id: ID of the requesting user
+        document_ids: IDs of the documents to analyze
+    
+    Returns:
+        Committed batch job
+    """
+    document_ids = list(dict.fromkeys(document_ids))
+    rows = await db.execute(
+        select(Document.id, Document.status)
+        .where(Document.id.in_(document_ids), Document.owner_id == owner_id)
+    )
+    statuses = dict(rows.all())
+    
+    batch = BatchJob(owner_id=owner_id, status="queued", total=len(document_ids))
+    db.add(batch)
+    await db.flush()
+    
+    now = _now()
+    items = []
+    for document_id in document_ids:
+        item = {
+            "batch_id": batch.id,
+            "document_id": document_id,
+            "owner_id": owner_id,
+            "status": "queued",
+            "error_message": None,
+            "finished_at": None,
+        }
+        if document_id not in statuses:
+            item.update(status="failed", error_message="Document not found", finished_at=now)
+        elif statuses[document_id] == "processed":
+            item.update(status="skipped", finished_at=now)
+        items.append(item)
+    if items:
+        await db.execute(insert(BatchItem), items)
+    
+    if not any(item["status"] == "queued" for item in items):
+        batch.status = "completed"
+        batch.finished_at = now
+    
+    await db.commit()
+    # Load the server-generated timestamps
+    await db.refresh(batch)
+    return batch
+
+
+async def get_item_counts(db: AsyncSession, batch_id: int) -> Dict[str, int]:
+    """
+    Count a batch's items by status.
+    
+    Args:
+        db: Database session
+        batch_id: ID of the batch
+    
+    Returns:
+        Status -> number of items, for every item status
+    """
+    rows = await db.execute(
+        select(BatchItem.status, func.count())
+        .where(BatchItem.batch_id == batch_id)
+        .group_by(BatchItem.status)
+    )
+    counts = dict.fromkeys(ITEM_STATUSES, 0)
+    counts.update({status: count for status, count in rows.all()})
+    return counts
+
+
+async def cancel_batch(db: AsyncSession, batch: BatchJob) -> None:
+    """
+    Cancel a batch's items that have not started.
+    
+    Items that are already running finish normally.
+    
+    Args:
+        db: Database session
+        batch: Batch to cancel
+    """
+    if batch.status in ("completed", "cancelled"):
+        return
+    
+    now = _now()
+    await db.execute(
+        update(BatchItem)
+        .where(BatchItem.batch_id == batch.id, BatchItem.status.in_(("queued", "dispatched")))
+        .values(status="cancelled", finished_at=now)
+    )
+    batch.status = "cancelled"
+    batch.finished_at = now
+    await db.commit()
+    await db.refresh(batch)
+
+
+def fair_dispatch_order(
+    candidates: Iterable[Tuple[int, int, int]],
+    owner_in_flight: Dict[int, int],
+    batch_in_flight: Dict[int, int],
+    slots: int,
+    per_batch: int
+) -> List[int]:
+    """
+    Choose queued items for free slots, fairly between owners.
+    
+    Each slot goes to the owner with the fewest items in flight, ties going
+    to the owner with the oldest waiting item. An owner's own items are taken
+    oldest first, skipping batches that have reached their limit.
+    
+    Args:
+        candidates: (item ID, batch ID, owner ID) of queued items, oldest first
+        owner_in_flight: Owner ID -> items in flight; updated in place
+        batch_in_flight: Batch ID -> items in flight; updated in place
+        slots: Number of items to choose at most
+        per_batch: Maximum items in flight per batch
+    
+    Returns:
+        IDs of the chosen items, in dispatch order
+    """
+    queues: Dict[int, deque] = defaultdict(deque)
+    for item_id, batch_id, owner_id in candidates:
+        queues[owner_id].append((item_id, batch_id))
+    
+    heap = [(owner_in_flight.get(owner_id, 0), queue[0][0], owner_id) for owner_id, queue in queues.items()]
+    heapq.heapify(heap)
+    
+    chosen = []
+    while heap and len(chosen) < slots:
+        _, _, owner_id = heapq.heappop(heap)
+        queue = queues[owner_id]
+        while queue and batch_in_flight.get(queue[0][1], 0) >= per_batch:
+            queue.popleft()
+        if not queue:
+            continue
+        
+        item_id, batch_id = queue.popleft()
+        chosen.append(item_id)
+        owner_in_flight[owner_id] = owner_in_flight.get(owner_id, 0) + 1
+        batch_in_flight[batch_id] = batch_in_flight.get(batch_id, 0) + 1
+        if queue:
+            heapq.heappush(heap, (owner_in_flight[owner_id], queue[0][0], owner_id))
+    
+    return chosen
+
+
+async def _complete_batches(db: AsyncSession, batch_ids: Iterable[int]) -> None:
+    """Mark batches completed once none of their items are left to run, and commit."""
+    batch_ids = list(batch_ids)
+    if not batch_ids:
+        return
+    
+    unfinished = select(BatchItem.batch_id).where(
+        BatchItem.batch_id.in_(batch_ids), BatchItem.status.in_(UNFINISHED_STATUSES)
+    )
+    await db.execute(
+        update(BatchJob)
+        .where(
+            BatchJob.id.in_(batch_ids),
+            BatchJob.status.in_(("queued", "running")),
+            BatchJob.id.not_in(unfinished),
+        )
+        .values(status="completed", finished_at=_now())
+    )
+    await db.commit()
+
+
+async def _expire_stale_items(db: AsyncSession) -> List[int]:
+    """Fail in-flight items that have exceeded BATCH_ITEM_TIMEOUT, e.g. after a worker crash."""
+    cutoff = _now() - timedelta(seconds=settings.BATCH_ITEM_TIMEOUT)
+    rows = await db.execute(
+        select(BatchItem.id, BatchItem.batch_id).where(
+            ((BatchItem.status == "dispatched") & (BatchItem.dispatched_at < cutoff))
+            | ((BatchItem.status == "running") & (BatchItem.started_at < cutoff))
+        )
+    )
+    stale = rows.all()
+    if stale:
+        logger.warning(f"Giving up on {len(stale)} batch items in flight for over {settings.BATCH_ITEM_TIMEOUT}s")
+        await db.execute(
+            update(BatchItem)
+            .where(BatchItem.id.in_([item_id for item_id, _ in stale]), BatchItem.status.in_(IN_FLIGHT_STATUSES))
+            .values(status="failed", error_message="Timed out", finished_at=_now())
+        )
+    return sorted({batch_id for _, batch_id in stale})
+
+
+async def _claim_items(db: AsyncSession) -> Tuple[List[int], List[int]]:
+    """
+    Mark queued items for the free slots as dispatched, in the caller's transaction.
+    
+    Returns:
+        IDs of the claimed items, and IDs of batches that had items time out
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(select(func.pg_advisory_xact_lock(DISPATCH_LOCK_ID)))
+    
+    expired_batch_ids = await _expire_stale_items(db)
+    
+    rows = await db.execute(
+        select(BatchItem.batch_id, BatchItem.owner_id, func.count())
+        .where(BatchItem.status.in_(IN_FLIGHT_STATUSES))
+        .group_by(BatchItem.batch_id, BatchItem.owner_id)
+    )
+    owner_in_flight: Dict[int, int] = defaultdict(int)
+    batch_in_flight: Dict[int, int] = defaultdict(int)
+    for batch_id, owner_id, count in rows.all():
+        owner_in_flight[owner_id] += count
+        batch_in_flight[batch_id] += count
+    
+    slots = settings.BATCH_MAX_IN_FLIGHT - sum(batch_in_flight.values())
+    per_batch = settings.BATCH_MAX_IN_FLIGHT_PER_BATCH
+    if slots <= 0:
+        return [], expired_batch_ids
+    
+    # Only the first few queued items of each batch can be chosen
+    position = func.row_number().over(partition_by=BatchItem.batch_id, order_by=BatchItem.id)
+    queued = (
+        select(BatchItem.id, BatchItem.batch_id, BatchItem.owner_id, position.label("position"))
+        .where(BatchItem.status == "queued")
+        .subquery()
+    )
+    rows = await db.execute(
+        select(queued.c.id, queued.c.batch_id, queued.c.owner_id)
+        .where(queued.c.position <= min(slots, per_batch))
+        .order_by(queued.c.id)
+    )
+    
+    item_ids = fair_dispatch_order(rows.all(), owner_in_flight, batch_in_flight, slots, per_batch)
+    if item_ids:
+        await db.execute(
+            update(BatchItem)
+            .where(BatchItem.id.in_(item_ids), BatchItem.status == "queued")
+            .values(status="dispatched", dispatched_at=_now())
+        )
+    return item_ids, expired_batch_ids
+
+
+def _enqueue(item_ids: List[int]) -> List[int]:
+    """Send items to the workers; returns the IDs that could not be sent."""
+    from app.tasks.batch_tasks import process_batch_item_task
+    
+    failed = []
+    for item_id in item_ids:
+        try:
+            process_batch_item_task.delay(item_id)
+        except Exception as e:
+            logger.warning(f"Error enqueuing batch item {item_id}: {str(e)}")
+            failed.append(item_id)
+    return failed
+
+
+async def dispatch_items() -> int:
+    """
+    Hand queued items to the workers for every free slot.
+    
+    Items are claimed and committed before they are enqueued, so a worker
+    never sees an unclaimed item; items that cannot be enqueued go back to
+    the queue for the next run.
+    
+    Returns:
+        Number of items enqueued
+    """
+    async with AsyncSessionLocal() as db:
+        item_ids, expired_batch_ids = await _claim_items(db)
+        await db.commit()
+        await _complete_batches(db, expired_batch_ids)
+    
+    if not item_ids:
+        return 0
+    
+    # Publishing to the broker blocks, so keep it off the event loop
+    loop = asyncio.get_running_loop()
+    failed = await loop.run_in_executor(None, _enqueue, item_ids)
+    
+    if failed:
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(BatchItem)
+                .where(BatchItem.id.in_(failed), BatchItem.status == "dispatched")
+                .values(status="queued", dispatched_at=None)
+            )
+            await db.commit()
+    
+    return len(item_ids) - len(failed)
+
+
+async def _finish_item(item_id: int, batch_id: int, status: str, error_message: Optional[str] = None) -> None:
+    """Record an item's outcome and complete its batch once nothing is left to run."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(BatchItem)
+            .where(BatchItem.id == item_id)
+            .values(status=status, error_message=error_message, finished_at=_now())
+        )
+        await db.commit()
+        
+        # Checked after the commit, so the last item to finish always sees none left
+        await _complete_batches(db, [batch_id])
+
+
+async def run_batch_item(item_id: int) -> Dict[str, Any]:
+    """
+    Analyze the document of a dispatched batch item, then refill its slot.
+    
+    Items cancelled after they were dispatched are not run.
+    
+    Args:
+        item_id: ID of the batch item
+    
+    Returns:
+        Outcome of the item
+    """
+    from app.services.document_service import process_document
+    
+    async with AsyncSessionLocal() as db:
+        claimed = await db.execute(
+            update(BatchItem)
+            .where(BatchItem.id == item_id, BatchItem.status == "dispatched")
+            .values(status="running", started_at=_now())
+        )
+        item = await db.get(BatchItem, item_id)
+        if claimed.rowcount == 0 or item is None:
+            await db.rollback()
+            return {"status": "ignored", "item_id": item_id}
+        
+        await db.execute(
+            update(BatchJob)
+            .where(BatchJob.id == item.batch_id, BatchJob.status == "queued")
+            .values(status="running")
+        )
+        document = await db.get(Document, item.document_id)
+        if document is not None:
+            document.status = "processing"
+            document.error_message = None
+        await db.commit()
+    
+    if document is None:
+        status, error_message = "failed", "Document not found"
+    else:
+        try:
+            await process_document(item.document_id)
+            status, error_message = "succeeded", None
+        except Exception as e:
+            logger.warning(f"Batch item {item_id} failed: {str(e)}")
+            status, error_message = "failed", str(e)
+    
+    await _finish_item(item_id, item.batch_id, status, error_message)
+    await dispatch_items()
+    
+    return {"status": status, "item_id": item_id, "document_id": item.document_id}
@@ -12,6 +12,8 @@ from typing import Dict, Any, Optional, Union
 import aioredis
 import time
 
+from app.monitoring.prometheus import record_cache_lookup
+
 logger = logging.getLogger(__name__)
 
 class LLMResponseCache:
@@ -74,6 +76,7 @@ class LLMResponseCache:
         
         try:
             cached = await self.redis.get(key)
+            record_cache_lookup("llm_response", "redis", bool(cached))
             
             if cached:
                 self.cache_hits += 1
@@ -216,6 +219,7 @@ class LLMResponseCache:
         """
         try:
             cached = await self.redis.get(cache_key)
+            record_cache_lookup("llm_response", "redis", bool(cached))
             
             if cached:
                 self.cache_hits += 1
@@ -1,43 +1,113 @@
+import asyncio
 import logging
-from typing import Optional
-from sqlalchemy.orm import Session
-from app.database import Document, Analysis, get_db
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional, Sequence, Set
+from sqlalchemy import select, func, cast
+from sqlalchemy.dialects.postgresql import JSONB, JSONPATH
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Document, Analysis, AsyncSessionLocal
+from app.services.redis_service import RedisService
 from app.services.storage_service import get_document_content
-from app.ai.orchestrator import AgentOrchestrator
+from app.services.search_service import index_document
+from app.services.progress_service import publish_progress
+from app.services.service_factory import ServiceFactory
+from app.monitoring.llm_metrics import track_llm_usage
+from app.monitoring import prometheus
 from app.core.errors import DocumentNotFoundError, DocumentProcessingError
+from app.core.utils import make_etag
+from app.config import get_settings
 
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Documents processed in this process when DOCUMENT_PROCESSING_BACKEND is local
+_local_tasks: Set[asyncio.Task] = set()
 
-async def process_document(document_id: int) -> None:
+
+async def find_reusable_analysis(db: AsyncSession, document: Document) -> Optional[Analysis]:
+    """
+    Find a completed analysis of a document identical to this one.
+    
+    Only analyses produced by the current ANALYSIS_PIPELINE_VERSION qualify,
+    and with ANALYSIS_REUSE_SCOPE owner, only those of the same user's
+    documents.
+    
+    Args:
+        db: Database session
+        document: Document about to be processed
+        
+    Returns:
+        Most recent matching analysis, or None if there is none or reuse is off
+    """
+    scope = settings.ANALYSIS_REUSE_SCOPE
+    if scope not in ("owner", "global") or not document.content_hash:
+        return None
+    
+    query = (
+        select(Analysis)
+        .join(Document, Analysis.document_id == Document.id)
+        .where(
+            Document.content_hash == document.content_hash,
+            Document.id != document.id,
+            Document.status == "processed",
+            Analysis.pipeline_version == settings.ANALYSIS_PIPELINE_VERSION,
+        )
+        .order_by(Analysis.id.desc())
+        .limit(1)
+    )
+    if scope == "owner":
+        query = query.where(Document.owner_id == document.owner_id)
+    
+    return await db.scalar(query)
+
+
+async def process_document(document_id: int, reuse: bool = True) -> None:
     """
     Process a document using the AI agent orchestrator.
     
+    If an identical document already has an analysis that may be reused (see
+    find_reusable_analysis), it is copied instead.
+    
     Args:
         document_id: ID of the document to process
+        reuse: Whether an existing analysis may be copied
     """
     logger.info(f"Starting document processing for document {document_id}")
     
     # Get database session
-    db = next(get_db())
+    db = AsyncSessionLocal()
+    document = None
     
     try:
         # Get document
-        document = db.query(Document).filter(Document.id == document_id).first()
+        document = await db.get(Document, document_id)
         if not document:
             raise DocumentNotFoundError(document_id)
         
         # Get document content
         content = await get_document_content(document.storage_path)
+        await publish_progress(document_id, "text_extracted", characters=len(content))
+        
+        source = await find_reusable_analysis(db, document) if reuse else None
+        if source is not None:
+            logger.info(f"Reusing the analysis of document {source.document_id} for identical document {document_id}")
+            results = {name: getattr(source, name) for name in ANALYSIS_FIELDS}
+            llm_tokens, llm_cost = source.llm_tokens, source.llm_cost
+        else:
+            # Agents and LLM clients are shared across documents
+            orchestrator = await ServiceFactory.get_orchestrator()
         
-        # Initialize orchestrator
-        orchestrator = AgentOrchestrator()
+            async def progress(stage: str, **details: Any) -> None:
+                await publish_progress(document_id, stage, **details)
         
-        # Process document
-        results = await orchestrator.process_document(content)
+            # Process document
+            with track_llm_usage() as usage:
+                results = await orchestrator.process_document(content, progress=progress)
+            llm_tokens, llm_cost = usage.total_tokens, usage.cost
         
         # Create or update analysis
-        analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+        analysis = await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
         if not analysis:
             analysis = Analysis(document_id=document_id)
         
@@ -47,6 +117,16 @@ async def process_document(document_id: int) -> None:
         analysis.comparisons = results["comparisons"]
         analysis.recommendations = results["recommendations"]
         analysis.summary = results["summary"]
+        analysis.pipeline_version = settings.ANALYSIS_PIPELINE_VERSION
+        analysis.llm_tokens = llm_tokens
+        analysis.llm_cost = llm_cost
+        # Point at the document the analysis was computed for, not at another copy
+        analysis.reused_from_document_id = (
+            (source.reused_from_document_id or source.document_id) if source is not None else None
+        )
+        
+        # Refresh the search index in the same transaction as the analysis
+        await index_document(db, document, content, results["clauses"])
         
         # Update document status
         document.status = "processed"
@@ -55,9 +135,11 @@ async def process_document(document_id: int) -> None:
         # Save changes
         db.add(analysis)
         db.add(document)
-        db.commit()
+        await db.commit()
         
+        prometheus.record_document_analysis(reused=source is not None, llm_cost=llm_cost or 0.0)
         logger.info(f"Successfully processed document {document_id}")
+        await publish_progress(document_id, "done", status="processed", reused=source is not None)
         
     except Exception as e:
         logger.error(f"Error processing document {document_id}: {e}")
@@ -67,14 +149,68 @@ async def process_document(document_id: int) -> None:
             document.status = "error"
             document.error_message = str(e)
             db.add(document)
-            db.commit()
+            await db.commit()
         except Exception as db_error:
             logger.error(f"Error updating document status: {db_error}")
         
+        await publish_progress(document_id, "error", status="error", message=str(e))
         raise DocumentProcessingError(f"Failed to process document: {str(e)}")
     
     finally:
-        db.close()
+        await db.close()
+
+
+async def _process_locally(document_id: int, reuse: bool) -> None:
+    """Process a document in this process, logging rather than raising failures."""
+    try:
+        await process_document(document_id, reuse=reuse)
+    except Exception as e:
+        logger.warning(f"Background processing of document {document_id} failed: {str(e)}")
+
+
+def _enqueue_task(document_id: int, reuse: bool) -> None:
+    """Send a document to the Celery workers."""
+    from app.tasks.document_tasks import process_document_task
+    process_document_task.delay(document_id, reuse=reuse)
+
+
+async def enqueue_document(document_id: int, reuse: bool = True) -> None:
+    """
+    Queue a document for processing and return without waiting for it.
+    
+    Documents go to the Celery workers, unless DOCUMENT_PROCESSING_BACKEND is
+    local or the broker cannot be reached; then they are processed in this
+    process in the background.
+    
+    Args:
+        document_id: ID of the document; its status should already be processing
+        reuse: Whether the analysis of an identical document may be copied
+    """
+    # Published first so it can never overwrite a later stage
+    await publish_progress(document_id, "queued")
+    
+    if settings.DOCUMENT_PROCESSING_BACKEND == "celery":
+        try:
+            # Publishing to the broker blocks, so keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, _enqueue_task, document_id, reuse)
+            return
+        except Exception as e:
+            logger.warning(f"Error queuing document {document_id}, processing it here instead: {str(e)}")
+    
+    task = asyncio.get_running_loop().create_task(_process_locally(document_id, reuse))
+    _local_tasks.add(task)
+    task.add_done_callback(_local_tasks.discard)
+
+
+async def wait_for_local_processing(timeout: Optional[float] = None) -> None:
+    """
+    Wait for documents being processed in this process, e.g. on shutdown.
+    
+    Args:
+        timeout: Seconds to wait at most, or None to wait until all finish
+    """
+    if _local_tasks:
+        await asyncio.wait(set(_local_tasks), timeout=timeout)
 
 
 async def reprocess_document(document_id: int) -> None:
@@ -87,17 +223,17 @@ async def reprocess_document(document_id: int) -> None:
     logger.info(f"Starting document reprocessing for document {document_id}")
     
     # Get database session
-    db = next(get_db())
+    db = AsyncSessionLocal()
     
     try:
         # Delete existing analysis if any
-        analysis = db.query(Analysis).filter(Analysis.document_id == document_id).first()
+        analysis = await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
         if analysis:
-            db.delete(analysis)
-            db.commit()
+            await db.delete(analysis)
+            await db.commit()
         
-        # Process document again
-        await process_document(document_id)
+        # Process document again, without copying another document's analysis
+        await process_document(document_id, reuse=False)
         
         logger.info(f"Successfully reprocessed document {document_id}")
         
@@ -106,7 +242,7 @@ async def reprocess_document(document_id: int) -> None:
         raise
     
     finally:
-        db.close()
+        await db.close()
 
 
 async def get_document_analysis(document_id: int) -> Optional[Analysis]:
@@ -119,10 +255,242 @@ async def get_document_analysis(document_id: int) -> Optional[Analysis]:
     Returns:
         Analysis object if found, None otherwise
     """
-    db = next(get_db())
+    db = AsyncSessionLocal()
     
     try:
-        return db.query(Analysis).filter(Analysis.document_id == document_id).first()
+        return await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
     
     finally:
-        db.close() 
\ No newline at end of file
+        await db.close() 
+
+async def count_documents(
+    db: AsyncSession,
+    owner_id: int,
+    status: Optional[str] = None,
+    use_cache: bool = False
+) -> int:
+    """
+    Count a user's documents.
+    
+    With use_cache, the count is read from Redis when present and otherwise
+    stored there for DOCUMENT_COUNT_CACHE_TTL seconds, so it may lag behind
+    recent uploads. Redis errors fall back to an exact count.
+    
+    Args:
+        db: Database session
+        owner_id: ID of the document owner
+        status: Optional status filter
+        use_cache: Whether an approximate cached count is acceptable
+        
+    Returns:
+        Number of documents
+    """
+    cache_key = f"documents:count:{owner_id}:{status or 'all'}"
+    redis = None
+    if use_cache:
+        try:
+            redis = await RedisService.get_redis()
+            cached = await redis.get(cache_key)
+            if cached is not None:
+                return int(cached)
+        except Exception as e:
+            logger.warning(f"Error reading cached document count: {str(e)}")
+            redis = None
+    
+    query = select(func.count(Document.id)).where(Document.owner_id == owner_id)
+    if status:
+        query = query.where(Document.status == status)
+    total = await db.scalar(query)
+    
+    if redis is not None:
+        try:
+            await redis.setex(cache_key, settings.DOCUMENT_COUNT_CACHE_TTL, total)
+        except Exception as e:
+            logger.warning(f"Error caching document count: {str(e)}")
+    
+    return total
+
+
+# Analysis columns that can be loaded on their own
+ANALYSIS_FIELDS = ("clauses", "risks", "comparisons", "recommendations", "summary")
+
+# Analysis columns holding JSON arrays that can be paged
+ANALYSIS_LIST_FIELDS = ("clauses", "risks", "comparisons", "recommendations")
+
+
+@dataclass
+class AnalysisProjection:
+    """Document ownership columns and selected analysis fields from one query."""
+    owner_id: int
+    status: str
+    has_analysis: bool
+    document: Optional[Document] = None
+    fields: Dict[str, Any] = field(default_factory=dict)
+    # Item count of each paged list field before slicing
+    totals: Dict[str, int] = field(default_factory=dict)
+    # Version of the document row and of its analysis, for ETags
+    document_id: Optional[int] = None
+    document_modified_at: Optional[datetime] = None
+    analysis_id: Optional[int] = None
+    analysis_modified_at: Optional[datetime] = None
+    
+    def analysis_etag(self) -> str:
+        """Get the ETag of the analysis; it changes on reprocess and reset."""
+        return make_etag("analysis", self.analysis_id, self.analysis_modified_at)
+    
+    def document_etag(self) -> str:
+        """Get the ETag of the document detail, covering the document row and its analysis."""
+        return make_etag(
+            "document", self.document_id, self.document_modified_at,
+            self.analysis_id or 0, self.analysis_modified_at or 0
+        )
+    
+    def document_last_modified(self) -> Optional[datetime]:
+        """Get the later of the document and analysis modification times."""
+        times = [t for t in (self.document_modified_at, self.analysis_modified_at) if t is not None]
+        return max(times) if times else None
+
+
+async def get_analysis_projection(
+    db: AsyncSession,
+    document_id: int,
+    fields: Sequence[str],
+    with_document: bool = False,
+    offset: int = 0,
+    limit: Optional[int] = None
+) -> Optional[AnalysisProjection]:
+    """
+    Load a document's owner and status with selected analysis fields in one query.
+    
+    Only the requested analysis columns are read, so the cost does not depend
+    on the size of the others. With no fields, only ownership and version
+    columns are read, which is enough to answer a conditional request. When offset or limit is given, list fields
+    are sliced; on Postgres the slice is taken in SQL so only the page is
+    transferred.
+    
+    Args:
+        db: Database session
+        document_id: ID of the document
+        fields: Analysis fields to load (see ANALYSIS_FIELDS)
+        with_document: Whether to load the full Document row as well
+        offset: First list item to return
+        limit: Maximum number of list items to return (None = all)
+        
+    Returns:
+        Projection, or None if the document does not exist
+    """
+    paged = bool(offset) or limit is not None
+    slice_in_sql = paged and db.get_bind().dialect.name == "postgresql"
+    
+    columns: List[Any] = [Document] if with_document else []
+    columns += [
+        Document.id.label("document_id"),
+        Document.owner_id,
+        Document.status,
+        func.coalesce(Document.updated_at, Document.created_at).label("document_modified_at"),
+        Analysis.id.label("analysis_id"),
+        func.coalesce(Analysis.updated_at, Analysis.created_at).label("analysis_modified_at"),
+    ]
+    for name in fields:
+        column = getattr(Analysis, name)
+        if slice_in_sql and name in ANALYSIS_LIST_FIELDS:
+            last = str(offset + limit - 1) if limit is not None else "last"
+            path = cast(f"$[{offset} to {last}]", JSONPATH)
+            columns.append(func.jsonb_path_query_array(cast(column, JSONB), path).label(name))
+            columns.append(func.jsonb_array_length(cast(column, JSONB)).label(f"{name}_total"))
+        else:
+            columns.append(column.label(name))
+    
+    query = (
+        select(*columns)
+        .select_from(Document)
+        .outerjoin(Analysis, Analysis.document_id == Document.id)
+        .where(Document.id == document_id)
+    )
+    row = (await db.execute(query)).first()
+    if row is None:
+        return None
+    
+    data = row._mapping
+    projection = AnalysisProjection(
+        owner_id=data["owner_id"],
+        status=data["status"],
+        has_analysis=data["analysis_id"] is not None,
+        document=row[0] if with_document else None,
+        document_id=data["document_id"],
+        document_modified_at=data["document_modified_at"],
+        analysis_id=data["analysis_id"],
+        analysis_modified_at=data["analysis_modified_at"],
+    )
+    for name in fields:
+        value = data[name]
+        # List fields written before they defaulted to a list hold {}
+        if name in ANALYSIS_LIST_FIELDS and value == {}:
+            value = []
+        if paged and name in ANALYSIS_LIST_FIELDS and isinstance(value, list):
+            if slice_in_sql:
+                projection.totals[name] = data[f"{name}_total"]
+            else:
+                projection.totals[name] = len(value)
+                value = value[offset:offset + limit if limit is not None else None]
+        projection.fields[name] = value
+    
+    return projection
+
+
+def _json_array_contains(column: Any, dialect_name: str, match: Dict[str, str]) -> Any:
+    """
+    Build a condition that a JSON array column has an element with all given keys.
+    
+    On Postgres this is JSONB containment (@>), which the jsonb_path_ops GIN
+    indexes serve. Other databases (SQLite in tests) fall back to json_each.
+    
+    Args:
+        column: JSON array column
+        dialect_name: Name of the database dialect
+        match: Key/value pairs one element must contain
+        
+    Returns:
+        SQL condition
+    """
+    if dialect_name == "postgresql":
+        return cast(column, JSONB).contains([match])
+    
+    elements = func.json_each(column).table_valued("value")
+    conditions = [func.json_extract(elements.c.value, f"$.{key}") == value for key, value in match.items()]
+    return select(1).select_from(elements).where(*conditions).exists()
+
+
+def analysis_filter_conditions(
+    dialect_name: str,
+    clause_type: Optional[str] = None,
+    risk_level: Optional[str] = None,
+    risk_category: Optional[str] = None
+) -> List[Any]:
+    """
+    Build conditions on Analysis that select documents for a portfolio query.
+    
+    A risk level and category given together must match the same risk.
+    
+    Args:
+        dialect_name: Name of the database dialect
+        clause_type: Clause type a clause must have
+        risk_level: Normalized risk level (high, medium, low) a risk must have
+        risk_category: Category a risk must have
+        
+    Returns:
+        SQL conditions to combine with AND
+    """
+    conditions = []
+    if clause_type:
+        conditions.append(_json_array_contains(Analysis.clauses, dialect_name, {"type": clause_type}))
+    
+    risk_match = {}
+    if risk_level:
+        risk_match["risk_level"] = risk_level.lower()
+    if risk_category:
+        risk_match["category"] = risk_category
+    if risk_match:
+        conditions.append(_json_array_contains(Analysis.risks, dialect_name, risk_match))
+    
+    return conditions
@@ -0,0 +1,169 @@
+"""
+In-memory object store for ContractAI.
+
+This module provides a stand-in for the MinIO client used by StorageService
+when STORAGE_BACKEND is 'memory'. It implements the subset of the client API
+the service calls, keeps objects in process memory, and raises S3Error with the
+same codes as MinIO so the service's error handling behaves as in production.
+Load tests and local development can then run without a MinIO server.
+"""
+
+import io
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from minio.error import S3Error
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MemoryObject:
+    """Stored object with the attributes StorageService reads from MinIO objects."""
+    bucket_name: str
+    object_name: str
+    data: bytes
+    content_type: str
+    last_modified: datetime
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class MemoryObjectResponse(io.BytesIO):
+    """Response body returned by get_object."""
+
+    def release_conn(self) -> None:
+        """Match the urllib3 response API used with MinIO."""
+        self.close()
+
+
+class InMemoryObjectStore:
+    """
+    Thread-safe in-memory implementation of the MinIO client calls used by StorageService.
+
+    Calls block for ``latency_ms`` to model the network round trip, just as
+    the synchronous MinIO client blocks its calling thread.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        """
+        Initialize the object store.
+
+        Args:
+            latency_ms: Simulated latency added to every call
+        """
+        self.latency_ms = latency_ms
+        self._buckets: Dict[str, Dict[str, MemoryObject]] = {}
+        self._lock = threading.Lock()
+
+    def _wait(self) -> None:
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000)
+
+    def _error(self, code: str, message: str, bucket_name: str, object_name: Optional[str] = None) -> S3Error:
+        resource = f"/{bucket_name}/{object_name}" if object_name else f"/{bucket_name}"
+        return S3Error(code, message, resource, "memory", "memory", None, bucket_name, object_name)
+
+    def _bucket(self, bucket_name: str) -> Dict[str, MemoryObject]:
+        bucket = self._buckets.get(bucket_name)
+        if bucket is None:
+            raise self._error("NoSuchBucket", "The specified bucket does not exist", bucket_name)
+        return bucket
+
+    def _object(self, bucket_name: str, object_name: str) -> MemoryObject:
+        obj = self._bucket(bucket_name).get(object_name)
+        if obj is None:
+            raise self._error("NoSuchKey", "Object does not exist", bucket_name, object_name)
+        return obj
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        self._wait()
+        return bucket_name in self._buckets
+
+    def make_bucket(self, bucket_name: str) -> None:
+        self._wait()
+        with self._lock:
+            self._buckets.setdefault(bucket_name, {})
+
+    def put_object(
+        self,
+        bucket_name: str,
+        object_name: str,
+        data: io.RawIOBase,
+        length: int,
+        content_type: str = "application/octet-stream",
+        **kwargs
+    ) -> MemoryObject:
+        self._wait()
+        content = data.read() if length < 0 else data.read(length)
+        obj = MemoryObject(bucket_name, object_name, content, content_type, datetime.now(timezone.utc))
+        with self._lock:
+            self._bucket(bucket_name)[object_name] = obj
+        return obj
+
+    def fput_object(
+        self,
+        bucket_name: str,
+        object_name: str,
+        file_path: str,
+        content_type: str = "application/octet-stream",
+        **kwargs
+    ) -> MemoryObject:
+        with open(file_path, "rb") as f:
+            return self.put_object(bucket_name, object_name, f, -1, content_type=content_type)
+
+    def stat_object(self, bucket_name: str, object_name: str, **kwargs) -> MemoryObject:
+        self._wait()
+        return self._object(bucket_name, object_name)
+
+    def get_object(self, bucket_name: str, object_name: str, **kwargs) -> MemoryObjectResponse:
+        self._wait()
+        return MemoryObjectResponse(self._object(bucket_name, object_name).data)
+
+    def remove_object(self, bucket_name: str, object_name: str, **kwargs) -> None:
+        self._wait()
+        with self._lock:
+            self._bucket(bucket_name).pop(object_name, None)
+
+    def remove_objects(self, bucket_name: str, delete_object_list: Iterable[Any], **kwargs) -> Iterator[Any]:
+        # A generator, so like MinIO nothing is removed until the errors are iterated
+        self._wait()
+        with self._lock:
+            bucket = self._bucket(bucket_name)
+            for delete_object in delete_object_list:
+                bucket.pop(delete_object._name, None)
+        yield from ()
+
+    def list_objects(
+        self,
+        bucket_name: str,
+        prefix: Optional[str] = None,
+        recursive: bool = False,
+        **kwargs
+    ) -> Iterator[MemoryObject]:
+        self._wait()
+        with self._lock:
+            objects = sorted(self._bucket(bucket_name).items())
+        for name, obj in objects:
+            if prefix and not name.startswith(prefix):
+                continue
+            if not recursive and "/" in name[len(prefix or ""):]:
+                continue
+            yield obj
+
+    def get_stats(self) -> Tuple[int, int]:
+        """
+        Get the number of stored objects and their total size in bytes.
+
+        Returns:
+            Tuple of (object count, total bytes)
+        """
+        with self._lock:
+            objects = [obj for bucket in self._buckets.values() for obj in bucket.values()]
+        return len(objects), sum(obj.size for obj in objects)
@@ -0,0 +1,234 @@
+"""
+Document processing progress events for ContractAI.
+
+Processing stages are published on one Redis channel (document:progress) as
+JSON events, and the latest event of each document is kept for
+PROGRESS_EVENT_TTL seconds, so a client that subscribes late starts from the
+current stage. Stages, in order:
+    stored: The file is durably stored
+    queued: Processing is queued
+    text_extracted: The text content was read
+    sections: The text was split into sections
+    clauses: Clause detection finished for completed of total sections
+    risks: Risks and comparisons were analyzed
+    recommendations: Recommendations were generated
+    done: The analysis is saved
+    error: Processing failed
+
+Each API process listens on the channel once and fans events out to the
+local subscribers of each document (ProgressHub), so open event streams do
+not hold a Redis connection each.
+"""
+
+import json
+import time
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Optional, Set
+from app.services.redis_service import RedisService
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROGRESS_CHANNEL = "document:progress"
+
+TERMINAL_STAGES = ("done", "error")
+
+# Events buffered per subscriber before older ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+# Seconds between keep-alive comments on idle event streams
+HEARTBEAT_INTERVAL = 15.0
+
+# Seconds to wait before resubscribing after the listener fails
+LISTENER_RETRY_INTERVAL = 5.0
+
+
+def _last_event_key(document_id: int) -> str:
+    """Get the Redis key holding a document's latest event."""
+    return f"document:{document_id}:progress"
+
+
+async def publish_progress(document_id: int, stage: str, **data: Any) -> None:
+    """
+    Publish a processing progress event for a document.
+    
+    Failures are logged and never interrupt processing.
+    
+    Args:
+        document_id: ID of the document
+        stage: Processing stage
+        data: Stage details, e.g. completed and total for clauses
+    """
+    event = {"document_id": document_id, "stage": stage, "at": time.time(), **data}
+    try:
+        redis = await RedisService.get_redis()
+        payload = json.dumps(event)
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(_last_event_key(document_id), payload, ex=settings.PROGRESS_EVENT_TTL)
+        pipe.publish(PROGRESS_CHANNEL, payload)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Error publishing progress for document {document_id}: {str(e)}")
+
+
+async def get_last_event(document_id: int) -> Optional[Dict[str, Any]]:
+    """
+    Get the latest progress event of a document.
+    
+    Args:
+        document_id: ID of the document
+    
+    Returns:
+        Latest event, or None if there is none or Redis is unavailable
+    """
+    try:
+        redis = await RedisService.get_redis()
+        raw = await redis.get(_last_event_key(document_id))
+        return json.loads(raw) if raw is not None else None
+    except Exception as e:
+        logger.warning(f"Error reading progress for document {document_id}: {str(e)}")
+        return None
+
+
+class ProgressHub:
+    """Fans progress events from Redis out to subscribers in this process."""
+    
+    _subscribers: Dict[int, Set[asyncio.Queue]] = {}
+    _listener: Optional[asyncio.Task] = None
+    _retry_at: float = 0.0
+    
+    @classmethod
+    def subscribe(cls, document_id: int) -> asyncio.Queue:
+        """
+        Start receiving a document's progress events.
+        
+        Args:
+            document_id: ID of the document
+        
+        Returns:
+            Queue the events are put on
+        """
+        cls._ensure_listener()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        cls._subscribers.setdefault(document_id, set()).add(queue)
+        return queue
+    
+    @classmethod
+    def unsubscribe(cls, document_id: int, queue: asyncio.Queue) -> None:
+        """
+        Stop receiving a document's progress events.
+        
+        Args:
+            document_id: ID of the document
+            queue: Queue from subscribe
+        """
+        queues = cls._subscribers.get(document_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                cls._subscribers.pop(document_id, None)
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Stop the listener."""
+        if cls._listener is not None:
+            cls._listener.cancel()
+            try:
+                await cls._listener
+            except asyncio.CancelledError:
+                pass
+            cls._listener = None
+    
+    @classmethod
+    def _deliver(cls, event: Dict[str, Any]) -> None:
+        """Put an event on the queues of its document's subscribers."""
+        for queue in cls._subscribers.get(event.get("document_id"), ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+    
+    @classmethod
+    def _ensure_listener(cls) -> None:
+        """Start the listener on the running event loop if needed."""
+        if cls._listener is not None and not cls._listener.done():
+            return
+        if time.monotonic() < cls._retry_at:
+            return
+        cls._listener = asyncio.get_running_loop().create_task(cls._listen())
+    
+    @classmethod
+    async def _listen(cls) -> None:
+        """Deliver events published on the progress channel."""
+        pubsub = None
+        try:
+            redis = await RedisService.get_redis()
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(PROGRESS_CHANNEL)
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    cls._deliver(json.loads(message["data"]))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Progress listener stopped: {str(e)}")
+        finally:
+            cls._retry_at = time.monotonic() + LISTENER_RETRY_INTERVAL
+            if pubsub is not None:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+
+def _format_event(event: Dict[str, Any]) -> str:
+    """Format an event as a Server-Sent Events message."""
+    return f"id: {event['at']}\nevent: {event['stage']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def progress_event_stream(
+    document_id: int,
+    is_disconnected: Any,
+    initial: Optional[Dict[str, Any]] = None
+) -> AsyncIterator[str]:
+    """
+    Stream a document's progress as Server-Sent Events until it finishes.
+    
+    The latest stored event is sent first. While the stream is idle, a
+    keep-alive comment is sent every HEARTBEAT_INTERVAL seconds and the stored
+    event is checked again, so progress still arrives if the listener is down.
+    
+    Args:
+        document_id: ID of the document
+        is_disconnected: Coroutine function telling whether the client left
+        initial: Event to start from instead of the stored one, e.g. for a
+            document that already finished
+    
+    Yields:
+        Server-Sent Events messages
+    """
+    if initial is not None:
+        yield _format_event(initial)
+        return
+    
+    queue = ProgressHub.subscribe(document_id)
+    try:
+        last_at = 0.0
+        event = await get_last_event(document_id)
+        while True:
+            if event is not None and event["at"] > last_at:
+                last_at = event["at"]
+                yield _format_event(event)
+                if event["stage"] in TERMINAL_STAGES:
+                    return
+            
+            try:
+                event = await asyncio.wait_for(queue.get(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                event = await get_last_event(document_id)
+    finally:
+        ProgressHub.unsubscribe(document_id, queue)
@@ -0,0 +1,172 @@
+"""
+Expired document cleanup for ContractAI.
+
+Processed documents older than the retention period are deleted in batches
+of CLEANUP_BATCH_SIZE. Each batch is read with a keyset query in
+(created_at, id) order on ix_documents_status_created_id, so it costs one
+index range scan however many documents there are, and only one batch is
+held in memory. The batch's rows are locked, its files are removed with
+bulk storage requests, and its search passages, analyses and documents are
+deleted with one statement each, in one transaction. Documents whose files
+could not be removed are kept and retried by the next run.
+
+Batches are paced to at most CLEANUP_MAX_RATE documents per second. The
+position of the last batch is saved in Redis, so a run stopped by its
+document limit, a worker restart or an error resumes where it stopped.
+"""
+
+import time
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select, delete, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Document, Analysis, AsyncSessionLocal
+from app.services.redis_service import RedisService
+from app.services.storage_service import storage_service
+from app.services.search_service import remove_documents as remove_from_search_index
+from app.services.stats_service import record_deleted_documents
+from app.core.utils import encode_cursor, decode_cursor
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+CURSOR_KEY = "retention:cleanup:cursor"
+
+
+async def _load_cursor() -> Optional[Tuple[datetime, int]]:
+    """Get the position a previous run stopped at, if any."""
+    try:
+        redis = await RedisService.get_redis()
+        raw = await redis.get(CURSOR_KEY)
+        return decode_cursor(raw.decode() if isinstance(raw, bytes) else raw) if raw else None
+    except Exception as e:
+        logger.warning(f"Error loading cleanup cursor, starting from the beginning: {str(e)}")
+        return None
+
+
+async def _save_cursor(cursor: Optional[Tuple[datetime, int]]) -> None:
+    """Save the position of the last batch, or clear it when the run is complete."""
+    try:
+        redis = await RedisService.get_redis()
+        if cursor is None:
+            await redis.delete(CURSOR_KEY)
+        else:
+            await redis.set(CURSOR_KEY, encode_cursor(*cursor))
+    except Exception as e:
+        logger.warning(f"Error saving cleanup cursor: {str(e)}")
+
+
+async def _delete_batch(
+    db: AsyncSession,
+    cutoff: datetime,
+    cursor: Optional[Tuple[datetime, int]],
+    limit: int
+) -> Tuple[int, int, Optional[Tuple[datetime, int]]]:
+    """
+    Delete the next batch of expired documents.
+    
+    Args:
+        db: Database session
+        cutoff: Documents created before this are expired
+        cursor: (created_at, id) of the last document of the previous batch
+        limit: Maximum documents in the batch
+    
+    Returns:
+        Tuple of (documents deleted, documents kept because their files
+        could not be removed, cursor after the batch or None if there were
+        no more expired documents)
+    """
+    query = (
+        select(Document.id, Document.storage_path, Document.created_at)
+        .where(Document.status == "processed", Document.created_at < cutoff)
+        .order_by(Document.created_at, Document.id)
+        .limit(limit)
+        # Documents being reprocessed or deleted elsewhere are left for the next run
+        .with_for_update(skip_locked=True)
+    )
+    if cursor is not None:
+        query = query.where(tuple_(Document.created_at, Document.id) > tuple_(*cursor))
+    
+    rows = (await db.execute(query)).all()
+    if not rows:
+        return 0, 0, None
+    
+    # Files first: a document is only deleted once nothing of it is left in storage
+    failed_paths = await storage_service.delete_documents(row.storage_path for row in rows)
+    deleted = [row for row in rows if row.storage_path not in failed_paths]
+    
+    if deleted:
+        ids = [row.id for row in deleted]
+        await remove_from_search_index(db, ids)
+        await db.execute(delete(Analysis).where(Analysis.document_id.in_(ids)))
+        await db.execute(
+            delete(Document).where(Document.id.in_(ids)).execution_options(synchronize_session=False)
+        )
+        
+        await record_deleted_documents(db, "processed", (row.created_at for row in deleted))
+    
+    await db.commit()
+    
+    last = rows[-1]
+    return len(deleted), len(rows) - len(deleted), (last.created_at, last.id)
+
+
+async def cleanup_expired_documents(
+    days: int,
+    max_documents: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    max_rate: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Delete processed documents created more than days ago, with their files.
+    
+    Args:
+        days: Retention period in days
+        max_documents: Maximum documents to go through in this run; the next
+            run continues from there
+        batch_size: Documents per batch (default CLEANUP_BATCH_SIZE)
+        max_rate: Documents per second at most (default CLEANUP_MAX_RATE;
+            0 for no limit)
+    
+    Returns:
+        Documents deleted, documents kept because their files could not be
+        removed, and whether every expired document has been gone through
+    """
+    batch_size = batch_size or settings.CLEANUP_BATCH_SIZE
+    max_rate = settings.CLEANUP_MAX_RATE if max_rate is None else max_rate
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    
+    cursor = await _load_cursor()
+    if cursor is not None:
+        logger.info(f"Resuming cleanup after document {cursor[1]} created at {cursor[0].isoformat()}")
+    
+    deleted = failed = 0
+    complete = False
+    while max_documents is None or deleted + failed < max_documents:
+        started = time.monotonic()
+        limit = batch_size if max_documents is None else min(batch_size, max_documents - deleted - failed)
+        
+        async with AsyncSessionLocal() as db:
+            batch_deleted, batch_failed, cursor = await _delete_batch(db, cutoff, cursor, limit)
+        
+        if cursor is None:
+            complete = True
+            break
+        
+        deleted += batch_deleted
+        failed += batch_failed
+        await _save_cursor(cursor)
+        
+        if max_rate > 0:
+            delay = (batch_deleted + batch_failed) / max_rate - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+    
+    if complete:
+        await _save_cursor(None)
+    
+    logger.info(f"Cleanup deleted {deleted} expired documents, kept {failed}, complete: {complete}")
+    return {"deleted": deleted, "failed": failed, "complete": complete}
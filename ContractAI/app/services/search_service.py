@@ -0,0 +1,225 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, delete, insert, func, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Document, SearchPassage, search_vector
+
+logger = logging.getLogger(__name__)
+
+# Content is indexed in passages of about this many characters
+CONTENT_PASSAGE_LENGTH = 2000
+
+# Characters of context on each side of a match in fallback snippets
+SNIPPET_CONTEXT = 80
+
+# ts_headline options for snippets on Postgres
+HEADLINE_OPTIONS = "MaxFragments=2, MinWords=10, MaxWords=30, FragmentDelimiter= ... "
+
+
+def split_passages(content: str, max_length: int = CONTENT_PASSAGE_LENGTH) -> List[str]:
+    """
+    Split document content into passages at paragraph boundaries.
+    
+    Paragraphs are merged until a passage would exceed max_length; a single
+    longer paragraph is cut into max_length pieces.
+    
+    Args:
+        content: Document text content
+        max_length: Maximum passage length in characters
+    
+    Returns:
+        Passages in document order
+    """
+    passages = []
+    current: List[str] = []
+    current_length = 0
+    for paragraph in re.split(r"\n\s*\n", content):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if current and current_length + len(paragraph) > max_length:
+            passages.append("\n\n".join(current))
+            current, current_length = [], 0
+        while len(paragraph) > max_length:
+            passages.append(paragraph[:max_length])
+            paragraph = paragraph[max_length:]
+        current.append(paragraph)
+        current_length += len(paragraph) + 2
+    if current:
+        passages.append("\n\n".join(current))
+    return passages
+
+
+async def index_document(
+    db: AsyncSession,
+    document: Document,
+    content: str,
+    clauses: List[Dict[str, Any]]
+) -> int:
+    """
+    Replace a document's search passages with its current clauses and content.
+    
+    Runs in the caller's transaction so the index is committed together with
+    the analysis it was built from.
+    
+    Args:
+        db: Database session
+        document: Processed document
+        content: Document text content
+        clauses: Clauses from the analysis
+    
+    Returns:
+        Number of passages indexed
+    """
+    rows = []
+    for ordinal, clause in enumerate(clauses):
+        text = clause.get("text") or ""
+        if not text.strip():
+            continue
+        rows.append({
+            "document_id": document.id,
+            "owner_id": document.owner_id,
+            "kind": "clause",
+            "clause_type": clause.get("type"),
+            "section": str(clause["section"]) if clause.get("section") else None,
+            "ordinal": ordinal,
+            "text": text,
+        })
+    for ordinal, passage in enumerate(split_passages(content)):
+        rows.append({
+            "document_id": document.id,
+            "owner_id": document.owner_id,
+            "kind": "content",
+            "clause_type": None,
+            "section": None,
+            "ordinal": ordinal,
+            "text": passage,
+        })
+    
+    await remove_document(db, document.id)
+    if rows:
+        await db.execute(insert(SearchPassage), rows)
+    
+    return len(rows)
+
+
+async def remove_document(db: AsyncSession, document_id: int) -> None:
+    """
+    Remove a document's search passages in the caller's transaction.
+    
+    Args:
+        db: Database session
+        document_id: ID of the document
+    """
+    await db.execute(delete(SearchPassage).where(SearchPassage.document_id == document_id))
+
+
+async def remove_documents(db: AsyncSession, document_ids: List[int]) -> None:
+    """
+    Remove the search passages of many documents in the caller's transaction.
+    
+    Args:
+        db: Database session
+        document_ids: IDs of the documents
+    """
+    await db.execute(delete(SearchPassage).where(SearchPassage.document_id.in_(document_ids)))
+
+
+def _fallback_snippet(text: str, terms: List[str]) -> str:
+    """Get the text around the first matching term."""
+    lowered = text.lower()
+    positions = [lowered.find(term.lower()) for term in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(min(positions) - SNIPPET_CONTEXT, 0) if positions else 0
+    end = min(start + 2 * SNIPPET_CONTEXT, len(text))
+    snippet = text[start:end].strip()
+    return f"{'...' if start > 0 else ''}{snippet}{'...' if end < len(text) else ''}"
+
+
+async def search_passages(
+    db: AsyncSession,
+    owner_id: int,
+    query: str,
+    kind: Optional[str] = None,
+    clause_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> List[Dict[str, Any]]:
+    """
+    Search a user's clause and content passages.
+    
+    On Postgres, passages match the web-search style query through the
+    full-text index or by trigram word similarity, and are ranked by both.
+    Snippets are built with ts_headline for the returned page only. Other
+    databases fall back to case-insensitive substring matching of every
+    term, newest documents first.
+    
+    Args:
+        db: Database session
+        owner_id: ID of the user whose documents are searched
+        query: Search text
+        kind: Only passages of this kind (clause or content)
+        clause_type: Only clauses of this type
+        limit: Maximum number of results
+        offset: Number of results to skip
+    
+    Returns:
+        Results with document, passage metadata, snippet and rank
+    """
+    filters = [SearchPassage.owner_id == owner_id]
+    if kind:
+        filters.append(SearchPassage.kind == kind)
+    if clause_type:
+        filters.append(SearchPassage.clause_type == clause_type)
+    
+    if db.get_bind().dialect.name == "postgresql":
+        config = literal_column("'english'")
+        tsquery = func.websearch_to_tsquery(config, query)
+        vector = search_vector(SearchPassage.text)
+        rank = func.ts_rank_cd(vector, tsquery) + func.word_similarity(query, SearchPassage.text)
+        ranked = (
+            select(SearchPassage.id, rank.label("rank"))
+            .where(*filters)
+            .where(vector.bool_op("@@")(tsquery) | SearchPassage.text.bool_op("%>")(query))
+            .order_by(rank.desc(), SearchPassage.id)
+            .limit(limit)
+            .offset(offset)
+            .subquery()
+        )
+        snippet = func.ts_headline(config, SearchPassage.text, tsquery, HEADLINE_OPTIONS)
+        statement = (
+            select(SearchPassage, Document.name, ranked.c.rank, snippet.label("snippet"))
+            .join(ranked, ranked.c.id == SearchPassage.id)
+            .join(Document, Document.id == SearchPassage.document_id)
+            .order_by(ranked.c.rank.desc(), SearchPassage.id)
+        )
+        rows = (await db.execute(statement)).all()
+        results = [(passage, name, float(rank_value), text) for passage, name, rank_value, text in rows]
+    else:
+        terms = query.split()
+        statement = (
+            select(SearchPassage, Document.name)
+            .join(Document, Document.id == SearchPassage.document_id)
+            .where(*filters)
+            # Escaped, so % and _ in a term match themselves rather than anything
+            .where(*(SearchPassage.text.icontains(term, autoescape=True) for term in terms))
+            .order_by(SearchPassage.document_id.desc(), SearchPassage.kind, SearchPassage.ordinal)
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = (await db.execute(statement)).all()
+        results = [(passage, name, 1.0, _fallback_snippet(passage.text, terms)) for passage, name in rows]
+    
+    return [
+        {
+            "document_id": passage.document_id,
+            "document_name": name,
+            "kind": passage.kind,
+            "clause_type": passage.clause_type,
+            "section": passage.section,
+            "snippet": snippet_text,
+            "rank": rank_value,
+        }
+        for passage, name, rank_value, snippet_text in results
+    ]
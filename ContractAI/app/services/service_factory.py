@@ -2,13 +2,13 @@
 Service factory for ContractAI.
 """
 
+import asyncio
 import logging
 from typing import Dict, Any, Optional
 
 from app.services.redis_service import RedisService
 from app.services.cache_service import LLMResponseCache
 from app.monitoring.llm_metrics import LLMMetricsTracker
-from app.ai.llm_config import initialize_llm_settings
 from app.ai.llm_factory import LLMFactory
 
 logger = logging.getLogger(__name__)
@@ -18,6 +18,8 @@ class ServiceFactory:
     
     _cache_service: Optional[LLMResponseCache] = None
     _metrics_tracker: Optional[LLMMetricsTracker] = None
+    _orchestrator = None
+    _orchestrator_lock: Optional[asyncio.Lock] = None
     _initialized: bool = False
     
     @classmethod
@@ -26,11 +28,8 @@ class ServiceFactory:
         if cls._initialized:
             return
             
-        # Initialize LLM settings
-        llm_settings, agent_llm_settings = initialize_llm_settings()
-        
-        # Initialize LLM factory
-        LLMFactory.initialize(llm_settings, agent_llm_settings)
+        # Initialize LLM factory; provider settings come from app.config
+        LLMFactory.initialize()
         
         # Mark as initialized
         cls._initialized = True
@@ -66,8 +65,16 @@ class ServiceFactory:
             await cls.initialize()
             
         if cls._metrics_tracker is None:
+            from app.config import get_settings
+            settings = get_settings()
+            
             redis = await RedisService.get_redis()
-            cls._metrics_tracker = LLMMetricsTracker(redis)
+            cls._metrics_tracker = LLMMetricsTracker(
+                redis,
+                max_queue_size=settings.METRICS_QUEUE_SIZE,
+                batch_size=settings.METRICS_BATCH_SIZE,
+                flush_interval=settings.METRICS_FLUSH_INTERVAL
+            )
             logger.info("Initialized LLM metrics tracker")
             
         return cls._metrics_tracker
@@ -168,8 +175,51 @@ class ServiceFactory:
         
         return agent
     
+    @classmethod
+    async def get_orchestrator(cls):
+        """
+        Get the shared agent orchestrator.
+        
+        The orchestrator and its agents hold no per-document state, so one
+        initialized instance serves all documents processed in this process.
+        
+        Returns:
+            Initialized agent orchestrator
+        """
+        if cls._orchestrator is None:
+            if cls._orchestrator_lock is None:
+                cls._orchestrator_lock = asyncio.Lock()
+            
+            async with cls._orchestrator_lock:
+                if cls._orchestrator is None:
+                    from app.ai.orchestrator import AgentOrchestrator
+                    
+                    orchestrator = AgentOrchestrator()
+                    await orchestrator.initialize()
+                    cls._orchestrator = orchestrator
+        
+        return cls._orchestrator
+    
     @classmethod
     async def shutdown(cls) -> None:
         """Shutdown all services."""
+        # Flush buffered metrics before the Redis connection goes away
+        if cls._metrics_tracker is not None:
+            try:
+                await cls._metrics_tracker.close()
+            except Exception as e:
+                logger.warning(f"Error flushing metrics on shutdown: {str(e)}")
+            cls._metrics_tracker = None
+        
+        cls._cache_service = None
+        cls._orchestrator = None
+        cls._orchestrator_lock = None
+        
+        # Stop listening for principal invalidations and progress events before Redis closes
+        from app.core.principal_cache import PrincipalCache
+        from app.services.progress_service import ProgressHub
+        await PrincipalCache.close()
+        await ProgressHub.close()
+        
         await RedisService.close()
         logger.info("ServiceFactory shutdown complete") 
\ No newline at end of file
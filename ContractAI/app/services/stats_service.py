@@ -0,0 +1,511 @@
+import random
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from sqlalchemy import select, delete, insert, func, case, event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+DOCUMENT_STATUSES = ("uploaded", "processing", "processed", "error")
+
+# Buckets of the documents-per-user histogram: label, lower and upper bound
+DOCUMENT_COUNT_BUCKETS = (("0", 0, 0), ("1-5", 1, 5), ("6-20", 6, 20), ("21-100", 21, 100), ("100+", 101, None))
+
+# Days of per-day creation counters kept by reconciliation
+CREATED_DAYS_KEPT = 31
+
+# Recent windows reported by the admin dashboard
+RECENT_DOCUMENT_DAYS = 7
+RECENT_USER_DAYS = 30
+
+_RECONCILE_LOCK_KEY = "stats:reconcile:lock"
+
+_reconcile_task: Optional[asyncio.Task] = None
+
+
+def _day(value: Optional[datetime] = None) -> str:
+    """Get the UTC day of a timestamp (default now) as YYYY-MM-DD."""
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%d")
+
+
+def _recent_days(days: int) -> List[str]:
+    """Get the last days UTC days, today included."""
+    today = datetime.now(timezone.utc)
+    return [_day(today - timedelta(days=offset)) for offset in range(days)]
+
+
+def _document_changes(session: Any, changes: Dict[str, int]) -> None:
+    """Add counter deltas for documents created, deleted or changing status in a flush."""
+    from sqlalchemy import inspect
+    from app.database import Document
+    
+    for document in session.new:
+        if isinstance(document, Document):
+            changes["documents.total"] += 1
+            changes[f"documents.status.{document.status or 'uploaded'}"] += 1
+            changes[f"documents.created.{_day()}"] += 1
+    
+    for document in session.deleted:
+        if isinstance(document, Document):
+            changes["documents.total"] -= 1
+            changes[f"documents.status.{document.status}"] -= 1
+            if document.created_at is not None:
+                changes[f"documents.created.{_day(document.created_at)}"] -= 1
+    
+    for document in session.dirty:
+        if not isinstance(document, Document) or document in session.deleted:
+            continue
+        history = inspect(document).attrs.status.history
+        if not history.added:
+            continue
+        if history.deleted:
+            old_status = history.deleted[0]
+        else:
+            # The old value was expired before being overwritten; read the stored row
+            old_status = session.connection().scalar(
+                select(Document.status).where(Document.id == document.id)
+            )
+        new_status = history.added[0]
+        if old_status != new_status:
+            changes[f"documents.status.{old_status}"] -= 1
+            changes[f"documents.status.{new_status}"] += 1
+
+
+def _user_changes(session: Any, changes: Dict[str, int]) -> None:
+    """Add counter deltas for users created, deleted or changing flags in a flush."""
+    from sqlalchemy import inspect
+    from app.database import User
+    
+    for user in session.new:
+        if isinstance(user, User):
+            changes["users.total"] += 1
+            # Column defaults are applied during the flush: active, not superuser
+            changes["users.active"] += 1 if user.is_active is None or user.is_active else 0
+            changes["users.superusers"] += 1 if user.is_superuser else 0
+            changes[f"users.created.{_day()}"] += 1
+    
+    for user in session.deleted:
+        if isinstance(user, User):
+            changes["users.total"] -= 1
+            changes["users.active"] -= 1 if user.is_active else 0
+            changes["users.superusers"] -= 1 if user.is_superuser else 0
+            if user.created_at is not None:
+                changes[f"users.created.{_day(user.created_at)}"] -= 1
+    
+    for user in session.dirty:
+        if not isinstance(user, User) or user in session.deleted:
+            continue
+        state = inspect(user)
+        for attribute, counter in (("is_active", "users.active"), ("is_superuser", "users.superusers")):
+            history = state.attrs[attribute].history
+            if not history.added:
+                continue
+            if history.deleted:
+                old_value = history.deleted[0]
+            else:
+                old_value = session.connection().scalar(
+                    select(getattr(User, attribute)).where(User.id == user.id)
+                )
+            new_value = history.added[0]
+            if bool(old_value) != bool(new_value):
+                changes[counter] += 1 if new_value else -1
+
+
+def _upsert_statement(dialect_name: str) -> Any:
+    """Get an INSERT that adds to an existing counter shard, for the dialect."""
+    from app.database import StatCounter
+    
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    
+    statement = dialect_insert(StatCounter)
+    return statement.on_conflict_do_update(
+        index_elements=[StatCounter.name, StatCounter.shard],
+        set_={"value": StatCounter.value + statement.excluded.value},
+    )
+
+
+def _counter_rows(changes: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Get upsert rows adding counter deltas to one random shard, in name order."""
+    # Name order so concurrent transactions lock rows in the same order
+    shard = random.randrange(max(settings.STATS_COUNTER_SHARDS, 1))
+    return [{"name": name, "shard": shard, "value": delta} for name, delta in sorted(changes.items()) if delta]
+
+
+async def record_deleted_documents(db: AsyncSession, status: str, created_at: Iterable[datetime]) -> None:
+    """
+    Update counters for documents removed with a bulk DELETE, in the caller's transaction.
+    
+    Bulk statements bypass the flush events that otherwise maintain the counters.
+    
+    Args:
+        db: Database session
+        status: Status of the deleted documents
+        created_at: Creation times of the deleted documents
+    """
+    changes: Dict[str, int] = defaultdict(int)
+    for value in created_at:
+        changes["documents.total"] -= 1
+        changes[f"documents.status.{status}"] -= 1
+        if value is not None:
+            changes[f"documents.created.{_day(value)}"] -= 1
+    
+    statement = _upsert_statement(db.get_bind().dialect.name)
+    rows = _counter_rows(changes)
+    if statement is not None and rows:
+        await db.execute(statement, rows)
+
+
+def instrument_stat_counters(session_class: Any) -> None:
+    """
+    Maintain stat counters in the same transaction as document and user changes.
+    
+    Deltas are computed before each flush, while attribute history shows the
+    old values, and written after it, so counters commit or roll back with
+    the rows they describe. Bulk UPDATE statements bypass these events; the
+    periodic reconciliation corrects any such drift.
+    
+    Args:
+        session_class: SQLAlchemy Session class to instrument; async sessions
+            are covered through their sync Session class
+    """
+    def before_flush(session: Any, flush_context: Any, instances: Any) -> None:
+        changes: Dict[str, int] = defaultdict(int)
+        _document_changes(session, changes)
+        _user_changes(session, changes)
+        changes = {name: delta for name, delta in changes.items() if delta}
+        if changes:
+            session.info.setdefault("stat_counter_changes", []).append(changes)
+    
+    def after_flush(session: Any, flush_context: Any) -> None:
+        pending = session.info.pop("stat_counter_changes", None)
+        if not pending:
+            return
+        
+        connection = session.connection()
+        statement = _upsert_statement(connection.dialect.name)
+        if statement is None:
+            logger.warning(f"Stat counters are not maintained on {connection.dialect.name}; run reconciliation")
+            return
+        
+        totals: Dict[str, int] = defaultdict(int)
+        for changes in pending:
+            for name, delta in changes.items():
+                totals[name] += delta
+        
+        rows = _counter_rows(totals)
+        if rows:
+            connection.execute(statement, rows)
+    
+    def after_rollback(session: Any) -> None:
+        session.info.pop("stat_counter_changes", None)
+    
+    event.listen(session_class, "before_flush", before_flush)
+    event.listen(session_class, "after_flush", after_flush)
+    event.listen(session_class, "after_soft_rollback", lambda session, previous_transaction: after_rollback(session))
+
+
+async def read_counters(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Read counter values, summed over shards.
+    
+    Args:
+        db: Database session
+        names: Counter names
+    
+    Returns:
+        Value of each counter; counters without rows are 0
+    """
+    from app.database import StatCounter
+    
+    names = list(names)
+    values = {name: 0 for name in names}
+    rows = (await db.execute(
+        select(StatCounter.name, func.sum(StatCounter.value))
+        .where(StatCounter.name.in_(names))
+        .group_by(StatCounter.name)
+    )).all()
+    for name, value in rows:
+        values[name] = int(value or 0)
+    return values
+
+
+async def get_document_stats(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Get document statistics for the admin dashboard from the counters.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Total, counts by status and documents created in the last 7 days
+    """
+    recent_keys = [f"documents.created.{day}" for day in _recent_days(RECENT_DOCUMENT_DAYS)]
+    status_keys = [f"documents.status.{status}" for status in DOCUMENT_STATUSES]
+    values = await read_counters(db, ["documents.total", *status_keys, *recent_keys])
+    
+    return {
+        "total": values["documents.total"],
+        "by_status": {status: values[f"documents.status.{status}"] for status in DOCUMENT_STATUSES},
+        "recent": sum(values[key] for key in recent_keys),
+    }
+
+
+async def get_user_stats(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Get user statistics for the admin dashboard from the counters.
+    
+    The documents-per-user histogram is as of the last reconciliation.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Totals, users created in the last 30 days and users by document count
+    """
+    recent_keys = [f"users.created.{day}" for day in _recent_days(RECENT_USER_DAYS)]
+    bucket_keys = [f"users.by_document_count.{label}" for label, _, _ in DOCUMENT_COUNT_BUCKETS]
+    values = await read_counters(
+        db, ["users.total", "users.active", "users.superusers", *recent_keys, *bucket_keys]
+    )
+    
+    return {
+        "total": values["users.total"],
+        "active": values["users.active"],
+        "inactive": values["users.total"] - values["users.active"],
+        "superusers": values["users.superusers"],
+        "recent": sum(values[key] for key in recent_keys),
+        "by_document_count": {
+            label: values[f"users.by_document_count.{label}"] for label, _, _ in DOCUMENT_COUNT_BUCKETS
+        },
+    }
+
+
+async def get_dedup_stats(db: AsyncSession, days: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Get how often identical uploads were found and their analyses reused.
+    
+    Computed from the analyses and documents tables on every call.
+    
+    Args:
+        db: Database session
+        days: Only count analyses saved and documents uploaded in the last
+            days days (default all)
+    
+    Returns:
+        Analyses computed and reused, the share reused, LLM spend and tokens
+        of computed analyses and avoided by reused ones, and uploads with and
+        without a distinct content hash
+    """
+    from app.database import Document, Analysis
+    
+    reused = Analysis.reused_from_document_id.isnot(None)
+    analyses = select(
+        func.count(Analysis.id),
+        func.sum(case((reused, 1), else_=0)),
+        func.sum(case((reused, 0), else_=func.coalesce(Analysis.llm_cost, 0.0))),
+        func.sum(case((reused, func.coalesce(Analysis.llm_cost, 0.0)), else_=0.0)),
+        func.sum(case((reused, 0), else_=func.coalesce(Analysis.llm_tokens, 0))),
+        func.sum(case((reused, func.coalesce(Analysis.llm_tokens, 0)), else_=0)),
+    )
+    uploads = select(
+        func.count(Document.id),
+        func.count(func.distinct(Document.content_hash)),
+    ).where(Document.content_hash.isnot(None))
+    if days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        analyses = analyses.where(func.coalesce(Analysis.updated_at, Analysis.created_at) >= since)
+        uploads = uploads.where(Document.created_at >= since)
+    
+    total, reused_count, cost_spent, cost_avoided, tokens_spent, tokens_avoided = (await db.execute(analyses)).one()
+    hashed_uploads, unique_uploads = (await db.execute(uploads)).one()
+    total, reused_count = int(total or 0), int(reused_count or 0)
+    
+    return {
+        "days": days,
+        "analyses": {
+            "total": total,
+            "computed": total - reused_count,
+            "reused": reused_count,
+            "dedup_ratio": reused_count / total if total else 0.0,
+        },
+        "llm_cost": {"spent": float(cost_spent or 0.0), "avoided": float(cost_avoided or 0.0)},
+        "llm_tokens": {"spent": int(tokens_spent or 0), "avoided": int(tokens_avoided or 0)},
+        "uploads": {
+            "total": int(hashed_uploads or 0),
+            "unique": int(unique_uploads or 0),
+            "duplicate": int(hashed_uploads or 0) - int(unique_uploads or 0),
+        },
+    }
+
+
+async def compute_counters(db: AsyncSession) -> Dict[str, int]:
+    """
+    Compute every counter from the documents and users tables.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Counter values by name
+    """
+    from app.database import Document, User
+    
+    counters: Dict[str, int] = {}
+    since = datetime.now(timezone.utc) - timedelta(days=CREATED_DAYS_KEPT)
+    
+    # Documents by status
+    counters["documents.total"] = 0
+    for status in DOCUMENT_STATUSES:
+        counters[f"documents.status.{status}"] = 0
+    for status, count in (await db.execute(
+        select(Document.status, func.count(Document.id)).group_by(Document.status)
+    )).all():
+        counters[f"documents.status.{status}"] = count
+        counters["documents.total"] += count
+    
+    # Documents and users created per day
+    for model, prefix in ((Document, "documents.created"), (User, "users.created")):
+        day = func.date(model.created_at)
+        for value, count in (await db.execute(
+            select(day, func.count(model.id)).where(model.created_at >= since).group_by(day)
+        )).all():
+            counters[f"{prefix}.{value}"] = count
+    
+    # User totals
+    total, active, superusers = (await db.execute(
+        select(
+            func.count(User.id),
+            func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0),  # noqa: E712
+            func.coalesce(func.sum(case((User.is_superuser == True, 1), else_=0)), 0),  # noqa: E712
+        )
+    )).one()
+    counters["users.total"] = total
+    counters["users.active"] = int(active)
+    counters["users.superusers"] = int(superusers)
+    
+    # Users by document count, bucketed in SQL
+    per_user = (
+        select(User.id, func.count(Document.id).label("documents"))
+        .outerjoin(Document, Document.owner_id == User.id)
+        .group_by(User.id)
+        .subquery()
+    )
+    bucket = case(
+        *[
+            (per_user.c.documents <= upper, label)
+            for label, _, upper in DOCUMENT_COUNT_BUCKETS
+            if upper is not None
+        ],
+        else_=DOCUMENT_COUNT_BUCKETS[-1][0],
+    )
+    for label, _, _ in DOCUMENT_COUNT_BUCKETS:
+        counters[f"users.by_document_count.{label}"] = 0
+    for label, count in (await db.execute(
+        select(bucket, func.count()).select_from(per_user).group_by(bucket)
+    )).all():
+        counters[f"users.by_document_count.{label}"] = count
+    
+    return counters
+
+
+async def reconcile_counters(db: AsyncSession) -> Dict[str, int]:
+    """
+    Replace all counters with values computed from the source tables.
+    
+    Counts are computed and the counters rewritten in one transaction. On
+    PostgreSQL the counter table is locked first: writers update counters in
+    the transaction that changes the rows they count, so they either commit
+    before the recount or wait until the rewrite is committed, and no
+    increment is lost. Other databases are not locked, and increments
+    committed during the recount are lost until the next reconciliation.
+    
+    Args:
+        db: Database session
+    
+    Returns:
+        Counter values written
+    """
+    from app.database import StatCounter
+    
+    if db.get_bind().dialect.name == "postgresql":
+        await db.execute(text(f"LOCK TABLE {StatCounter.__tablename__} IN EXCLUSIVE MODE"))
+    
+    counters = await compute_counters(db)
+    await db.execute(delete(StatCounter))
+    await db.execute(
+        insert(StatCounter),
+        [{"name": name, "shard": 0, "value": value} for name, value in counters.items()],
+    )
+    await db.commit()
+    
+    logger.info(f"Reconciled {len(counters)} stat counters")
+    return counters
+
+
+async def _acquire_reconcile_lock(interval: float) -> bool:
+    """Take the cluster-wide reconciliation lock so one worker runs per interval."""
+    try:
+        from app.services.redis_service import RedisService
+        redis = await RedisService.get_redis()
+        return bool(await redis.set(_RECONCILE_LOCK_KEY, "1", ex=max(int(interval) - 1, 1), nx=True))
+    except Exception as e:
+        logger.warning(f"Error acquiring stats reconciliation lock: {str(e)}")
+        return True
+
+
+async def _reconcile_loop(interval: float) -> None:
+    """Reconcile counters now and then every interval seconds."""
+    from app.database import AsyncSessionLocal
+    
+    while True:
+        try:
+            if await _acquire_reconcile_lock(interval):
+                async with AsyncSessionLocal() as db:
+                    await reconcile_counters(db)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Error reconciling stat counters: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+def start_reconciliation(interval: Optional[float] = None) -> None:
+    """
+    Start periodic counter reconciliation on the running event loop.
+    
+    Args:
+        interval: Seconds between runs (default STATS_RECONCILE_INTERVAL; 0 disables)
+    """
+    global _reconcile_task
+    
+    interval = settings.STATS_RECONCILE_INTERVAL if interval is None else interval
+    if interval <= 0 or (_reconcile_task is not None and not _reconcile_task.done()):
+        return
+    _reconcile_task = asyncio.get_running_loop().create_task(_reconcile_loop(interval))
+
+
+async def stop_reconciliation() -> None:
+    """Stop periodic counter reconciliation."""
+    global _reconcile_task
+    
+    if _reconcile_task is None:
+        return
+    _reconcile_task.cancel()
+    try:
+        await _reconcile_task
+    except asyncio.CancelledError:
+        pass
+    _reconcile_task = None
@@ -1,16 +1,21 @@
+import asyncio
+import hashlib
 import logging
-from typing import BinaryIO, Optional, List
+from typing import BinaryIO, Iterable, Optional, List, Set, Tuple
 from minio import Minio
+from minio.deleteobjects import DeleteObject
+from minio.helpers import MIN_PART_SIZE
 from minio.error import S3Error, InvalidResponseError, MinioException
 from fastapi import UploadFile
 import io
-import tempfile
-import os
 import time
-from functools import wraps
+from functools import partial, wraps
 
 from app.config import get_settings
-from app.core.errors import StorageError, DocumentNotFoundError, BucketNotFoundError, StorageAuthError, StorageTimeoutError
+from app.monitoring.tracing import traced, current_span
+from app.core.errors import (
+    StorageError, DocumentNotFoundError, DocumentTooLargeError, BucketNotFoundError, StorageAuthError, StorageTimeoutError
+)
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -61,25 +66,65 @@ def with_retry(func):
     return wrapper
 
 
+class HashingReader:
+    """
+    Read-only stream that hashes and counts the bytes read through it.
+    
+    Raises DocumentTooLargeError as soon as more than max_size bytes have been
+    read, so an oversized upload is never read to the end.
+    """
+    
+    def __init__(self, source: BinaryIO, max_size: Optional[int] = None):
+        """
+        Initialize the reader.
+        
+        Args:
+            source: Stream to read from
+            max_size: Maximum number of bytes, or None for no limit
+        """
+        self._source = source
+        self._max_size = max_size
+        self._digest = hashlib.sha256()
+        self.size = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        """Read up to size bytes (all remaining if negative)."""
+        chunk = self._source.read(size)
+        self.size += len(chunk)
+        if self._max_size is not None and self.size > self._max_size:
+            raise DocumentTooLargeError(self._max_size)
+        self._digest.update(chunk)
+        return chunk
+    
+    def hexdigest(self) -> str:
+        """Get the hex SHA-256 of the bytes read so far."""
+        return self._digest.hexdigest()
+
+
 class StorageService:
     """Service for handling document storage using MinIO."""
     
     def __init__(self):
         """Initialize the storage service."""
         try:
-            # Initialize MinIO client
-            self.client = Minio(
-                settings.MINIO_ENDPOINT,
-                access_key=settings.MINIO_ACCESS_KEY,
-                secret_key=settings.MINIO_SECRET_KEY,
-                secure=settings.MINIO_SECURE
-            )
+            if settings.STORAGE_BACKEND == "memory":
+                # Import here to avoid loading the stand-in in production
+                from app.services.memory_storage import InMemoryObjectStore
+                self.client = InMemoryObjectStore(latency_ms=settings.STORAGE_MEMORY_LATENCY_MS)
+            else:
+                # Initialize MinIO client
+                self.client = Minio(
+                    settings.MINIO_ENDPOINT,
+                    access_key=settings.MINIO_ACCESS_KEY,
+                    secret_key=settings.MINIO_SECRET_KEY,
+                    secure=settings.MINIO_SECURE
+                )
             
             # Ensure buckets exist
             self._ensure_bucket(settings.DOCUMENT_BUCKET)
             self._ensure_bucket(settings.PROCESSED_BUCKET)
             
-            logger.info("Initialized StorageService with MinIO")
+            logger.info(f"Initialized StorageService with {settings.STORAGE_BACKEND} backend")
             
         except S3Error as e:
             logger.error(f"S3 error initializing StorageService: {e}")
@@ -111,36 +156,53 @@ class StorageService:
             raise StorageError(f"Failed to ensure bucket exists: {str(e)}")
     
     @with_retry
-    async def store_document(self, file: UploadFile, storage_path: str) -> None:
+    async def store_document(self, file: UploadFile, storage_path: str) -> Tuple[str, int]:
         """
         Store a document file.
         
+        The upload is streamed to storage in parts of STORAGE_UPLOAD_PART_SIZE
+        bytes (one request for smaller files), hashed and measured on the way,
+        so an upload holds about one part in memory whatever the file size.
+        If the file turns out to exceed MAX_DOCUMENT_SIZE, the multipart upload
+        is aborted and nothing is stored.
+        
         Args:
             file: File to store
             storage_path: Path to store the file at
+            
+        Returns:
+            Tuple of (hex SHA-256 of the file content, size in bytes)
+            
+        Raises:
+            DocumentTooLargeError: If the file exceeds MAX_DOCUMENT_SIZE
         """
-        temp_file_path = None
-        
         try:
-            # Create a temporary file
-            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                temp_file_path = temp_file.name
-                
-                # Write uploaded file to temporary file
-                content = await file.read()
-                temp_file.write(content)
-                temp_file.flush()
-                
-                # Upload to MinIO
-                self.client.fput_object(
+            # Starts over from the beginning when retried
+            await file.seek(0)
+            reader = HashingReader(file.file, settings.MAX_DOCUMENT_SIZE)
+        
+            # The client reads and uploads the parts itself, which blocks, so
+            # keep it off the event loop. Parts are sent one at a time so only
+            # one is held in memory.
+            await asyncio.get_running_loop().run_in_executor(
+                None,
+                partial(
+                    self.client.put_object,
                     settings.DOCUMENT_BUCKET,
                     storage_path,
-                    temp_file.name,
-                    content_type=file.content_type
+                    reader,
+                    -1,
+                    content_type=file.content_type or "application/octet-stream",
+                    part_size=max(settings.STORAGE_UPLOAD_PART_SIZE, MIN_PART_SIZE),
+                    num_parallel_uploads=1,
                 )
+            )
             
-            logger.info(f"Stored document at {storage_path}")
+            logger.info(f"Stored document at {storage_path} ({reader.size} bytes)")
+            return reader.hexdigest(), reader.size
             
+        except DocumentTooLargeError:
+            raise
         except S3Error as e:
             logger.error(f"S3 error storing document: {e}")
             if "NoSuchBucket" in str(e):
@@ -151,14 +213,8 @@ class StorageService:
         except Exception as e:
             logger.error(f"Error storing document: {e}")
             raise StorageError(f"Failed to store document: {str(e)}")
-        finally:
-            # Clean up temporary file
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.unlink(temp_file_path)
-                except Exception as e:
-                    logger.warning(f"Failed to clean up temporary file {temp_file_path}: {e}")
     
+    @traced("storage.get_document_content")
     @with_retry
     async def get_document_content(self, storage_path: str) -> str:
         """
@@ -187,6 +243,7 @@ class StorageService:
             
             # Read content
             content = data.read()
+            current_span().set_attributes({"storage.path": storage_path, "storage.bytes": len(content)})
             
             # TODO: Add document text extraction based on file type
             # For now, assume text content
@@ -319,6 +376,64 @@ class StorageService:
             logger.error(f"Error deleting document: {e}")
             raise StorageError(f"Failed to delete document: {str(e)}")
     
+    async def delete_documents(self, storage_paths: Iterable[str]) -> Set[str]:
+        """
+        Delete many documents and their processed versions.
+        
+        Objects are removed with multi-object delete requests of up to 1000
+        keys per bucket instead of a stat and a remove per object. Objects
+        that do not exist count as deleted. The requests block, so they run
+        in the default executor. Requests that fail as a whole are not
+        retried here; callers keep the documents and try again later.
+        
+        Args:
+            storage_paths: Paths to the documents
+            
+        Returns:
+            Paths whose objects could not be deleted
+        """
+        paths = list(storage_paths)
+        
+        try:
+            failed = await asyncio.get_running_loop().run_in_executor(None, self._remove_objects, paths)
+            logger.info(f"Deleted {len(paths) - len(failed)} of {len(paths)} documents")
+            return failed
+            
+        except S3Error as e:
+            logger.error(f"S3 error deleting documents: {e}")
+            if "NoSuchBucket" in str(e):
+                raise BucketNotFoundError("Document bucket not found")
+            elif "AccessDenied" in str(e):
+                raise StorageAuthError("Not authorized to delete documents")
+            raise StorageError(f"S3 error deleting documents: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error deleting documents: {e}")
+            raise StorageError(f"Failed to delete documents: {str(e)}")
+    
+    def _remove_objects(self, paths: List[str]) -> Set[str]:
+        """
+        Remove the objects of documents from both buckets.
+        
+        Args:
+            paths: Paths to the documents
+            
+        Returns:
+            Paths whose objects could not be deleted
+        """
+        failed: Set[str] = set()
+        for bucket_name, object_paths in (
+            (settings.DOCUMENT_BUCKET, {path: path for path in paths}),
+            (settings.PROCESSED_BUCKET, {f"{path}/processed.txt": path for path in paths}),
+        ):
+            # remove_objects is lazy; the requests are sent while iterating its errors
+            errors = self.client.remove_objects(
+                bucket_name, (DeleteObject(name) for name in object_paths)
+            )
+            for error in errors:
+                logger.warning(f"Error deleting {bucket_name}/{error.name}: {error.code} {error.message}")
+                failed.add(object_paths.get(error.name, error.name))
+        return failed
+    
     async def list_documents(self, prefix: str = "") -> List[str]:
         """
         List documents in the document bucket.
@@ -357,6 +472,7 @@ storage_service = StorageService()
 
 # Export functions that use the global instance
 store_document = storage_service.store_document
+store_document_file = storage_service.store_document
 get_document_content = storage_service.get_document_content
 store_processed_document = storage_service.store_processed_document
 delete_document = storage_service.delete_document
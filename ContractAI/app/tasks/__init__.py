@@ -2,4 +2,9 @@
 Tasks package for ContractAI.
 
 This package contains Celery tasks for background processing.
-""" 
\ No newline at end of file
+"""
+
+from app.monitoring.tracing import instrument_celery
+
+# Carry trace context from the API into task execution
+instrument_celery()
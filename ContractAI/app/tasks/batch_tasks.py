@@ -0,0 +1,25 @@
+"""
+Batch analysis tasks for ContractAI.
+
+This module contains the Celery task that analyzes one document of a
+batch job. Items are handed to it by app.services.batch_service.
+"""
+
+import logging
+from app.worker import celery
+from app.services.batch_service import run_batch_item
+from app.tasks.runtime import WorkerRuntime
+
+logger = logging.getLogger(__name__)
+
+
+@celery.task(name="process_batch_item")
+def process_batch_item_task(item_id: int):
+    """
+    Analyze the document of a batch item.
+    
+    Args:
+        item_id: The ID of the batch item
+    """
+    logger.info(f"Processing batch item {item_id}")
+    return WorkerRuntime.run(run_batch_item(item_id))
@@ -6,11 +6,11 @@ including text extraction, analysis, and cleanup.
 """
 
 import logging
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from typing import Optional
 from app.worker import celery
-from app.database import SessionLocal, Document
 from app.services.document_service import process_document
+from app.services.retention_service import cleanup_expired_documents as delete_expired_documents
+from app.tasks.runtime import WorkerRuntime
 from app.config import get_settings
 
 settings = get_settings()
@@ -18,91 +18,44 @@ logger = logging.getLogger(__name__)
 
 
 @celery.task(name="process_document")
-def process_document_task(document_id: int):
+def process_document_task(document_id: int, reuse: bool = True):
     """
     Process a document asynchronously.
     
     Args:
         document_id: The ID of the document to process
+        reuse: Whether the analysis of an identical document may be copied
     """
     logger.info(f"Processing document {document_id}")
-    db = SessionLocal()
     
     try:
-        # Get the document
-        document = db.query(Document).filter(Document.id == document_id).first()
-        
-        if not document:
-            logger.error(f"Document {document_id} not found")
-            return {"status": "error", "message": "Document not found"}
-        
-        # Update document status
-        document.status = "processing"
-        db.commit()
-        
-        # Process the document
-        result = process_document(document, db)
-        
-        # Update document status
-        document.status = "processed"
-        db.commit()
-        
-        return {"status": "success", "result": result}
+        # process_document records the outcome on the document itself
+        WorkerRuntime.run(process_document(document_id, reuse=reuse))
+        return {"status": "success", "document_id": document_id}
     
     except Exception as e:
         logger.exception(f"Error processing document {document_id}: {str(e)}")
-        
-        # Update document status to error
-        if document:
-            document.status = "error"
-            document.error_message = str(e)
-            db.commit()
-        
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close()
 
 
 @celery.task(name="cleanup_expired_documents")
-def cleanup_expired_documents(days: int = 30):
+def cleanup_expired_documents(days: int = 30, max_documents: Optional[int] = None):
     """
-    Clean up documents that have been processed more than X days ago.
+    Delete documents that were processed more than X days ago, with their files.
     
     Args:
         days: Number of days after which documents are considered expired
+        max_documents: Maximum documents to go through in this run; the next
+            run resumes where this one stopped
     """
     logger.info(f"Cleaning up documents older than {days} days")
-    db = SessionLocal()
     
     try:
-        # Calculate the cutoff date
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Find expired documents
-        expired_documents = (
-            db.query(Document)
-            .filter(Document.created_at < cutoff_date)
-            .filter(Document.status == "processed")
-            .all()
-        )
-        
-        logger.info(f"Found {len(expired_documents)} expired documents")
-        
-        # Process each expired document
-        for document in expired_documents:
-            try:
-                # TODO: Implement document cleanup logic
-                # This could include removing files from storage, etc.
-                logger.info(f"Cleaning up document {document.id}")
-            except Exception as e:
-                logger.error(f"Error cleaning up document {document.id}: {str(e)}")
-        
-        return {"status": "success", "count": len(expired_documents)}
+        # Cleanup mostly waits on the database and storage, so it does not take a
+        # document processing slot
+        result = WorkerRuntime.run(delete_expired_documents(days, max_documents=max_documents), limited=False)
+        return {"status": "success", **result}
     
     except Exception as e:
         logger.exception(f"Error cleaning up expired documents: {str(e)}")
         return {"status": "error", "message": str(e)}
-    
-    finally:
-        db.close() 
\ No newline at end of file
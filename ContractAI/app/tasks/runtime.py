@@ -0,0 +1,144 @@
+"""
+Asyncio runtime for ContractAI Celery workers.
+
+Celery tasks are synchronous, while the document pipeline is async. Rather
+than starting an event loop per task with asyncio.run, which also means
+reconnecting Redis, the database pool and the LLM clients and rebuilding
+the agents every time, each worker process runs one long-lived event loop
+in a background thread. Tasks submit their coroutine to it and block until
+it finishes, so clients created by ServiceFactory stay warm between tasks.
+
+With the threads pool, several tasks of one process run on the shared loop
+at the same time:
+    celery -A app.worker worker --pool threads --concurrency 8
+
+WORKER_DOCUMENT_CONCURRENCY caps how many of them run at once. On shutdown,
+running coroutines get WORKER_SHUTDOWN_TIMEOUT seconds to finish before
+they are cancelled, then shared clients are closed and the loop stops.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Optional, Set
+from app.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class WorkerRuntime:
+    """Long-lived event loop shared by the tasks of a worker process."""
+    
+    _loop: Optional[asyncio.AbstractEventLoop] = None
+    _thread: Optional[threading.Thread] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _tasks: Set[asyncio.Task] = set()
+    _lock = threading.Lock()
+    
+    @classmethod
+    def start(cls) -> asyncio.AbstractEventLoop:
+        """
+        Start the event loop thread if it is not running.
+        
+        Returns:
+            The running event loop
+        """
+        with cls._lock:
+            if cls._loop is not None:
+                return cls._loop
+            
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+            
+            def run_loop() -> None:
+                asyncio.set_event_loop(loop)
+                cls._semaphore = asyncio.Semaphore(settings.WORKER_DOCUMENT_CONCURRENCY)
+                loop.call_soon(started.set)
+                loop.run_forever()
+            
+            cls._thread = threading.Thread(target=run_loop, name="worker-runtime", daemon=True)
+            cls._thread.start()
+            started.wait()
+            cls._loop = loop
+            logger.info(f"Started worker runtime with {settings.WORKER_DOCUMENT_CONCURRENCY} concurrent documents")
+            return loop
+    
+    @classmethod
+    def run(cls, coro: Awaitable[Any], timeout: Optional[float] = None, limited: bool = True) -> Any:
+        """
+        Run a coroutine on the shared event loop and wait for its result.
+        
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait before the coroutine is cancelled
+            limited: Whether the coroutine takes one of the
+                WORKER_DOCUMENT_CONCURRENCY slots; maintenance tasks that
+                mostly wait should not
+        
+        Returns:
+            The coroutine's result
+        
+        Raises:
+            TimeoutError: If the coroutine did not finish within timeout
+        """
+        loop = cls.start()
+        future = asyncio.run_coroutine_threadsafe(cls._guarded(coro, limited), loop)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise
+    
+    @classmethod
+    async def _guarded(cls, coro: Awaitable[Any], limited: bool) -> Any:
+        """Run a coroutine, once a concurrency slot is free if limited, tracking it for shutdown."""
+        task = asyncio.current_task()
+        cls._tasks.add(task)
+        try:
+            if not limited:
+                return await coro
+            async with cls._semaphore:
+                return await coro
+        finally:
+            cls._tasks.discard(task)
+    
+    @classmethod
+    def stop(cls) -> None:
+        """Let running coroutines finish, close shared clients and stop the loop."""
+        with cls._lock:
+            loop, thread = cls._loop, cls._thread
+            if loop is None:
+                return
+            
+            try:
+                asyncio.run_coroutine_threadsafe(cls._shutdown(), loop).result()
+            except Exception as e:
+                logger.warning(f"Error shutting down worker runtime: {str(e)}")
+            
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            cls._loop = None
+            cls._thread = None
+            cls._semaphore = None
+            logger.info("Stopped worker runtime")
+    
+    @classmethod
+    async def _shutdown(cls) -> None:
+        """Wait for running coroutines, then close shared connections."""
+        from app.database import async_engine
+        from app.services.service_factory import ServiceFactory
+        
+        if cls._tasks:
+            pending = set(cls._tasks)
+            _, still_running = await asyncio.wait(pending, timeout=settings.WORKER_SHUTDOWN_TIMEOUT)
+            for task in still_running:
+                task.cancel()
+            if still_running:
+                logger.warning(f"Cancelled {len(still_running)} tasks still running at shutdown")
+                await asyncio.wait(still_running)
+        
+        await ServiceFactory.shutdown()
+        await async_engine.dispose()
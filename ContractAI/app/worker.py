@@ -1 +1,54 @@
- 
\ No newline at end of file
+"""
+Celery application for ContractAI.
+
+Workers are started with:
+    celery -A app.worker worker --loglevel=info
+
+or, to analyze several documents per process on one event loop (see
+app.tasks.runtime):
+    celery -A app.worker worker --pool threads --concurrency 8 --loglevel=info
+
+The broker and result backend default to REDIS_URL. Tasks are acknowledged
+when they finish and each worker process reserves one task at a time, so a
+long analysis never holds back queued tasks another worker could run.
+"""
+
+from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+from app.config import get_settings
+from app.tasks.runtime import WorkerRuntime
+
+settings = get_settings()
+
+celery = Celery(
+    "contractai",
+    broker=settings.CELERY_BROKER_URL or settings.REDIS_URL,
+    backend=settings.CELERY_RESULT_BACKEND or settings.REDIS_URL,
+    include=[
+        "app.tasks.document_tasks",
+        "app.tasks.batch_tasks",
+        "app.tasks.notification_tasks",
+    ],
+)
+
+celery.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=24 * 3600,
+)
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs):
+    """Start the event loop when a pool process starts, before its first task."""
+    WorkerRuntime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_worker_runtime(**kwargs):
+    """Finish running documents and close shared clients when the worker stops."""
+    WorkerRuntime.stop()
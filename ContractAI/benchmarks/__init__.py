@@ -0,0 +1,6 @@
+"""
+Benchmarks for ContractAI.
+
+This package contains throughput benchmarks that run against the simulated
+LLM provider, so they cost nothing and need no provider API keys.
+"""
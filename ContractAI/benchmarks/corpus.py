@@ -0,0 +1,155 @@
+"""
+Synthetic contract corpus for ContractAI benchmarks.
+
+Contracts are generated deterministically from a seed. Each page holds about
+PAGE_CHARS characters of numbered sections. Most sections are one of the
+standard clause types the clause detection agent looks for. The rest are
+boilerplate headings, so the simulated provider finds a realistic mix of
+clauses.
+
+A synthetic user population can be generated alongside, with a long-tailed
+number of documents per user so a few power users own most of them.
+"""
+
+import random
+from typing import Dict, Any, List
+
+# Approximate characters per contract page
+PAGE_CHARS = 3000
+
+CLAUSE_TYPES = [
+    "Indemnification",
+    "Limitation of Liability",
+    "Confidentiality",
+    "Termination",
+    "Governing Law",
+    "Force Majeure",
+    "Intellectual Property",
+    "Payment Terms",
+    "Warranties",
+    "Assignment",
+    "Non-Compete",
+    "Dispute Resolution",
+    "Insurance",
+    "Compliance with Laws",
+    "Data Protection",
+    "Audit Rights"
+]
+
+# Headings that are not clause types
+BOILERPLATE_HEADINGS = ["Definitions", "Services", "Notices", "Miscellaneous", "Schedules"]
+
+CLAUSE_SENTENCES = {
+    "Indemnification": "The Supplier shall indemnify and hold harmless the Customer against all claims arising from the Supplier's negligence.",
+    "Limitation of Liability": "Neither party's aggregate liability shall exceed {amount} in any contract year.",
+    "Confidentiality": "Each party shall keep the other party's confidential information secret for {years} years after disclosure.",
+    "Termination": "Either party may terminate this Agreement on {days} days' written notice.",
+    "Governing Law": "This Agreement is governed by the laws of {jurisdiction}.",
+    "Force Majeure": "Neither party is liable for delay caused by events beyond its reasonable control lasting fewer than {days} days.",
+    "Intellectual Property": "All intellectual property created under this Agreement vests in the Customer on payment.",
+    "Payment Terms": "Invoices are payable within {days} days of receipt, with late interest at {rate} percent per annum.",
+    "Warranties": "The Supplier warrants that the deliverables will conform to the specification for {days} days.",
+    "Assignment": "Neither party may assign this Agreement without the prior written consent of the other party.",
+    "Non-Compete": "The Supplier shall not provide similar services to a competitor for {years} years.",
+    "Dispute Resolution": "Disputes shall first be escalated to senior management and then referred to arbitration in {jurisdiction}.",
+    "Insurance": "The Supplier shall maintain professional indemnity cover of at least {amount}.",
+    "Compliance with Laws": "Each party shall comply with all applicable laws and regulations in performing this Agreement.",
+    "Data Protection": "The Supplier shall process personal data only on the Customer's documented instructions.",
+    "Audit Rights": "The Customer may inspect the Supplier's records once per year on {days} days' notice."
+}
+
+# Neutral sentences used to pad sections to a realistic length
+FILLER_SENTENCES = [
+    "The parties shall act in good faith in performing their obligations under this section.",
+    "Any notice under this section shall be given in writing to the address set out above.",
+    "References to a party include its permitted successors.",
+    "The obligations in this section continue for the duration of the relevant statement of work.",
+    "Headings are for convenience only and do not affect interpretation.",
+    "Words in the singular include the plural and vice versa.",
+    "The Customer shall provide reasonable access to its premises where required.",
+    "Each statement of work forms part of this Agreement once signed by both parties.",
+    "Time is of the essence for the delivery milestones agreed in writing.",
+    "No variation of this section is effective unless agreed in writing by both parties."
+]
+
+JURISDICTIONS = ["England and Wales", "New York", "Delaware", "Ontario", "Singapore"]
+PARTIES = ["Acme Holdings Ltd", "Globex Corporation", "Initech LLC", "Umbrella Services Inc", "Stark Industries plc"]
+
+
+def _section(number: int, heading: str, rng: random.Random) -> str:
+    """Build one numbered section."""
+    sentences: List[str] = []
+    template = CLAUSE_SENTENCES.get(heading)
+    if template:
+        sentences.append(template.format(
+            amount=f"USD {rng.choice([100, 250, 500, 1000])},000",
+            years=rng.choice([2, 3, 5]),
+            days=rng.choice([14, 30, 60, 90]),
+            rate=rng.choice([2, 4, 8]),
+            jurisdiction=rng.choice(JURISDICTIONS)
+        ))
+    sentences.extend(rng.choice(FILLER_SENTENCES) for _ in range(rng.randint(3, 7)))
+    return f"{number}. {heading}. " + " ".join(sentences)
+
+
+def generate_contract(pages: int, seed: int = 0) -> str:
+    """
+    Generate a synthetic contract.
+
+    Args:
+        pages: Approximate number of pages
+        seed: Seed for reproducible text
+
+    Returns:
+        Contract text
+    """
+    rng = random.Random(seed)
+    party_a, party_b = rng.sample(PARTIES, 2)
+    parts = [
+        "MASTER SERVICES AGREEMENT",
+        f"This Agreement is made between {party_a} (the Customer) and {party_b} (the Supplier)."
+    ]
+
+    target_length = pages * PAGE_CHARS
+    length = sum(len(part) + 2 for part in parts)
+    number = 1
+    while length < target_length:
+        if rng.random() < 0.2:
+            heading = rng.choice(BOILERPLATE_HEADINGS)
+        else:
+            heading = CLAUSE_TYPES[(number - 1) % len(CLAUSE_TYPES)]
+        section = _section(number, heading, rng)
+        parts.append(section)
+        length += len(section) + 2
+        number += 1
+
+    return "\n\n".join(parts)
+
+
+def generate_users(count: int, documents: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Generate a synthetic user population.
+
+    Documents are spread over users with a Pareto distribution, so the first
+    users hold many documents and most users hold a few.
+
+    Args:
+        count: Number of users
+        documents: Total number of documents across all users
+        seed: Seed for reproducible output
+
+    Returns:
+        List of user dictionaries with email, full_name and documents
+    """
+    rng = random.Random(seed)
+    weights = sorted((rng.paretovariate(1.2) for _ in range(count)), reverse=True)
+    total_weight = sum(weights)
+
+    users = []
+    for i, weight in enumerate(weights):
+        users.append({
+            "email": f"loadtest-user-{i}@example.com",
+            "full_name": f"Load Test User {i}",
+            "documents": max(1, round(documents * weight / total_weight)) if documents else 0
+        })
+    return users
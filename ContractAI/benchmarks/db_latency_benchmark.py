@@ -0,0 +1,228 @@
+"""
+Database latency benchmark for ContractAI.
+
+Compares request throughput per worker when handler queries go through a
+synchronous Session, as the API handlers used to, against the AsyncSession
+from app.database. Every SQL statement is delayed by a simulated network
+round trip (20 ms by default).
+
+The delay is a SQLite trace callback that sleeps in the thread executing the
+statement. For the sync session that is the event loop thread, which blocks
+every other request. For aiosqlite it is the connection's own thread, so the
+loop keeps serving other requests while the statement waits. The same models
+and query shapes as GET /api/documents/{id} are used: load the user, the
+document and its analysis.
+
+Usage:
+    python -m benchmarks.db_latency_benchmark --latency-ms 20 --concurrency 1,8,32,64
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import asyncio
+import logging
+import argparse
+import tempfile
+from typing import Any, Callable, Dict, List
+
+from benchmarks.harness import configure_environment, percentile
+
+configure_environment()
+
+from sqlalchemy import create_engine, select  # noqa: E402
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # noqa: E402
+
+from app.database import Base, User, Document, Analysis  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def _sleep_per_statement(latency: float) -> Callable[[str], None]:
+    """Get a trace callback that delays every statement."""
+    def callback(statement: str) -> None:
+        time.sleep(latency)
+    return callback
+
+
+def seed_database(path: str, documents: int) -> int:
+    """
+    Create one user with documents and analyses.
+
+    Args:
+        path: SQLite database file
+        documents: Number of documents to create
+
+    Returns:
+        ID of the user
+    """
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        user = User(email="dbbench@example.com", hashed_password="x", full_name="DB Bench", is_active=True)
+        db.add(user)
+        db.flush()
+        for i in range(documents):
+            document = Document(
+                name=f"contract-{i}", storage_path=f"{user.id}/{i}", content_type="application/pdf",
+                status="processed", owner_id=user.id
+            )
+            db.add(document)
+            db.flush()
+            db.add(Analysis(document_id=document.id, clauses=[], risks=[], summary="Summary"))
+        db.commit()
+        user_id = user.id
+    engine.dispose()
+    return user_id
+
+
+def sync_session_factory(path: str, latency: float, pool_size: int) -> sessionmaker:
+    """Get a sync session factory whose statements are delayed."""
+    def creator() -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.set_trace_callback(_sleep_per_statement(latency))
+        return conn
+
+    engine = create_engine("sqlite://", creator=creator, poolclass=QueuePool, pool_size=pool_size, max_overflow=0)
+    return sessionmaker(bind=engine, autoflush=False)
+
+
+def async_session_factory(path: str, latency: float, pool_size: int) -> async_sessionmaker:
+    """Get an async session factory whose statements are delayed."""
+    import aiosqlite
+
+    async def creator() -> Any:
+        conn = await aiosqlite.connect(path)
+        await conn.set_trace_callback(_sleep_per_statement(latency))
+        return conn
+
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", async_creator=creator,
+        poolclass=AsyncAdaptedQueuePool, pool_size=pool_size, max_overflow=0
+    )
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def sync_request(factory: sessionmaker, user_id: int, document_id: int) -> None:
+    """Run the document detail queries on a sync session inside a coroutine."""
+    with factory() as db:
+        db.get(User, user_id)
+        db.get(Document, document_id)
+        db.scalar(select(Analysis).where(Analysis.document_id == document_id))
+
+
+async def async_request(factory: async_sessionmaker, user_id: int, document_id: int) -> None:
+    """Run the document detail queries on an async session."""
+    async with factory() as db:
+        await db.get(User, user_id)
+        await db.get(Document, document_id)
+        await db.scalar(select(Analysis).where(Analysis.document_id == document_id))
+
+
+async def run_scenario(
+    request: Callable,
+    factory: Any,
+    user_id: int,
+    documents: int,
+    concurrency: int,
+    requests: int
+) -> Dict[str, Any]:
+    """
+    Issue requests with a fixed number in flight.
+
+    Args:
+        request: sync_request or async_request
+        factory: Session factory for the request function
+        user_id: Seeded user ID
+        documents: Number of seeded documents
+        concurrency: Requests in flight at once
+        requests: Total requests
+
+    Returns:
+        Throughput and latency percentiles
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await request(factory, user_id, i % documents + 1)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests_per_second": requests / elapsed,
+        "latency_p50_ms": percentile(latencies, 0.5) * 1000,
+        "latency_p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def _parse_int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Compare sync and async sessions under database latency")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated latency per SQL statement")
+    parser.add_argument("--concurrency", type=_parse_int_list, default=[1, 8, 32, 64],
+                        help="Comma-separated numbers of requests in flight")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--pool-size", type=int, default=20, help="Connection pool size for both sessions")
+    parser.add_argument("--documents", type=int, default=100)
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    """
+    Run the benchmark.
+
+    Args:
+        argv: Command line arguments
+
+    Returns:
+        Process exit code
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    latency = args.latency_ms / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "dbbench.db")
+        user_id = seed_database(path, args.documents)
+        sync_factory = sync_session_factory(path, latency, args.pool_size)
+        async_factory = async_session_factory(path, latency, args.pool_size)
+
+        print(f"{latency * 1000:.0f} ms per statement, pool size {args.pool_size}")
+        print(f"{'concurrency':>11} {'sync req/s':>11} {'async req/s':>12} {'speedup':>8} "
+              f"{'sync p99 ms':>12} {'async p99 ms':>13}")
+        for concurrency in args.concurrency:
+            sync_result = await run_scenario(
+                sync_request, sync_factory, user_id, args.documents, concurrency, args.requests
+            )
+            async_result = await run_scenario(
+                async_request, async_factory, user_id, args.documents, concurrency, args.requests
+            )
+            print(
+                f"{concurrency:>11} {sync_result['requests_per_second']:>11.1f} "
+                f"{async_result['requests_per_second']:>12.1f} "
+                f"{async_result['requests_per_second'] / sync_result['requests_per_second']:>7.1f}x "
+                f"{sync_result['latency_p99_ms']:>12.1f} {async_result['latency_p99_ms']:>13.1f}"
+            )
+
+        sync_factory.kw["bind"].dispose()
+        await async_factory.kw["bind"].dispose()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -0,0 +1,200 @@
+"""
+Shared benchmark helpers for ContractAI.
+
+This module sets up the environment the app's settings require, builds an
+AgentOrchestrator wired to the simulated LLM provider, and compares results
+with a stored baseline.
+"""
+
+import os
+import json
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Settings validators require these; benchmarks never connect to the
+# services behind them unless a real URL is supplied in the environment
+BENCHMARK_ENVIRONMENT = {
+    "DATABASE_URL": "sqlite:///./benchmark.db",
+    "SECRET_KEY": "benchmark-secret-key-not-for-production-use",
+    "MINIO_ENDPOINT": "localhost:9000",
+    "MINIO_ACCESS_KEY": "benchmark",
+    "MINIO_SECRET_KEY": "benchmark",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "STORAGE_BACKEND": "memory",
+    # Process uploads in the benchmark process instead of Celery workers
+    "DOCUMENT_PROCESSING_BACKEND": "local",
+}
+
+
+def configure_environment() -> None:
+    """
+    Prepare environment variables before any app module is imported.
+
+    Existing values are kept, except that LLM_SIMULATED is always enabled.
+    """
+    for key, value in BENCHMARK_ENVIRONMENT.items():
+        os.environ.setdefault(key, value)
+    os.environ["LLM_SIMULATED"] = "true"
+
+
+class NullResponseCache:
+    """Response cache that never hits, so every agent call reaches the provider."""
+
+    def generate_agent_cache_key(self, agent_name: str, operation: str, input_data: Dict[str, Any]) -> str:
+        return ""
+
+    async def get_with_key(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    async def set_with_key(self, cache_key: str, response: Dict[str, Any], ttl: Optional[int] = None) -> bool:
+        return False
+
+
+class NullMetricsTracker:
+    """Metrics tracker that discards LLM call metrics."""
+
+    async def record_llm_call(self, **kwargs) -> str:
+        return ""
+
+
+async def build_orchestrator(
+    client: Any,
+    metrics_tracker: Optional[Any] = None,
+    cassette: Optional[Any] = None
+) -> Any:
+    """
+    Build an AgentOrchestrator whose agents all use the given simulated client.
+
+    Args:
+        client: SimulatedLLMClient instance
+        metrics_tracker: Optional LLMMetricsTracker; metrics are discarded if omitted
+        cassette: Optional LLMCassette shared by all agents, e.g. to replay recorded traffic
+
+    Returns:
+        Initialized orchestrator
+    """
+    from app.ai.llm_factory import LLMFactory, LLMProvider
+    from app.ai.orchestrator import AgentOrchestrator
+    from app.ai.agents.clause_agent import ClauseDetectionAgent
+    from app.ai.agents.risk_agent import RiskAnalysisAgent
+    from app.ai.agents.comparison_agent import DocumentComparisonAgent
+    from app.ai.agents.recommendation_agent import RecommendationAgent
+
+    LLMFactory.set_client(LLMProvider.SIMULATED.value, client)
+
+    cache_service = NullResponseCache()
+    tracker = metrics_tracker or NullMetricsTracker()
+
+    orchestrator = AgentOrchestrator()
+    orchestrator.clause_agent = ClauseDetectionAgent(cache_service=cache_service, metrics_tracker=tracker)
+    orchestrator.risk_agent = RiskAnalysisAgent(cache_service=cache_service, metrics_tracker=tracker)
+    orchestrator.comparison_agent = DocumentComparisonAgent(cache_service=cache_service, metrics_tracker=tracker)
+    orchestrator.recommendation_agent = RecommendationAgent(cache_service=cache_service, metrics_tracker=tracker)
+
+    for agent in (
+        orchestrator.clause_agent,
+        orchestrator.risk_agent,
+        orchestrator.comparison_agent,
+        orchestrator.recommendation_agent
+    ):
+        if cassette is not None:
+            agent.cassette = cassette
+        await agent.initialize()
+
+    orchestrator.initialized = True
+    return orchestrator
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Get a nearest-rank percentile.
+
+    Args:
+        values: Sample values
+        q: Quantile between 0 and 1
+
+    Returns:
+        Percentile value, or None for an empty sample
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    """
+    Load a stored baseline.
+
+    Args:
+        path: Baseline JSON file
+
+    Returns:
+        Baseline data, or None if the file does not exist
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, data: Dict[str, Any]) -> None:
+    """
+    Write a baseline file.
+
+    Args:
+        path: Baseline JSON file
+        data: Baseline data
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare_to_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float,
+    higher_is_better: List[str],
+    lower_is_better: List[str],
+    exact: Optional[List[str]] = None
+) -> List[str]:
+    """
+    Compare scenario results with a baseline.
+
+    Args:
+        results: Scenario name -> metrics from this run
+        baseline: Scenario name -> metrics from the baseline
+        tolerance: Allowed relative change before a metric counts as a regression
+        higher_is_better: Metrics that regress when they drop
+        lower_is_better: Metrics that regress when they rise
+        exact: Metrics that regress when they increase at all (e.g., call counts)
+
+    Returns:
+        Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for scenario, metrics in results.items():
+        base = baseline.get(scenario)
+        if base is None:
+            continue
+
+        for name in higher_is_better:
+            if metrics.get(name) is not None and base.get(name):
+                if metrics[name] < base[name] * (1 - tolerance):
+                    regressions.append(f"{scenario}: {name} {metrics[name]:.4g} < baseline {base[name]:.4g}")
+
+        for name in lower_is_better:
+            if metrics.get(name) is not None and base.get(name):
+                if metrics[name] > base[name] * (1 + tolerance):
+                    regressions.append(f"{scenario}: {name} {metrics[name]:.4g} > baseline {base[name]:.4g}")
+
+        for name in exact or []:
+            if metrics.get(name) is not None and base.get(name) is not None:
+                if metrics[name] > base[name]:
+                    regressions.append(f"{scenario}: {name} {metrics[name]} > baseline {base[name]}")
+
+    return regressions
@@ -0,0 +1,520 @@
+"""
+HTTP API load test for ContractAI.
+
+Runs a mixed workload against the FastAPI app in-process through httpx's ASGI
+transport, with a synthetic contract corpus and user population. The app runs
+against:
+    - the simulated LLM provider
+    - SQLite by default, or the database in DATABASE_URL (e.g. Postgres)
+    - the in-memory object store instead of MinIO (STORAGE_BACKEND=memory)
+
+Client and server share one event loop, as in a single Uvicorn worker, so
+blocking calls in async handlers show up directly as event-loop lag and as
+tail latency on unrelated routes.
+
+The report covers throughput and p50/p95/p99 latency per route, event-loop
+lag, process CPU time per request and, with --track-memory, the peak of
+memory allocated during the measured phase (tracemalloc slows Python code
+down, so latencies from such a run are not comparable). Results can be checked against a stored baseline; the command
+exits non-zero on regressions beyond the tolerance, and when there is no
+baseline unless --allow-missing-baseline is given.
+
+Usage:
+    python -m benchmarks.load_test_api --users 50 --documents 500 --concurrency 32 --duration 60
+    python -m benchmarks.load_test_api --update-baseline
+
+Contracts are uploaded as UTF-8 text under an allowed document content type,
+since the storage service does not extract text from PDF or Word files yet.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import logging
+import argparse
+import tracemalloc
+from collections import defaultdict
+from typing import Dict, Any, List, Optional
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./loadtest.db")
+
+from benchmarks.harness import (  # noqa: E402
+    configure_environment,
+    NullResponseCache,
+    NullMetricsTracker,
+    percentile,
+    load_baseline,
+    save_baseline,
+    compare_to_baseline,
+)
+from benchmarks.corpus import generate_contract, generate_users  # noqa: E402
+
+configure_environment()
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.database import Base, engine, SessionLocal, User  # noqa: E402
+from app.services.document_service import wait_for_local_processing  # noqa: E402
+from app.core.security import get_password_hash, create_access_token  # noqa: E402
+from app.services.service_factory import ServiceFactory  # noqa: E402
+from app.services.storage_service import storage_service  # noqa: E402
+from app.ai.llm_factory import LLMFactory, LLMProvider  # noqa: E402
+from app.ai.simulated_provider import SimulatedLLMClient, SimulatedLLMConfig  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = "benchmarks/baselines/api_load.json"
+
+LOADTEST_PASSWORD = "loadtest-password"
+UPLOAD_CONTENT_TYPE = "application/msword"
+
+# Relative weight of each operation in the workload
+DEFAULT_MIX = {
+    "list": 30,
+    "detail": 25,
+    "clauses": 15,
+    "risks": 15,
+    "analysis": 10,
+    "upload": 10,
+    "batch": 5,
+}
+
+# Interval of the event-loop lag probe in seconds
+LAG_PROBE_INTERVAL = 0.01
+
+
+class VirtualUser:
+    """Seeded user with an access token and the IDs of their documents."""
+
+    def __init__(self, user_id: int, token: str):
+        self.user_id = user_id
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.document_ids: List[int] = []
+
+
+class LoadTestRecorder:
+    """Collects per-route latency samples and event-loop lag."""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.loop_lag: List[float] = []
+
+    def record(self, route: str, seconds: float, status_code: int) -> None:
+        self.latencies[route].append(seconds)
+        if status_code >= 400:
+            self.errors[route] += 1
+
+    async def probe_loop_lag(self, stop: asyncio.Event) -> None:
+        """
+        Measure how late the event loop wakes a sleeping task.
+
+        Args:
+            stop: Event that ends the probe
+        """
+        loop = asyncio.get_running_loop()
+        while not stop.is_set():
+            start = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.loop_lag.append(max(0.0, loop.time() - start - LAG_PROBE_INTERVAL))
+
+    def summary(
+        self,
+        elapsed: float,
+        cpu_seconds: float,
+        peak_memory_mb: Optional[float] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarize the run.
+
+        Args:
+            elapsed: Duration of the measured phase in seconds
+            cpu_seconds: Process CPU time used during the measured phase
+            peak_memory_mb: Peak traced memory, if memory was tracked
+
+        Returns:
+            Route -> metrics, plus an 'overall' entry
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        total = 0
+        for route, samples in sorted(self.latencies.items()):
+            total += len(samples)
+            results[route] = {
+                "requests": len(samples),
+                "errors": self.errors.get(route, 0),
+                "requests_per_second": len(samples) / elapsed if elapsed > 0 else 0.0,
+                "latency_p50_ms": percentile(samples, 0.5) * 1000,
+                "latency_p95_ms": percentile(samples, 0.95) * 1000,
+                "latency_p99_ms": percentile(samples, 0.99) * 1000,
+            }
+
+        lag = self.loop_lag or [0.0]
+        results["overall"] = {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "requests_per_second": total / elapsed if elapsed > 0 else 0.0,
+            "event_loop_lag_p50_ms": percentile(lag, 0.5) * 1000,
+            "event_loop_lag_p99_ms": percentile(lag, 0.99) * 1000,
+            "event_loop_lag_max_ms": max(lag) * 1000,
+            "cpu_ms_per_request": cpu_seconds / total * 1000 if total else 0.0,
+            "peak_memory_mb": peak_memory_mb,
+        }
+        return results
+
+
+def seed_users(population: List[Dict[str, Any]], reset: bool) -> List[VirtualUser]:
+    """
+    Create the load-test users and their access tokens.
+
+    Args:
+        population: Users from generate_users
+        reset: Whether to drop and recreate all tables first
+
+    Returns:
+        Virtual users in population order
+    """
+    if reset:
+        Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    # One hash for all users; bcrypt would otherwise dominate seeding time
+    hashed_password = get_password_hash(LOADTEST_PASSWORD)
+
+    db = SessionLocal()
+    try:
+        users = []
+        for entry in population:
+            user = db.query(User).filter(User.email == entry["email"]).first()
+            if not user:
+                user = User(
+                    email=entry["email"],
+                    full_name=entry["full_name"],
+                    hashed_password=hashed_password,
+                    is_active=True,
+                )
+                db.add(user)
+                db.commit()
+                db.refresh(user)
+            users.append(VirtualUser(user.id, create_access_token(subject=user.id)))
+        return users
+    finally:
+        db.close()
+
+
+async def upload(client: httpx.AsyncClient, user: VirtualUser, text: str, name: str) -> httpx.Response:
+    """Upload one contract and remember its ID."""
+    response = await client.post(
+        "/api/documents/",
+        headers=user.headers,
+        data={"name": name},
+        files={"file": (f"{name}.doc", text.encode("utf-8"), UPLOAD_CONTENT_TYPE)},
+    )
+    if response.status_code == 201:
+        user.document_ids.append(response.json()["id"])
+    return response
+
+
+async def seed_documents(
+    client: httpx.AsyncClient,
+    users: List[VirtualUser],
+    population: List[Dict[str, Any]],
+    pages: int,
+    seed: int
+) -> int:
+    """
+    Upload each user's share of the corpus through the API.
+
+    Args:
+        client: HTTP client bound to the app
+        users: Virtual users
+        population: Users from generate_users with document counts
+        pages: Pages per contract
+        seed: Corpus seed
+
+    Returns:
+        Number of documents uploaded
+    """
+    uploaded = 0
+    for user, entry in zip(users, population):
+        for i in range(entry["documents"]):
+            text = generate_contract(pages, seed=seed + uploaded)
+            response = await upload(client, user, text, f"seed-{user.user_id}-{i}")
+            if response.status_code != 201:
+                logger.warning(f"Seed upload failed with {response.status_code}: {response.text[:200]}")
+            uploaded += 1
+    return uploaded
+
+
+async def run_operation(
+    client: httpx.AsyncClient,
+    user: VirtualUser,
+    operation: str,
+    rng: random.Random,
+    pages: int,
+    recorder: LoadTestRecorder
+) -> None:
+    """
+    Run one workload operation and record its latency.
+
+    Args:
+        client: HTTP client bound to the app
+        user: Virtual user making the request
+        operation: Operation name from the workload mix
+        rng: Random source for this worker
+        pages: Pages per uploaded contract
+        recorder: Result recorder
+    """
+    document_id = rng.choice(user.document_ids) if user.document_ids else 0
+
+    start = time.perf_counter()
+    if operation == "upload":
+        route = "POST /api/documents/"
+        text = generate_contract(pages, seed=rng.randrange(1 << 30))
+        response = await upload(client, user, text, f"load-{user.user_id}-{len(user.document_ids)}")
+    elif operation == "list":
+        route = "GET /api/documents/"
+        skip = rng.randrange(0, max(1, len(user.document_ids)), 20)
+        response = await client.get("/api/documents/", headers=user.headers, params={"skip": skip, "limit": 20})
+    elif operation == "detail":
+        route = "GET /api/documents/{id}"
+        response = await client.get(f"/api/documents/{document_id}", headers=user.headers)
+    elif operation == "clauses":
+        route = "GET /api/analysis/documents/{id}/clauses"
+        response = await client.get(f"/api/analysis/documents/{document_id}/clauses", headers=user.headers)
+    elif operation == "risks":
+        route = "GET /api/analysis/documents/{id}/risks"
+        response = await client.get(f"/api/analysis/documents/{document_id}/risks", headers=user.headers)
+    elif operation == "analysis":
+        route = "GET /api/analysis/{id}"
+        response = await client.get(f"/api/analysis/{document_id}", headers=user.headers)
+    elif operation == "batch":
+        route = "POST /api/analysis/batch"
+        sample = rng.sample(user.document_ids, min(10, len(user.document_ids)))
+        response = await client.post("/api/analysis/batch", headers=user.headers, json={"document_ids": sample})
+    else:
+        raise ValueError(f"Unknown operation: {operation}")
+
+    recorder.record(route, time.perf_counter() - start, response.status_code)
+
+
+async def run_workload(
+    client: httpx.AsyncClient,
+    users: List[VirtualUser],
+    mix: Dict[str, int],
+    concurrency: int,
+    duration: float,
+    max_requests: int,
+    pages: int,
+    seed: int,
+    track_memory: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the mixed workload with a fixed number of concurrent workers.
+
+    Args:
+        client: HTTP client bound to the app
+        users: Virtual users to act as
+        mix: Operation -> relative weight
+        concurrency: Number of concurrent workers
+        duration: Stop after this many seconds
+        max_requests: Stop after this many requests (0 = no limit)
+        pages: Pages per uploaded contract
+        seed: Workload seed
+        track_memory: Whether to measure peak memory with tracemalloc
+
+    Returns:
+        Summary from LoadTestRecorder
+    """
+    recorder = LoadTestRecorder()
+    operations = list(mix)
+    weights = [mix[op] for op in operations]
+    deadline = time.perf_counter() + duration
+    issued = 0
+
+    async def worker(index: int) -> None:
+        nonlocal issued
+        rng = random.Random(seed + index)
+        while time.perf_counter() < deadline and (not max_requests or issued < max_requests):
+            issued += 1
+            user = rng.choice(users)
+            operation = rng.choices(operations, weights)[0]
+            try:
+                await run_operation(client, user, operation, rng, pages, recorder)
+            except Exception as e:
+                logger.warning(f"{operation} failed: {str(e)}")
+                recorder.record(operation, 0.0, 599)
+
+    stop = asyncio.Event()
+    probe = asyncio.create_task(recorder.probe_loop_lag(stop))
+
+    if track_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    cpu_seconds = time.process_time() - cpu_start
+    elapsed = time.perf_counter() - start
+
+    peak_memory = None
+    if track_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    stop.set()
+    await probe
+    return recorder.summary(elapsed, cpu_seconds, peak_memory)
+
+
+def _parse_mix(value: str) -> Dict[str, int]:
+    """Parse an operation mix such as 'list=30,detail=25'."""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name.strip()] = int(weight)
+    return mix
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Load test the ContractAI HTTP API")
+    parser.add_argument("--users", type=int, default=50, help="Number of synthetic users")
+    parser.add_argument("--documents", type=int, default=200,
+                        help="Documents seeded across all users before the measured phase")
+    parser.add_argument("--pages", type=int, default=2, help="Pages per contract")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured phase length in seconds")
+    parser.add_argument("--requests", type=int, default=0, help="Stop after this many requests")
+    parser.add_argument("--mix", type=_parse_mix, default=DEFAULT_MIX,
+                        help="Operation weights, e.g. list=30,detail=25,clauses=15,risks=15,analysis=10,upload=10,batch=5")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Multiplier for simulated LLM delays during the measured phase")
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="Simulated LLM latency")
+    parser.add_argument("--storage-latency-ms", type=float, default=2.0,
+                        help="Simulated latency of each object store call")
+    parser.add_argument("--track-memory", action="store_true",
+                        help="Measure peak memory with tracemalloc, which slows Python code down")
+    parser.add_argument("--reset-database", action="store_true",
+                        help="Drop and recreate all tables first (always done for SQLite)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Exit zero instead of failing when there is no baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative regression against the baseline")
+    parser.add_argument("--output", help="Write full results to this JSON file")
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    """
+    Run the load test.
+
+    Args:
+        argv: Command line arguments
+
+    Returns:
+        Process exit code
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    config = SimulatedLLMConfig(latency_ms=args.latency_ms, time_scale=args.time_scale, seed=args.seed)
+    llm_client = SimulatedLLMClient(config)
+
+    # Agents share the simulated client; Redis-backed caching and metrics are
+    # replaced so the run needs no Redis server
+    await ServiceFactory.initialize()
+    ServiceFactory._cache_service = NullResponseCache()
+    ServiceFactory._metrics_tracker = NullMetricsTracker()
+    LLMFactory.set_client(LLMProvider.SIMULATED.value, llm_client)
+
+    if hasattr(storage_service.client, "latency_ms"):
+        storage_service.client.latency_ms = args.storage_latency_ms
+
+    population = generate_users(args.users, args.documents, seed=args.seed)
+    users = seed_users(population, reset=args.reset_database or engine.url.get_backend_name() == "sqlite")
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+        # Seed without simulated LLM delays
+        config.time_scale = 0
+        seed_start = time.perf_counter()
+        seeded = await seed_documents(client, users, population, args.pages, args.seed)
+        # Uploads return before processing; analyses must exist before the measured phase
+        await wait_for_local_processing()
+        print(f"Seeded {len(users)} users and {seeded} documents in {time.perf_counter() - seed_start:.1f}s")
+
+        config.time_scale = args.time_scale
+        results = await run_workload(
+            client, users, args.mix, args.concurrency, args.duration, args.requests, args.pages, args.seed,
+            args.track_memory,
+        )
+
+    print(f"{'route':<42} {'req':>7} {'err':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for route, metrics in results.items():
+        if route == "overall":
+            continue
+        print(
+            f"{route:<42} {metrics['requests']:>7} {metrics['errors']:>5} {metrics['requests_per_second']:>8.1f} "
+            f"{metrics['latency_p50_ms']:>9.1f} {metrics['latency_p95_ms']:>9.1f} {metrics['latency_p99_ms']:>9.1f}"
+        )
+    overall = results["overall"]
+    print(
+        f"overall: {overall['requests_per_second']:.1f} req/s, {overall['errors']} errors, "
+        f"event-loop lag p50 {overall['event_loop_lag_p50_ms']:.1f} ms, "
+        f"p99 {overall['event_loop_lag_p99_ms']:.1f} ms, max {overall['event_loop_lag_max_ms']:.1f} ms, "
+        f"CPU {overall['cpu_ms_per_request']:.2f} ms/request"
+    )
+    if overall["peak_memory_mb"] is not None:
+        print(f"peak memory during the measured phase: {overall['peak_memory_mb']:.1f} MB")
+
+    settings_report = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "update_baseline")}
+    settings_report["database"] = engine.url.get_backend_name()
+    report = {"settings": settings_report, "routes": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline: Optional[Dict[str, Any]] = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0 if args.allow_missing_baseline else 1
+
+    if baseline.get("settings") != report["settings"]:
+        print("Warning: load test settings differ from the baseline; comparison may not be meaningful")
+
+    regressions = compare_to_baseline(
+        results,
+        baseline.get("routes", {}),
+        args.tolerance,
+        higher_is_better=["requests_per_second"],
+        lower_is_better=["latency_p50_ms", "latency_p99_ms", "event_loop_lag_p99_ms", "cpu_ms_per_request", "peak_memory_mb"],
+        exact=["errors"],
+    )
+    if regressions:
+        print("Regressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
@@ -0,0 +1,388 @@
+"""
+Micro-benchmarks for ContractAI's per-document pure-Python paths.
+
+Each case times one function at several realistic input sizes and records
+its allocations with tracemalloc:
+    - DocumentChunker.split_by_semantic_sections on 1 KB to 5 MB contracts
+    - ClauseMerger.merge_with_context on 10 to 10,000 clauses
+    - count_messages_tokens on 1 KB to 5 MB prompts
+    - LLMResponseCache.generate_agent_cache_key on 1 KB to 5 MB prompts
+    - AgentOrchestrator._generate_summary on 10 to 10,000 clauses
+
+Timing and allocation runs are separate, because tracemalloc slows Python
+code down. Results can be checked against a stored baseline, and the command
+exits non-zero when the median time or peak allocation of any case regresses
+beyond the tolerance, or when there is no baseline unless
+--allow-missing-baseline is given. Timings depend on the machine, so compare
+against a baseline recorded on the same hardware; the committed
+benchmarks/baselines/micro.json is a starting point to be re-recorded with
+--update-baseline on the machine that runs the check.
+
+Usage:
+    python -m benchmarks.micro_benchmarks
+    python -m benchmarks.micro_benchmarks --filter chunker --quick
+    python -m benchmarks.micro_benchmarks --update-baseline
+"""
+
+import sys
+import copy
+import json
+import time
+import random
+import logging
+import argparse
+import statistics
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from benchmarks.harness import configure_environment, load_baseline, save_baseline, compare_to_baseline
+from benchmarks.corpus import generate_contract, CLAUSE_TYPES, PAGE_CHARS
+
+configure_environment()
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = "benchmarks/baselines/micro.json"
+
+KB = 1024
+MB = 1024 * KB
+
+TEXT_SIZES = [("1KB", KB), ("100KB", 100 * KB), ("1MB", MB), ("5MB", 5 * MB)]
+CLAUSE_COUNTS = [10, 100, 1000, 10000]
+
+# Sizes skipped by --quick
+LARGE_SIZES = {"5MB", "10000"}
+
+
+@dataclass
+class BenchmarkCase:
+    """One function at one input size."""
+    name: str
+    size: str
+    # Builds fresh arguments for a single call; not timed
+    setup: Callable[[], Tuple]
+    func: Callable[..., Any]
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[{self.size}]"
+
+
+def contract_text(size: int, seed: int = 0) -> str:
+    """Get a synthetic contract of exactly ``size`` characters."""
+    pages = max(1, size // PAGE_CHARS + 1)
+    return generate_contract(pages, seed=seed)[:size]
+
+
+def prompt_messages(size: int) -> List[Dict[str, str]]:
+    """Get chat messages shaped like a clause detection call with a ``size``-character contract."""
+    return [
+        {"role": "system", "content": "You are a legal expert specializing in contract analysis."},
+        {"role": "user", "content": f"Analyze the following contract text:\n```\n{contract_text(size)}\n```"},
+    ]
+
+
+def section_clauses(count: int, seed: int = 0) -> Tuple[List[List[Dict[str, Any]]], List[Any]]:
+    """
+    Build clause detection results spread over overlapping sections.
+
+    About one clause in ten is detected twice, once in each of two
+    overlapping sections, so the merger has duplicates to remove.
+
+    Args:
+        count: Number of distinct clauses
+        seed: Seed for reproducible confidence values
+
+    Returns:
+        Tuple of (per-section clause lists, sections)
+    """
+    from app.ai.orchestrator import DocumentChunker
+
+    rng = random.Random(seed)
+    chunker = DocumentChunker()
+    clause_length = 300
+    text = contract_text(count * clause_length)
+    sections = chunker.split_by_semantic_sections(text)
+
+    results: List[List[Dict[str, Any]]] = [[] for _ in sections]
+    section_index = 0
+    for i in range(count):
+        start = i * clause_length
+        while sections[section_index].end_char <= start and section_index < len(sections) - 1:
+            section_index += 1
+        targets = [section_index]
+        if rng.random() < 0.1 and section_index + 1 < len(sections):
+            targets.append(section_index + 1)
+
+        for target in targets:
+            section = sections[target]
+            local_start = max(0, start - section.start_char)
+            results[target].append({
+                "type": CLAUSE_TYPES[i % len(CLAUSE_TYPES)],
+                "text": text[start:start + clause_length],
+                "position": {"start_char": local_start, "end_char": local_start + clause_length},
+                "confidence": round(rng.uniform(0.6, 1.0), 3),
+            })
+    return results, sections
+
+
+def summary_inputs(count: int, seed: int = 0) -> Tuple[List[Dict[str, Any]], ...]:
+    """Build clauses, risks and recommendations for _generate_summary."""
+    rng = random.Random(seed)
+    clauses = [{"type": CLAUSE_TYPES[i % len(CLAUSE_TYPES)], "confidence": 0.9} for i in range(count)]
+    risks = [{"risk_level": rng.choice(["high", "medium", "low"])} for _ in range(count // 2)]
+    recommendations = [
+        {"priority": rng.choice(["high", "medium", "low"]), "suggested_action": f"Revise clause {i}"}
+        for i in range(count // 4)
+    ]
+    return clauses, risks, recommendations
+
+
+def build_cases() -> Tuple[List[BenchmarkCase], Dict[str, str]]:
+    """
+    Build all benchmark cases.
+
+    Cases whose module cannot be imported (e.g. tiktoken or numpy missing)
+    are reported as skipped rather than failing the whole run.
+
+    Returns:
+        Tuple of (cases, case name -> skip reason)
+    """
+    cases: List[BenchmarkCase] = []
+    skipped: Dict[str, str] = {}
+
+    try:
+        from app.ai.orchestrator import DocumentChunker, ClauseMerger, AgentOrchestrator
+
+        chunker = DocumentChunker()
+        for label, size in TEXT_SIZES:
+            text = contract_text(size)
+            cases.append(BenchmarkCase(
+                "chunker.split_by_semantic_sections", label,
+                lambda text=text: (text,), chunker.split_by_semantic_sections
+            ))
+
+        merger = ClauseMerger()
+        for count in CLAUSE_COUNTS:
+            # merge_with_context shifts clause positions in place, so every
+            # call gets a fresh copy
+            results, sections = section_clauses(count)
+            cases.append(BenchmarkCase(
+                "merger.merge_with_context", str(count),
+                lambda results=results, sections=sections: (copy.deepcopy(results), sections),
+                merger.merge_with_context
+            ))
+
+        orchestrator = AgentOrchestrator()
+        for count in CLAUSE_COUNTS:
+            inputs = summary_inputs(count)
+            cases.append(BenchmarkCase(
+                "orchestrator._generate_summary", str(count),
+                lambda inputs=inputs: inputs, orchestrator._generate_summary
+            ))
+    except ImportError as e:
+        skipped["orchestrator"] = str(e)
+
+    try:
+        from app.ai.token_counter import count_messages_tokens
+
+        for label, size in TEXT_SIZES:
+            messages = prompt_messages(size)
+            cases.append(BenchmarkCase(
+                "token_counter.count_messages_tokens", label,
+                lambda messages=messages: (messages, "gpt-4"), count_messages_tokens
+            ))
+    except ImportError as e:
+        skipped["token_counter"] = str(e)
+
+    try:
+        from app.services.cache_service import LLMResponseCache
+
+        cache = LLMResponseCache(redis_client=None)
+        for label, size in TEXT_SIZES:
+            # Same shape as the cache key input built in BaseAgent._call_llm
+            input_data = {
+                "messages": prompt_messages(size),
+                "params": {"temperature": 0.0, "max_tokens": 2000},
+                "provider": "openai",
+                "model": "gpt-4",
+            }
+            cases.append(BenchmarkCase(
+                "cache.generate_agent_cache_key", label,
+                lambda input_data=input_data: ("clause_detection", "detect_clauses", input_data),
+                cache.generate_agent_cache_key
+            ))
+    except ImportError as e:
+        skipped["cache_service"] = str(e)
+
+    return cases, skipped
+
+
+def time_case(case: BenchmarkCase, min_time: float, min_calls: int) -> Dict[str, Any]:
+    """
+    Time a case until both the minimum time and the minimum call count are reached.
+
+    Args:
+        case: Case to time
+        min_time: Minimum total measured time in seconds
+        min_calls: Minimum number of calls
+
+    Returns:
+        Timing metrics in microseconds
+    """
+    # Warm up caches (tokenizer, regexes) outside the measurement
+    case.func(*case.setup())
+
+    samples: List[float] = []
+    total = 0.0
+    while total < min_time or len(samples) < min_calls:
+        args = case.setup()
+        start = time.perf_counter()
+        case.func(*args)
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed)
+        total += elapsed
+
+    return {
+        "calls": len(samples),
+        "median_us": statistics.median(samples) * 1e6,
+        "min_us": min(samples) * 1e6,
+        "mean_us": statistics.fmean(samples) * 1e6,
+    }
+
+
+def measure_allocations(case: BenchmarkCase) -> Dict[str, Any]:
+    """
+    Measure the allocations of one call.
+
+    Args:
+        case: Case to measure
+
+    Returns:
+        Peak traced memory, and the number of blocks allocated by the call
+        that are still live afterwards (including the result)
+    """
+    args = case.setup()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        result = case.func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    del result
+
+    diff = after.compare_to(before, "filename")
+    return {
+        "peak_alloc_kb": peak / 1024,
+        "allocated_blocks": sum(stat.count_diff for stat in diff if stat.count_diff > 0),
+    }
+
+
+def run(cases: List[BenchmarkCase], min_time: float, min_calls: int, allocations: bool) -> Dict[str, Dict[str, Any]]:
+    """
+    Run all cases and print a table.
+
+    Args:
+        cases: Cases to run
+        min_time: Minimum measured time per case in seconds
+        min_calls: Minimum calls per case
+        allocations: Whether to measure allocations
+
+    Returns:
+        Case key -> metrics
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'case':<48} {'calls':>7} {'median us':>12} {'min us':>12} {'peak KB':>10}")
+    for case in cases:
+        metrics = time_case(case, min_time, min_calls)
+        if allocations:
+            metrics.update(measure_allocations(case))
+        results[case.key] = metrics
+        print(
+            f"{case.key:<48} {metrics['calls']:>7} {metrics['median_us']:>12.1f} "
+            f"{metrics['min_us']:>12.1f} {metrics.get('peak_alloc_kb', 0):>10.1f}"
+        )
+    return results
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Micro-benchmark ContractAI's pure-Python hot paths")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--quick", action="store_true", help="Skip the 5 MB and 10,000-clause inputs")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Minimum measured seconds per case")
+    parser.add_argument("--min-calls", type=int, default=5, help="Minimum calls per case")
+    parser.add_argument("--no-allocations", action="store_true", help="Skip tracemalloc measurements")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Exit zero instead of failing when there is no baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative regression against the baseline")
+    parser.add_argument("--output", help="Write full results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: List[str]) -> int:
+    """
+    Run the micro-benchmarks.
+
+    Args:
+        argv: Command line arguments
+
+    Returns:
+        Process exit code
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    cases, skipped = build_cases()
+    for module, reason in skipped.items():
+        print(f"Skipping {module} cases: {reason}")
+
+    cases = [
+        case for case in cases
+        if args.filter in case.key and not (args.quick and case.size in LARGE_SIZES)
+    ]
+    results = run(cases, args.min_time, args.min_calls, allocations=not args.no_allocations)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"cases": results}, f, indent=2)
+
+    if args.update_baseline:
+        # Merge so a filtered run only replaces the cases it measured
+        baseline: Optional[Dict[str, Any]] = load_baseline(args.baseline) or {"cases": {}}
+        baseline["cases"].update(results)
+        save_baseline(args.baseline, baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0 if args.allow_missing_baseline else 1
+
+    regressions = compare_to_baseline(
+        results,
+        baseline.get("cases", {}),
+        args.tolerance,
+        higher_is_better=[],
+        lower_is_better=["median_us", "peak_alloc_kb"],
+    )
+    if regressions:
+        print("Regressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
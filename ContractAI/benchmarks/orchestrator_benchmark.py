@@ -0,0 +1,267 @@
+"""
+Orchestrator throughput benchmark for ContractAI.
+
+Drives AgentOrchestrator.process_document over synthetic contracts at several
+document sizes and concurrency levels, using the simulated LLM provider.
+For each scenario it reports:
+    - documents per minute
+    - p50 and p99 document latency
+    - LLM call counts by operation
+    - peak traced memory
+
+Results can be checked against a stored baseline. The command exits non-zero
+when throughput, latency or memory regress beyond the tolerance, or when a
+scenario makes more LLM calls than before. It also fails when there is no
+baseline, unless --allow-missing-baseline is given.
+
+Usage:
+    python -m benchmarks.orchestrator_benchmark --pages 1,10,100,500 --concurrency 1,4,16
+    python -m benchmarks.orchestrator_benchmark --update-baseline
+
+Simulated delays are multiplied by --time-scale (default 0.1), so latencies
+are in scaled time. With --cassette, LLM calls recorded with
+LLM_CASSETTE_MODE=record are replayed from that directory and only requests
+that were never recorded reach the simulated provider. A baseline only makes sense for the same provider
+settings; they are stored alongside the results.
+"""
+
+import sys
+import json
+import time
+import asyncio
+import logging
+import argparse
+import tracemalloc
+from typing import Dict, Any, List
+
+from benchmarks.harness import (
+    configure_environment,
+    build_orchestrator,
+    percentile,
+    load_baseline,
+    save_baseline,
+    compare_to_baseline,
+)
+from benchmarks.corpus import generate_contract
+
+configure_environment()
+
+from app.ai.simulated_provider import SimulatedLLMClient, SimulatedLLMConfig  # noqa: E402
+from app.ai.cassette import LLMCassette  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = "benchmarks/baselines/orchestrator.json"
+
+
+async def run_scenario(
+    orchestrator: Any,
+    client: SimulatedLLMClient,
+    pages: int,
+    concurrency: int,
+    documents: int,
+    seed: int,
+    track_memory: bool = True
+) -> Dict[str, Any]:
+    """
+    Process a batch of synthetic contracts and measure throughput.
+
+    Args:
+        orchestrator: Orchestrator to benchmark
+        client: Simulated client the orchestrator's agents use
+        pages: Pages per contract
+        concurrency: Documents processed at the same time
+        documents: Number of documents to process
+        seed: Seed for the first contract
+        track_memory: Whether to measure peak memory with tracemalloc
+
+    Returns:
+        Scenario metrics
+    """
+    texts = [generate_contract(pages, seed=seed + i) for i in range(documents)]
+    client.reset_stats()
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def process(text: str) -> None:
+        nonlocal failures
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await orchestrator.process_document(text)
+            except Exception as e:
+                failures += 1
+                logger.warning(f"Document failed: {str(e)}")
+                return
+            latencies.append(time.perf_counter() - start)
+
+    if track_memory:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(process(text) for text in texts))
+    elapsed = time.perf_counter() - start
+
+    peak_memory = None
+    if track_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        tracemalloc.stop()
+
+    stats = client.stats.to_dict()
+    return {
+        "pages": pages,
+        "concurrency": concurrency,
+        "documents": documents,
+        "failures": failures,
+        "elapsed_seconds": elapsed,
+        "docs_per_minute": len(latencies) / elapsed * 60 if elapsed > 0 else 0.0,
+        "latency_p50_seconds": percentile(latencies, 0.5),
+        "latency_p99_seconds": percentile(latencies, 0.99),
+        "llm_calls": stats["calls"],
+        "llm_calls_by_operation": stats["calls_by_operation"],
+        "llm_errors": stats["errors"],
+        "llm_rate_limited": stats["rate_limited"],
+        "prompt_tokens": stats["prompt_tokens"],
+        "completion_tokens": stats["completion_tokens"],
+        "peak_memory_mb": peak_memory,
+    }
+
+
+def _parse_int_list(value: str) -> List[int]:
+    """Parse a comma-separated list of integers."""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv: List[str]) -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark AgentOrchestrator throughput")
+    parser.add_argument("--pages", type=_parse_int_list, default=[1, 10, 100, 500],
+                        help="Comma-separated contract sizes in pages")
+    parser.add_argument("--concurrency", type=_parse_int_list, default=[1, 4, 16],
+                        help="Comma-separated numbers of documents processed at once")
+    parser.add_argument("--documents", type=int, default=0,
+                        help="Documents per scenario (default: twice the concurrency)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--time-scale", type=float, default=0.1,
+                        help="Multiplier for simulated delays")
+    parser.add_argument("--latency-distribution", default="lognormal",
+                        choices=["constant", "uniform", "lognormal"])
+    parser.add_argument("--latency-ms", type=float, default=800.0)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-error-rate", type=float, default=0.0)
+    parser.add_argument("--requests-per-minute", type=int, default=0)
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Provider-side limit on in-flight requests")
+    parser.add_argument("--cassette",
+                        help="Replay LLM responses recorded in this cassette directory")
+    parser.add_argument("--cassette-latency-scale", type=float, default=0.0,
+                        help="Multiplier for recorded latency when replaying a cassette")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc, which slows Python code down")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--allow-missing-baseline", action="store_true",
+                        help="Exit zero instead of failing when there is no baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Allowed relative regression against the baseline")
+    parser.add_argument("--output", help="Write full results to this JSON file")
+    return parser.parse_args(argv)
+
+
+async def main(argv: List[str]) -> int:
+    """
+    Run the benchmark.
+
+    Args:
+        argv: Command line arguments
+
+    Returns:
+        Process exit code
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    config = SimulatedLLMConfig(
+        latency_distribution=args.latency_distribution,
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        rate_limit_error_rate=args.rate_limit_error_rate,
+        requests_per_minute=args.requests_per_minute,
+        max_concurrency=args.max_concurrency,
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    client = SimulatedLLMClient(config)
+    cassette = None
+    if args.cassette:
+        cassette = LLMCassette(
+            mode="replay",
+            directory=args.cassette,
+            replay_latency_scale=args.cassette_latency_scale
+        )
+    orchestrator = await build_orchestrator(client, cassette=cassette)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    print(f"{'scenario':<14} {'docs/min':>10} {'p50 s':>9} {'p99 s':>9} {'calls':>7} {'peak MB':>9} {'fail':>5}")
+    for pages in args.pages:
+        for concurrency in args.concurrency:
+            documents = args.documents or concurrency * 2
+            name = f"{pages}p_c{concurrency}"
+            result = await run_scenario(
+                orchestrator, client, pages, concurrency, documents, args.seed,
+                track_memory=not args.no_memory
+            )
+            results[name] = result
+            print(
+                f"{name:<14} {result['docs_per_minute']:>10.2f} "
+                f"{result['latency_p50_seconds'] or 0:>9.3f} {result['latency_p99_seconds'] or 0:>9.3f} "
+                f"{result['llm_calls']:>7} {result['peak_memory_mb'] or 0:>9.1f} {result['failures']:>5}"
+            )
+
+    if cassette is not None:
+        stats = cassette.get_stats()
+        print(f"Cassette: {stats['hits']} replayed, {stats['misses']} not recorded")
+
+    report = {"provider_config": config.__dict__, "scenarios": results}
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, report)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0 if args.allow_missing_baseline else 1
+
+    if baseline.get("provider_config") != report["provider_config"]:
+        print("Warning: provider settings differ from the baseline; comparison may not be meaningful")
+
+    regressions = compare_to_baseline(
+        results,
+        baseline.get("scenarios", {}),
+        args.tolerance,
+        higher_is_better=["docs_per_minute"],
+        lower_is_better=["latency_p50_seconds", "latency_p99_seconds", "peak_memory_mb"],
+        exact=["llm_calls"],
+    )
+    if regressions:
+        print("Regressions against baseline:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+
+    print("No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(sys.argv[1:])))
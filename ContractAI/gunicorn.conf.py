@@ -0,0 +1,14 @@
+"""
+Gunicorn configuration for ContractAI.
+
+Run with:
+    PROMETHEUS_MULTIPROC_DIR=/tmp/contractai-metrics \
+    gunicorn app.main:app -k uvicorn.workers.UvicornWorker -c gunicorn.conf.py
+"""
+
+from app.monitoring.prometheus import mark_process_dead
+
+
+def child_exit(server, worker):
+    """Drop the live Prometheus gauges of an exited worker."""
+    mark_process_dead(worker.pid)
@@ -0,0 +1,10 @@
+-- Indexes for keyset pagination of GET /api/documents.
+-- New databases get them from Base.metadata.create_all; run this on existing
+-- Postgres databases. CONCURRENTLY avoids locking writes, so run each
+-- statement outside a transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_owner_status_created_id
+    ON documents (owner_id, status, created_at, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_owner_created_id
+    ON documents (owner_id, created_at, id);
@@ -0,0 +1,18 @@
+-- Store analysis results as JSONB and index clauses and risks for portfolio
+-- queries (GET /api/analysis/portfolio).
+-- New databases get the types and indexes from Base.metadata.create_all; run
+-- this on existing Postgres databases. The ALTER TABLE rewrites the table
+-- under an exclusive lock, so run it in a maintenance window. CONCURRENTLY
+-- avoids locking writes, so run each CREATE INDEX outside a transaction.
+
+ALTER TABLE analyses
+    ALTER COLUMN clauses TYPE jsonb USING clauses::jsonb,
+    ALTER COLUMN risks TYPE jsonb USING risks::jsonb,
+    ALTER COLUMN comparisons TYPE jsonb USING comparisons::jsonb,
+    ALTER COLUMN recommendations TYPE jsonb USING recommendations::jsonb;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analyses_clauses_gin
+    ON analyses USING gin (clauses jsonb_path_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analyses_risks_gin
+    ON analyses USING gin (risks jsonb_path_ops);
@@ -0,0 +1,42 @@
+-- Full-text search over clause texts and document content
+-- (GET /api/analysis/search).
+-- New databases get the table and indexes from Base.metadata.create_all; run
+-- this on existing Postgres databases. CONCURRENTLY avoids locking writes, so
+-- run each CREATE INDEX outside a transaction.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE TABLE IF NOT EXISTS search_passages (
+    id SERIAL PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents (id),
+    owner_id INTEGER NOT NULL REFERENCES users (id),
+    kind VARCHAR NOT NULL,
+    clause_type VARCHAR,
+    section VARCHAR,
+    ordinal INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_passages_owner_id
+    ON search_passages (owner_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_passages_document_id
+    ON search_passages (document_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_passages_text_trgm
+    ON search_passages USING gin (text gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_search_passages_text_fts
+    ON search_passages USING gin (to_tsvector('english', text));
+
+-- Backfill clauses of existing analyses. Content passages are added when a
+-- document is next processed or reprocessed.
+INSERT INTO search_passages (document_id, owner_id, kind, clause_type, section, ordinal, text)
+SELECT d.id, d.owner_id, 'clause', c.value ->> 'type', c.value ->> 'section', c.ordinality - 1, c.value ->> 'text'
+FROM analyses a
+JOIN documents d ON d.id = a.document_id
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(a.clauses) = 'array' THEN a.clauses ELSE '[]'::jsonb END
+) WITH ORDINALITY AS c (value, ordinality)
+WHERE coalesce(c.value ->> 'text', '') <> ''
+  AND NOT EXISTS (SELECT 1 FROM search_passages p WHERE p.document_id = d.id);
@@ -0,0 +1,11 @@
+-- Counters behind the admin dashboard statistics (GET /api/admin/stats/*).
+-- New databases get the table from Base.metadata.create_all; run this on
+-- existing Postgres databases. The API fills the table on its first
+-- reconciliation after startup, or on POST /api/admin/stats/reconcile.
+
+CREATE TABLE IF NOT EXISTS stat_counters (
+    name VARCHAR NOT NULL,
+    shard INTEGER NOT NULL,
+    value BIGINT NOT NULL,
+    PRIMARY KEY (name, shard)
+);
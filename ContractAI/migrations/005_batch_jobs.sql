@@ -0,0 +1,31 @@
+-- Batch analysis jobs (POST /api/analysis/batch and GET /api/analysis/batch/*).
+-- New databases get the tables from Base.metadata.create_all; run this on
+-- existing Postgres databases.
+
+CREATE TABLE IF NOT EXISTS batch_jobs (
+    id SERIAL PRIMARY KEY,
+    owner_id INTEGER NOT NULL REFERENCES users (id),
+    status VARCHAR NOT NULL,
+    total INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    updated_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_batch_jobs_id ON batch_jobs (id);
+CREATE INDEX IF NOT EXISTS ix_batch_jobs_owner_id ON batch_jobs (owner_id);
+
+CREATE TABLE IF NOT EXISTS batch_items (
+    id SERIAL PRIMARY KEY,
+    batch_id INTEGER NOT NULL REFERENCES batch_jobs (id),
+    document_id INTEGER NOT NULL,
+    owner_id INTEGER NOT NULL,
+    status VARCHAR NOT NULL,
+    error_message TEXT,
+    dispatched_at TIMESTAMP WITH TIME ZONE,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS ix_batch_items_batch_status ON batch_items (batch_id, status);
+CREATE INDEX IF NOT EXISTS ix_batch_items_status_batch_id ON batch_items (status, batch_id, id);
@@ -0,0 +1,7 @@
+-- Index for the keyset scan of expired documents by cleanup_expired_documents.
+-- New databases get it from Base.metadata.create_all; run this on existing
+-- Postgres databases. CONCURRENTLY avoids locking writes, so run it outside
+-- a transaction.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_status_created_id
+    ON documents (status, created_at, id);
@@ -0,0 +1,16 @@
+-- Content hashes of uploads and the columns behind analysis reuse
+-- (ANALYSIS_REUSE_SCOPE) and GET /api/admin/stats/dedup.
+-- New databases get them from Base.metadata.create_all; run this on existing
+-- Postgres databases. Documents uploaded before have no hash and are never
+-- matched. CONCURRENTLY avoids locking writes, so run the index statement
+-- outside a transaction.
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS pipeline_version VARCHAR;
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS llm_tokens INTEGER;
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS llm_cost DOUBLE PRECISION;
+ALTER TABLE analyses ADD COLUMN IF NOT EXISTS reused_from_document_id INTEGER;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_documents_content_hash
+    ON documents (content_hash);
@@ -0,0 +1,17 @@
+-- Store clauses, risks, comparisons and recommendations as JSON arrays, the
+-- shape the orchestrator produces and the analysis endpoints page.
+-- New rows get [] from the model defaults; run this on existing Postgres
+-- databases so that paging and containment filters do not meet the old {}
+-- default, which jsonb_path_query_array would return as [{}].
+
+UPDATE analyses SET clauses = '[]'::jsonb
+    WHERE clauses IS NULL OR clauses = '{}'::jsonb;
+
+UPDATE analyses SET risks = '[]'::jsonb
+    WHERE risks IS NULL OR risks = '{}'::jsonb;
+
+UPDATE analyses SET comparisons = '[]'::jsonb
+    WHERE comparisons IS NULL OR comparisons = '{}'::jsonb;
+
+UPDATE analyses SET recommendations = '[]'::jsonb
+    WHERE recommendations IS NULL OR recommendations = '{}'::jsonb;
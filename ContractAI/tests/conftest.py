@@ -0,0 +1,135 @@
+"""
+Shared test fixtures for ContractAI.
+
+The application reads its settings when first imported, so test defaults are
+set here first: a SQLite database in a temporary directory, the in-memory
+object store and local document processing. Redis is replaced by fakeredis.
+"""
+
+import os
+import asyncio
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/contractai-test.db")
+os.environ.setdefault("SECRET_KEY", "test-secret-key-that-is-long-enough-for-hs256")
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+os.environ.setdefault("DOCUMENT_PROCESSING_BACKEND", "local")
+
+import pytest
+from app.database import Base, User, engine, async_engine, SessionLocal
+from app.services.redis_service import RedisService
+
+
+def run_async(coro):
+    """
+    Run a coroutine on a new event loop.
+
+    Pooled async database connections belong to the loop that opened them,
+    so they are closed before the loop ends.
+    """
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def run():
+    """
+    Get a function running a coroutine to completion (see run_async).
+    """
+    return run_async
+
+
+@pytest.fixture
+def database():
+    """
+    Create the schema in the test database, and drop it afterwards.
+    """
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """
+    Serve RedisService from fakeredis.
+
+    Clients are bound to an event loop, so each loop gets its own client; all
+    of them share one server, so data outlives the loop that wrote it.
+    """
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    clients = {}
+
+    async def get_redis():
+        loop = asyncio.get_running_loop()
+        if loop not in clients:
+            clients[loop] = fakeredis.aioredis.FakeRedis(server=server)
+        return clients[loop]
+
+    monkeypatch.setattr(RedisService, "get_redis", get_redis)
+    return server
+
+
+@pytest.fixture
+def make_user(database):
+    """
+    Create users in the test database; they are returned detached.
+    """
+    def make(email="owner@example.com", **fields):
+        with SessionLocal() as session:
+            user = User(email=email, hashed_password="x", full_name=email.split("@")[0], is_active=True, **fields)
+            session.add(user)
+            session.commit()
+            session.refresh(user)
+            session.expunge(user)
+        return user
+
+    return make
+
+
+@pytest.fixture
+def client(database, redis, make_user):
+    """
+    Create a test client for the API routers, authenticated as client.user.
+    """
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api import auth, documents, analysis, admin
+    from app.core.errors import configure_exception_handlers
+    from app.core.security import get_current_user
+
+    app = FastAPI()
+    configure_exception_handlers(app)
+    app.include_router(auth.router, prefix="/api/auth")
+    app.include_router(documents.router, prefix="/api/documents")
+    app.include_router(analysis.router, prefix="/api/analysis")
+    app.include_router(admin.router, prefix="/api/admin")
+
+    with TestClient(app) as test_client:
+        test_client.user = make_user()
+        app.dependency_overrides[get_current_user] = lambda: test_client.user
+        yield test_client
+        test_client.portal.call(async_engine.dispose)
+
+
+@pytest.fixture
+def queued(monkeypatch):
+    """
+    Record documents the API queues for processing instead of processing them.
+    """
+    from app.api import documents
+
+    document_ids = []
+
+    async def enqueue_document(document_id, reuse=True):
+        document_ids.append(document_id)
+
+    monkeypatch.setattr(documents, "enqueue_document", enqueue_document)
+    return document_ids
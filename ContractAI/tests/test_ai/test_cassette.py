@@ -0,0 +1,176 @@
+"""
+LLM cassette tests for ContractAI.
+
+This module contains tests for recording and replaying LLM calls.
+"""
+
+import os
+import asyncio
+import pytest
+from app.ai.cassette import LLMCassette, CassetteMissError, RECORD_BUFFER_SIZE
+from app.ai.agents.base_agent import BaseAgent
+from app.ai.llm_factory import LLMFactory
+from app.ai.simulated_provider import SimulatedLLMClient, SimulatedLLMConfig
+
+MESSAGES = [{"role": "user", "content": "Identify the termination clause."}]
+PARAMS = {"temperature": 0.0, "max_tokens": 2000}
+
+
+class FakeCache:
+    """
+    LLM response cache that never hits and remembers what was stored.
+    """
+
+    def __init__(self):
+        self.stored = []
+
+    def generate_agent_cache_key(self, agent_name, operation, input_data):
+        return f"{agent_name}:{operation}"
+
+    async def get_with_key(self, cache_key):
+        return None
+
+    async def set_with_key(self, cache_key, response, ttl=None):
+        self.stored.append(cache_key)
+        return True
+
+
+class WarmCache(FakeCache):
+    """
+    LLM response cache that hits for every request.
+    """
+
+    async def get_with_key(self, cache_key):
+        return {"content": "cached"}
+
+
+class FakeTracker:
+    """
+    LLM metrics tracker that remembers recorded calls.
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    async def record_llm_call(self, **call):
+        self.calls.append(call)
+
+
+def make_agent(cassette, llm):
+    """
+    Create an initialized agent on the simulated provider.
+    """
+    agent = BaseAgent("clause_detection", FakeCache(), FakeTracker(), max_retries=1)
+    agent.cassette = cassette
+    agent.provider, agent.model, agent.llm = "simulated", "simulated-contract-model", llm
+    agent.initialized = True
+    return agent
+
+
+def record(recorder, fingerprint, content):
+    """
+    Record a response for a clause detection request.
+    """
+    return recorder.record(
+        fingerprint=fingerprint,
+        agent_name="clause_detection",
+        operation="detect_clauses",
+        provider="openai",
+        model="gpt-4",
+        response={"content": content},
+        prompt_tokens=12,
+        completion_tokens=1,
+        latency_ms=850.0
+    )
+
+
+def test_record_then_replay(tmp_path):
+    """
+    Test that recorded responses are replayed in recorded order.
+    """
+    recorder = LLMCassette(mode="record", directory=str(tmp_path))
+    fingerprint = recorder.fingerprint("clause_detection", "detect_clauses", MESSAGES, PARAMS)
+    for content in ("first", "second"):
+        asyncio.run(record(recorder, fingerprint, content))
+    recorder.close()
+
+    player = LLMCassette(mode="replay", directory=str(tmp_path), strict=True)
+    replayed = [asyncio.run(player.replay(fingerprint))["content"] for _ in range(3)]
+
+    assert replayed == ["first", "second", "first"]
+    assert player.get_stats()["hits"] == 3
+
+
+def test_strict_replay_miss_raises(tmp_path):
+    """
+    Test that an unrecorded request raises in strict replay mode.
+    """
+    player = LLMCassette(mode="replay", directory=str(tmp_path), strict=True)
+    fingerprint = player.fingerprint("clause_detection", "detect_clauses", MESSAGES, PARAMS)
+
+    with pytest.raises(CassetteMissError):
+        player.lookup(fingerprint)
+
+
+def test_full_buffer_is_written_without_close(tmp_path):
+    """
+    Test that a full record buffer is written to the cassette file.
+    """
+    recorder = LLMCassette(mode="record", directory=str(tmp_path))
+    fingerprint = recorder.fingerprint("clause_detection", "detect_clauses", MESSAGES, PARAMS)
+
+    async def record_all():
+        for i in range(RECORD_BUFFER_SIZE):
+            await record(recorder, fingerprint, str(i))
+
+    asyncio.run(record_all())
+
+    player = LLMCassette(mode="replay", directory=str(tmp_path))
+    assert os.path.getsize(recorder._path) > 0
+    assert player.get_stats()["distinct_requests"] == 1
+    assert asyncio.run(player.replay(fingerprint))["content"] == "0"
+
+
+def test_replayed_calls_are_not_accounted(tmp_path, monkeypatch):
+    """
+    Test that replayed responses are not counted as LLM usage or cached.
+    """
+    token_updates = []
+    monkeypatch.setattr(LLMFactory, "update_token_count", lambda **usage: token_updates.append(usage))
+    prompt = "Identify the termination clause."
+
+    recorder = LLMCassette(mode="record", directory=str(tmp_path))
+    live = make_agent(recorder, SimulatedLLMClient(SimulatedLLMConfig(time_scale=0)))
+    recorded = asyncio.run(live._call_llm(prompt, operation="detect_clauses"))
+    recorder.close()
+
+    player = LLMCassette(mode="replay", directory=str(tmp_path), strict=True)
+    replaying = make_agent(player, None)
+    replayed = asyncio.run(replaying._call_llm(prompt, operation="detect_clauses"))
+
+    assert replayed == recorded
+    assert len(live.metrics_tracker.calls) == 1 and len(live.cache_service.stored) == 1
+    assert replaying.metrics_tracker.calls == [] and replaying.cache_service.stored == []
+    assert len(token_updates) == 1
+
+
+def test_warm_cache_is_bypassed_while_recording_and_replaying(tmp_path):
+    """
+    Test that calls the response cache could serve are recorded and replayed from the cassette.
+    """
+    prompt = "Identify the termination clause."
+
+    recorder = LLMCassette(mode="record", directory=str(tmp_path))
+    live = make_agent(recorder, SimulatedLLMClient(SimulatedLLMConfig(time_scale=0)))
+    live.cache_service = WarmCache()
+    recorded = asyncio.run(live._call_llm(prompt, operation="detect_clauses"))
+    recorder.close()
+
+    player = LLMCassette(mode="replay", directory=str(tmp_path), strict=True)
+    replaying = make_agent(player, None)
+    replaying.cache_service = WarmCache()
+    replayed = asyncio.run(replaying._call_llm(prompt, operation="detect_clauses"))
+
+    assert recorded["content"] != "cached"
+    assert replayed == recorded
+    assert player.get_stats()["hits"] == 1
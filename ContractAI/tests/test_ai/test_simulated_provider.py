@@ -0,0 +1,90 @@
+"""
+Simulated LLM provider tests for ContractAI.
+
+This module contains tests for the simulated provider used by benchmarks.
+"""
+
+import json
+import asyncio
+import pytest
+from app.ai.simulated_provider import (
+    SimulatedLLMClient,
+    SimulatedLLMConfig,
+    SimulatedProviderError,
+    SimulatedRateLimitError,
+    detect_operation,
+)
+
+CONTRACT_TEXT = """MASTER SERVICES AGREEMENT
+
+1. Definitions. Headings are for convenience only.
+
+2. Termination. Either party may terminate this Agreement on 30 days' written notice.
+
+3. Governing Law. This Agreement is governed by the laws of Delaware."""
+
+DETECT_PROMPT = f"""Analyze the following contract text and identify the following types of clauses: Termination, Governing Law, Insurance.
+
+Contract Text:
+```
+{CONTRACT_TEXT}
+```
+
+Provide your analysis in the following JSON format:
+{{
+  "clauses": [],
+  "missing_clauses": ["List of clause types that were not found in the contract"]
+}}"""
+
+
+def complete(client, prompt):
+    """
+    Run a single completion on a new event loop.
+    """
+    return asyncio.run(client.chat.completions.create(
+        model="simulated-contract-model",
+        messages=[{"role": "user", "content": prompt}]
+    ))
+
+
+def test_detect_clauses_returns_exact_clause_text():
+    """
+    Test that detected clauses quote the contract text exactly.
+    """
+    client = SimulatedLLMClient(SimulatedLLMConfig(time_scale=0))
+
+    response = complete(client, DETECT_PROMPT)
+    result = json.loads(response.choices[0].message.content)
+
+    assert detect_operation(DETECT_PROMPT) == "detect_clauses"
+    assert [clause["type"] for clause in result["clauses"]] == ["Termination", "Governing Law"]
+    assert all(clause["text"] in CONTRACT_TEXT for clause in result["clauses"])
+    assert result["missing_clauses"] == ["Insurance"]
+    assert response.usage.completion_tokens > 0
+    assert client.stats.calls_by_operation == {"detect_clauses": 1}
+
+
+def test_requests_per_minute_limit_returns_429():
+    """
+    Test that requests over the per-minute limit are rejected.
+    """
+    client = SimulatedLLMClient(SimulatedLLMConfig(time_scale=0, requests_per_minute=2))
+
+    complete(client, DETECT_PROMPT)
+    complete(client, DETECT_PROMPT)
+    with pytest.raises(SimulatedRateLimitError):
+        complete(client, DETECT_PROMPT)
+
+    assert client.stats.rate_limited == 1
+
+
+def test_injected_errors():
+    """
+    Test that the configured error rate produces provider errors.
+    """
+    client = SimulatedLLMClient(SimulatedLLMConfig(time_scale=0, error_rate=1.0))
+
+    with pytest.raises(SimulatedProviderError):
+        complete(client, DETECT_PROMPT)
+
+    assert client.stats.errors == 1
@@ -0,0 +1,183 @@
+"""
+Analysis API tests for ContractAI.
+
+This module contains tests for conditional requests to the analysis and
+document detail endpoints, and for NDJSON analysis fields.
+"""
+
+import json
+import pytest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from app.database import Document, Analysis, SessionLocal
+
+ANALYSIS = {
+    "clauses": [{"type": "Termination", "text": "Either party may terminate on 30 days' notice."}],
+    "risks": [{"level": "low", "description": "Short notice period"}],
+    "recommendations": [],
+    "summary": "A services agreement.",
+}
+
+
+def add_analysis(document_id, **fields):
+    """
+    Store an analysis for a document and mark the document processed.
+    """
+    with SessionLocal() as session:
+        session.add(Analysis(document_id=document_id, **{**ANALYSIS, **fields}))
+        session.get(Document, document_id).status = "processed"
+        session.commit()
+
+
+@pytest.fixture
+def document_id(client):
+    """
+    Create a processed document with an analysis, owned by the client's user.
+    """
+    with SessionLocal() as session:
+        document = Document(name="Services agreement", storage_path="1/contract.pdf", owner_id=client.user.id)
+        session.add(document)
+        session.commit()
+        document_id = document.id
+    add_analysis(document_id)
+    return document_id
+
+
+@pytest.fixture(params=["/api/analysis/{}", "/api/documents/{}"])
+def url(request, document_id):
+    """
+    Get the URL of a conditional endpoint for the document.
+    """
+    return request.param.format(document_id)
+
+
+def test_matching_etag_gets_not_modified(client, url):
+    """
+    Test that a request with the current ETag gets 304 with the validators.
+    """
+    response = client.get(url)
+    etag = response.headers["ETag"]
+
+    not_modified = client.get(url, headers={"If-None-Match": etag})
+    changed = client.get(url, headers={"If-None-Match": 'W/"stale"'})
+
+    assert response.status_code == 200
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+    assert not_modified.headers["Last-Modified"] == response.headers["Last-Modified"]
+    assert changed.status_code == 200
+    assert changed.json() == response.json()
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since(client, url):
+    """
+    Test that If-Modified-Since is ignored when If-None-Match is present.
+    """
+    tomorrow = format_datetime(datetime.now(timezone.utc) + timedelta(days=1), usegmt=True)
+
+    assert client.get(url, headers={"If-Modified-Since": tomorrow}).status_code == 304
+    response = client.get(url, headers={"If-None-Match": 'W/"stale"', "If-Modified-Since": tomorrow})
+    assert response.status_code == 200
+
+
+def test_etag_changes_after_reprocess(client, document_id, url, queued):
+    """
+    Test that reprocessing a document changes its ETag.
+    """
+    etag = client.get(url).headers["ETag"]
+
+    assert client.post(f"/api/documents/{document_id}/reprocess").status_code == 200
+    assert queued == [document_id]
+    # SQLite may give the new analysis the deleted one's id and stores server
+    # timestamps to the second, so date it after the first as processing would
+    add_analysis(document_id, created_at=datetime.now(timezone.utc) + timedelta(seconds=1))
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_etag_changes_after_reset(client, document_id):
+    """
+    Test that resetting a document changes the ETag of its detail.
+    """
+    url = f"/api/documents/{document_id}"
+    etag = client.get(url).headers["ETag"]
+    client.user.is_superuser = True
+
+    assert client.post(f"/api/admin/documents/{document_id}/reset").status_code == 200
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["analysis"] is None
+
+
+@pytest.mark.parametrize("query, headers", [
+    ("?format=ndjson", {}),
+    ("", {"Accept": "application/x-ndjson"}),
+])
+def test_clauses_as_ndjson(client, document_id, query, headers):
+    """
+    Test that clauses can be read as NDJSON, with their own ETag.
+    """
+    url = f"/api/analysis/documents/{document_id}/clauses"
+    as_json = client.get(url)
+
+    response = client.get(url + query, headers=headers)
+
+    assert response.status_code == 200
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert response.headers["Vary"] == "Accept"
+    assert as_json.headers["Vary"] == "Accept"
+    assert [json.loads(line) for line in response.text.splitlines()] == as_json.json() == ANALYSIS["clauses"]
+    assert response.headers["ETag"] != as_json.headers["ETag"]
+
+    etag = response.headers["ETag"]
+    not_modified = client.get(url + query, headers={**headers, "If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["Vary"] == "Accept"
+    assert client.get(url + query, headers={**headers, "If-None-Match": as_json.headers["ETag"]}).status_code == 200
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+    # Both representations have the same Last-Modified, so it cannot tell them apart
+    since = {"If-Modified-Since": response.headers["Last-Modified"]}
+    assert client.get(url + query, headers={**headers, **since}).status_code == 200
+    assert client.get(f"/api/analysis/documents/{document_id}/summary", headers=since).status_code == 304
+
+
+def test_comparisons_are_a_list(client, document_id):
+    """
+    Test that comparisons are returned as a list, also for analyses stored with the old {} default.
+    """
+    with SessionLocal() as session:
+        session.query(Analysis).filter(Analysis.document_id == document_id).update({"comparisons": {}})
+        session.commit()
+
+    analysis = client.get(f"/api/analysis/{document_id}").json()
+    detail = client.get(f"/api/documents/{document_id}").json()
+    projected = client.get(f"/api/documents/{document_id}", params={"include": "comparisons"}).json()
+
+    assert analysis["comparisons"] == detail["analysis"]["comparisons"] == []
+    assert projected["analysis"] == {"comparisons": []}
+
+
+def test_list_fields_default_to_empty_lists(client, document_id):
+    """
+    Test that list fields are stored as [] by default and read as [] from old {} rows.
+    """
+    with SessionLocal() as session:
+        session.query(Analysis).filter(Analysis.document_id == document_id).delete()
+        session.add(Analysis(document_id=document_id))
+        session.commit()
+        analysis = session.query(Analysis).filter(Analysis.document_id == document_id).one()
+        defaults = (analysis.clauses, analysis.risks, analysis.comparisons, analysis.recommendations)
+        analysis.risks = {}
+        session.commit()
+
+    risks = client.get(f"/api/analysis/documents/{document_id}/risks", params={"limit": 5})
+
+    assert defaults == ([], [], [], [])
+    assert risks.json() == []
+    assert risks.headers["X-Total-Count"] == "0"
@@ -0,0 +1,119 @@
+"""
+Authentication tests for ContractAI.
+
+This module contains tests for access tokens and the principal cache.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+import pytest
+from jose import jwt
+from app.config import get_settings
+from app.database import User, SessionLocal
+from app.core.security import create_access_token
+from app.core.principal_cache import PrincipalCache
+from app.services.redis_service import RedisService
+
+settings = get_settings()
+
+
+@pytest.fixture
+def api(client):
+    """
+    Create a test client that authenticates with real access tokens.
+    """
+    client.app.dependency_overrides.clear()
+    yield client
+    client.portal.call(PrincipalCache.close)
+
+
+def get_me(api, token):
+    """
+    Get the current user with an access token.
+    """
+    return api.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+
+
+def update_user(user_id, **fields):
+    """
+    Change a user row without going through the API, so the cache is not invalidated.
+    """
+    with SessionLocal() as session:
+        user = session.get(User, user_id)
+        for name, value in fields.items():
+            setattr(user, name, value)
+        session.commit()
+
+
+def test_cached_principal_skips_the_users_table(api):
+    """
+    Test that a token's user is served from the cache after the first request.
+    """
+    token = create_access_token(api.user.id)
+    assert get_me(api, token).json()["full_name"] == "owner"
+
+    update_user(api.user.id, full_name="Renamed")
+
+    assert get_me(api, token).json()["full_name"] == "owner"
+    assert get_me(api, create_access_token(api.user.id)).json()["full_name"] == "Renamed"
+
+
+def test_invalidation_drops_cached_principal(api):
+    """
+    Test that a deactivated user is rejected once the cache is invalidated.
+    """
+    token = create_access_token(api.user.id)
+    assert get_me(api, token).status_code == 200
+
+    update_user(api.user.id, is_active=False)
+    api.portal.call(PrincipalCache.invalidate, api.user.id)
+
+    response = get_me(api, token)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_user_loaded_before_invalidation_is_not_cached(redis, run):
+    """
+    Test that a user loaded before an invalidation cannot be cached after it.
+    """
+    snapshot = {"id": 7, "email": "a@example.com", "is_active": True}
+
+    async def scenario():
+        try:
+            generation = await PrincipalCache.generation(7)
+            await PrincipalCache.invalidate(7)
+            stale_set = await PrincipalCache.set(7, "token", snapshot, generation)
+            stale_get = await PrincipalCache.get(7, "token")
+
+            # An entry written under the old generation is ignored as well
+            redis_client = await RedisService.get_redis()
+            await redis_client.hset(
+                "principal:7", "old", f'{{"expires_at": 1e12, "generation": {generation}, "user": {{"id": 7}}}}'
+            )
+            stale_entry = await PrincipalCache.get(7, "old")
+
+            fresh_set = await PrincipalCache.set(7, "token", snapshot, await PrincipalCache.generation(7))
+            fresh_get = await PrincipalCache.get(7, "token")
+            return stale_set, stale_get, stale_entry, fresh_set, fresh_get
+        finally:
+            await PrincipalCache.close()
+
+    assert run(scenario()) == (False, None, None, True, snapshot)
+
+
+def test_tokens_without_jti_are_cached_by_hash(api):
+    """
+    Test that tokens issued before jti was added still authenticate and are cached.
+    """
+    expire = datetime.utcnow() + timedelta(minutes=5)
+    token = jwt.encode({"exp": expire, "sub": str(api.user.id)}, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
+    assert get_me(api, token).status_code == 200
+    assert get_me(api, token).status_code == 200
+
+    async def cached_token_ids():
+        redis_client = await RedisService.get_redis()
+        return await redis_client.hkeys(f"principal:{api.user.id}")
+
+    assert api.portal.call(cached_token_ids) == [hashlib.sha256(token.encode()).hexdigest().encode()]
@@ -0,0 +1,29 @@
+"""
+Batch scheduling tests for ContractAI.
+
+This module contains tests for sharing worker slots between batches.
+"""
+
+from app.services.batch_service import fair_dispatch_order
+
+
+def test_slots_are_shared_between_owners():
+    """
+    Test that a large batch does not starve another owner's batch.
+    """
+    candidates = [(1, 10, 1), (2, 10, 1), (3, 10, 1), (4, 20, 2), (5, 20, 2)]
+    chosen = fair_dispatch_order(candidates, {}, {}, slots=3, per_batch=10)
+    assert chosen == [1, 4, 2]
+
+
+def test_owner_with_fewest_in_flight_goes_first():
+    """
+    Test that items already in flight count against their owner and batch.
+    """
+    candidates = [(1, 10, 1), (2, 10, 1), (3, 30, 1), (4, 20, 2)]
+    owner_in_flight = {1: 0, 2: 2}
+    batch_in_flight = {10: 1}
+    chosen = fair_dispatch_order(candidates, owner_in_flight, batch_in_flight, slots=3, per_batch=2)
+    assert chosen == [1, 3, 4]
+    assert owner_in_flight == {1: 2, 2: 3}
+    assert batch_in_flight == {10: 2, 30: 1, 20: 1}
@@ -0,0 +1,265 @@
+"""
+Document API tests for ContractAI.
+
+This module contains tests for the document endpoints.
+"""
+
+import json
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import partial
+import pytest
+from app.config import get_settings
+from app.database import Document, Analysis, SessionLocal
+from app.services.storage_service import storage_service
+from app.services.progress_service import ProgressHub, publish_progress, get_last_event
+
+settings = get_settings()
+
+
+def upload(client, content, name="Services agreement"):
+    """
+    Upload a PDF document.
+    """
+    return client.post(
+        "/api/documents/",
+        data={"name": name},
+        files={"file": ("contract.pdf", content, "application/pdf")},
+    )
+
+
+def test_upload_stores_the_file_and_queues_processing(client, queued):
+    """
+    Test that an upload is stored with its content hash and queued.
+    """
+    content = b"%PDF-1.4 services agreement" * 1000
+
+    response = upload(client, content)
+
+    assert response.status_code == 201
+    document_id = response.json()["id"]
+    assert response.json()["status"] == "processing"
+    assert queued == [document_id]
+    with SessionLocal() as session:
+        document = session.get(Document, document_id)
+        assert document.content_hash == hashlib.sha256(content).hexdigest()
+        stored = storage_service.client.get_object(settings.DOCUMENT_BUCKET, document.storage_path).read()
+    assert stored == content
+    stored_event = client.portal.call(get_last_event, document_id)
+    assert (stored_event["stage"], stored_event["size"]) == ("stored", len(content))
+
+
+def test_oversized_upload_is_rejected(client, queued, monkeypatch):
+    """
+    Test that an upload over MAX_DOCUMENT_SIZE returns 413 and is not queued.
+    """
+    monkeypatch.setattr(settings, "MAX_DOCUMENT_SIZE", 1000)
+
+    response = upload(client, b"x" * 1001)
+
+    assert response.status_code == 413
+    assert queued == []
+
+
+def add_documents(owner_id, count, created_at=None, status="processed"):
+    """
+    Create documents, optionally all with the same creation time, and return their ids.
+    """
+    with SessionLocal() as session:
+        documents = [
+            Document(
+                name=f"contract {i}",
+                storage_path=f"{owner_id}/{i}.pdf",
+                status=status,
+                owner_id=owner_id,
+                created_at=created_at or datetime(2024, 5, 1, tzinfo=timezone.utc) + timedelta(hours=i),
+            )
+            for i in range(count)
+        ]
+        session.add_all(documents)
+        session.commit()
+        return [document.id for document in documents]
+
+
+def list_pages(client, limit, **params):
+    """
+    Read every page of the document list by cursor and return the pages.
+    """
+    pages = []
+    cursor = None
+    while True:
+        page_params = {**params, "limit": limit}
+        if cursor:
+            page_params["cursor"] = cursor
+        response = client.get("/api/documents/", params=page_params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_document_once(client, make_user):
+    """
+    Test that following next_cursor returns each document once, newest first.
+    """
+    same_time = datetime(2024, 6, 1, tzinfo=timezone.utc)
+    ids = add_documents(client.user.id, 4) + add_documents(client.user.id, 3, created_at=same_time)
+    add_documents(make_user("other@example.com").id, 3)
+
+    pages = list_pages(client, limit=3)
+
+    listed = [document["id"] for page in pages for document in page["documents"]]
+    # Documents created at the same time are ordered by id
+    assert listed == sorted(ids[4:], reverse=True) + ids[3::-1]
+    assert [len(page["documents"]) for page in pages] == [3, 3, 1]
+    # Only the first page, which has no cursor, is counted
+    assert [page["total"] for page in pages] == [7, None, None]
+
+
+def test_cursor_pages_are_stable_under_inserts(client):
+    """
+    Test that documents created while paging do not shift later pages.
+    """
+    ids = add_documents(client.user.id, 5)
+
+    first = client.get("/api/documents/", params={"limit": 2}).json()
+    add_documents(client.user.id, 2, created_at=datetime.now(timezone.utc))
+    second = client.get("/api/documents/", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+
+    assert [document["id"] for document in first["documents"]] == [ids[4], ids[3]]
+    assert [document["id"] for document in second["documents"]] == [ids[2], ids[1]]
+
+
+def test_cursor_mode_total_and_filters(client):
+    """
+    Test that cursor pages count documents only on request and respect the status filter.
+    """
+    add_documents(client.user.id, 4)
+    add_documents(client.user.id, 2, status="error")
+
+    first = client.get("/api/documents/", params={"limit": 2, "status": "processed"}).json()
+    assert first["total"] == 4
+    pages = list_pages(client, limit=2, status="processed", include_total=True)
+    assert sum(len(page["documents"]) for page in pages) == 4
+    assert pages[-1]["total"] == 4
+
+    response = client.get("/api/documents/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def analysed_document(client):
+    """
+    Create a processed document with a long analysis, owned by the client's user.
+    """
+    document_id = add_documents(client.user.id, 1)[0]
+    with SessionLocal() as session:
+        session.add(Analysis(
+            document_id=document_id,
+            clauses=[{"type": "Clause", "text": f"Clause {i}"} for i in range(5)],
+            risks=[{"level": "high", "description": f"Risk {i}"} for i in range(3)],
+            recommendations=[{"text": "Negotiate the notice period"}],
+            summary="A services agreement.",
+        ))
+        session.commit()
+    return document_id
+
+
+def test_analysis_lists_are_paged_with_a_total(client, analysed_document):
+    """
+    Test that offset and limit page a list field and X-Total-Count gives its length.
+    """
+    url = f"/api/analysis/documents/{analysed_document}"
+
+    clauses = client.get(f"{url}/clauses", params={"offset": 1, "limit": 2})
+    risks = client.get(f"{url}/risks", params={"limit": 2})
+    past_the_end = client.get(f"{url}/clauses", params={"offset": 10})
+
+    assert clauses.json() == [{"type": "Clause", "text": "Clause 1"}, {"type": "Clause", "text": "Clause 2"}]
+    assert clauses.headers["X-Total-Count"] == "5"
+    assert [risk["description"] for risk in risks.json()] == ["Risk 0", "Risk 1"]
+    assert risks.headers["X-Total-Count"] == "3"
+    assert past_the_end.json() == []
+    assert past_the_end.headers["X-Total-Count"] == "5"
+    assert len(client.get(f"{url}/clauses").json()) == 5
+    assert client.get(f"{url}/summary").json() == "A services agreement."
+    assert client.get(f"{url}/clauses", params={"limit": 0}).status_code == 422
+
+
+def test_document_detail_includes_only_requested_fields(client, analysed_document):
+    """
+    Test that include limits the analysis fields returned with a document.
+    """
+    url = f"/api/documents/{analysed_document}"
+
+    full = client.get(url).json()
+    partial = client.get(url, params={"include": "summary, risks"}).json()
+
+    assert set(full["analysis"]) == {"clauses", "risks", "comparisons", "recommendations", "summary"}
+    assert partial["analysis"] == {"summary": "A services agreement.", "risks": full["analysis"]["risks"]}
+    assert partial["name"] == full["name"] == "contract 0"
+    assert client.get(url, params={"include": "summary,owner"}).status_code == 400
+
+
+def test_analysis_fields_of_other_users_are_denied(client, analysed_document, make_user):
+    """
+    Test that another user's analysis fields cannot be read.
+    """
+    client.user = make_user("other@example.com")
+
+    assert client.get(f"/api/analysis/documents/{analysed_document}/clauses").status_code == 403
+    assert client.get(f"/api/documents/{analysed_document}", params={"include": "summary"}).status_code == 403
+    assert client.get("/api/analysis/documents/999999/risks").status_code == 404
+
+
+def read_events(client, document_id):
+    """
+    Read a document's progress event stream to the end.
+    """
+    response = client.get(f"/api/documents/{document_id}/events")
+    client.portal.call(ProgressHub.close)
+    if response.status_code != 200:
+        return response, []
+    events = [
+        dict(line.split(": ", 1) for line in message.splitlines())
+        for message in response.text.split("\n\n") if message.startswith("id:")
+    ]
+    return response, [(event["event"], json.loads(event["data"])) for event in events]
+
+
+def test_events_of_a_finished_document(client):
+    """
+    Test that a processed document's stream is its done event.
+    """
+    document_id = add_documents(client.user.id, 1)[0]
+
+    response, events = read_events(client, document_id)
+
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+    assert response.headers["Cache-Control"] == "no-cache"
+    assert [name for name, _ in events] == ["done"]
+    assert (events[0][1]["document_id"], events[0][1]["status"]) == (document_id, "processed")
+
+
+def test_events_of_a_document_being_processed(client):
+    """
+    Test that a processing document's stream starts from its latest event and ends after done.
+    """
+    document_id = add_documents(client.user.id, 1, status="processing")[0]
+    client.portal.call(partial(publish_progress, document_id, "done", status="processed"))
+
+    _, events = read_events(client, document_id)
+
+    assert [name for name, _ in events] == ["done"]
+    assert events[0][1]["status"] == "processed"
+
+
+def test_events_of_other_users_documents_are_denied(client, make_user):
+    """
+    Test that another user's document progress cannot be streamed.
+    """
+    document_id = add_documents(make_user("other@example.com").id, 1, status="processing")[0]
+
+    assert read_events(client, document_id)[0].status_code == 403
+    assert read_events(client, 999999)[0].status_code == 404
@@ -0,0 +1,72 @@
+"""
+Portfolio query tests for ContractAI.
+
+This module contains tests for filtering documents by analysis contents.
+"""
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.database import Base, User, Document, Analysis
+from app.services.document_service import analysis_filter_conditions
+
+
+@pytest.fixture
+def db():
+    """
+    Create an in-memory SQLite session with two analyzed documents.
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+
+    user = User(email="portfolio@example.com", hashed_password="x", full_name="Portfolio", is_active=True)
+    session.add(user)
+    session.flush()
+
+    analyses = {
+        "supply": (
+            [{"type": "Indemnification"}, {"type": "Termination"}],
+            [{"category": "Indemnification", "risk_level": "high"}, {"category": "Termination", "risk_level": "low"}],
+        ),
+        "nda": (
+            [{"type": "Confidentiality"}],
+            [{"category": "Indemnification", "risk_level": "low"}, {"category": "Confidentiality", "risk_level": "high"}],
+        ),
+    }
+    for name, (clauses, risks) in analyses.items():
+        document = Document(name=name, storage_path=name, content_type="application/pdf", owner_id=user.id)
+        session.add(document)
+        session.flush()
+        session.add(Analysis(document_id=document.id, clauses=clauses, risks=risks))
+    session.commit()
+
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def find(db, **filters):
+    """
+    Get the names of documents matching the filters.
+    """
+    conditions = analysis_filter_conditions("sqlite", **filters)
+    query = select(Document.name).join(Analysis, Analysis.document_id == Document.id).where(*conditions)
+    return sorted(db.scalars(query).all())
+
+
+def test_filter_by_clause_type(db):
+    """
+    Test that documents are selected by the types of their clauses.
+    """
+    assert find(db, clause_type="Termination") == ["supply"]
+    assert find(db, clause_type="Governing Law") == []
+
+
+def test_risk_level_and_category_match_the_same_risk(db):
+    """
+    Test that a risk level and category must hold for a single risk.
+    """
+    assert find(db, risk_level="HIGH", risk_category="Indemnification") == ["supply"]
+    assert find(db, risk_category="Indemnification") == ["nda", "supply"]
+    assert find(db, risk_level="high", risk_category="Termination") == []
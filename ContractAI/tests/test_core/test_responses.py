@@ -0,0 +1,73 @@
+"""
+JSON response tests for ContractAI.
+
+This module contains tests for the chunked JSON and NDJSON encoders.
+"""
+
+import json
+import pytest
+from datetime import datetime, timezone
+from decimal import Decimal
+from fastapi.responses import StreamingResponse
+from app.core import responses
+
+PAYLOAD = {
+    "document_id": 7,
+    "clauses": [
+        {"type": "Termination", "text": f"Clause {i}: either party may terminate — à 30 jours.", "section": i}
+        for i in range(200)
+    ],
+    "comparisons": [],
+    "summary": None,
+    "score": Decimal("0.75"),
+    "created_at": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+}
+
+EXPECTED = json.loads(json.dumps(PAYLOAD, default=responses._default))
+
+
+@pytest.fixture(params=[True, False], ids=["orjson", "stdlib"])
+def encoder(request, monkeypatch):
+    """
+    Encode with orjson, then with the standard library encoder.
+    """
+    if request.param:
+        pytest.importorskip("orjson")
+    monkeypatch.setattr(responses, "ORJSON_AVAILABLE", request.param)
+    return request.param
+
+
+def test_chunks_decode_to_the_payload(encoder):
+    """
+    Test that the joined chunks decode to the stored payload.
+    """
+    chunks = list(responses.iter_json(PAYLOAD, chunk_size=1024))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 1024 for chunk in chunks[:-1])
+    assert json.loads(b"".join(chunks)) == EXPECTED
+    assert json.loads(responses.dumps(PAYLOAD)) == EXPECTED
+
+
+def test_ndjson_has_one_item_per_line(encoder):
+    """
+    Test that NDJSON output decodes line by line to the items.
+    """
+    body = b"".join(responses.iter_ndjson(PAYLOAD["clauses"], chunk_size=1024))
+
+    lines = body.decode("utf-8").splitlines()
+    assert body.endswith(b"\n")
+    assert [json.loads(line) for line in lines] == EXPECTED["clauses"]
+
+
+def test_small_bodies_are_not_streamed(encoder):
+    """
+    Test that a body fitting in one chunk is sent with a Content-Length.
+    """
+    small = responses.json_stream_response({"summary": "short"}, headers={"ETag": 'W/"1"'})
+    large = responses.json_stream_response({"clauses": PAYLOAD["clauses"] * 10})
+
+    assert not isinstance(small, StreamingResponse)
+    assert small.headers["content-length"] == str(len(small.body))
+    assert small.headers["etag"] == 'W/"1"'
+    assert isinstance(large, StreamingResponse)
@@ -0,0 +1,73 @@
+"""
+Latency sketch tests for ContractAI.
+
+This module contains tests for the mergeable latency quantile sketch.
+"""
+
+import random
+import pytest
+from app.monitoring.latency_sketch import LatencySketch
+
+
+def exact_quantile(values, q):
+    """
+    Get the exact quantile using the same rank convention as the sketch.
+    """
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    """
+    Test that quantile estimates stay within the configured relative error.
+    """
+    rng = random.Random(42)
+    values = [rng.lognormvariate(7, 1.2) for _ in range(20000)]
+    
+    sketch = LatencySketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+    
+    for q in (0.5, 0.9, 0.99, 0.999):
+        expected = exact_quantile(values, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.02)
+
+
+def test_merged_redis_mappings_match_single_sketch():
+    """
+    Test that sketches written by separate workers merge to the same result.
+    """
+    rng = random.Random(7)
+    values = [rng.uniform(50, 5000) for _ in range(5000)]
+    
+    single = LatencySketch()
+    workers = [LatencySketch() for _ in range(4)]
+    for i, value in enumerate(values):
+        single.add(value)
+        workers[i % 4].add(value)
+    
+    merged = LatencySketch.merged(worker.to_mapping() for worker in workers)
+    
+    assert merged.count == single.count
+    assert merged.percentiles() == single.percentiles()
+
+
+def test_bucket_field_matches_add():
+    """
+    Test that the hash field used by the metrics writer matches the sketch buckets.
+    """
+    sketch = LatencySketch()
+    sketch.add(0.0)
+    sketch.add(123.4)
+    
+    mapping = sketch.to_mapping()
+    
+    assert mapping[sketch.bucket_field(0.0)] == 1
+    assert mapping[sketch.bucket_field(123.4)] == 1
+
+
+def test_empty_sketch_has_no_percentiles():
+    """
+    Test that an empty sketch reports no percentile values.
+    """
+    assert LatencySketch().quantile(0.99) is None
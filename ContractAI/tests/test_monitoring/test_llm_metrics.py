@@ -0,0 +1,222 @@
+"""
+LLM metrics tests for ContractAI.
+
+This module contains tests for the daily aggregates kept by LLMMetricsTracker.
+They need a Redis server and are skipped when none is reachable at
+TEST_REDIS_URL.
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import pytest
+
+aioredis = pytest.importorskip("aioredis")
+
+from app.monitoring.llm_metrics import LLMMetricsTracker
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+
+async def connect_redis():
+    """
+    Connect to the test Redis server, or skip the test if it is unavailable.
+    """
+    redis = aioredis.from_url(TEST_REDIS_URL)
+    try:
+        await redis.ping()
+    except Exception:
+        pytest.skip(f"Redis not available at {TEST_REDIS_URL}")
+    return redis
+
+
+def isolate_keys(tracker, prefix):
+    """
+    Move every key family a tracker writes under a test prefix.
+    """
+    tracker.metrics_key_prefix = f"{prefix}llm:metrics:"
+    tracker.daily_metrics_key = f"{prefix}llm:daily:"
+    tracker.events_key_prefix = f"{prefix}llm:events:"
+    tracker.rollup_key_prefix = f"{prefix}llm:rollup:"
+    tracker.latency_key_prefix = f"{prefix}llm:latency:"
+
+
+async def delete_keys(redis, prefix):
+    """
+    Delete every key under a test prefix.
+    """
+    keys = [key async for key in redis.scan_iter(match=f"{prefix}*")]
+    if keys:
+        await redis.delete(*keys)
+
+
+def test_concurrent_record_call_loses_no_increments():
+    """
+    Test that concurrent writers from several trackers all land in the daily aggregates.
+    """
+    calls_per_tracker = 500
+    tracker_count = 4
+
+    async def run():
+        redis = await connect_redis()
+        prefix = f"test:{uuid.uuid4().hex}:"
+
+        # One tracker per simulated worker process, all sharing the same keys
+        trackers = []
+        for _ in range(tracker_count):
+            tracker = LLMMetricsTracker(redis, batch_size=50, flush_interval=0.01)
+            isolate_keys(tracker, prefix)
+            trackers.append(tracker)
+
+        try:
+            await asyncio.gather(*(
+                tracker.record_call(
+                    model_name="gpt-4" if i % 2 else "claude-3-haiku",
+                    operation="completion",
+                    prompt_tokens=10,
+                    completion_tokens=5,
+                    latency_ms=100.0,
+                    success=i % 10 != 0,
+                    cached=i % 5 == 0
+                )
+                for tracker in trackers
+                for i in range(calls_per_tracker)
+            ))
+            for tracker in trackers:
+                await tracker.close()
+
+            daily = await trackers[0].get_daily_metrics()
+            model = await trackers[0].get_daily_model_metrics("gpt-4")
+            operation = await trackers[0].get_daily_operation_metrics("completion")
+        finally:
+            await delete_keys(redis, prefix)
+            await redis.close()
+
+        return daily, model, operation
+
+    daily, model, operation = asyncio.run(run())
+    total = calls_per_tracker * tracker_count
+
+    assert daily["total_calls"] == total
+    assert daily["successful_calls"] == total * 9 // 10
+    assert daily["failed_calls"] == total // 10
+    assert daily["cached_calls"] == total // 5
+    assert daily["total_tokens"] == total * 15
+    assert daily["total_latency_ms"] == pytest.approx(total * 100.0)
+    assert set(daily["models"]) == {"gpt-4", "claude-3-haiku"}
+    assert sum(stats["calls"] for stats in daily["models"].values()) == total
+
+    assert model["calls"] == total // 2
+    assert model["total_cost"] == pytest.approx(daily["models"]["gpt-4"]["total_cost"])
+    assert operation["calls"] == total
+    assert operation["total_tokens"] == total * 15
+
+
+def test_overall_latency_counts_each_call_once():
+    """
+    Test that a call recorded through both tracker APIs is one overall latency sample.
+    """
+    async def run():
+        redis = await connect_redis()
+        prefix = f"test:{uuid.uuid4().hex}:"
+        tracker = LLMMetricsTracker(redis, batch_size=10, flush_interval=0.01)
+        isolate_keys(tracker, prefix)
+
+        try:
+            await tracker.record_llm_call(
+                provider="openai",
+                model="gpt-4",
+                agent="risk_analysis",
+                input_tokens=10,
+                output_tokens=5,
+                latency_ms=250.0,
+                success=True,
+                cost=0.01,
+                metadata={"operation": "analyze_risks"}
+            )
+            await tracker.record_call(
+                model_name="gpt-4",
+                operation="analyze_risks",
+                prompt_tokens=10,
+                completion_tokens=5,
+                latency_ms=250.0,
+                success=True
+            )
+            await tracker.close()
+
+            return (
+                await tracker.get_latency_percentiles(),
+                await tracker.get_latency_percentiles("agent", "risk_analysis")
+            )
+        finally:
+            await delete_keys(redis, prefix)
+            await redis.close()
+
+    overall, agent = asyncio.run(run())
+
+    assert overall["count"] == 1
+    assert agent["count"] == 1
+
+
+def test_events_are_stored_once_and_paged_newest_first():
+    """
+    Test that raw events live only in the day index and are paged by Redis, newest first.
+    """
+    async def run():
+        redis = await connect_redis()
+        prefix = f"test:{uuid.uuid4().hex}:"
+        tracker = LLMMetricsTracker(redis, batch_size=10, flush_interval=0.01)
+        isolate_keys(tracker, prefix)
+
+        try:
+            start = time.time()
+            ids = []
+            for i in range(5):
+                ids.append(await tracker.record_llm_call(
+                    provider="openai",
+                    model="gpt-4",
+                    agent="risk_analysis",
+                    input_tokens=10 + i,
+                    output_tokens=5,
+                    latency_ms=250.0,
+                    success=True,
+                    cost=0.01
+                ))
+                await asyncio.sleep(0.001)
+            call_id = await tracker.record_call(
+                model_name="gpt-4",
+                operation="analyze_risks",
+                prompt_tokens=10,
+                completion_tokens=5,
+                latency_ms=250.0,
+                success=True
+            )
+            await tracker.close()
+            end = time.time() + 1
+
+            per_entry_keys = [key async for key in redis.scan_iter(match=f"{prefix}llm:metrics:{ids[0][:8]}*")]
+            return (
+                ids,
+                per_entry_keys,
+                await tracker.get_events(start, end, limit=2, offset=1),
+                await tracker.get_events(start, end, limit=2, offset=3),
+                await tracker.get_events(start, end),
+                await tracker.get_metrics_by_id(ids[1]),
+                await tracker.get_metrics_by_id(call_id, date=time.strftime("%Y-%m-%d")),
+                await tracker.get_metrics_by_id(str(uuid.uuid4()))
+            )
+        finally:
+            await delete_keys(redis, prefix)
+            await redis.close()
+
+    ids, per_entry_keys, first, second, every, entry, call, missing = asyncio.run(run())
+
+    assert per_entry_keys == []
+    assert [event["id"] for event in first] == [ids[4], ids[3]]
+    assert [event["id"] for event in second] == [ids[2], ids[1]]
+    # The record_call event is the newest
+    assert [event["id"] for event in every[1:]] == ids[::-1]
+    assert entry["input_tokens"] == 11
+    assert call["id"] == every[0]["id"]
+    assert missing is None
@@ -0,0 +1,98 @@
+"""
+Prometheus metrics tests for ContractAI.
+
+This module contains tests for the metric recording helpers.
+"""
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.monitoring import prometheus
+
+
+def sample(metric, suffix, **labels):
+    """
+    Get the current value of a metric sample, or 0 if it has none yet.
+    """
+    for family in metric.collect():
+        for item in family.samples:
+            if item.name == f"{family.name}{suffix}" and item.labels == labels:
+                return item.value
+    return 0.0
+
+
+def test_llm_calls_reuse_label_children():
+    """
+    Test that repeated LLM calls are recorded through one cached child per label set.
+    """
+    labels = {"provider": "simulated", "agent": "test_agent", "operation": "detect_clauses", "outcome": "success"}
+    calls = sample(prometheus.LLM_CALL_DURATION, "_count", **labels)
+    tokens = sample(prometheus.LLM_TOKENS, "_total", provider="simulated", agent="test_agent", direction="output")
+
+    for _ in range(3):
+        prometheus.record_llm_call("simulated", "test_agent", "detect_clauses", 0.5, True, 100, 20)
+    prometheus.record_llm_call("simulated", "test_agent", "detect_clauses", 0.5, False, 100)
+
+    assert sample(prometheus.LLM_CALL_DURATION, "_count", **labels) == calls + 3
+    assert sample(prometheus.LLM_TOKENS, "_total", provider="simulated", agent="test_agent", direction="output") == tokens + 60
+    assert ("simulated", "test_agent", "detect_clauses", "success") in prometheus._llm_call_children
+    assert ("simulated", "test_agent", "detect_clauses", "error") in prometheus._llm_call_children
+    assert ("simulated", "test_agent", "output") in prometheus._llm_token_children
+
+
+class FakePool:
+    """
+    Connection pool with fixed usage counts.
+    """
+
+    def checkedout(self):
+        return 3
+
+    def checkedin(self):
+        return 7
+
+    def overflow(self):
+        return -2
+
+    def size(self):
+        return 10
+
+
+class FakeEngine:
+    """
+    Engine whose pool is a FakePool.
+    """
+
+    pool = FakePool()
+
+
+def test_http_requests_reuse_label_children(monkeypatch):
+    """
+    Test that requests are recorded through a cached child and pool usage is only read on scrape.
+    """
+    monkeypatch.setattr(prometheus, "_db_pool_engines", [])
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        return {"id": item_id}
+
+    app.add_middleware(prometheus.PrometheusMiddleware, engine=FakeEngine())
+    labels = {"method": "GET", "route": "/items/{item_id}", "status": "200"}
+    requests = sample(prometheus.HTTP_REQUEST_DURATION, "_count", **labels)
+    pool_updates = []
+    update_db_pool_metrics = prometheus.update_db_pool_metrics
+    monkeypatch.setattr(prometheus, "update_db_pool_metrics", lambda engine: pool_updates.append(engine))
+
+    with TestClient(app) as client:
+        for item_id in range(3):
+            assert client.get(f"/items/{item_id}").status_code == 200
+
+    assert sample(prometheus.HTTP_REQUEST_DURATION, "_count", **labels) == requests + 3
+    assert ("GET", "/items/{item_id}", "200") in prometheus._http_children
+    assert pool_updates == []
+
+    monkeypatch.setattr(prometheus, "update_db_pool_metrics", update_db_pool_metrics)
+    payload, _ = prometheus.generate_metrics()
+
+    assert b'contractai_db_pool_connections{state="checked_out"} 3.0' in payload
+    assert b'contractai_db_pool_connections{state="overflow"} 0.0' in payload
@@ -0,0 +1,203 @@
+"""
+Analysis reuse tests for ContractAI.
+
+This module contains tests for reusing the analysis of identical uploads and
+the deduplication statistics.
+"""
+
+import io
+import uuid
+import hashlib
+import pytest
+from app.config import get_settings
+from app.database import Document, Analysis, SessionLocal, AsyncSessionLocal
+from app.services import document_service
+from app.services.storage_service import storage_service
+from app.services.stats_service import get_dedup_stats
+from app.monitoring.llm_metrics import record_usage
+
+settings = get_settings()
+
+CONTRACT = "MASTER SERVICES AGREEMENT\n\n2. Termination. Either party may terminate on 30 days' notice."
+OTHER_CONTRACT = "NON-DISCLOSURE AGREEMENT\n\n3. Governing Law. This Agreement is governed by Delaware law."
+
+
+class FakeOrchestrator:
+    """
+    Orchestrator that returns a fixed analysis and counts the documents it processed.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    async def process_document(self, content, progress=None):
+        self.calls += 1
+        record_usage(1000, 200, 0.05)
+        return {
+            "clauses": [{"type": "Termination", "text": content.splitlines()[-1]}],
+            "risks": [],
+            "comparisons": [],
+            "recommendations": [],
+            "summary": f"analysis {self.calls}",
+        }
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, redis):
+    """
+    Serve document processing from a FakeOrchestrator.
+    """
+    fake = FakeOrchestrator()
+
+    async def get_orchestrator():
+        return fake
+
+    monkeypatch.setattr(document_service.ServiceFactory, "get_orchestrator", get_orchestrator)
+    return fake
+
+
+@pytest.fixture
+def users(make_user):
+    """
+    Create two users uploading the same contracts.
+    """
+    return make_user("alice@example.com"), make_user("bob@example.com")
+
+
+def upload(owner, text):
+    """
+    Store an uploaded document waiting to be processed and return its id.
+    """
+    content = text.encode("utf-8")
+    with SessionLocal() as session:
+        document = Document(
+            name="contract.txt",
+            storage_path=f"{owner.id}/{uuid.uuid4().hex}.txt",
+            status="processing",
+            owner_id=owner.id,
+            content_hash=hashlib.sha256(content).hexdigest(),
+        )
+        storage_service.client.put_object(settings.DOCUMENT_BUCKET, document.storage_path, io.BytesIO(content), len(content))
+        session.add(document)
+        session.commit()
+        return document.id
+
+
+def process(run, owner, text, reuse=True):
+    """
+    Upload and process a document, and return its analysis.
+    """
+    document_id = upload(owner, text)
+    run(document_service.process_document(document_id, reuse=reuse))
+    with SessionLocal() as session:
+        analysis = session.query(Analysis).filter(Analysis.document_id == document_id).one()
+        session.expunge(analysis)
+        return analysis
+
+
+def test_owner_scope_reuses_only_the_owners_documents(users, orchestrator, run, monkeypatch):
+    """
+    Test that with owner scope, analyses are reused for the same user only.
+    """
+    monkeypatch.setattr(settings, "ANALYSIS_REUSE_SCOPE", "owner")
+    alice, bob = users
+
+    first = process(run, alice, CONTRACT)
+    copy = process(run, alice, CONTRACT)
+    copy_of_copy = process(run, alice, CONTRACT)
+    other_user = process(run, bob, CONTRACT)
+    other_content = process(run, alice, OTHER_CONTRACT)
+
+    assert orchestrator.calls == 3
+    assert first.reused_from_document_id is None
+    assert copy.reused_from_document_id == first.document_id
+    assert copy_of_copy.reused_from_document_id == first.document_id
+    assert (copy.summary, copy.clauses, copy.llm_cost) == (first.summary, first.clauses, first.llm_cost)
+    assert other_user.reused_from_document_id is None
+    assert other_content.reused_from_document_id is None
+
+
+def test_global_scope_reuses_across_users(users, orchestrator, run, monkeypatch):
+    """
+    Test that with global scope, analyses are reused for any user.
+    """
+    monkeypatch.setattr(settings, "ANALYSIS_REUSE_SCOPE", "global")
+    alice, bob = users
+
+    first = process(run, alice, CONTRACT)
+    other_user = process(run, bob, CONTRACT)
+
+    assert orchestrator.calls == 1
+    assert other_user.reused_from_document_id == first.document_id
+
+
+def test_reuse_can_be_turned_off(users, orchestrator, run, monkeypatch):
+    """
+    Test that with scope off, every document is analysed.
+    """
+    monkeypatch.setattr(settings, "ANALYSIS_REUSE_SCOPE", "off")
+    alice, _ = users
+
+    process(run, alice, CONTRACT)
+    second = process(run, alice, CONTRACT)
+
+    assert orchestrator.calls == 2
+    assert second.reused_from_document_id is None
+
+
+def test_analyses_of_another_pipeline_version_are_not_reused(users, orchestrator, run, monkeypatch):
+    """
+    Test that a pipeline version change makes identical documents be analysed again.
+    """
+    monkeypatch.setattr(settings, "ANALYSIS_REUSE_SCOPE", "owner")
+    monkeypatch.setattr(settings, "ANALYSIS_PIPELINE_VERSION", "1")
+    alice, _ = users
+
+    process(run, alice, CONTRACT)
+    monkeypatch.setattr(settings, "ANALYSIS_PIPELINE_VERSION", "2")
+    recomputed = process(run, alice, CONTRACT)
+    reused = process(run, alice, CONTRACT)
+
+    assert orchestrator.calls == 2
+    assert recomputed.reused_from_document_id is None
+    assert recomputed.pipeline_version == "2"
+    assert reused.reused_from_document_id == recomputed.document_id
+
+
+def test_reprocessing_always_recomputes(users, orchestrator, run, monkeypatch):
+    """
+    Test that processing without reuse analyses the document even if a copy exists.
+    """
+    monkeypatch.setattr(settings, "ANALYSIS_REUSE_SCOPE", "owner")
+    alice, _ = users
+
+    process(run, alice, CONTRACT)
+    reprocessed = process(run, alice, CONTRACT, reuse=False)
+
+    assert orchestrator.calls == 2
+    assert reprocessed.reused_from_document_id is None
+    assert reprocessed.summary == "analysis 2"
+
+
+def test_dedup_stats(users, orchestrator, run, monkeypatch):
+    """
+    Test that the deduplication statistics count reused analyses and avoided spend.
+    """
+    monkeypatch.setattr(settings, "ANALYSIS_REUSE_SCOPE", "owner")
+    alice, _ = users
+
+    process(run, alice, CONTRACT)
+    process(run, alice, CONTRACT)
+    process(run, alice, CONTRACT)
+    process(run, alice, OTHER_CONTRACT)
+
+    async def dedup_stats(days):
+        async with AsyncSessionLocal() as db:
+            return await get_dedup_stats(db, days=days)
+
+    stats = run(dedup_stats(None))
+    assert stats["analyses"] == {"total": 4, "computed": 2, "reused": 2, "dedup_ratio": 0.5}
+    assert stats["llm_cost"] == pytest.approx({"spent": 0.1, "avoided": 0.1})
+    assert stats["llm_tokens"] == {"spent": 2400, "avoided": 2400}
+    assert stats["uploads"] == {"total": 4, "unique": 2, "duplicate": 2}
+    assert run(dedup_stats(1))["analyses"]["total"] == 4
@@ -0,0 +1,135 @@
+"""
+Processing progress tests for ContractAI.
+
+This module contains tests for publishing progress events and streaming them
+as Server-Sent Events.
+"""
+
+import json
+import asyncio
+import pytest
+from app.services import progress_service
+from app.services.progress_service import ProgressHub, publish_progress, get_last_event, progress_event_stream
+from app.services.redis_service import RedisService
+
+
+@pytest.fixture
+def hub(redis, monkeypatch):
+    """
+    Start each test with no progress listener or subscribers.
+    """
+    monkeypatch.setattr(ProgressHub, "_listener", None)
+    monkeypatch.setattr(ProgressHub, "_subscribers", {})
+    monkeypatch.setattr(ProgressHub, "_retry_at", 0.0)
+    return ProgressHub
+
+
+def parse(message):
+    """
+    Parse a Server-Sent Events message into its event name and data.
+    """
+    fields = dict(line.split(": ", 1) for line in message.strip().splitlines())
+    return fields["event"], json.loads(fields["data"])
+
+
+async def never_disconnected():
+    """
+    Report a client that stays connected.
+    """
+    return False
+
+
+async def collect(stream):
+    """
+    Read a stream to the end.
+    """
+    return [message async for message in stream]
+
+
+def test_latest_event_is_kept(hub, run):
+    """
+    Test that the latest published event of a document can be read back.
+    """
+    async def scenario():
+        await publish_progress(1, "stored", size=1024)
+        await publish_progress(1, "queued")
+        return await get_last_event(1), await get_last_event(2)
+
+    latest, missing = run(scenario())
+
+    assert latest["document_id"] == 1
+    assert latest["stage"] == "queued"
+    assert missing is None
+
+
+def test_redis_failures_are_not_raised(hub, run, monkeypatch):
+    """
+    Test that publishing and reading progress survive Redis being down.
+    """
+    async def unavailable():
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(RedisService, "get_redis", unavailable)
+
+    async def scenario():
+        await publish_progress(1, "stored")
+        return await get_last_event(1)
+
+    assert run(scenario()) is None
+
+
+def test_stream_follows_live_events_until_done(hub, run):
+    """
+    Test that the stream starts from the stored event and ends after done.
+    """
+    async def scenario():
+        try:
+            await publish_progress(1, "queued")
+            stream = progress_event_stream(1, never_disconnected)
+            first = await stream.__anext__()
+
+            # Let the listener subscribe before publishing
+            await asyncio.sleep(0.05)
+            await publish_progress(2, "clauses", completed=1, total=2)
+            await publish_progress(1, "clauses", completed=1, total=2)
+            await publish_progress(1, "done", status="processed")
+            return [first] + await collect(stream)
+        finally:
+            await ProgressHub.close()
+
+    events = [parse(message) for message in run(scenario())]
+
+    assert [name for name, _ in events] == ["queued", "clauses", "done"]
+    assert events[1][1]["completed"] == 1
+    assert ProgressHub._subscribers == {}
+
+
+def test_finished_documents_get_a_single_event(hub, run):
+    """
+    Test that a stream with an initial event sends only that event.
+    """
+    initial = {"document_id": 1, "stage": "done", "at": 1.0, "status": "processed"}
+
+    messages = run(collect(progress_event_stream(1, never_disconnected, initial)))
+
+    assert [parse(message) for message in messages] == [("done", initial)]
+
+
+def test_idle_streams_send_keep_alives_until_the_client_leaves(hub, run, monkeypatch):
+    """
+    Test that an idle stream sends keep-alive comments and stops once the client is gone.
+    """
+    monkeypatch.setattr(progress_service, "HEARTBEAT_INTERVAL", 0.01)
+    checks = []
+
+    async def is_disconnected():
+        checks.append(True)
+        return len(checks) > 2
+
+    async def scenario():
+        try:
+            return await collect(progress_event_stream(1, is_disconnected))
+        finally:
+            await ProgressHub.close()
+
+    assert run(scenario()) == [": keep-alive\n\n", ": keep-alive\n\n"]
@@ -0,0 +1,145 @@
+"""
+Expired document cleanup tests for ContractAI.
+
+This module contains tests for deleting expired documents in batches with
+their files, search passages and analyses.
+"""
+
+import io
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from minio.deleteobjects import DeleteError
+from sqlalchemy import select, func
+from app.config import get_settings
+from app.database import Document, Analysis, SearchPassage, SessionLocal, AsyncSessionLocal
+from app.services import retention_service
+from app.services.storage_service import storage_service
+from app.services.stats_service import DOCUMENT_STATUSES, compute_counters, read_counters
+
+settings = get_settings()
+
+COUNTER_NAMES = ["documents.total", *[f"documents.status.{status}" for status in DOCUMENT_STATUSES]]
+
+
+def seed_documents(owner_id, count, status="processed", days_old=60):
+    """
+    Create documents with a stored file, an analysis and a search passage.
+    """
+    created_at = datetime.now(timezone.utc) - timedelta(days=days_old)
+    paths = []
+    with SessionLocal() as session:
+        for i in range(count):
+            path = f"{owner_id}/{uuid.uuid4().hex}.pdf"
+            storage_service.client.put_object(settings.DOCUMENT_BUCKET, path, io.BytesIO(b"contract"), 8)
+            document = Document(
+                name=f"contract {i}", storage_path=path, status=status, owner_id=owner_id, created_at=created_at
+            )
+            session.add(document)
+            session.flush()
+            session.add(Analysis(document_id=document.id, summary="summary"))
+            session.add(SearchPassage(document_id=document.id, owner_id=owner_id, kind="content", text="passage"))
+            paths.append(path)
+        session.commit()
+    return paths
+
+
+def stored(path):
+    """
+    Check whether a document file is in storage.
+    """
+    return path in storage_service.client._buckets[settings.DOCUMENT_BUCKET]
+
+
+async def table_counts():
+    """
+    Count the rows left in the tables the cleanup deletes from.
+    """
+    async with AsyncSessionLocal() as db:
+        return tuple([
+            await db.scalar(select(func.count()).select_from(model))
+            for model in (Document, Analysis, SearchPassage)
+        ])
+
+
+async def counters_match():
+    """
+    Check that the maintained document counters equal a recount.
+    """
+    async with AsyncSessionLocal() as db:
+        computed = await compute_counters(db)
+        counters = await read_counters(db, COUNTER_NAMES)
+    return counters == {name: computed[name] for name in COUNTER_NAMES}
+
+
+@pytest.fixture
+def owner(make_user, redis):
+    """
+    Create the owner of the seeded documents.
+    """
+    return make_user()
+
+
+def test_cleanup_deletes_only_expired_processed_documents(owner, run):
+    """
+    Test that expired documents are deleted in batches, with everything that belongs to them.
+    """
+    expired = seed_documents(owner.id, 25)
+    recent = seed_documents(owner.id, 3, days_old=1)
+    failed = seed_documents(owner.id, 2, status="error")
+
+    result = run(retention_service.cleanup_expired_documents(30, batch_size=10, max_rate=0))
+
+    assert result == {"deleted": 25, "failed": 0, "complete": True}
+    assert run(table_counts()) == (5, 5, 5)
+    assert not any(stored(path) for path in expired)
+    assert all(stored(path) for path in recent + failed)
+    assert run(counters_match())
+
+
+def test_cleanup_resumes_where_the_previous_run_stopped(owner, run):
+    """
+    Test that a run stopped by its document limit is continued by the next one.
+    """
+    seed_documents(owner.id, 12)
+
+    first = run(retention_service.cleanup_expired_documents(30, max_documents=5, batch_size=2, max_rate=0))
+    cursor = run(retention_service._load_cursor())
+    second = run(retention_service.cleanup_expired_documents(30, batch_size=4, max_rate=0))
+
+    assert first == {"deleted": 5, "failed": 0, "complete": False}
+    assert cursor is not None
+    assert second == {"deleted": 7, "failed": 0, "complete": True}
+    assert run(retention_service._load_cursor()) is None
+    assert run(table_counts()) == (0, 0, 0)
+    assert run(counters_match())
+
+
+def test_documents_whose_files_cannot_be_deleted_are_kept(owner, run, monkeypatch):
+    """
+    Test that a document stays until its file is removed, and is deleted by a later run.
+    """
+    paths = seed_documents(owner.id, 4)
+    stuck = paths[1]
+    remove_objects = storage_service.client.remove_objects
+
+    def failing_remove_objects(bucket_name, delete_object_list, **kwargs):
+        objects = list(delete_object_list)
+        yield from remove_objects(bucket_name, (obj for obj in objects if obj._name != stuck))
+        for obj in objects:
+            if obj._name == stuck:
+                yield DeleteError("InternalError", "We encountered an internal error", obj._name, None)
+
+    monkeypatch.setattr(storage_service.client, "remove_objects", failing_remove_objects)
+    first = run(retention_service.cleanup_expired_documents(30, batch_size=10, max_rate=0))
+    assert first == {"deleted": 3, "failed": 1, "complete": True}
+    assert stored(stuck)
+    assert run(table_counts()) == (1, 1, 1)
+    assert run(counters_match())
+
+    monkeypatch.setattr(storage_service.client, "remove_objects", remove_objects)
+    second = run(retention_service.cleanup_expired_documents(30, batch_size=10, max_rate=0))
+    assert second == {"deleted": 1, "failed": 0, "complete": True}
+    assert not stored(stuck)
+    assert run(table_counts()) == (0, 0, 0)
+    assert run(counters_match())
@@ -0,0 +1,109 @@
+"""
+Search tests for ContractAI.
+
+This module contains tests for splitting documents into passages and for
+substring search on databases without full-text search.
+"""
+
+import pytest
+from app.database import Document, AsyncSessionLocal
+from app.services.search_service import split_passages, index_document, search_passages
+
+CONTRACT = """MASTER SERVICES AGREEMENT
+
+1. Fees. The Customer pays 100% of the fees within 30 days.
+
+2. Termination. Either party may terminate on 30 days' notice.
+
+3. Notices. Notices go to legal_team@example.com."""
+
+CLAUSES = [
+    {"type": "Payment", "text": "The Customer pays 100% of the fees within 30 days.", "section": 1},
+    {"type": "Termination", "text": "Either party may terminate on 30 days' notice.", "section": 2},
+]
+
+
+def test_short_paragraphs_are_merged():
+    """
+    Test that paragraphs are merged into passages up to the maximum length.
+    """
+    passages = split_passages("First.\n\nSecond.\n  \nThird paragraph.", max_length=20)
+
+    assert passages == ["First.\n\nSecond.", "Third paragraph."]
+
+
+def test_long_paragraphs_are_cut():
+    """
+    Test that a paragraph longer than the maximum is cut into pieces.
+    """
+    passages = split_passages("Intro.\n\n" + "x" * 25, max_length=10)
+
+    assert passages == ["Intro.", "x" * 10, "x" * 10, "x" * 5]
+    assert split_passages("\n\n  \n") == []
+
+
+@pytest.fixture
+def owners(make_user, run):
+    """
+    Create two users, each with the same indexed contract.
+    """
+    users = [make_user("alice@example.com"), make_user("bob@example.com")]
+
+    async def index():
+        async with AsyncSessionLocal() as db:
+            for user in users:
+                document = Document(name=f"{user.full_name} MSA", storage_path="msa.txt", owner_id=user.id)
+                db.add(document)
+                await db.flush()
+                await index_document(db, document, CONTRACT, CLAUSES)
+            await db.commit()
+
+    run(index())
+    return users
+
+
+def search(run, owner, query, **filters):
+    """
+    Search a user's passages.
+    """
+    async def run_search():
+        async with AsyncSessionLocal() as db:
+            return await search_passages(db, owner.id, query, **filters)
+
+    return run(run_search())
+
+
+def test_every_term_must_match(owners, run):
+    """
+    Test that passages containing every term, in any case, are found.
+    """
+    results = search(run, owners[0], "TERMINATE notice")
+
+    assert [(result["kind"], result["clause_type"]) for result in results] == [
+        ("clause", "Termination"), ("content", None)
+    ]
+    assert results[0]["document_name"] == "alice MSA"
+    assert results[0]["section"] == "2"
+    assert "terminate" in results[0]["snippet"]
+    assert search(run, owners[0], "terminate", kind="clause", clause_type="Payment") == []
+
+
+def test_wildcards_match_literally(owners, run):
+    """
+    Test that % and _ in a query are not treated as LIKE wildcards.
+    """
+    assert [result["clause_type"] for result in search(run, owners[0], "100%", kind="clause")] == ["Payment"]
+    assert search(run, owners[0], "%") != []
+    assert search(run, owners[0], "30%") == []
+    assert len(search(run, owners[0], "legal_team")) == 1
+    assert search(run, owners[0], "legal_") != []
+    assert search(run, owners[0], "l_gal") == []
+
+
+def test_only_the_owners_passages_are_searched(owners, run):
+    """
+    Test that a user only finds passages of their own documents.
+    """
+    results = search(run, owners[1], "termination")
+
+    assert results and all(result["document_name"] == "bob MSA" for result in results)
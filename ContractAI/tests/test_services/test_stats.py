@@ -0,0 +1,167 @@
+"""
+Stat counter tests for ContractAI.
+
+This module contains tests for the counters maintained on flush and their
+reconciliation with the source tables.
+"""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete
+from app.database import Document, User, StatCounter, SessionLocal, AsyncSessionLocal
+from app.services.stats_service import compute_counters, read_counters, record_deleted_documents, reconcile_counters
+
+
+async def counters_and_recount():
+    """
+    Read every maintained counter together with its recomputed value.
+    """
+    async with AsyncSessionLocal() as db:
+        computed = await compute_counters(db)
+        # The documents-per-user histogram is only written by reconciliation
+        names = [name for name in computed if not name.startswith("users.by_document_count.")]
+        counters = await read_counters(db, names)
+    return counters, {name: computed[name] for name in names}
+
+
+def assert_counters_match(run):
+    """
+    Check that the maintained counters equal a recount.
+    """
+    counters, computed = run(counters_and_recount())
+    assert counters == computed
+
+
+def add_documents(owner_id, *statuses):
+    """
+    Create documents with the given statuses and return their ids.
+    """
+    with SessionLocal() as session:
+        documents = [
+            Document(name=f"contract {i}", storage_path=f"{owner_id}/{i}.pdf", status=status, owner_id=owner_id)
+            for i, status in enumerate(statuses)
+        ]
+        session.add_all(documents)
+        session.commit()
+        return [document.id for document in documents]
+
+
+@pytest.fixture
+def owner(make_user):
+    """
+    Create the owner of the test documents.
+    """
+    return make_user()
+
+
+def test_inserts_and_deletes_update_counters(owner, run):
+    """
+    Test that created and deleted documents and created users are counted.
+    """
+    ids = add_documents(owner.id, "uploaded", "processed", "processed")
+    assert_counters_match(run)
+
+    with SessionLocal() as session:
+        session.delete(session.get(Document, ids[1]))
+        session.add(User(email="admin@example.com", hashed_password="x", is_superuser=True))
+        session.commit()
+    assert_counters_match(run)
+
+
+def test_status_and_flag_changes_move_counts(owner, run):
+    """
+    Test that status and user flag changes move counts between counters.
+    """
+    ids = add_documents(owner.id, "uploaded", "uploaded")
+
+    with SessionLocal() as session:
+        document = session.get(Document, ids[0])
+        document.status = "processing"
+        session.flush()
+        document.status = "processed"
+        session.get(User, owner.id).is_active = False
+        session.commit()
+
+    counters, computed = run(counters_and_recount())
+    assert counters == computed
+    assert counters["documents.status.processed"] == 1
+    assert counters["users.active"] == 0
+
+
+def test_changes_to_expired_attributes_read_the_stored_value(owner, run):
+    """
+    Test that a change to an attribute whose old value was expired is counted.
+    """
+    ids = add_documents(owner.id, "processing")
+
+    with SessionLocal() as session:
+        document = session.get(Document, ids[0])
+        user = session.get(User, owner.id)
+        session.expire(document, ["status"])
+        session.expire(user, ["is_active"])
+        document.status = "error"
+        user.is_active = False
+        session.commit()
+
+    counters, computed = run(counters_and_recount())
+    assert counters == computed
+    assert counters["documents.status.processing"] == 0
+    assert counters["documents.status.error"] == 1
+
+
+def test_rolled_back_changes_are_not_counted(owner, run):
+    """
+    Test that counters written by a flush roll back with it.
+    """
+    add_documents(owner.id, "uploaded")
+
+    with SessionLocal() as session:
+        session.add(Document(name="draft", storage_path="draft.pdf", owner_id=owner.id))
+        session.flush()
+        session.rollback()
+
+    assert_counters_match(run)
+
+
+def test_bulk_deletes_are_recorded(owner, run):
+    """
+    Test that documents removed with a bulk DELETE are subtracted from the counters.
+    """
+    created_at = datetime.now(timezone.utc) - timedelta(days=2)
+    with SessionLocal() as session:
+        session.add_all([
+            Document(name=f"contract {i}", storage_path=f"{i}.pdf", status="processed",
+                     owner_id=owner.id, created_at=created_at)
+            for i in range(3)
+        ])
+        session.commit()
+
+    async def bulk_delete():
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Document))
+            await record_deleted_documents(db, "processed", [created_at] * 3)
+            await db.commit()
+
+    run(bulk_delete())
+    counters, computed = run(counters_and_recount())
+    assert counters == computed
+    assert counters["documents.total"] == 0
+
+
+def test_reconciliation_replaces_drifted_counters(owner, run):
+    """
+    Test that reconciliation rewrites counters from the source tables.
+    """
+    add_documents(owner.id, "processed", "processed")
+    with SessionLocal() as session:
+        session.query(StatCounter).filter(StatCounter.name == "documents.total").update({"value": 40})
+        session.commit()
+
+    async def reconcile():
+        async with AsyncSessionLocal() as db:
+            return await reconcile_counters(db)
+
+    written = run(reconcile())
+    assert written["documents.total"] == 2
+    assert written["users.by_document_count.1-5"] == 1
+    assert_counters_match(run)
@@ -0,0 +1,70 @@
+"""
+Document storage tests for ContractAI.
+
+This module contains tests for streaming uploads to object storage.
+"""
+
+import io
+import hashlib
+import pytest
+from starlette.datastructures import UploadFile
+from app.config import get_settings
+from app.core.errors import DocumentTooLargeError
+from app.services.storage_service import HashingReader, storage_service
+
+settings = get_settings()
+
+
+def test_hashing_reader_hashes_and_counts_what_is_read():
+    """
+    Test that the reader's hash and size cover every byte read through it.
+    """
+    content = b"contract text " * 1000
+    reader = HashingReader(io.BytesIO(content), max_size=len(content))
+
+    chunks = [reader.read(4096) for _ in range(4)]
+
+    assert b"".join(chunks) == content
+    assert reader.read() == b""
+    assert reader.size == len(content)
+    assert reader.hexdigest() == hashlib.sha256(content).hexdigest()
+
+
+def test_hashing_reader_stops_at_the_size_limit():
+    """
+    Test that reading past the size limit raises before the rest is read.
+    """
+    source = io.BytesIO(b"x" * 100)
+    reader = HashingReader(source, max_size=10)
+
+    assert reader.read(8) == b"x" * 8
+    with pytest.raises(DocumentTooLargeError):
+        reader.read(8)
+    assert source.tell() == 16
+
+
+def test_store_document_returns_the_content_hash_and_size(run):
+    """
+    Test that a stored upload is complete and its hash and size are returned.
+    """
+    content = b"%PDF-1.4 contract" * 100
+    upload = UploadFile(io.BytesIO(content), filename="contract.pdf")
+    upload.file.read(5)
+
+    content_hash, size = run(storage_service.store_document(upload, "1/contract.pdf"))
+
+    assert content_hash == hashlib.sha256(content).hexdigest()
+    assert size == len(content)
+    assert storage_service.client.get_object(settings.DOCUMENT_BUCKET, "1/contract.pdf").read() == content
+
+
+def test_store_document_rejects_oversized_uploads(run, monkeypatch):
+    """
+    Test that an upload over MAX_DOCUMENT_SIZE is rejected and not stored.
+    """
+    monkeypatch.setattr(settings, "MAX_DOCUMENT_SIZE", 1000)
+    upload = UploadFile(io.BytesIO(b"x" * 1001), filename="contract.pdf")
+
+    with pytest.raises(DocumentTooLargeError):
+        run(storage_service.store_document(upload, "1/too-large.pdf"))
+    assert "1/too-large.pdf" not in storage_service.client._buckets[settings.DOCUMENT_BUCKET]